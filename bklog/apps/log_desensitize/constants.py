@@ -40,6 +40,12 @@ class DesensitizeOperator(ChoicesEnum):
 
 MODEL_TO_DICT_EXCLUDE_FIELD = ["id", "created_at", "created_by", "updated_at", "updated_by"]
 
+# 已编译脱敏规则集的缓存数量
+DESENSITIZE_RULE_SET_CACHE_SIZE = 256
+
+# 参与脱敏规则集编译的配置项
+DESENSITIZE_RULE_CONFIG_KEYS = ["field_name", "rule_id", "operator", "params", "match_pattern", "sort_index"]
+
 
 class ScenarioEnum(ChoicesEnum):
     LOG_CUSTOM = "log_custom"
@@ -20,7 +20,9 @@ We undertake not to change the open source license (MIT license) applicable to t
 the project delivered to anyone in the future.
 """
 import copy
+import json
 import re
+from functools import lru_cache
 from typing import List
 
 from django.db.models import Q
@@ -28,7 +30,12 @@ from django.utils.translation import gettext_lazy as _
 
 from apps.exceptions import ValidationError
 from apps.log_databus.models import CollectorConfig
-from apps.log_desensitize.constants import DesensitizeRuleTypeEnum, ScenarioEnum
+from apps.log_desensitize.constants import (
+    DESENSITIZE_RULE_CONFIG_KEYS,
+    DESENSITIZE_RULE_SET_CACHE_SIZE,
+    DesensitizeRuleTypeEnum,
+    ScenarioEnum,
+)
 from apps.log_desensitize.exceptions import (
     DesensitizeRegexDebugNoMatchException,
     DesensitizeRuleNameExistException,
@@ -37,7 +44,7 @@ from apps.log_desensitize.exceptions import (
 )
 from apps.log_desensitize.handlers.desensitize_operator import OPERATOR_MAPPING
 from apps.log_desensitize.models import DesensitizeFieldConfig, DesensitizeRule
-from apps.log_desensitize.utils import expand_nested_data
+from apps.log_desensitize.utils import compile_prefilter_regex, expand_nested_data
 from apps.log_search.constants import CollectorScenarioEnum
 from apps.log_search.models import LogIndexSet, Scenario
 from apps.models import model_to_dict
@@ -47,73 +54,35 @@ class DesensitizeHandler(object):
     """
     日志脱敏工厂
     接收配置规则的列表, 进行规则匹配, 并调用相关的脱敏算子进行处理, 规则列表以流水线的方式处理
+    相同配置编译后的规则集会被缓存复用, 每组规则额外编译一个合并的预筛选正则, 文本扫描一次即可跳过未命中的内容
     """
 
     def __init__(self, desensitize_config_info):
-        # 构建字段绑定的规则mapping
-        self.field_rule_mapping = dict()
-        self.rules = list()
-
         rule_ids = [_info["rule_id"] for _info in desensitize_config_info if _info.get("rule_id")]
 
         # 过滤出当前脱敏配置的关联规则中启用的规则 包含已删除的规则
         effective_rule_objs = DesensitizeRule.origin_objects.filter(id__in=rule_ids, is_active=True)
-        effective_rule_mapping = {_obj.id: model_to_dict(_obj) for _obj in effective_rule_objs}
-
-        for _config in desensitize_config_info:
-            # 如果绑定了脱敏规则  判断绑定的规则当前是否启用
-            rule_id = _config.get("rule_id")
-
-            if rule_id and rule_id not in effective_rule_mapping:
-                continue
-
-            field_name = _config.get("field_name")
-
-            if rule_id and field_name:
-                match_fields = effective_rule_mapping[rule_id]["match_fields"]
-                if match_fields and field_name not in match_fields:
-                    continue
-
-            operator = _config["operator"]
-
-            if not operator:
-                continue
-
-            # 生成配置对应的算子实例
-            if operator not in OPERATOR_MAPPING:
-                raise ValidationError(_("{} 算子能力尚未实现").format(operator))
-
-            operator_cls = OPERATOR_MAPPING[operator]
+        effective_rule_mapping = {_obj.id: _obj.match_fields for _obj in effective_rule_objs}
 
-            # 实例化算子
-            _config["operator_obj"] = operator_cls() if not _config["params"] else operator_cls(**_config["params"])
-
-            # 编译正则表达式
-            try:
-                _config["__regex__"] = (
-                    None if not _config.get("match_pattern") else re.compile(_config["match_pattern"])
-                )
-            except re.error:
-                raise DesensitizeRuleRegexCompileException(
-                    DesensitizeRuleRegexCompileException.MESSAGE.format(
-                        rule_id=rule_id, pattern=_config["match_pattern"]
-                    )
-                )
-
-            if field_name and field_name not in self.field_rule_mapping:
-                self.field_rule_mapping[field_name] = list()
-            if field_name:
-                self.field_rule_mapping[field_name].append(_config)
-            else:
-                self.rules.append(_config)
-
-        if self.field_rule_mapping:
-            # 对字段绑定的规则按照优先级排序 sort_index 越小的优先级越高
-            for _field_name, _config in self.field_rule_mapping.items():
-                self.field_rule_mapping[_field_name] = sorted(_config, key=lambda x: x["sort_index"])
+        # 配置内容及关联规则的匹配字段即规则集版本, 版本不变时复用已编译的规则集
+        version = json.dumps(
+            {
+                "configs": [
+                    {_key: _info.get(_key) for _key in DESENSITIZE_RULE_CONFIG_KEYS}
+                    for _info in desensitize_config_info
+                ],
+                "effective_rules": effective_rule_mapping,
+            },
+            default=str,
+        )
+        rule_set = compile_desensitize_rule_set(version)
 
-        if self.rules:
-            self.rules = sorted(self.rules, key=lambda x: x["sort_index"])
+        # 字段绑定的规则mapping
+        self.field_rule_mapping = rule_set["field_rule_mapping"]
+        self.field_prefilter_mapping = rule_set["field_prefilter_mapping"]
+        # 未绑定字段的规则
+        self.rules = rule_set["rules"]
+        self.prefilter = rule_set["prefilter"]
 
     def transform_text(self, text: str, is_highlight: bool = False):
         """
@@ -124,13 +93,14 @@ class DesensitizeHandler(object):
         if not self.rules or not text:
             return text
 
-        text = self.transform(log=str(text), rules=self.rules, is_highlight=is_highlight)
+        text = self.transform(log=str(text), rules=self.rules, is_highlight=is_highlight, prefilter=self.prefilter)
 
         return text
 
-    def transform_dict(self, log_content: dict = None):
+    def transform_dict(self, log_content: dict = None, cache: dict = None):
         """
         params: log_content 需要处理的文本内容
+        params: cache 脱敏结果缓存 {(字段名, 原文): 脱敏结果}, 批量处理时同一字段的相同内容只处理一次
         处理字典类型 单条log内容的格式 {"field_a": 12345, "field_b": "abc"}
         根据脱敏配置列表 desensitize_config_list 以流水线方式处理 log 字段的内容
         """
@@ -140,11 +110,29 @@ class DesensitizeHandler(object):
         for _field, _rules in self.field_rule_mapping.items():
             if _field not in log_content or not _rules:
                 continue
-            text = log_content[_field]
-            log_content[_field] = self.transform(log=str(text), rules=_rules)
+            text = str(log_content[_field])
+            if cache is None:
+                log_content[_field] = self.transform(
+                    log=text, rules=_rules, prefilter=self.field_prefilter_mapping.get(_field)
+                )
+                continue
+
+            cache_key = (_field, text)
+            if cache_key not in cache:
+                cache[cache_key] = self.transform(
+                    log=text, rules=_rules, prefilter=self.field_prefilter_mapping.get(_field)
+                )
+            log_content[_field] = cache[cache_key]
 
         return log_content
 
+    def transform_dicts(self, log_content_list: list[dict]):
+        """
+        批量处理一页日志, 同一字段的相同内容只处理一次
+        """
+        cache = dict()
+        return [self.transform_dict(log_content, cache=cache) for log_content in log_content_list]
+
     @staticmethod
     def _match_transform(rule: dict, text: str = "", context: dict = None, is_highlight: bool = False):
         """
@@ -214,7 +202,11 @@ class DesensitizeHandler(object):
 
         return result
 
-    def transform(self, log: str, rules: list, is_highlight: bool = False):
+    def transform(self, log: str, rules: list, is_highlight: bool = False, prefilter: re.Pattern = None):
+        # 预筛选正则未命中时, 所有规则均不会命中
+        if prefilter and not prefilter.search(log):
+            return log
+
         substrings = []
         for rule in rules:
             rule_substrings = self.find_substrings_by_rule(log, rule)
@@ -240,6 +232,76 @@ class DesensitizeHandler(object):
         return "".join(outputs)
 
 
+@lru_cache(maxsize=DESENSITIZE_RULE_SET_CACHE_SIZE)
+def compile_desensitize_rule_set(version: str) -> dict:
+    """
+    编译脱敏规则集
+    params: version 规则集版本, 即脱敏配置及启用规则匹配字段的序列化内容
+    """
+    version_info = json.loads(version)
+    effective_rule_mapping = {int(_id): _fields for _id, _fields in version_info["effective_rules"].items()}
+
+    field_rule_mapping = dict()
+    rules = list()
+
+    for _config in version_info["configs"]:
+        # 如果绑定了脱敏规则  判断绑定的规则当前是否启用
+        rule_id = _config.get("rule_id")
+
+        if rule_id and rule_id not in effective_rule_mapping:
+            continue
+
+        field_name = _config.get("field_name")
+
+        if rule_id and field_name:
+            match_fields = effective_rule_mapping[rule_id]
+            if match_fields and field_name not in match_fields:
+                continue
+
+        operator = _config["operator"]
+
+        if not operator:
+            continue
+
+        # 生成配置对应的算子实例
+        if operator not in OPERATOR_MAPPING:
+            raise ValidationError(_("{} 算子能力尚未实现").format(operator))
+
+        operator_cls = OPERATOR_MAPPING[operator]
+
+        # 实例化算子
+        _config["operator_obj"] = operator_cls() if not _config["params"] else operator_cls(**_config["params"])
+
+        # 编译正则表达式
+        try:
+            _config["__regex__"] = None if not _config.get("match_pattern") else re.compile(_config["match_pattern"])
+        except re.error:
+            raise DesensitizeRuleRegexCompileException(
+                DesensitizeRuleRegexCompileException.MESSAGE.format(rule_id=rule_id, pattern=_config["match_pattern"])
+            )
+
+        if field_name:
+            field_rule_mapping.setdefault(field_name, list()).append(_config)
+        else:
+            rules.append(_config)
+
+    # 对字段绑定的规则按照优先级排序 sort_index 越小的优先级越高
+    for _field_name, _config in field_rule_mapping.items():
+        field_rule_mapping[_field_name] = sorted(_config, key=lambda x: x["sort_index"])
+
+    rules = sorted(rules, key=lambda x: x["sort_index"])
+
+    return {
+        "field_rule_mapping": field_rule_mapping,
+        "field_prefilter_mapping": {
+            _field_name: compile_prefilter_regex([_config.get("match_pattern") for _config in _rules])
+            for _field_name, _rules in field_rule_mapping.items()
+        },
+        "rules": rules,
+        "prefilter": compile_prefilter_regex([_config.get("match_pattern") for _config in rules]),
+    }
+
+
 class DesensitizeRuleHandler(object):
     """
     脱敏规则
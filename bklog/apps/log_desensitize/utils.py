@@ -19,8 +19,17 @@ SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 We undertake not to change the open source license (MIT license) applicable to the current version of
 the project delivered to anyone in the future.
 """
+import re
+
 from apps.log_desensitize.exceptions import DesensitizeDataErrorException
 
+# 按编号引用分组的语法, 合并后编号会发生偏移
+NUMBERED_GROUP_REFERENCE_REGEX = re.compile(r"\\[1-9]|\(\?\(\d")
+# 表达式开头的全局标志
+GLOBAL_FLAGS_REGEX = re.compile(r"^\(\?([aiLmsux]+)\)")
+# 命名分组、命名引用及命名条件
+NAMED_GROUP_REGEX = re.compile(r"\(\?P<(\w+)>|\(\?P=(\w+)\)|\(\?\((?!\d)(\w+)\)")
+
 
 def expand_nested_data(data: dict):
     """
@@ -61,3 +70,39 @@ def merge_nested_data(data: dict):
         return merged_data
     except Exception as e:
         raise DesensitizeDataErrorException(DesensitizeDataErrorException.MESSAGE.format(e=e))
+
+
+def compile_prefilter_regex(patterns: list[str]) -> re.Pattern | None:
+    """
+    将多个正则合并为一个预筛选正则 (p1)|(p2)|...
+    文本只需扫描一次, 未命中预筛选正则的文本必然不会命中其中任意一个正则
+    无法安全合并时返回 None, 由调用方逐个正则处理
+    """
+    alternatives = []
+    for index, pattern in enumerate(patterns):
+        if not pattern or NUMBERED_GROUP_REFERENCE_REGEX.search(pattern):
+            return None
+
+        # 全局标志只能出现在整个表达式的开头, 转换为作用域标志
+        flags_match = GLOBAL_FLAGS_REGEX.match(pattern)
+        if flags_match:
+            pattern = f"(?{flags_match.group(1)}:{pattern[flags_match.end() :]})"
+
+        # 不同正则的分组可能重名, 分组名称加上序号前缀
+        def _rename(match, _prefix=f"_{index}_"):
+            group, reference, condition = match.groups()
+            if group:
+                return f"(?P<{_prefix}{group}>"
+            if reference:
+                return f"(?P={_prefix}{reference})"
+            return f"(?({_prefix}{condition})"
+
+        alternatives.append(f"(?:{NAMED_GROUP_REGEX.sub(_rename, pattern)})")
+
+    if not alternatives:
+        return None
+
+    try:
+        return re.compile("|".join(alternatives))
+    except re.error:
+        return None
@@ -163,6 +163,10 @@ ASYNC_EXPORT_EMAIL_ERR_TEMPLATE_PATH_EN = "templates/email_template/email_templa
 ASYNC_EXPORT_FILE_EXPIRED_DAYS = 2
 # 异步导出链接expired时间 24*60*60
 ASYNC_EXPORT_EXPIRED = 86400
+# 异步导出流式写入时，在内存中缓存的最大字节数，超出后落盘
+ASYNC_EXPORT_SPOOL_MAX_SIZE = 64 * 1024 * 1024
+# 异步导出流式写入时，各检索来源与写入方之间缓冲的最大页数
+ASYNC_EXPORT_STREAM_QUEUE_SIZE = 8
 HAVE_DATA_ID = "have_data_id"
 BKDATA_OPEN = "bkdata"
 NOT_CUSTOM = "not_custom"
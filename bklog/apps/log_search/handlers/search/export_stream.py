@@ -0,0 +1,259 @@
+"""
+Tencent is pleased to support the open source community by making BK-LOG 蓝鲸日志平台 available.
+Copyright (C) 2021 THL A29 Limited, a Tencent company.  All rights reserved.
+BK-LOG 蓝鲸日志平台 is licensed under the MIT License.
+License for BK-LOG 蓝鲸日志平台:
+--------------------------------------------------------------------
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+The above copyright notice and this permission notice shall be included in all copies or substantial
+portions of the Software.
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT
+LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN
+NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+We undertake not to change the open source license (MIT license) applicable to the current version of
+the project delivered to anyone in the future.
+"""
+
+"""
+异步导出流式写入
+
+各检索来源(存储集群/索引集)并发翻页，每页序列化为导出行后经有界队列汇入同一个归档文件:
+- 不再为每个来源单独落盘，也不再回读汇总文件，导出内容只写入一次缓冲区后直接打包
+- 缓冲区优先使用内存，超过 ASYNC_EXPORT_SPOOL_MAX_SIZE 后才落盘
+- 无需脱敏及字段裁剪的日志直接序列化 _source，跳过逐条的字典重建
+"""
+
+import os
+import queue
+import tarfile
+import tempfile
+import threading
+import time
+
+import ujson
+
+from apps.log_search import metrics
+from apps.log_search.constants import (
+    ASYNC_DIR,
+    ASYNC_EXPORT_SPOOL_MAX_SIZE,
+    ASYNC_EXPORT_STREAM_QUEUE_SIZE,
+)
+from apps.log_search.exceptions import PreCheckAsyncExportException
+from apps.log_search.models import Scenario
+from apps.utils.log import logger
+from apps.utils.thread import MultiExecuteFunc
+
+# 导出时追加到日志末尾的字段
+EXPORT_APPEND_FIELDS = {"__index_set_id__", "index", "__id__"}
+
+
+class ExportLineSerializer:
+    """
+    检索结果序列化为导出行，与 SearchHandler._deal_query_result 的 origin_log_list 逐行一致
+    """
+
+    def __init__(self, search_handler):
+        self.search_handler = search_handler
+        if search_handler.export_fields:
+            # 将导出字段和检索日志有的字段取交集，整个导出过程只需计算一次
+            support_fields_list = [i["field_name"] for i in search_handler.fields()["fields"]]
+            search_handler.export_fields = list(set(search_handler.export_fields).intersection(support_fields_list))
+
+        # 无需脱敏及字段裁剪时，日志可以直接序列化
+        self.passthrough = not search_handler.export_fields and not search_handler.need_desensitize
+        self.with_cmdb_fields = bool(search_handler.search_dict.get("bk_biz_id"))
+        self.with_doc_id = bool(search_handler.search_dict.get("is_return_doc_id"))
+        self.index_set_id_json = ujson.dumps(search_handler.index_set_id, ensure_ascii=False)
+
+    @classmethod
+    def has_dotted_key(cls, value) -> bool:
+        if isinstance(value, dict):
+            return any("." in key or cls.has_dotted_key(item) for key, item in value.items())
+        if isinstance(value, list):
+            return any(isinstance(item, dict) and cls.has_dotted_key(item) for item in value)
+        return False
+
+    def is_plain(self, source: dict) -> bool:
+        """
+        日志是否可以直接序列化: 无需展开带点的字段，也不会补充主机信息
+        """
+        if not source or not EXPORT_APPEND_FIELDS.isdisjoint(source):
+            return False
+        if self.with_cmdb_fields and (source.get("bk_host_id") or source.get("serverIp", source.get("ip"))):
+            return False
+        return not self.has_dotted_key(source)
+
+    def dumps_hit(self, hit: dict, desensitize_caches: tuple | None = None) -> tuple[str, bool]:
+        """
+        :return: (导出行, 是否直接序列化)
+        """
+        source = hit["_source"]
+        if self.passthrough and self.is_plain(source):
+            body = ujson.dumps(source, ensure_ascii=False)
+            index_json = ujson.dumps(hit["_index"], ensure_ascii=False)
+            suffix = f',"__index_set_id__":{self.index_set_id_json},"index":{index_json}'
+            if self.with_doc_id:
+                suffix += f',"__id__":{ujson.dumps(hit["_id"], ensure_ascii=False)}'
+            return f"{body[:-1]}{suffix}}}\n", True
+
+        _, origin_log = self.search_handler._deal_hit(hit, desensitize_caches=desensitize_caches)
+        return f"{ujson.dumps(origin_log, ensure_ascii=False)}\n", False
+
+    def dumps(self, result: dict) -> tuple[bytes, int, int]:
+        """
+        序列化一页检索结果
+        :return: (导出内容, 行数, 直接序列化的行数)
+        """
+        # 与 _deal_query_result 保持一致，没有命中总数的结果视为空
+        if not result.get("hits", {}).get("total"):
+            return b"", 0, 0
+
+        lines = []
+        passthrough_count = 0
+        desensitize_caches = self.search_handler.new_desensitize_caches()
+        for hit in result["hits"]["hits"]:
+            line, passthrough = self.dumps_hit(hit, desensitize_caches=desensitize_caches)
+            lines.append(line)
+            passthrough_count += passthrough
+        return "".join(lines).encode("utf-8"), len(lines), passthrough_count
+
+
+class ExportStream:
+    """
+    多来源导出流，所有来源的导出行写入同一个 tar.gz 归档成员
+    """
+
+    # 队列结束标记
+    _DONE = object()
+
+    def __init__(self, arcname: str, tar_file_path: str, index_set_id=""):
+        """
+        @param arcname: 归档中的文件名
+        @param tar_file_path: 归档文件路径
+        @param index_set_id: 指标上报使用的索引集ID
+        """
+        self.arcname = arcname
+        self.tar_file_path = tar_file_path
+        self.index_set_id = str(index_set_id)
+        self.sources = []
+        self.pages = queue.Queue(maxsize=ASYNC_EXPORT_STREAM_QUEUE_SIZE)
+        self.aborted = threading.Event()
+        self.line_count = 0
+        self.byte_count = 0
+
+    def add_source(self, source_key, search_handler, sorted_fields: list):
+        self.sources.append((source_key, search_handler, sorted_fields))
+
+    @classmethod
+    def iter_pages(cls, search_handler, sorted_fields: list):
+        """
+        单个来源的原始翻页结果
+        """
+        max_result_window = search_handler.index_set.result_window
+        result = search_handler.pre_get_result(sorted_fields=sorted_fields, size=max_result_window)
+        # 判断是否成功
+        if result["_shards"]["total"] != result["_shards"]["successful"]:
+            logger.error("can not create async_export task, reason: {}".format(result["_shards"]["failures"]))
+            raise PreCheckAsyncExportException()
+        yield result
+        if search_handler.scenario_id == Scenario.ES:
+            yield from search_handler.iter_scroll_result(result)
+        else:
+            yield from search_handler.iter_search_after_result(result, sorted_fields)
+
+    def _produce(self, search_handler, sorted_fields: list):
+        serializer = ExportLineSerializer(search_handler)
+        index_set_id = str(search_handler.index_set_id)
+        for result in self.iter_pages(search_handler, sorted_fields):
+            if self.aborted.is_set():
+                return
+            content, line_count, passthrough_count = serializer.dumps(result)
+            if not content:
+                continue
+            self.pages.put(content)
+            metrics.ASYNC_EXPORT_LINES_COUNT.labels(index_set_id=index_set_id, mode="passthrough").inc(
+                passthrough_count
+            )
+            metrics.ASYNC_EXPORT_LINES_COUNT.labels(index_set_id=index_set_id, mode="processed").inc(
+                line_count - passthrough_count
+            )
+            metrics.ASYNC_EXPORT_BYTES_COUNT.labels(index_set_id=index_set_id).inc(len(content))
+
+    def _run_producers(self, multi_execute_func: MultiExecuteFunc):
+        try:
+            multi_result = multi_execute_func.run(return_exception=True)
+            for source_key, result in multi_result.items():
+                if isinstance(result, Exception):
+                    logger.exception("async export error: %s -- %s, reason: %s", self.arcname, source_key, result)
+        finally:
+            self.pages.put(self._DONE)
+
+    def _consume(self, buffer):
+        error = None
+        while True:
+            content = self.pages.get()
+            if content is self._DONE:
+                break
+            if error:
+                # 写入失败后继续取出数据，避免来源阻塞在队列上
+                continue
+            try:
+                buffer.write(content)
+                self.line_count += content.count(b"\n")
+                self.byte_count += len(content)
+            except Exception as e:  # pylint: disable=broad-except
+                error = e
+                self.aborted.set()
+        if error:
+            raise error
+
+    def run(self):
+        """
+        执行导出并打包
+        """
+        start_time = time.time()
+        status = "success"
+        try:
+            with tempfile.SpooledTemporaryFile(max_size=ASYNC_EXPORT_SPOOL_MAX_SIZE, dir=ASYNC_DIR) as buffer:
+                # 在当前线程创建任务，以便继承请求及时区等上下文
+                multi_execute_func = MultiExecuteFunc()
+                for source_key, search_handler, sorted_fields in self.sources:
+                    multi_execute_func.append(
+                        result_key=source_key,
+                        func=self._produce,
+                        params={"search_handler": search_handler, "sorted_fields": sorted_fields},
+                        multi_func_params=True,
+                    )
+                producer = threading.Thread(target=self._run_producers, args=(multi_execute_func,), daemon=True)
+                producer.start()
+                try:
+                    self._consume(buffer)
+                finally:
+                    producer.join()
+
+                tar_info = tarfile.TarInfo(name=os.path.basename(self.arcname))
+                tar_info.size = buffer.tell()
+                tar_info.mtime = int(time.time())
+                tar_info.mode = 0o644
+                buffer.seek(0)
+                with tarfile.open(self.tar_file_path, "w:gz") as tar:
+                    tar.addfile(tar_info, buffer)
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            cost = time.time() - start_time
+            metrics.ASYNC_EXPORT_LATENCY.labels(index_set_id=self.index_set_id, status=status).observe(cost)
+            logger.info(
+                "[ExportStream] %s export %s lines, %s bytes, cost %.2fs, %.2f lines/s",
+                self.arcname,
+                self.line_count,
+                self.byte_count,
+                cost,
+                self.line_count / cost if cost else 0,
+            )
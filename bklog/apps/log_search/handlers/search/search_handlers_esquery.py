@@ -1127,6 +1127,16 @@ class SearchHandler:
         @param sorted_fields:
         @return:
         """
+        for result in self.iter_search_after_result(search_result, sorted_fields):
+            yield self._deal_query_result(result)
+
+    def iter_search_after_result(self, search_result, sorted_fields):
+        """
+        search_after 翻页，返回原始查询结果
+        @param search_result:
+        @param sorted_fields:
+        @return:
+        """
         # 获取search对应的esquery方法
         search_func = self.fetch_esquery_method(method_name="search")
         search_after_size = len(search_result["hits"]["hits"])
@@ -1170,7 +1180,7 @@ class SearchHandler:
 
             search_after_size = len(search_result["hits"]["hits"])
             result_size += search_after_size
-            yield self._deal_query_result(search_result)
+            yield search_result
 
     def scroll_result(self, scroll_result):
         """
@@ -1178,6 +1188,15 @@ class SearchHandler:
         @param scroll_result:
         @return:
         """
+        for result in self.iter_scroll_result(scroll_result):
+            yield self._deal_query_result(result)
+
+    def iter_scroll_result(self, scroll_result):
+        """
+        scroll 翻页，返回原始查询结果
+        @param scroll_result:
+        @return:
+        """
         # 获取scroll对应的esquery方法
         scroll_func = self.fetch_esquery_method(method_name="scroll")
         scroll_size = len(scroll_result["hits"]["hits"])
@@ -1199,7 +1218,7 @@ class SearchHandler:
             )
             scroll_size = len(scroll_result["hits"]["hits"])
             result_size += scroll_size
-            yield self._deal_query_result(scroll_result)
+            yield scroll_result
 
     def multi_get_slice_data(self, pre_file_name, export_file_type):
         collector_config = CollectorConfig.objects.filter(index_set_id=self.index_set_id).first()
@@ -2208,44 +2227,11 @@ class SearchHandler:
                 {"total": 0, "took": 0, "list": log_list, "aggs": agg_result, "origin_log_list": origin_log_list}
             )
             return result
+        # 同一页日志共享脱敏结果缓存
+        desensitize_caches = self.new_desensitize_caches()
         # hit data
         for hit in result_dict["hits"]["hits"]:
-            log = hit["_source"]
-            # 脱敏处理
-            if (self.field_configs or self.text_fields_field_configs) and self.is_desensitize:
-                log = self._log_desensitize(log)
-            else:
-                log = self.convert_keys(log)
-            # 联合检索补充索引集信息
-            log["__index_set_id__"] = self.index_set_id
-            log = self._add_cmdb_fields(log)
-            if self.export_fields:
-                new_origin_log = {}
-                for _export_field in self.export_fields:
-                    # 此处是为了虚拟字段[__set__, __module__, ipv6]可以导出
-                    if _export_field in log:
-                        new_origin_log[_export_field] = log[_export_field]
-                    # 处理a.b.c的情况
-                    elif "." in _export_field:
-                        # 在log中找不到时,去log的子级查找
-                        key, *field_list = _export_field.split(".")
-                        _result = log.get(key, {})
-                        for _field in field_list:
-                            if isinstance(_result, dict) and _field in _result:
-                                _result = _result[_field]
-                            else:
-                                _result = ""
-                                break
-                        new_origin_log[_export_field] = _result
-                    else:
-                        new_origin_log[_export_field] = log.get(_export_field, "")
-                origin_log = new_origin_log
-            else:
-                origin_log = log
-            _index = hit["_index"]
-            log.update({"index": _index})
-            if self.search_dict.get("is_return_doc_id"):
-                log.update({"__id__": hit["_id"]})
+            log, origin_log = self._deal_hit(hit, desensitize_caches=desensitize_caches)
 
             if "highlight" not in hit:
                 origin_log_list.append(origin_log)
@@ -2271,6 +2257,65 @@ class SearchHandler:
         result.update({"aggs": agg_dict})
         return result
 
+    def _deal_hit(self, hit: dict, desensitize_caches: tuple | None = None) -> tuple[dict, dict]:
+        """
+        处理单条命中日志
+        @param desensitize_caches: 脱敏结果缓存, 见 new_desensitize_caches
+        @return: (日志, 原始日志), 未指定导出字段时两者为同一对象
+        """
+        log = hit["_source"]
+        # 脱敏处理
+        if self.need_desensitize:
+            log = self._log_desensitize(log, desensitize_caches=desensitize_caches)
+        else:
+            log = self.convert_keys(log)
+        # 联合检索补充索引集信息
+        log["__index_set_id__"] = self.index_set_id
+        log = self._add_cmdb_fields(log)
+        if self.export_fields:
+            new_origin_log = {}
+            for _export_field in self.export_fields:
+                # 此处是为了虚拟字段[__set__, __module__, ipv6]可以导出
+                if _export_field in log:
+                    new_origin_log[_export_field] = log[_export_field]
+                # 处理a.b.c的情况
+                elif "." in _export_field:
+                    # 在log中找不到时,去log的子级查找
+                    key, *field_list = _export_field.split(".")
+                    _result = log.get(key, {})
+                    for _field in field_list:
+                        if isinstance(_result, dict) and _field in _result:
+                            _result = _result[_field]
+                        else:
+                            _result = ""
+                            break
+                    new_origin_log[_export_field] = _result
+                else:
+                    new_origin_log[_export_field] = log.get(_export_field, "")
+            origin_log = new_origin_log
+        else:
+            origin_log = log
+        _index = hit["_index"]
+        log.update({"index": _index})
+        if self.search_dict.get("is_return_doc_id"):
+            log.update({"__id__": hit["_id"]})
+        return log, origin_log
+
+    @property
+    def need_desensitize(self) -> bool:
+        """
+        日志是否需要脱敏
+        """
+        return bool(self.field_configs or self.text_fields_field_configs) and self.is_desensitize
+
+    def new_desensitize_caches(self) -> tuple | None:
+        """
+        批量处理一页日志时使用的脱敏结果缓存: (字段脱敏缓存, 原文字段脱敏缓存)
+        """
+        if not self.need_desensitize:
+            return None
+        return dict(), dict()
+
     def convert_keys(self, data):
         new_dict = {}
 
@@ -2338,20 +2383,22 @@ class SearchHandler:
         nested_dict = self.nested_dict_from_dotted_key(dotted_dict=highlight)
         return self.update_nested_dict(log, nested_dict)
 
-    def _log_desensitize(self, log: dict = None):
+    def _log_desensitize(self, log: dict = None, desensitize_caches: tuple | None = None):
         """
         字段脱敏
         """
         if not log:
             return log
 
+        field_cache, text_field_cache = desensitize_caches or (None, None)
+
         # 展开object对象
         log = expand_nested_data(log)
         # 保存一份未处理之前的log字段 用于脱敏之后的日志原文处理
         log_content_tmp = copy.deepcopy(log)
 
         # 字段脱敏处理
-        log = self.desensitize_handler.transform_dict(log)
+        log = self.desensitize_handler.transform_dict(log, cache=field_cache)
 
         # 原文字段应用其他字段的脱敏结果
         if not self.text_fields:
@@ -2370,7 +2417,7 @@ class SearchHandler:
 
         # 处理原文字段自身绑定的脱敏逻辑
         if self.text_fields:
-            log = self.text_fields_desensitize_handler.transform_dict(log)
+            log = self.text_fields_desensitize_handler.transform_dict(log, cache=text_field_cache)
         # 折叠object对象
         log = merge_nested_data(log)
         return log
@@ -19,3 +19,28 @@ DORIS_QUERY_COUNT = register_metric(
     documentation="query count of doris query API",
     labelnames=("index_set_id", "result_table_id", "status", "source_app_code"),
 )
+
+
+ASYNC_EXPORT_LINES_COUNT = register_metric(
+    Counter,
+    name="async_export_lines_count",
+    documentation="lines written by async export stream",
+    labelnames=("index_set_id", "mode"),
+)
+
+
+ASYNC_EXPORT_BYTES_COUNT = register_metric(
+    Counter,
+    name="async_export_bytes_count",
+    documentation="bytes written by async export stream",
+    labelnames=("index_set_id",),
+)
+
+
+ASYNC_EXPORT_LATENCY = register_metric(
+    Histogram,
+    name="async_export_latency",
+    documentation="latency of async export stream",
+    labelnames=("index_set_id", "status"),
+    buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0, INF),
+)
@@ -27,7 +27,6 @@ import tarfile
 
 import arrow
 import pytz
-import ujson
 from blueapps.contrib.celery_tools.periodic import periodic_task
 from blueapps.core.celery.celery import app
 from celery.schedules import crontab
@@ -52,19 +51,17 @@ from apps.log_search.constants import (
     ExportStatus,
     MsgModel,
 )
-from apps.log_search.exceptions import PreCheckAsyncExportException
+from apps.log_search.handlers.search.export_stream import ExportStream
 from apps.log_search.handlers.search.search_handlers_esquery import SearchHandler, UnionSearchHandler
 from apps.log_search.models import (
     AsyncTask,
     LogIndexSet,
-    Scenario,
     StorageClusterRecord,
 )
 from apps.utils.local import get_local_param
 from apps.utils.log import logger
 from apps.utils.notify import NotifyType
 from apps.utils.remote_storage import StorageType
-from apps.utils.thread import MultiExecuteFunc
 
 
 @app.task(ignore_result=True, queue="async_export")
@@ -398,32 +395,12 @@ class AsyncExportUtils:
             storage_cluster_ids.add(self.search_handler.storage_cluster_id)
         return storage_cluster_ids
 
-    def _async_export(self, search_handler, file_path):
-        try:
-            max_result_window = search_handler.index_set.result_window
-            result = search_handler.pre_get_result(sorted_fields=self.sorted_fields, size=max_result_window)
-            # 判断是否成功
-            if result["_shards"]["total"] != result["_shards"]["successful"]:
-                logger.error("can not create async_export task, reason: {}".format(result["_shards"]["failures"]))
-                raise PreCheckAsyncExportException()
-            with open(file_path, "a+", encoding="utf-8") as f:
-                result_list = search_handler._deal_query_result(result_dict=result).get("origin_log_list")
-                for item in result_list:
-                    f.write("%s\n" % ujson.dumps(item, ensure_ascii=False))
-                if search_handler.scenario_id == Scenario.ES:
-                    generate_result = search_handler.scroll_result(result)
-                else:
-                    generate_result = search_handler.search_after_result(result, self.sorted_fields)
-                self.write_file(f, generate_result)
-        except Exception as e:  # pylint: disable=broad-except
-            logger.exception("async export error: index_set_id: %s, reason: %s", search_handler.index_set_id, e)
-            raise e
-
-        return file_path
-
     def async_export(self):
         storage_cluster_record_ids = self.get_storage_cluster_record()
-        multi_execute_func = MultiExecuteFunc()
+        summary_file_path = f"{ASYNC_DIR}/{self.file_name}_summary.{self.export_file_type}"
+        export_stream = ExportStream(
+            arcname=summary_file_path, tar_file_path=self.tar_file_path, index_set_id=self.search_handler.index_set_id
+        )
         for storage_cluster_record_id in storage_cluster_record_ids:
             search_handler = SearchHandler(
                 index_set_id=self.search_handler.index_set_id,
@@ -432,33 +409,12 @@ class AsyncExportUtils:
                 export_log=True,
             )
             search_handler.storage_cluster_id = storage_cluster_record_id
-            current_cluster_id = search_handler.storage_cluster_id
-            file_path = f"{ASYNC_DIR}/{self.file_name}_cluster_{current_cluster_id}.{self.export_file_type}"
-            params = {
-                "search_handler": search_handler,
-                "file_path": file_path,
-            }
-            multi_execute_func.append(
-                result_key=search_handler.storage_cluster_id,
-                func=self._async_export,
-                params=params,
-                multi_func_params=True,
+            export_stream.add_source(
+                source_key=search_handler.storage_cluster_id,
+                search_handler=search_handler,
+                sorted_fields=self.sorted_fields,
             )
-        multi_result = multi_execute_func.run(return_exception=True)
-        summary_file_path = f"{ASYNC_DIR}/{self.file_name}_summary.{self.export_file_type}"
-        with open(summary_file_path, "a+", encoding="utf-8") as summary_file:
-            for result_key, result in multi_result.items():
-                if isinstance(result, Exception):
-                    logger.exception("async export error: %s -- %s, reason: %s", self.file_name, result_key, result)
-                else:
-                    self.file_path_list.append(result)
-                    # 读取文件内容并写入汇总文件
-                    with open(result, encoding="utf-8") as f:
-                        for line in f:
-                            summary_file.write(line)
-        with tarfile.open(self.tar_file_path, "w:gz") as tar:
-            tar.add(summary_file_path, arcname=os.path.basename(summary_file_path))
-            self.file_path_list.append(summary_file_path)
+        export_stream.run()
 
     def _quick_export(self, search_handler):
         multi_result = search_handler.multi_get_slice_data(
@@ -580,16 +536,6 @@ class AsyncExportUtils:
 
         return NotifyType.get_instance(notify_type=notify_type)()
 
-    @classmethod
-    def write_file(cls, f, result):
-        """
-        将对应数据写到文件中
-        """
-        for res in result:
-            origin_result_list = res.get("origin_log_list")
-            for item in origin_result_list:
-                f.write("%s\n" % ujson.dumps(item, ensure_ascii=False))
-
 
 class UnionAsyncExportUtils:
     """
@@ -670,32 +616,9 @@ class UnionAsyncExportUtils:
             storage_cluster_ids.add(self.search_handler.storage_cluster_id)
         return storage_cluster_ids
 
-    def _async_export(self, search_handler, file_path):
-        try:
-            sorted_fields = search_handler.search_dict["sort_list"]
-            max_result_window = search_handler.index_set.result_window
-            result = search_handler.pre_get_result(sorted_fields=sorted_fields, size=max_result_window)
-            # 判断是否成功
-            if result["_shards"]["total"] != result["_shards"]["successful"]:
-                logger.error("can not create async_export task, reason: {}".format(result["_shards"]["failures"]))
-                raise PreCheckAsyncExportException()
-            with open(file_path, "a+", encoding="utf-8") as f:
-                result_list = search_handler._deal_query_result(result_dict=result).get("origin_log_list")
-                for item in result_list:
-                    f.write("%s\n" % ujson.dumps(item, ensure_ascii=False))
-                if search_handler.scenario_id == Scenario.ES:
-                    generate_result = search_handler.scroll_result(result)
-                else:
-                    generate_result = search_handler.search_after_result(result, sorted_fields)
-                self.write_file(f, generate_result)
-        except Exception as e:  # pylint: disable=broad-except
-            logger.exception("async export error: index_set_id: %s, reason: %s", search_handler.index_set_id, e)
-            raise e
-
-        return file_path
-
     def async_export(self):
-        multi_execute_func = MultiExecuteFunc()
+        summary_file_path = f"{ASYNC_DIR}/{self.file_name}_summary.{self.export_file_type}"
+        export_stream = ExportStream(arcname=summary_file_path, tar_file_path=self.tar_file_path)
         for index_set_id in self.union_search_handler.index_set_ids:
             # 构建请求参数
             params = {
@@ -720,32 +643,12 @@ class UnionAsyncExportUtils:
                 export_fields=self.union_search_handler.search_dict.get("export_fields", []),
                 export_log=True,
             )
-            file_path = f"{ASYNC_DIR}/{self.file_name}_{index_set_id}.{self.export_file_type}"
-            params = {
-                "search_handler": search_handler,
-                "file_path": file_path,
-            }
-            multi_execute_func.append(
-                result_key=index_set_id,
-                func=self._async_export,
-                params=params,
-                multi_func_params=True,
+            export_stream.add_source(
+                source_key=index_set_id,
+                search_handler=search_handler,
+                sorted_fields=search_dict["sort_list"],
             )
-        multi_result = multi_execute_func.run(return_exception=True)
-        summary_file_path = f"{ASYNC_DIR}/{self.file_name}_summary.{self.export_file_type}"
-        with open(summary_file_path, "a+", encoding="utf-8") as summary_file:
-            for result_key, result in multi_result.items():
-                if isinstance(result, Exception):
-                    logger.exception("async export error: %s -- %s, reason: %s", self.file_name, result_key, result)
-                else:
-                    self.file_path_list.append(result)
-                    # 读取文件内容并写入汇总文件
-                    with open(result, encoding="utf-8") as f:
-                        for line in f:
-                            summary_file.write(line)
-        with tarfile.open(self.tar_file_path, "w:gz") as tar:
-            tar.add(summary_file_path, arcname=os.path.basename(summary_file_path))
-            self.file_path_list.append(summary_file_path)
+        export_stream.run()
 
     def _quick_export(self, search_handler):
         pre_file_name = f"{self.file_name}_{search_handler.index_set_id}"
@@ -888,13 +791,3 @@ class UnionAsyncExportUtils:
         )
 
         return NotifyType.get_instance(notify_type=notify_type)()
-
-    @classmethod
-    def write_file(cls, f, result):
-        """
-        将对应数据写到文件中
-        """
-        for res in result:
-            origin_result_list = res.get("origin_log_list")
-            for item in origin_result_list:
-                f.write("%s\n" % ujson.dumps(item, ensure_ascii=False))
@@ -59,3 +59,44 @@ class TestDesensitizeOperator(TestCase):
 
         self.assertEqual(result.get("test_field_1"), "132*****678")
         self.assertEqual(result.get("test_field_2"), "abc3434defg")
+
+    def test_transform_dicts(self):
+        desensitize_config_info = [
+            {
+                "field_name": "test_field",
+                "rule_id": 0,
+                "operator": DesensitizeOperator.TEXT_REPLACE.value,
+                "params": {"template_string": "${partNum}****"},
+                "match_pattern": r"(?P<partNum>\d{3})\d{4}",
+                "sort_index": 1,
+            },
+            {
+                "field_name": "test_field",
+                "rule_id": 0,
+                "operator": DesensitizeOperator.TEXT_REPLACE.value,
+                "params": {"template_string": "${partNum}@***"},
+                "match_pattern": r"(?i)(?P<partNum>[a-z]+)@\w+\.com",
+                "sort_index": 0,
+            },
+        ]
+        logs = [
+            {"test_field": "1234567 abc@qq.com"},
+            {"test_field": "no sensitive data"},
+            {"test_field": "1234567 abc@qq.com"},
+            {"test_field": 12345678},
+        ]
+
+        handler = DesensitizeHandler(desensitize_config_info=desensitize_config_info)
+        self.assertIsNotNone(handler.field_prefilter_mapping["test_field"])
+        # 相同配置复用已编译的规则集
+        self.assertIs(
+            DesensitizeHandler(desensitize_config_info=desensitize_config_info).field_rule_mapping,
+            handler.field_rule_mapping,
+        )
+
+        result = handler.transform_dicts(logs)
+
+        self.assertEqual(
+            [log["test_field"] for log in result],
+            ["123**** abc@***", "no sensitive data", "123**** abc@***", "123****8"],
+        )
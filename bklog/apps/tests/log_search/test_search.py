@@ -19,12 +19,15 @@ We undertake not to change the open source license (MIT license) applicable to t
 the project delivered to anyone in the future.
 """
 
+import copy
 from unittest.mock import Mock, patch
 
 import arrow
+import ujson
 from django.test import TestCase
 
 from apps.log_search.constants import LOG_ASYNC_FIELDS
+from apps.log_search.handlers.search.export_stream import ExportLineSerializer
 from apps.log_search.handlers.search.search_handlers_esquery import SearchHandler
 
 CLUSTERED_RT = "2_bklog_3_clustered"
@@ -555,6 +558,22 @@ class TestSearchHandler(TestCase):
         dot_logs = dot_result["list"]
         self.assertEqual(dot_logs, DOT_RESULT)
 
+    def test_export_line_serializer(self):
+        serializer = ExportLineSerializer(self.search_handler)
+        self.assertTrue(serializer.passthrough)
+        for result_dict in [SEARCH_RESULT, DOT_DICT]:
+            content, line_count, passthrough_count = serializer.dumps(copy.deepcopy(result_dict))
+            origin_log_list = self.search_handler._deal_query_result(result_dict=copy.deepcopy(result_dict))[
+                "origin_log_list"
+            ]
+            self.assertEqual(line_count, len(origin_log_list))
+            self.assertEqual(
+                content.decode("utf-8"),
+                "".join(f"{ujson.dumps(log, ensure_ascii=False)}\n" for log in origin_log_list),
+            )
+        # 带点的字段需要展开，不能直接序列化
+        self.assertEqual(serializer.dumps(copy.deepcopy(DOT_DICT))[2], 1)
+
     @patch(
         "apps.log_clustering.models.ClusteringConfig.get_by_index_set_id",
         lambda index_set_id, raise_exception: Mock(clustered_rt=CLUSTERED_RT),
@@ -0,0 +1,192 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+"""
+活跃告警索引
+
+记录集群内处于异常状态且未被熔断的告警，供告警管理周期任务直接读取，避免每轮全量扫描ES
+- 策略列表(sorted set): 有活跃告警的策略ID -> 最近写入时间
+- 策略告警索引(hash): alert_id -> "{bk_biz_id}|{写入时间}"
+key 前缀中包含集群名称，因此索引天然按集群分片；同一策略的索引与告警缓存位于同一 redis 节点
+"""
+
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+
+from alarm_backends.core.cache.key import (
+    ALERT_ACTIVE_INDEX_KEY,
+    ALERT_ACTIVE_INDEX_SWEEP_KEY,
+    ALERT_ACTIVE_STRATEGY_KEY,
+)
+from constants.alert import EventStatus
+
+
+class ActiveAlertIndex:
+    # 一致性校验时，最近写入的索引不会被删除，避免ES数据尚未刷新导致误删
+    SWEEP_GRACE_PERIOD = 5 * 60
+
+    @staticmethod
+    def get_index_key(strategy_id):
+        return ALERT_ACTIVE_INDEX_KEY.get_key(strategy_id=strategy_id or 0)
+
+    @staticmethod
+    def is_active(alert: dict) -> bool:
+        return alert["status"] == EventStatus.ABNORMAL and not alert.get("is_blocked")
+
+    @classmethod
+    def update(cls, alerts: Iterable[dict]):
+        """
+        根据告警的最新状态更新索引
+        :param alerts: [{"id": "xxx", "strategy_id": 1, "bk_biz_id": 2, "status": "ABNORMAL", "is_blocked": False}]
+        """
+        now = int(time.time())
+        active_alerts = defaultdict(dict)
+        inactive_alerts = defaultdict(list)
+        for alert in alerts:
+            strategy_id = alert.get("strategy_id") or 0
+            if cls.is_active(alert):
+                active_alerts[strategy_id][alert["id"]] = f"{alert.get('bk_biz_id') or 0}|{now}"
+            else:
+                inactive_alerts[strategy_id].append(alert["id"])
+        cls.write(active_alerts, inactive_alerts, now)
+
+    @classmethod
+    def write(cls, active_alerts: dict[int, dict[str, str]], inactive_alerts: dict[int, list[str]], now: int):
+        """
+        批量写入索引
+        :param active_alerts: {strategy_id: {alert_id: "{bk_biz_id}|{写入时间}"}}
+        :param inactive_alerts: {strategy_id: [alert_id]}
+        """
+        if not active_alerts and not inactive_alerts:
+            return
+
+        pipeline = ALERT_ACTIVE_INDEX_KEY.client.pipeline(transaction=False)
+        for strategy_id, mapping in active_alerts.items():
+            index_key = cls.get_index_key(strategy_id)
+            pipeline.hmset(index_key, mapping)
+            pipeline.expire(index_key, ALERT_ACTIVE_INDEX_KEY.ttl)
+        for strategy_id, alert_ids in inactive_alerts.items():
+            pipeline.hdel(cls.get_index_key(strategy_id), *alert_ids)
+
+        if active_alerts:
+            strategy_key = ALERT_ACTIVE_STRATEGY_KEY.get_key()
+            pipeline.zadd(strategy_key, {str(strategy_id): now for strategy_id in active_alerts})
+            pipeline.expire(strategy_key, ALERT_ACTIVE_STRATEGY_KEY.ttl)
+        pipeline.execute()
+
+    @classmethod
+    def update_by_alerts(cls, alerts: list):
+        """
+        根据告警对象更新索引
+        """
+        cls.update(
+            {
+                "id": alert.id,
+                "strategy_id": alert.strategy_id,
+                "bk_biz_id": alert.bk_biz_id,
+                "status": alert.status,
+                "is_blocked": alert.is_blocked,
+            }
+            for alert in alerts
+        )
+
+    @classmethod
+    def scan(cls) -> dict[int, dict[str, tuple[str, int]]]:
+        """
+        读取全部索引
+        :return: {strategy_id: {alert_id: (bk_biz_id, 写入时间)}}
+        """
+        client = ALERT_ACTIVE_INDEX_KEY.client
+        strategy_key = ALERT_ACTIVE_STRATEGY_KEY.get_key()
+        strategies = client.zrange(strategy_key, 0, -1, withscores=True)
+        if not strategies:
+            return {}
+
+        strategy_ids = [int(strategy_id) for strategy_id, _ in strategies]
+        pipeline = client.pipeline(transaction=False)
+        for strategy_id in strategy_ids:
+            pipeline.hgetall(cls.get_index_key(strategy_id))
+        results = pipeline.execute()
+
+        index = {}
+        expired_strategy_ids = []
+        expire_time = time.time() - ALERT_ACTIVE_INDEX_KEY.ttl
+        for (_, update_time), strategy_id, result in zip(strategies, strategy_ids, results):
+            if not result:
+                # 长时间没有写入且没有活跃告警的策略，从策略列表中移除
+                if update_time < expire_time:
+                    expired_strategy_ids.append(strategy_id)
+                continue
+            alerts = index[strategy_id] = {}
+            for alert_id, value in result.items():
+                bk_biz_id, _, timestamp = value.partition("|")
+                alerts[alert_id] = (bk_biz_id, int(timestamp or 0))
+
+        if expired_strategy_ids:
+            client.zrem(strategy_key, *expired_strategy_ids)
+        return index
+
+    @classmethod
+    def list_alerts(cls, bk_biz_ids: Iterable[int]) -> list[dict]:
+        """
+        获取指定业务下的活跃告警
+        :return: [{"id": "xxx", "strategy_id": 1}]
+        """
+        bk_biz_ids = {str(bk_biz_id) for bk_biz_id in bk_biz_ids}
+        alerts = []
+        for strategy_id, index in cls.scan().items():
+            for alert_id, (bk_biz_id, _) in index.items():
+                if bk_biz_id in bk_biz_ids:
+                    alerts.append({"id": alert_id, "strategy_id": strategy_id or None})
+        return alerts
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        """
+        索引是否可用，只有最近完成过一致性校验的索引才能作为唯一数据来源
+        """
+        return bool(ALERT_ACTIVE_INDEX_KEY.client.exists(ALERT_ACTIVE_INDEX_SWEEP_KEY.get_key()))
+
+    @classmethod
+    def invalidate(cls):
+        """
+        使索引失效，下次使用前需要重新完成一致性校验
+        """
+        ALERT_ACTIVE_INDEX_SWEEP_KEY.client.delete(ALERT_ACTIVE_INDEX_SWEEP_KEY.get_key())
+
+    @classmethod
+    def sweep(cls, alerts: list[dict], start_time: int) -> tuple[int, int]:
+        """
+        以ES的查询结果为准校正索引
+        :param alerts: ES 中的活跃告警 [{"id": "xxx", "strategy_id": 1, "bk_biz_id": 2}]
+        :param start_time: ES 查询开始时间，在此之后写入的索引不会被删除
+        :return: (补充数量, 删除数量)
+        """
+        index = cls.scan()
+        indexed_alert_ids = {alert_id for alerts in index.values() for alert_id in alerts}
+        active_alert_ids = {alert["id"] for alert in alerts}
+
+        now = int(time.time())
+        missing_alerts = defaultdict(dict)
+        for alert in alerts:
+            if alert["id"] not in indexed_alert_ids:
+                missing_alerts[alert.get("strategy_id") or 0][alert["id"]] = f"{alert.get('bk_biz_id') or 0}|{now}"
+
+        stale_alerts = defaultdict(list)
+        for strategy_id, strategy_alerts in index.items():
+            for alert_id, (_, update_time) in strategy_alerts.items():
+                if alert_id not in active_alert_ids and update_time < start_time - cls.SWEEP_GRACE_PERIOD:
+                    stale_alerts[strategy_id].append(alert_id)
+        cls.write(missing_alerts, stale_alerts, now)
+
+        sweep_key = ALERT_ACTIVE_INDEX_SWEEP_KEY.get_key()
+        ALERT_ACTIVE_INDEX_SWEEP_KEY.client.set(sweep_key, start_time, ALERT_ACTIVE_INDEX_SWEEP_KEY.ttl)
+        return sum(len(v) for v in missing_alerts.values()), sum(len(v) for v in stale_alerts.values())
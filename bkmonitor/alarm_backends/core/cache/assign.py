@@ -13,9 +13,11 @@ from collections import defaultdict
 from alarm_backends.core.cache.base import CacheManager
 from alarm_backends.core.cache.cmdb.business import BusinessManager
 from alarm_backends.core.cache.cmdb.dynamic_group import DynamicGroupManager
+from bkmonitor.action.alert_assign import AssignRuleMatch
 from bkmonitor.models.fta.assign import AlertAssignGroup, AlertAssignRule
 from bkmonitor.utils import extended_json
 from bkmonitor.utils.local import local
+from bkmonitor.utils.range.matcher import ConditionMatcher
 from constants.action import GLOBAL_BIZ_ID
 
 setattr(local, "assign_cache", {})
@@ -87,6 +89,21 @@ class AssignCacheManager(CacheManager):
 
         return local.assign_cache[cache_key]
 
+    @classmethod
+    def get_assign_rule_matcher(cls, bk_biz_id, priority):
+        """
+        获取某个优先级下的全部分派规则及其预编译的匹配器
+        :return: (规则列表, 匹配器)，匹配器中的条件与规则一一对应
+        """
+        cache_key = f"matcher_{bk_biz_id}_{priority}"
+        if cache_key not in local.assign_cache:
+            rules = []
+            for group_id in cls.get_assign_groups_by_priority(bk_biz_id, priority):
+                rules.extend(cls.get_assign_rules_by_group(bk_biz_id, group_id))
+            matcher = ConditionMatcher([AssignRuleMatch.load_dimension_check(rule["conditions"]) for rule in rules])
+            local.assign_cache[cache_key] = (rules, matcher)
+        return local.assign_cache[cache_key]
+
     @classmethod
     def get_global_config(cls, key_template, **kwargs):
         kwargs.update({"bk_biz_id": GLOBAL_BIZ_ID})
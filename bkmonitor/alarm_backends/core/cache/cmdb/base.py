@@ -15,16 +15,18 @@ import json
 import time
 
 import six.moves.cPickle as pickle
-from django.core.cache import caches
+from django.conf import settings
 
 from alarm_backends.constants import CONST_ONE_DAY
 from alarm_backends.core.cache.base import CacheManager
+from alarm_backends.core.cache.cmdb.codec import CompactCodec, FieldTableMissing
+from alarm_backends.core.cache.cmdb.local_cache import MISSING, LRUCache
 from alarm_backends.core.storage.redis import Cache
+from api.cmdb import client
+from bkmonitor.utils.thread_backend import ThreadPool
 from core.drf_resource import api
 from core.prometheus import metrics
 
-mem_cache = caches["locmem"]
-
 
 class CMDBCacheManager(CacheManager):
     """
@@ -36,12 +38,28 @@ class CMDBCacheManager(CacheManager):
     CACHE_TIMEOUT = 7 * CONST_ONE_DAY
     ObjectClass = None
     cache = Cache("cache-cmdb")
+    # 紧凑编码器，字段名表在所有CMDB缓存间共享
+    codec = CompactCodec(cache, f"{CacheManager.CACHE_KEY_PREFIX}.cmdb.field_tables", CACHE_TIMEOUT)
+
+    # 进程内缓存，key 为 (CACHE_KEY, 缓存代数, 对象key)，缓存刷新后代数变化，旧数据不再命中
+    # 调用方会在返回的对象上设置属性，每次读取返回新的对象
+    local_cache = LRUCache(settings.CMDB_CACHE_LOCAL_MAXSIZE, settings.CMDB_CACHE_LOCAL_TTL, copy_on_read=True)
+    # 缓存代数的检查间隔(秒)
+    GENERATION_CHECK_INTERVAL = 10
+    # CACHE_KEY -> (缓存代数, 检查时间)
+    _generations = {}
 
     @classmethod
     def serialize(cls, obj):
         """
         序列化数据
         """
+        if settings.CMDB_CACHE_COMPACT_SERIALIZE:
+            try:
+                return cls.codec.encode(obj)
+            except TypeError:
+                # 不支持紧凑编码的对象回退为 pickle
+                pass
         return pickle.dumps(obj).decode("latin1")
 
     @classmethod
@@ -49,10 +67,43 @@ class CMDBCacheManager(CacheManager):
         """
         反序列化数据
         """
+        if cls.codec.is_compact(string):
+            try:
+                return cls.codec.decode(string)
+            except FieldTableMissing as e:
+                cls.logger.warning(f"{cls.__name__} field table({e}) not found")
+                return None
         if cls.ObjectClass and string.startswith("{"):
             return cls.ObjectClass(**json.loads(string))
         return pickle.loads(string.encode("latin1"))
 
+    @classmethod
+    def get_generation_key(cls):
+        return f"{cls.CACHE_KEY}.generation"
+
+    @classmethod
+    def get_generation(cls) -> str:
+        """
+        获取缓存代数，按检查间隔从redis同步
+        """
+        now = time.time()
+        generation, checked_at = cls._generations.get(cls.CACHE_KEY, (None, 0))
+        if generation is None or now - checked_at >= cls.GENERATION_CHECK_INTERVAL:
+            generation = str(cls.cache.get(cls.get_generation_key()) or 0)
+            cls._generations[cls.CACHE_KEY] = (generation, now)
+        return generation
+
+    @classmethod
+    def bump_generation(cls):
+        """
+        缓存数据变更后递增缓存代数，使所有进程的进程内缓存失效
+        """
+        generation_key = cls.get_generation_key()
+        generation = cls.cache.incr(generation_key)
+        cls.cache.expire(generation_key, cls.CACHE_TIMEOUT)
+        # 当前进程立即生效
+        cls._generations[cls.CACHE_KEY] = (str(generation), time.time())
+
     @classmethod
     @abc.abstractmethod
     def key_to_internal_value(cls, *args, **kwargs):
@@ -79,13 +130,19 @@ class CMDBCacheManager(CacheManager):
             return []
         keys = list(keys)
 
-        objs = cls.cache.hmget(cls.CACHE_KEY, keys)
-        result = []
-        for obj in objs:
-            if obj:
-                result.append(cls.deserialize(obj))
-            else:
-                result.append(None)
+        generation = cls.get_generation()
+        result = [cls.local_cache.get((cls.CACHE_KEY, generation, key)) for key in keys]
+        missing_indexes = [index for index, obj in enumerate(result) if obj is MISSING]
+        if not missing_indexes:
+            return result
+
+        objs = cls.cache.hmget(cls.CACHE_KEY, [keys[index] for index in missing_indexes])
+        for index, obj in zip(missing_indexes, objs):
+            obj = cls.deserialize(obj) if obj else None
+            result[index] = obj
+            # 只缓存命中的数据，未命中的数据下次重新查询
+            if obj is not None:
+                cls.local_cache.set((cls.CACHE_KEY, generation, keys[index]), obj)
         return result
 
     @classmethod
@@ -94,9 +151,10 @@ class CMDBCacheManager(CacheManager):
         获取单个对象
         """
         key = cls.key_to_internal_value(*args, **kwargs)
-        local_key = f"{cls.CACHE_KEY}_{key}"
-        if local_key in mem_cache:
-            return mem_cache.get(local_key)
+        local_key = (cls.CACHE_KEY, cls.get_generation(), key)
+        obj = cls.local_cache.get(local_key)
+        if obj is not MISSING:
+            return obj
 
         obj = cls.cache.hget(cls.CACHE_KEY, key)
 
@@ -104,7 +162,10 @@ class CMDBCacheManager(CacheManager):
             cls.logger.warning("unknown {}: {}".format(cls.__name__.replace("Manager", ""), key))
         else:
             obj = cls.deserialize(obj)
-        mem_cache.set(local_key, obj)
+            # 反序列化失败(如字段名表尚未写入)时不缓存，下次重新查询
+            if obj is None:
+                return obj
+        cls.local_cache.set(local_key, obj)
         return obj
 
     @classmethod
@@ -157,13 +218,36 @@ class CMDBCacheManager(CacheManager):
         清理缓存
         """
         cls.cache.delete(cls.CACHE_KEY)
+        cls.bump_generation()
 
 
 class RefreshByBizMixin(object):
+    # 增量刷新时监听的CMDB资源类型
+    WATCH_RESOURCES = ()
+    # 单次增量刷新时，每种资源最多拉取的事件批次
+    WATCH_MAX_ROUNDS = 10
+    # CMDB单次返回的最大事件数量
+    WATCH_PAGE_SIZE = 200
+    # 游标哈希中记录最近一次全量刷新时间的字段
+    WATCH_REFRESH_TIME_FIELD = "refresh_time"
+
     @classmethod
     def get_biz_cache_key(cls):
         return "{}.biz".format(cls.CACHE_KEY)
 
+    @classmethod
+    def get_watch_cursor_key(cls):
+        """
+        资源监听游标
+        存储结构
+        {
+          "host": "MQ0xDTE2MzA...",
+          "host_relation": "MQ0xDTE2MzA...",
+          "refresh_time": "1630000000",
+        }
+        """
+        return f"{cls.CACHE_KEY}.watch_cursor"
+
     @classmethod
     @abc.abstractmethod
     def refresh_by_biz(cls, bk_biz_id):
@@ -204,8 +288,8 @@ class RefreshByBizMixin(object):
                 cls.logger.exception("get data by biz fail, bk_biz_id: {}, {}".format(bk_biz_id, e))
                 exc = e
             else:
-                # 更新对象缓存
-                cls.cache_by_biz(bk_biz_id, objs, force=True)
+                # 更新对象缓存，全部业务刷新完成后统一递增缓存代数
+                cls.cache_by_biz(bk_biz_id, objs, force=True, bump=False)
 
             metrics.ALARM_CACHE_TASK_TIME.labels(str(bk_biz_id), cls.type, str(exc)).observe(
                 time.time() - biz_start_time
@@ -237,16 +321,174 @@ class RefreshByBizMixin(object):
         if deleted_keys:
             cls.cache.hdel(cls.CACHE_KEY, *deleted_keys)
         cls.cache.expire(cls.CACHE_KEY, cls.CACHE_TIMEOUT)
+        cls.bump_generation()
 
         metrics.ALARM_CACHE_TASK_TIME.labels("0", cls.type, "None").observe(time.time() - start_time)
 
+        # 全量刷新完成后，增量刷新从本次全量刷新开始时间重新监听
+        cursor_key = cls.get_watch_cursor_key()
+        cls.cache.delete(cursor_key)
+        cls.cache.hset(cursor_key, cls.WATCH_REFRESH_TIME_FIELD, int(start_time))
+        cls.cache.expire(cursor_key, cls.CACHE_TIMEOUT)
+
         cls.logger.info(
             "cache_key({}) refresh CMDB data finished, amount: updated: {}, removed: {}, "
             "removed_biz: {}".format(cls.CACHE_KEY, len(new_keys), len(deleted_keys), len(deleted_biz_ids))
         )
 
     @classmethod
-    def cache_by_biz(cls, bk_biz_id: str, objs_dict: dict, force: bool = False) -> None:
+    def get_last_refresh_time(cls) -> int:
+        """
+        获取最近一次全量刷新时间，未记录时返回0
+        """
+        return int(cls.cache.hget(cls.get_watch_cursor_key(), cls.WATCH_REFRESH_TIME_FIELD) or 0)
+
+    @classmethod
+    def get_biz_ids_by_event(cls, event: dict) -> set:
+        """
+        根据资源变更事件获取受影响的业务ID，子类可按资源类型重写
+        """
+        detail = event.get("bk_detail") or {}
+        bk_biz_id = detail.get("bk_biz_id")
+        return {int(bk_biz_id)} if bk_biz_id else set()
+
+    @classmethod
+    def watch_resource(cls, resource: str, cursor: str = None, start_from: int = None):
+        """
+        拉取资源变更事件
+        :param resource: 资源类型
+        :param cursor: 上次监听的游标
+        :param start_from: 无游标时，从该时间点开始监听
+        :return: 二元组：变更事件列表，最新游标
+        """
+        events = []
+        for _ in range(cls.WATCH_MAX_ROUNDS):
+            params = {"bk_resource": resource}
+            if cursor:
+                params["bk_cursor"] = cursor
+            else:
+                params["bk_start_from"] = start_from
+            result = client.resource_watch(params) or {}
+
+            batch_events = result.get("bk_events") or []
+            if batch_events:
+                cursor = batch_events[-1]["bk_cursor"]
+
+            # 未监听到事件时，只返回最新游标
+            if not result.get("bk_watched"):
+                break
+
+            events.extend(batch_events)
+            if len(batch_events) < cls.WATCH_PAGE_SIZE:
+                break
+        return events, cursor
+
+    @classmethod
+    def refresh_incremental(cls) -> bool:
+        """
+        根据CMDB资源变更事件增量刷新缓存，只刷新发生变更的业务
+        :return: 是否完成增量刷新。不支持增量刷新、未全量刷新过或游标失效时返回False，需要进行全量刷新
+        """
+        if not cls.WATCH_RESOURCES:
+            return False
+
+        cursor_key = cls.get_watch_cursor_key()
+        cursors = cls.cache.hgetall(cursor_key) or {}
+        refresh_time = int(cursors.get(cls.WATCH_REFRESH_TIME_FIELD) or 0)
+        if not refresh_time:
+            return False
+
+        start_time = time.time()
+
+        # 没有变更时监听请求会阻塞等待，多种资源并发监听
+        pool = ThreadPool(len(cls.WATCH_RESOURCES))
+        results = pool.map_ignore_exception(
+            cls.watch_resource,
+            [(resource, cursors.get(resource), refresh_time) for resource in cls.WATCH_RESOURCES],
+            return_exception=True,
+        )
+        pool.close()
+        pool.join()
+
+        biz_ids = set()
+        new_cursors = {}
+        for resource, result in zip(cls.WATCH_RESOURCES, results):
+            if isinstance(result, Exception):
+                # 游标过期等情况，需要重新全量刷新
+                cls.logger.error(f"cache_key({cls.CACHE_KEY}) watch resource({resource}) fail, {result}")
+                cls.cache.delete(cursor_key)
+                return False
+
+            events, cursor = result
+            for event in events:
+                biz_ids.update(cls.get_biz_ids_by_event(event))
+            if cursor:
+                new_cursors[resource] = cursor
+
+        updated, removed = cls.refresh_by_biz_ids(biz_ids)
+
+        # 缓存更新完成后再保存游标，更新失败时下次重新拉取事件
+        if new_cursors:
+            cls.cache.hmset(cursor_key, new_cursors)
+        cls.cache.expire(cursor_key, cls.CACHE_TIMEOUT)
+        cls.cache.expire(cls.CACHE_KEY, cls.CACHE_TIMEOUT)
+
+        metrics.ALARM_CACHE_TASK_TIME.labels("0", f"{cls.type}_incremental", "None").observe(time.time() - start_time)
+        cls.logger.info(
+            f"cache_key({cls.CACHE_KEY}) incremental refresh CMDB data finished, biz: {len(biz_ids)}, "
+            f"amount: updated: {updated}, removed: {removed}"
+        )
+        return True
+
+    @classmethod
+    def refresh_by_biz_ids(cls, biz_ids):
+        """
+        刷新指定业务的缓存，并清理这些业务下已被删除的对象数据
+        :return: 二元组：更新数量，删除数量
+        """
+        from alarm_backends.core.i18n import i18n
+
+        if not biz_ids:
+            return 0, 0
+
+        biz_ids = sorted(biz_ids)
+        biz_cache_key = cls.get_biz_cache_key()
+        old_keys_list = cls.cache.hmget(biz_cache_key, [str(bk_biz_id) for bk_biz_id in biz_ids])
+
+        old_keys = set()
+        new_keys = set()
+        refreshed_biz_ids = set()
+        for bk_biz_id, keys in zip(biz_ids, old_keys_list):
+            try:
+                i18n.set_biz(bk_biz_id)
+                objs = cls.refresh_by_biz(bk_biz_id)
+            except Exception as e:
+                # 如果接口调用异常，则不更新
+                cls.logger.exception(f"get data by biz fail, bk_biz_id: {bk_biz_id}, {e}")
+                continue
+
+            cls.cache_by_biz(bk_biz_id, objs, force=True, bump=False)
+            refreshed_biz_ids.add(str(bk_biz_id))
+            old_keys.update(json.loads(keys) if keys else [])
+            new_keys.update(objs)
+
+        deleted_keys = old_keys - new_keys
+        if deleted_keys:
+            # 对象可能迁移到了其他业务下，仍被其他业务引用的key不能删除
+            for bk_biz_id, keys in (cls.cache.hgetall(biz_cache_key) or {}).items():
+                if bk_biz_id not in refreshed_biz_ids:
+                    deleted_keys.difference_update(json.loads(keys))
+        if deleted_keys:
+            cls.cache.hdel(cls.CACHE_KEY, *deleted_keys)
+        if refreshed_biz_ids or deleted_keys:
+            cls.bump_generation()
+        return len(new_keys), len(deleted_keys)
+
+    @classmethod
+    def cache_by_biz(cls, bk_biz_id: str, objs_dict: dict, force: bool = False, bump: bool = True) -> None:
+        """
+        :param bump: 是否递增缓存代数，批量刷新多个业务时由调用方在刷新完成后统一递增
+        """
         if not force:
             if not cls.can_cache(bk_biz_id):
                 return
@@ -259,15 +501,20 @@ class RefreshByBizMixin(object):
             batch_objs[key] = cls.serialize(objs_dict[key])
             key_list.append(key)
             if (index + 1) % 1000 == 0:
+                # 字段名表需要先于数据写入
+                cls.codec.flush_tables()
                 cls.cache.hmset(cls.CACHE_KEY, batch_objs)
                 batch_objs = {}
         if batch_objs:
+            cls.codec.flush_tables()
             cls.cache.hmset(cls.CACHE_KEY, batch_objs)
 
         pipeline.expire(cls.CACHE_KEY, cls.CACHE_TIMEOUT)
         # 按业务设置key列表，用于差量更新
         pipeline.hset(cls.get_biz_cache_key(), str(bk_biz_id), json.dumps(key_list))
         pipeline.execute()
+        if bump:
+            cls.bump_generation()
 
     @classmethod
     def can_cache(cls, bk_biz_id: str) -> bool:
@@ -278,4 +525,5 @@ class RefreshByBizMixin(object):
         """
         清理缓存
         """
-        cls.cache.delete(cls.CACHE_KEY, cls.get_biz_cache_key())
+        cls.cache.delete(cls.CACHE_KEY, cls.get_biz_cache_key(), cls.get_watch_cursor_key())
+        cls.bump_generation()
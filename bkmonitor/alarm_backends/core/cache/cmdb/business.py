@@ -64,6 +64,8 @@ class BusinessManager(CMDBCacheManager):
         for business in business_list:
             pipeline.hset(cls.CACHE_KEY, cls.key_to_internal_value(business.bk_biz_id), cls.serialize(business))
 
+        # 字段名表需要先于数据写入
+        cls.codec.flush_tables()
         pipeline.execute()
 
         # 差值比对需要删除的业务
@@ -76,6 +78,7 @@ class BusinessManager(CMDBCacheManager):
 
         pipeline.expire(cls.CACHE_KEY, cls.CACHE_TIMEOUT)
         pipeline.execute()
+        cls.bump_generation()
 
         cls.logger.info(
             "refresh CMDB Business data finished, amount: updated: {}, removed: {}".format(
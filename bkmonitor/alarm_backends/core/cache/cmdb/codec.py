@@ -0,0 +1,158 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+"""
+CMDB 缓存对象的紧凑编码
+
+对象按 "字段名表 + 值数组" 编码，字段名表按内容寻址，存储在共享的 redis hash 中，
+同一结构的对象(如同一业务下的主机)只需存储一份字段名：
+v1|{"#":["TopoNode","3f2a9c1d",[2,"blueking","biz","业务"]]}
+
+嵌套的拓扑节点等对象同样按此方式编码。无法编码的对象(如包含元组、非字符串键的字典)由调用方回退为 pickle
+"""
+
+import json
+import threading
+import zlib
+
+from django.utils.functional import cached_property
+
+from api.cmdb.define import BaseNode, Business, Host, Module, ServiceInstance, Set, TopoNode
+
+COMPACT_PREFIX = "v1|"
+
+# 对象标记字段
+OBJECT_TAG = "#"
+
+# 支持紧凑编码的对象类型
+OBJECT_CLASSES = {cls.__name__: cls for cls in (Host, TopoNode, Business, Set, Module, ServiceInstance)}
+
+
+class FieldTableMissing(Exception):
+    """
+    字段名表不存在
+    """
+
+
+class CompactCodec:
+    """
+    紧凑编码器
+    """
+
+    def __init__(self, cache, table_key: str, timeout: int):
+        self.cache = cache
+        self.table_key = table_key
+        self.timeout = timeout
+        # 字段名表 id -> 字段名列表
+        self.tables: dict[str, list[str]] = {}
+        # 自上次写入redis后使用过的字段名表
+        self.used_tables: set[str] = set()
+        self.lock = threading.Lock()
+        # 对象类型 -> 不需要编码的缓存属性
+        self._ignored_fields: dict[type, set[str]] = {}
+
+    @staticmethod
+    def is_compact(string: str) -> bool:
+        return string.startswith(COMPACT_PREFIX)
+
+    def get_ignored_fields(self, object_class: type) -> set[str]:
+        ignored_fields = self._ignored_fields.get(object_class)
+        if ignored_fields is None:
+            ignored_fields = self._ignored_fields[object_class] = {
+                name
+                for klass in object_class.__mro__
+                for name, attr in vars(klass).items()
+                if isinstance(attr, cached_property)
+            }
+        return ignored_fields
+
+    def add_table(self, fields: list[str]) -> str:
+        table_id = format(zlib.crc32("\0".join(fields).encode("utf-8")), "08x")
+        if table_id not in self.tables:
+            self.tables[table_id] = fields
+        elif self.tables[table_id] != fields:
+            # 哈希冲突时不使用紧凑编码
+            raise TypeError("field table conflict")
+        with self.lock:
+            self.used_tables.add(table_id)
+        return table_id
+
+    def get_table(self, table_id: str) -> list[str]:
+        fields = self.tables.get(table_id)
+        if fields is None:
+            content = self.cache.hget(self.table_key, table_id)
+            if not content:
+                raise FieldTableMissing(table_id)
+            fields = self.tables[table_id] = json.loads(content)
+        return fields
+
+    def flush_tables(self):
+        """
+        将使用过的字段名表写入redis，需要在写入编码后的数据之前调用
+        """
+        with self.lock:
+            used_tables, self.used_tables = self.used_tables, set()
+        if not used_tables:
+            return
+        self.cache.hmset(self.table_key, {table_id: json.dumps(self.tables[table_id]) for table_id in used_tables})
+        self.cache.expire(self.table_key, self.timeout)
+
+    def _encode_value(self, value):
+        value_type = type(value)
+        if value is None or value_type in (str, int, float, bool):
+            return value
+        if value_type is list:
+            return [self._encode_value(v) for v in value]
+        if value_type is dict:
+            if OBJECT_TAG in value or any(type(k) is not str for k in value):
+                raise TypeError("unsupported dict keys")
+            return {k: self._encode_value(v) for k, v in value.items()}
+        if OBJECT_CLASSES.get(value_type.__name__) is value_type:
+            return self._encode_object(value)
+        raise TypeError(f"unsupported type: {value_type.__name__}")
+
+    def _encode_state(self, state: dict) -> list:
+        fields = list(state)
+        return [self.add_table(fields), [self._encode_value(state[field]) for field in fields]]
+
+    def _encode_object(self, obj):
+        ignored_fields = self.get_ignored_fields(type(obj))
+        state = {k: v for k, v in obj.__dict__.items() if k not in ignored_fields}
+        tagged = [type(obj).__name__]
+        if isinstance(obj, BaseNode):
+            # 节点属性与实例属性(如后补充的拓扑链)分开编码
+            tagged.extend(self._encode_state(state.pop("_extra_attr")))
+        tagged.extend(self._encode_state(state))
+        return {OBJECT_TAG: tagged}
+
+    def _decode_object(self, value: dict):
+        tagged = value.get(OBJECT_TAG)
+        if tagged is None or len(value) != 1:
+            return value
+
+        object_class = OBJECT_CLASSES[tagged[0]]
+        # 与 pickle 一致，不经过 __init__ 直接恢复对象状态
+        obj = object_class.__new__(object_class)
+        if issubclass(object_class, BaseNode):
+            obj.__dict__["_extra_attr"] = dict(zip(self.get_table(tagged[1]), tagged[2]))
+        obj.__dict__.update(zip(self.get_table(tagged[-2]), tagged[-1]))
+        return obj
+
+    def encode(self, obj) -> str:
+        """
+        编码对象，不支持的对象抛出 TypeError
+        """
+        return COMPACT_PREFIX + json.dumps(self._encode_value(obj), separators=(",", ":"), ensure_ascii=False)
+
+    def decode(self, string: str):
+        """
+        解码对象，字段名表不存在时抛出 FieldTableMissing
+        """
+        return json.loads(string[len(COMPACT_PREFIX) :], object_hook=self._decode_object)
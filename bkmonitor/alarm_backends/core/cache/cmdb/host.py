@@ -145,6 +145,7 @@ class HostManager(RefreshByBizMixin, CMDBCacheManager):
     type = "host"
     CACHE_KEY = f"{CMDBCacheManager.CACHE_KEY_PREFIX}.cmdb.host"
     ObjectClass = Host
+    WATCH_RESOURCES = ("host", "host_relation")
 
     @classmethod
     def key_to_internal_value(cls, ip, bk_cloud_id=0):
@@ -210,9 +211,7 @@ class HostManager(RefreshByBizMixin, CMDBCacheManager):
                 return host
 
         # 尝试使用bk_host_id获取主机信息
-        host = cls.cache.hget(cls.CACHE_KEY, bk_host_id)
-        if host:
-            host = cls.deserialize(host)
+        host = cls.multi_get([bk_host_id])[0]
 
         # 本地缓存主机信息
         if using_mem:
@@ -249,6 +248,16 @@ class HostManager(RefreshByBizMixin, CMDBCacheManager):
                 host_key__obj_map[str(host.bk_host_id)] = host
         return host_key__obj_map
 
+    @classmethod
+    def get_biz_ids_by_event(cls, event: dict) -> set:
+        if event.get("bk_resource") != "host":
+            return super().get_biz_ids_by_event(event)
+
+        # 主机属性变更事件不包含业务信息，从缓存中获取主机所属业务，新增主机会同时产生主机关系变更事件
+        bk_host_id = (event.get("bk_detail") or {}).get("bk_host_id")
+        host = cls.get_by_id(bk_host_id) if bk_host_id else None
+        return {host.bk_biz_id} if host and host.bk_biz_id else set()
+
     @classmethod
     def refresh_by_biz(cls, bk_biz_id):
         hosts: list[Host] = api.cmdb.get_host_by_topo_node(bk_biz_id=bk_biz_id)
@@ -0,0 +1,67 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# 未命中标记，用于区分缓存的 None 值
+MISSING = object()
+
+
+class LRUCache:
+    """
+    进程内有界缓存
+    超过容量时淘汰最久未使用的数据，数据超过过期时间后视为未命中
+    """
+
+    def __init__(self, maxsize: int, ttl: int, copy_on_read: bool = False):
+        """
+        :param copy_on_read: 是否每次读取返回新的对象，调用方修改返回值时不影响缓存及其他调用方
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.copy_on_read = copy_on_read
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, default=MISSING):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return default
+
+            expire_time, value = item
+            if expire_time < time.time():
+                del self.data[key]
+                return default
+
+            self.data.move_to_end(key)
+        return pickle.loads(value) if self.copy_on_read else value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+
+        if self.copy_on_read:
+            value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.data[key] = (time.time() + self.ttl, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
@@ -29,6 +29,7 @@ class ServiceInstanceManager(RefreshByBizMixin, CMDBCacheManager):
         prefix=CMDBCacheManager.CACHE_KEY_PREFIX
     )
     ObjectClass = ServiceInstance
+    WATCH_RESOURCES = ("host_relation", "module", "process_instance_relation")
 
     @classmethod
     def key_to_internal_value(cls, service_instance_id):
@@ -46,6 +47,20 @@ class ServiceInstanceManager(RefreshByBizMixin, CMDBCacheManager):
         """
         return super().get(service_instance_id)
 
+    @classmethod
+    def get_biz_ids_by_event(cls, event: dict) -> set:
+        if event.get("bk_resource") != "process_instance_relation":
+            return super().get_biz_ids_by_event(event)
+
+        # 进程实例关系变更事件不包含业务信息，从主机缓存中获取进程所在主机的业务
+        detail = event.get("bk_detail") or {}
+        bk_host_id = detail.get("bk_host_id")
+        if not bk_host_id and detail.get("service_instance_id"):
+            instance = cls.get(detail["service_instance_id"])
+            bk_host_id = instance.bk_host_id if instance else None
+        host = HostManager.get_by_id(bk_host_id) if bk_host_id else None
+        return {host.bk_biz_id} if host and host.bk_biz_id else set()
+
     @classmethod
     def refresh_by_biz(cls, bk_biz_id):
         """
@@ -21,6 +21,7 @@ class TopoManager(RefreshByBizMixin, CMDBCacheManager):
     ObjectClass = TopoNode
     type = "topo"
     CACHE_KEY = f"{CMDBCacheManager.CACHE_KEY_PREFIX}.cmdb.topo"
+    WATCH_RESOURCES = ("set", "module", "mainline_instance")
 
     @classmethod
     def key_to_internal_value(cls, bk_obj_id, bk_inst_id):
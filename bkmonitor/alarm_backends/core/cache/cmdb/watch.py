@@ -0,0 +1,45 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import time
+
+from django.conf import settings
+
+from alarm_backends.core.cache.cmdb.host import HostManager
+from alarm_backends.core.cache.cmdb.service_instance import ServiceInstanceManager
+from alarm_backends.core.cache.cmdb.topo import TopoManager
+from alarm_backends.core.lock.service_lock import share_lock
+from bkmonitor.utils.thread_backend import ThreadPool
+
+
+def refresh(manager):
+    """
+    刷新单个缓存
+    默认根据资源变更事件增量刷新，超过全量刷新周期或增量刷新不可用时进行全量刷新，用于兜底对账
+    """
+    last_refresh_time = manager.get_last_refresh_time()
+    if time.time() - last_refresh_time < settings.CMDB_CACHE_FULL_REFRESH_INTERVAL:
+        if manager.refresh_incremental():
+            return
+    manager.refresh()
+
+
+@share_lock(ttl=3600, identify="cmdb_cache_watch_refresh")
+def main():
+    if not settings.CMDB_CACHE_INCREMENTAL_REFRESH:
+        return
+
+    # 服务实例缓存依赖主机缓存补全IP信息，需要先刷新主机缓存
+    refresh(HostManager)
+
+    pool = ThreadPool(2)
+    pool.map_ignore_exception(refresh, [TopoManager, ServiceInstanceManager])
+    pool.close()
+    pool.join()
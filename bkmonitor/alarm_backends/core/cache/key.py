@@ -206,6 +206,17 @@ DATA_LIST_KEY = register_key_with_config(
     }
 )
 
+DATA_LIST_COLUMNAR_KEY = register_key_with_config(
+    {
+        "label": "[access]待检测数据队列中列式数据块统计",
+        "key_type": "hash",
+        "key_tpl": "access.data.columnar.{strategy_id}.{item_id}",
+        "field_tpl": "{field}",
+        "ttl": 30 * CONST_MINUTES,
+        "backend": "queue",
+    }
+)
+
 DATA_SIGNAL_KEY = register_key_with_config(
     {
         "label": "[access]待检测数据信号队列",
@@ -333,6 +344,27 @@ STRATEGY_TOKEN_BUCKET_KEY = register_key_with_config(
     }
 )
 
+ACCESS_GROUP_COST_KEY = register_key_with_config(
+    {
+        "label": "[access]策略分组数据拉取耗时(指数滑动平均)",
+        "key_type": "hash",
+        "key_tpl": "access.data.cost",
+        "field_tpl": "{strategy_group_key}",
+        "ttl": CONST_ONE_HOUR,
+        "backend": "service",
+    }
+)
+
+DISPATCH_TARGET_COST_KEY = register_key_with_config(
+    {
+        "label": "[dispatch]后台目标分配使用的目标代价快照",
+        "key_type": "string",
+        "key_tpl": "dispatch.target_cost.{path_prefix}",
+        "ttl": 10 * CONST_MINUTES,
+        "backend": "service",
+    }
+)
+
 QOS_CONTROL_KEY = register_key_with_config(
     {
         "label": "[access]QOS控制开关",
@@ -618,6 +650,37 @@ ALERT_SHIELD_SNAPSHOT = register_key_with_config(
     }
 )
 
+ALERT_ACTIVE_INDEX_KEY = register_key_with_config(
+    {
+        "label": "[alert]策略下的活跃告警索引",
+        "key_type": "hash",
+        "key_tpl": "alert.active_index.{strategy_id}",
+        "field_tpl": "{alert_id}",
+        "ttl": CONST_ONE_DAY,
+        "backend": "service",
+    }
+)
+
+ALERT_ACTIVE_STRATEGY_KEY = register_key_with_config(
+    {
+        "label": "[alert]有活跃告警的策略列表",
+        "key_type": "sorted_set",
+        "key_tpl": "alert.active_index.strategies",
+        "ttl": CONST_ONE_DAY,
+        "backend": "service",
+    }
+)
+
+ALERT_ACTIVE_INDEX_SWEEP_KEY = register_key_with_config(
+    {
+        "label": "[alert]活跃告警索引最近一次一致性校验时间",
+        "key_type": "string",
+        "key_tpl": "alert.active_index.sweep",
+        "ttl": 30 * CONST_MINUTES,
+        "backend": "service",
+    }
+)
+
 #####################################################
 #            fta action模块相关队列                   #
 #####################################################
@@ -951,6 +1014,16 @@ APM_TOPO_DISCOVER_LOCK = register_key_with_config(
     }
 )
 
+APM_TOPO_DISCOVER_WATERMARK_KEY = register_key_with_config(
+    {
+        "label": "[apm]TOPO自动发现已处理的时间位置",
+        "key_type": "string",
+        "key_tpl": "apm.tasks.topo.discover.watermark.{bk_biz_id}:{app_name}",
+        "ttl": CONST_ONE_DAY,
+        "backend": "service",
+    }
+)
+
 APM_DATASOURCE_DISCOVER_LOCK = register_key_with_config(
     {
         "label": "[apm]数据源自动发现周期锁",
@@ -39,7 +39,7 @@ from bkmonitor.models import (
     StrategyModel,
 )
 from bkmonitor.strategy.new_strategy import Strategy, parse_metric_id
-from bkmonitor.utils.common_utils import chunks, count_md5
+from bkmonitor.utils.common_utils import chunks, count_md5, safe_int
 from bkmonitor.utils.kubernetes import is_k8s_target
 from bkmonitor.utils.tenant import bk_biz_id_to_bk_tenant_id
 from constants.cmdb import TargetNodeType
@@ -87,6 +87,15 @@ class StrategyCacheManager(CacheManager):
     fake_event_agg_interval = 60
     # 实例维度
     instance_dimensions = {"bk_target_ip", "bk_target_service_instance_id", "bk_host_id"}
+    # 支持合并查询的数据源
+    coalesce_data_sources = {
+        (DataSourceLabel.BK_MONITOR_COLLECTOR, DataTypeLabel.TIME_SERIES),
+        (DataSourceLabel.CUSTOM, DataTypeLabel.TIME_SERIES),
+    }
+    # 支持合并查询的聚合方法，按更细的维度聚合后可以再次聚合得到相同结果
+    coalesce_agg_methods = {"SUM", "MAX", "MIN", "COUNT"}
+    # 支持合并查询的条件方法，查询结果需要在进程内按条件重新过滤
+    coalesce_condition_methods = {"eq", "neq"}
     cache = Cache("cache-strategy")
 
     @classmethod
@@ -489,6 +498,53 @@ class StrategyCacheManager(CacheManager):
             else {"expression": item["expression"], "query_configs": configs}
         )
 
+    @classmethod
+    def get_query_coalesce_key(cls, bk_biz_id: int, item: dict) -> str:
+        """
+        生成监控项合并查询key，key相同的策略分组可以合并为一次查询，不支持合并时返回空字符串
+        合并查询时维度取并集，条件取或，因此只忽略维度和条件，其他查询参数必须一致
+        """
+        query_configs = item.get("query_configs") or []
+        if len(query_configs) != 1 or len((item.get("expression") or "").strip(" ")) > 1 or item.get("functions"):
+            return ""
+
+        query_config = query_configs[0]
+        if (
+            (query_config["data_source_label"], query_config["data_type_label"]) not in cls.coalesce_data_sources
+            or query_config.get("agg_method") not in cls.coalesce_agg_methods
+            or not query_config.get("metric_field")
+            or query_config.get("functions")
+            or query_config.get("promql")
+            or query_config.get("values")
+            or query_config.get("intelligent_detect")
+        ):
+            return ""
+
+        fields = {dimension for dimension in query_config.get("agg_dimension") or [] if dimension}
+        for condition in query_config.get("agg_condition") or []:
+            if condition.get("method") not in cls.coalesce_condition_methods:
+                return ""
+            fields.add(condition["key"])
+
+        # cmdb 节点维度的查询会切换查询方式，不参与合并
+        if fields & {"bk_obj_id", "bk_inst_id"}:
+            return ""
+
+        return count_md5(
+            {
+                "bk_biz_id": int(bk_biz_id),
+                "data_source_label": query_config["data_source_label"],
+                "data_type_label": query_config["data_type_label"],
+                "result_table_id": query_config.get("result_table_id"),
+                "data_label": query_config.get("data_label", ""),
+                "metric_field": query_config["metric_field"],
+                "alias": query_config.get("alias") or query_config["metric_field"],
+                "agg_method": query_config["agg_method"],
+                "agg_interval": query_config.get("agg_interval"),
+                "time_delay": safe_int(item.get("time_delay"), 0),
+            }
+        )
+
     @classmethod
     def is_disabled_strategy(cls, strategy: dict) -> bool:
         """
@@ -926,6 +982,11 @@ class StrategyCacheManager(CacheManager):
                     strategy_groups[item["query_md5"]][strategy["id"]].append(item["id"])
                     # 补充业务信息
                     strategy_groups[item["query_md5"]]["bk_biz_id"] = strategy["bk_biz_id"]
+                    # 补充合并查询key
+                    if "coalesce_key" not in strategy_groups[item["query_md5"]]:
+                        strategy_groups[item["query_md5"]]["coalesce_key"] = cls.get_query_coalesce_key(
+                            strategy["bk_biz_id"], item
+                        )
                     # interval
                     # 补充周期缓存
                     for config in item.get("query_configs", []):
@@ -15,6 +15,7 @@ from itertools import chain
 from typing import Dict
 
 import arrow
+from django.conf import settings
 from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
 
@@ -105,75 +106,211 @@ class CheckMixin(object):
             self.recover(total_no_data_md5[0])
 
             # 5. 生成异常记录，生成规则：1）当前监测点无数据 or 2）当前监测点有数据，但是数据上报时间晚于 last_check_point
-            anomaly_data = []
-            target_dimensions_md5 = []
-            last_check_cache_key = key.LAST_CHECKPOINTS_CACHE_KEY.get_key(strategy_id=self.strategy.id, item_id=self.id)
-            for target_inst_dms in target_instance_dimensions:
-                target_dms_md5 = count_md5(target_inst_dms)
-                target_dimensions_md5.append(target_dms_md5)
-                # 之前检测的数据最后上报点
-                last_checkpoint_cache_field = key.LAST_CHECKPOINTS_CACHE_KEY.get_field(
-                    dimensions_md5=target_dms_md5,
-                    level=self.no_data_level,
+            if settings.NO_DATA_BATCH_CHECK:
+                anomaly_data, target_dimensions_md5 = self._batch_check(
+                    check_timestamp, target_instance_dimensions, missing_target_instances, dimensions_md5_timestamp
                 )
-                last_point = key.LAST_CHECKPOINTS_CACHE_KEY.client.hget(
-                    last_check_cache_key, last_checkpoint_cache_field
+            else:
+                anomaly_data, target_dimensions_md5 = self._check(
+                    check_timestamp, target_instance_dimensions, missing_target_instances, dimensions_md5_timestamp
                 )
-                if target_dms_md5 not in dimensions_md5_timestamp or (
-                    last_point and dimensions_md5_timestamp[target_dms_md5] < int(last_point)
-                ):
-                    # 如果存在主机维度，判断其是否存在于业务中
-                    if not self._is_host_dimension_in_business(target_inst_dms):
-                        self.recover(target_dms_md5)
-                        continue
 
-                    anomaly_data.append(self._produce_anomaly_info(check_timestamp, target_inst_dms, target_dms_md5))
-                    logger.warning(
-                        (
-                            "[nodata] strategy({strategy_id}) item({item_id}) produce anomaly info, "
-                            "target_inst_dms({target_inst_dms}), target_dms_md5({target_dms_md5}), "
-                            "check_timestamp({check_timestamp}), last_point({last_point})"
-                        ).format(
-                            strategy_id=self.strategy.id,
-                            item_id=self.id,
-                            target_inst_dms=target_inst_dms,
-                            target_dms_md5=target_dms_md5,
-                            check_timestamp=check_timestamp,
-                            last_point=last_point,
-                        )
-                    )
-                else:
-                    # recovery 历史告警事件
+        # 7. 将当前维度数据和历史维度数据的并集缓存
+        self._update_dimensions_checkpoint(
+            check_timestamp,
+            target_instance_dimensions,
+            target_dimensions_md5,
+            data_dimensions,
+            data_dimensions_mds,
+            dimensions_md5_timestamp,
+        )
+        return anomaly_data
+
+    def _check(self, check_timestamp, target_instance_dimensions, missing_target_instances, dimensions_md5_timestamp):
+        """
+        逐个维度检测目标实例是否无数据
+        :return: (异常记录, 目标维度md5列表)
+        """
+        anomaly_data = []
+        target_dimensions_md5 = []
+        last_check_cache_key = key.LAST_CHECKPOINTS_CACHE_KEY.get_key(strategy_id=self.strategy.id, item_id=self.id)
+        for target_inst_dms in target_instance_dimensions:
+            target_dms_md5 = count_md5(target_inst_dms)
+            target_dimensions_md5.append(target_dms_md5)
+            # 之前检测的数据最后上报点
+            last_checkpoint_cache_field = key.LAST_CHECKPOINTS_CACHE_KEY.get_field(
+                dimensions_md5=target_dms_md5,
+                level=self.no_data_level,
+            )
+            last_point = key.LAST_CHECKPOINTS_CACHE_KEY.client.hget(last_check_cache_key, last_checkpoint_cache_field)
+            if target_dms_md5 not in dimensions_md5_timestamp or (
+                last_point and dimensions_md5_timestamp[target_dms_md5] < int(last_point)
+            ):
+                # 如果存在主机维度，判断其是否存在于业务中
+                if not self._is_host_dimension_in_business(target_inst_dms):
                     self.recover(target_dms_md5)
+                    continue
 
-            # 6. 如果有不存在的目标实例，生成异常记录
-            for missing_target_inst in missing_target_instances:
-                missing_target_md5 = count_md5(missing_target_inst)
-                anomaly_data.append(
-                    self._produce_anomaly_info(check_timestamp, missing_target_inst, missing_target_md5)
-                )
+                anomaly_data.append(self._produce_anomaly_info(check_timestamp, target_inst_dms, target_dms_md5))
                 logger.warning(
                     (
                         "[nodata] strategy({strategy_id}) item({item_id}) produce anomaly info, "
-                        "missing_target_inst({missing_target_inst}), missing_target_md5({missing_target_md5}), "
-                        "check_timestamp({check_timestamp})"
+                        "target_inst_dms({target_inst_dms}), target_dms_md5({target_dms_md5}), "
+                        "check_timestamp({check_timestamp}), last_point({last_point})"
                     ).format(
                         strategy_id=self.strategy.id,
                         item_id=self.id,
-                        missing_target_inst=missing_target_inst,
-                        missing_target_md5=missing_target_md5,
+                        target_inst_dms=target_inst_dms,
+                        target_dms_md5=target_dms_md5,
                         check_timestamp=check_timestamp,
+                        last_point=last_point,
                     )
                 )
-        # 7. 将当前维度数据和历史维度数据的并集缓存
-        self._update_dimensions_checkpoint(
-            check_timestamp,
-            target_instance_dimensions,
-            target_dimensions_md5,
-            data_dimensions,
-            data_dimensions_mds,
-            dimensions_md5_timestamp,
+            else:
+                # recovery 历史告警事件
+                self.recover(target_dms_md5)
+
+        # 6. 如果有不存在的目标实例，生成异常记录
+        for missing_target_inst in missing_target_instances:
+            missing_target_md5 = count_md5(missing_target_inst)
+            anomaly_data.append(self._produce_anomaly_info(check_timestamp, missing_target_inst, missing_target_md5))
+            logger.warning(
+                (
+                    "[nodata] strategy({strategy_id}) item({item_id}) produce anomaly info, "
+                    "missing_target_inst({missing_target_inst}), missing_target_md5({missing_target_md5}), "
+                    "check_timestamp({check_timestamp})"
+                ).format(
+                    strategy_id=self.strategy.id,
+                    item_id=self.id,
+                    missing_target_inst=missing_target_inst,
+                    missing_target_md5=missing_target_md5,
+                    check_timestamp=check_timestamp,
+                )
+            )
+        return anomaly_data, target_dimensions_md5
+
+    def _batch_check(
+        self, check_timestamp, target_instance_dimensions, missing_target_instances, dimensions_md5_timestamp
+    ):
+        """
+        批量检测目标实例是否无数据，检测结果与逐个维度检测一致
+        1. 按块通过 HMGET 读取维度的最后检测点
+        2. 在内存中判断无数据维度
+        3. 异常周期的读取、首次异常点的写入及恢复按块通过 pipeline 完成
+        :return: (异常记录, 目标维度md5列表)
+        """
+        anomaly_data = []
+        target_dimensions_md5 = [count_md5(target_inst_dms) for target_inst_dms in target_instance_dimensions]
+        chunk_size = settings.NO_DATA_BATCH_CHECK_CHUNK_SIZE
+        for start in range(0, len(target_dimensions_md5), chunk_size):
+            chunk_dimensions = target_instance_dimensions[start : start + chunk_size]
+            chunk_md5 = target_dimensions_md5[start : start + chunk_size]
+            last_points = self._get_last_checkpoints(chunk_md5)
+
+            no_data_targets = []
+            recover_md5 = []
+            for target_inst_dms, target_dms_md5, last_point in zip(chunk_dimensions, chunk_md5, last_points):
+                if target_dms_md5 not in dimensions_md5_timestamp or (
+                    last_point and dimensions_md5_timestamp[target_dms_md5] < int(last_point)
+                ):
+                    # 如果存在主机维度，判断其是否存在于业务中
+                    if not self._is_host_dimension_in_business(target_inst_dms):
+                        recover_md5.append(target_dms_md5)
+                        continue
+                    no_data_targets.append((target_inst_dms, target_dms_md5, last_point))
+                else:
+                    # recovery 历史告警事件
+                    recover_md5.append(target_dms_md5)
+
+            for anomaly_info, (target_inst_dms, target_dms_md5, last_point) in zip(
+                self._batch_produce_anomaly_info(check_timestamp, no_data_targets, recover_md5), no_data_targets
+            ):
+                anomaly_data.append(anomaly_info)
+                logger.warning(
+                    f"[nodata] strategy({self.strategy.id}) item({self.id}) produce anomaly info, "
+                    f"target_inst_dms({target_inst_dms}), target_dms_md5({target_dms_md5}), "
+                    f"check_timestamp({check_timestamp}), last_point({last_point})"
+                )
+
+        # 6. 如果有不存在的目标实例，生成异常记录
+        for start in range(0, len(missing_target_instances), chunk_size):
+            chunk_instances = missing_target_instances[start : start + chunk_size]
+            chunk_md5 = [count_md5(missing_target_inst) for missing_target_inst in chunk_instances]
+            missing_targets = list(zip(chunk_instances, chunk_md5, self._get_last_checkpoints(chunk_md5)))
+            for anomaly_info, (missing_target_inst, missing_target_md5, _last_point) in zip(
+                self._batch_produce_anomaly_info(check_timestamp, missing_targets, []), missing_targets
+            ):
+                anomaly_data.append(anomaly_info)
+                logger.warning(
+                    f"[nodata] strategy({self.strategy.id}) item({self.id}) produce anomaly info, "
+                    f"missing_target_inst({missing_target_inst}), missing_target_md5({missing_target_md5}), "
+                    f"check_timestamp({check_timestamp})"
+                )
+        return anomaly_data, target_dimensions_md5
+
+    def _get_last_checkpoints(self, dimensions_md5_list):
+        """
+        批量获取维度的最后检测点
+        """
+        if not dimensions_md5_list:
+            return []
+        return key.LAST_CHECKPOINTS_CACHE_KEY.client.hmget(
+            key.LAST_CHECKPOINTS_CACHE_KEY.get_key(strategy_id=self.strategy.id, item_id=self.id),
+            [
+                key.LAST_CHECKPOINTS_CACHE_KEY.get_field(dimensions_md5=dimensions_md5, level=self.no_data_level)
+                for dimensions_md5 in dimensions_md5_list
+            ],
         )
+
+    def _batch_produce_anomaly_info(self, check_timestamp, no_data_targets, recover_md5):
+        """
+        批量生成异常记录并恢复维度
+        :param no_data_targets: [(维度, 维度md5, 最后检测点)]
+        :param recover_md5: 需要恢复的维度md5
+        """
+        anomaly_key = key.NO_DATA_LAST_ANOMALY_CHECKPOINTS_CACHE_KEY
+        cache_key = anomaly_key.get_key()
+        client = anomaly_key.client
+
+        fields = [
+            anomaly_key.get_field(strategy_id=self.strategy.id, item_id=self.id, dimensions_md5=target_dms_md5)
+            for _target, target_dms_md5, _last_point in no_data_targets
+        ]
+        last_anomaly_points = client.hmget(cache_key, fields) if fields else []
+
+        pipeline = client.pipeline(transaction=False)
+        anomaly_data = []
+        first_anomaly = False
+        for (target_inst_dms, target_dms_md5, last_point), field, last_anomaly_point in zip(
+            no_data_targets, fields, last_anomaly_points
+        ):
+            if not last_anomaly_point:
+                # 记录首次出现无数据告警时的检测点，同一批次中重复的维度沿用该检测点
+                last_anomaly_point = check_timestamp
+                pipeline.hset(cache_key, field, check_timestamp)
+                first_anomaly = True
+            anomaly_data.append(
+                self._produce_anomaly_info(
+                    check_timestamp,
+                    target_inst_dms,
+                    target_dms_md5,
+                    no_data_period=self._calc_no_data_period(check_timestamp, last_point),
+                    anomaly_period=self._calc_anomaly_period(check_timestamp, last_anomaly_point),
+                )
+            )
+
+        if recover_md5:
+            pipeline.hdel(
+                cache_key,
+                *[
+                    anomaly_key.get_field(strategy_id=self.strategy.id, item_id=self.id, dimensions_md5=dimensions_md5)
+                    for dimensions_md5 in recover_md5
+                ],
+            )
+        if first_anomaly:
+            pipeline.expire(cache_key, anomaly_key.ttl)
+        if first_anomaly or recover_md5:
+            pipeline.execute()
         return anomaly_data
 
     @staticmethod
@@ -240,8 +377,7 @@ class CheckMixin(object):
             ),
         )
         if last_anomaly_point:
-            agg_interval = int(self.query_configs[0]["agg_interval"])
-            anomaly_period = (check_timestamp - int(float(last_anomaly_point))) // agg_interval + 1
+            anomaly_period = self._calc_anomaly_period(check_timestamp, last_anomaly_point)
         else:
             anomaly_period = 1
             # 记录首次出现无数据告警时的检测点
@@ -264,16 +400,29 @@ class CheckMixin(object):
             key.LAST_CHECKPOINTS_CACHE_KEY.get_key(strategy_id=self.strategy.id, item_id=self.id),
             key.LAST_CHECKPOINTS_CACHE_KEY.get_field(dimensions_md5=dimensions_md5, level=self.no_data_level),
         )
-        if last_check_point:
-            agg_interval = int(self.query_configs[0]["agg_interval"])
-            no_data_period = (check_timestamp - int(float(last_check_point))) // agg_interval
-            return no_data_period
-        else:
+        return self._calc_no_data_period(check_timestamp, last_check_point)
+
+    def _calc_anomaly_period(self, check_timestamp, last_anomaly_point):
+        agg_interval = int(self.query_configs[0]["agg_interval"])
+        return (check_timestamp - int(float(last_anomaly_point))) // agg_interval + 1
+
+    def _calc_no_data_period(self, check_timestamp, last_check_point):
+        if not last_check_point:
             return 0
+        agg_interval = int(self.query_configs[0]["agg_interval"])
+        return (check_timestamp - int(float(last_check_point))) // agg_interval
 
-    def _produce_anomaly_info(self, check_timestamp, target_dimension, target_dms_md5):
-        no_data_period = self._count_no_data_period(check_timestamp, target_dms_md5)
-        anomaly_period = self._count_anomaly_period(check_timestamp, target_dms_md5)
+    def _produce_anomaly_info(
+        self, check_timestamp, target_dimension, target_dms_md5, no_data_period=None, anomaly_period=None
+    ):
+        """
+        :param no_data_period: 无数据上报丢失周期，批量检测时预先计算，为空时从缓存读取
+        :param anomaly_period: 无数据检测异常周期，批量检测时预先计算，为空时从缓存读取
+        """
+        if no_data_period is None:
+            no_data_period = self._count_no_data_period(check_timestamp, target_dms_md5)
+        if anomaly_period is None:
+            anomaly_period = self._count_anomaly_period(check_timestamp, target_dms_md5)
         if no_data_period > 0:
             anomaly_message = _("当前指标({})已经有{}个周期无数据上报").format(self.name, no_data_period)
             if anomaly_period < no_data_period:
@@ -368,24 +517,48 @@ class CheckMixin(object):
             redis_pipeline.execute()
 
         # 更新last_checkpoint，计算无数据
-        for _dimensions_md5, point_timestamp in list(dimensions_md5_timestamp.items()):
-            try:
-                CheckResult.update_last_checkpoint_by_d_md5(
-                    self.strategy.id,
-                    self.id,
-                    _dimensions_md5,
-                    point_timestamp,
-                    self.no_data_level,
-                )
-            except Exception as e:
-                msg = "set nodata check result cache last_check_point error:%s" % e
-                logger.exception(msg)
+        if settings.NO_DATA_BATCH_CHECK:
+            self._batch_update_last_checkpoints(dimensions_md5_timestamp)
+        else:
+            for _dimensions_md5, point_timestamp in list(dimensions_md5_timestamp.items()):
+                try:
+                    CheckResult.update_last_checkpoint_by_d_md5(
+                        self.strategy.id,
+                        self.id,
+                        _dimensions_md5,
+                        point_timestamp,
+                        self.no_data_level,
+                    )
+                except Exception as e:
+                    msg = f"set nodata check result cache last_check_point error:{e}"
+                    logger.exception(msg)
         # 记录每个策略监控项的最后无数据检测时间，避免同一时刻的数据被多次检测，否则会导致除了第一次能取到数据，其他检测都报无数据
         CheckResult.update_last_checkpoint_by_d_md5(
             self.strategy.id, self.id, LATEST_NO_DATA_CHECK_POINT, check_timestamp, self.no_data_level
         )
         CheckResult.expire_last_checkpoint_cache(strategy_id=self.strategy.id, item_id=self.id)
 
+    def _batch_update_last_checkpoints(self, dimensions_md5_timestamp):
+        """
+        按块通过 pipeline 更新维度的最后检测点
+        """
+        client = key.LAST_CHECKPOINTS_CACHE_KEY.client
+        cache_key = key.LAST_CHECKPOINTS_CACHE_KEY.get_key(strategy_id=self.strategy.id, item_id=self.id)
+        checkpoints = list(dimensions_md5_timestamp.items())
+        chunk_size = settings.NO_DATA_BATCH_CHECK_CHUNK_SIZE
+        for start in range(0, len(checkpoints), chunk_size):
+            pipeline = client.pipeline(transaction=False)
+            for dimensions_md5, point_timestamp in checkpoints[start : start + chunk_size]:
+                field = key.LAST_CHECKPOINTS_CACHE_KEY.get_field(
+                    dimensions_md5=dimensions_md5, level=self.no_data_level
+                )
+                pipeline.hset(cache_key, field, point_timestamp)
+            try:
+                pipeline.execute()
+            except Exception as e:
+                msg = "set nodata check result cache last_check_point error:%s" % e
+                logger.exception(msg)
+
     def recover(self, dimensions_md5):
         key.NO_DATA_LAST_ANOMALY_CHECKPOINTS_CACHE_KEY.client.hdel(
             key.NO_DATA_LAST_ANOMALY_CHECKPOINTS_CACHE_KEY.get_key(),
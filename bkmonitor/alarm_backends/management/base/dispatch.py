@@ -9,9 +9,16 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import json
+import logging
 
+from django.conf import settings
+
+from alarm_backends.core.cache import key
 from alarm_backends.management.base.protocol import AbstractDispatchMixin
-from alarm_backends.management.hashring import HashRing
+from alarm_backends.management.hashring import BoundedLoadHashRing, HashRing
+
+logger = logging.getLogger(__name__)
 
 
 class DefaultDispatchMixin(AbstractDispatchMixin):
@@ -22,7 +29,17 @@ class DefaultDispatchMixin(AbstractDispatchMixin):
         targets = self.query_host_targets()
 
         host_targets_dict = {host: list() for host in hosts}
-        if targets:
+        if not targets:
+            return targets, host_targets_dict
+
+        target_costs = self.get_target_costs_snapshot(targets) if settings.DISPATCH_BOUNDED_LOAD_ENABLED else {}
+        if target_costs:
+            # 按目标代价分配，避免单个大业务将主机压满
+            host_ring = BoundedLoadHashRing(hosts, load_factor=settings.DISPATCH_BOUNDED_LOAD_FACTOR)
+            target_hosts = host_ring.assign({target: target_costs.get(str(target), 1) for target in targets})
+            for target in targets:
+                host_targets_dict[target_hosts[target]].append(target)
+        else:
             host_ring = HashRing(hosts)
             for target in targets:
                 host = host_ring.get_node(target)
@@ -30,6 +47,38 @@ class DefaultDispatchMixin(AbstractDispatchMixin):
 
         return targets, host_targets_dict
 
+    def get_target_costs_snapshot(self, targets) -> dict[str, int]:
+        """
+        获取各主机共用的目标代价快照: 目标 -> 取整后的代价
+        各主机独立计算分配结果，为保证分配一致，代价由首个发现快照缺失的主机计算并发布，
+        快照有效期内所有主机使用同一份代价，不直接使用实时变化的代价
+        """
+        client = key.DISPATCH_TARGET_COST_KEY.client
+        cache_key = key.DISPATCH_TARGET_COST_KEY.get_key(path_prefix=self._PATH_PREFIX_)
+        try:
+            snapshot = client.get(cache_key)
+            if snapshot is None:
+                target_costs = self.query_target_costs(targets)
+                if not target_costs:
+                    return {}
+                snapshot = json.dumps(
+                    {str(target): BoundedLoadHashRing.quantize_cost(cost) for target, cost in target_costs.items()}
+                )
+                # 只有首个写入的主机发布快照，其他主机以已发布的快照为准
+                if not client.set(cache_key, snapshot, nx=True, ex=key.DISPATCH_TARGET_COST_KEY.ttl):
+                    snapshot = client.get(cache_key)
+            return json.loads(snapshot) if snapshot else {}
+        except Exception as e:  # noqa
+            logger.warning(f"get target costs snapshot({cache_key}) failed: {e}")
+            return {}
+
+    def query_target_costs(self, targets):
+        """
+        获取目标的代价(如处理耗时)，代价需要来自共享存储，由 get_target_costs_snapshot 发布为各主机共用的快照
+        返回空时按目标数量均衡分配
+        """
+        return {}
+
     def dispatch_for_host(self, hosts):
         targets, host_targets_dict = self.dispatch_all_hosts(hosts)
 
@@ -10,7 +10,9 @@ specific language governing permissions and limitations under the License.
 """
 
 
+import json
 import logging
+from collections import defaultdict
 
 from django.conf import settings
 
@@ -19,6 +21,8 @@ from alarm_backends.core.cache.strategy import StrategyCacheManager
 from alarm_backends.core.cluster import filter_bk_biz_ids
 from alarm_backends.management.base.base import ConsulDispatchCommand
 from alarm_backends.management.base.loaders import load_handler_cls
+from alarm_backends.service.access import AccessType
+from alarm_backends.service.access.scheduler import AccessCostRecorder
 from bkmonitor import models
 
 logger = logging.getLogger(__name__)
@@ -111,3 +115,24 @@ class Command(ConsulDispatchCommand):
         data.sort()
 
         return data
+
+    def query_target_costs(self, targets):
+        """
+        数据拉取按业务下各策略分组的拉取耗时之和分配业务
+        """
+        if self._ACCESS_TYPE_ != AccessType.Data:
+            return {}
+
+        group_costs = AccessCostRecorder.get_all()
+        if not group_costs:
+            return {}
+
+        biz_costs = defaultdict(float)
+        for strategy_group_key, strategy_group in StrategyCacheManager.get_all_groups().items():
+            cost = group_costs.get(strategy_group_key)
+            if cost is None:
+                continue
+            bk_biz_id = json.loads(strategy_group).get("bk_biz_id")
+            if bk_biz_id is not None:
+                biz_costs[bk_biz_id] += cost
+        return biz_costs
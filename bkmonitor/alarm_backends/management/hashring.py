@@ -10,6 +10,7 @@ specific language governing permissions and limitations under the License.
 """
 
 
+import math
 from bisect import bisect_left
 from hashlib import md5
 
@@ -44,3 +45,69 @@ class HashRing(object):
         h = self._hash(key)
         n = bisect_left(self.ring, h) % self.vnodes
         return self.hash2node[self.ring[n]]
+
+
+class BoundedLoadHashRing(HashRing):
+    """
+    负载有界的一致性哈希
+
+    每个目标带有代价(如单周期数据量、处理耗时)，节点容量为 平均负载 * load_factor * 节点权重占比，
+    目标从哈希位置顺时针查找第一个容量足够的节点，超出容量时溢出到下一个节点。
+    节点增减时只有落在变化节点及溢出链路上的目标会移动。
+    """
+
+    def __init__(self, nodes, load_factor=1.25, num_vnodes=2**16):
+        super().__init__(nodes, num_vnodes=num_vnodes)
+        self.load_factor = load_factor
+
+    @staticmethod
+    def quantize_cost(cost, min_cost=1):
+        """
+        代价取整为2的幂，代价小幅波动时分配结果保持不变
+        """
+        cost = max(cost or 0, min_cost)
+        return 2 ** int(round(math.log2(cost)))
+
+    def iter_nodes(self, key):
+        """
+        从哈希位置开始顺时针遍历所有节点，每个节点只返回一次
+        """
+        start = bisect_left(self.ring, self._hash(key))
+        visited = set()
+        for index in range(start, start + len(self.ring)):
+            node = self.hash2node[self.ring[index % len(self.ring)]]
+            if node in visited:
+                continue
+            visited.add(node)
+            yield node
+            if len(visited) == len(self.nodes):
+                break
+
+    def assign(self, costs):
+        """
+        分配目标到节点
+        :param costs: 目标 -> 代价
+        :return: 目标 -> 节点
+        """
+        total_weight = sum(self.nodes.values())
+        total_cost = sum(costs.values())
+        capacities = {
+            node: total_cost * self.load_factor * weight / total_weight for node, weight in self.nodes.items()
+        }
+        loads = {node: 0 for node in self.nodes}
+
+        result = {}
+        # 代价大的目标优先分配，代价相同时按哈希值排序，保证各主机计算结果一致
+        for key in sorted(costs, key=lambda k: (-costs[k], self._hash(k), str(k))):
+            cost = costs[key]
+            candidate = None
+            for node in self.iter_nodes(key):
+                if loads[node] + cost <= capacities[node]:
+                    candidate = node
+                    break
+                # 所有节点容量都不足时，分配给负载最小的节点
+                if candidate is None or loads[node] < loads[candidate]:
+                    candidate = node
+            result[key] = candidate
+            loads[candidate] += cost
+        return result
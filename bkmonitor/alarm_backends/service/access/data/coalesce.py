@@ -0,0 +1,260 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+"""
+策略分组合并查询
+
+读取同一结果表同一指标的策略分组，仅聚合维度和过滤条件不同时，合并为一次查询:
+1. 调度时按合并查询key(StrategyCacheManager.get_query_coalesce_key)将同周期的分组合并，只下发合并后的首个分组
+2. 拉取时使用各分组维度(含条件字段)的并集、条件的或进行一次查询
+3. 查询结果按各分组的条件重新过滤，并按分组的维度再次聚合，再交给各分组原有的处理流程
+"""
+
+import copy
+import logging
+import time
+from collections import defaultdict
+
+import arrow
+
+from alarm_backends.core.cache.strategy import StrategyCacheManager
+from alarm_backends.core.control.item import Item, gen_condition_matcher
+from alarm_backends.service.access.data.processor import AccessDataProcess
+from bkmonitor.data_source import load_data_source
+from bkmonitor.data_source.unify_query.query import UnifyQuery
+from bkmonitor.utils.local import local
+from core.errors.api import BKAPIError
+from core.prometheus import metrics
+
+logger = logging.getLogger("access.data")
+
+# 按更细维度聚合的结果再次聚合的方法
+REAGGREGATE_METHODS = {
+    "SUM": sum,
+    "COUNT": sum,
+    "MAX": max,
+    "MIN": min,
+}
+
+
+class QueryCoalescePlanner:
+    """
+    策略分组合并查询规划
+    """
+
+    @classmethod
+    def plan(
+        cls, interval_map: dict[int, set], coalesce_keys: dict[str, str], max_size: int
+    ) -> tuple[dict[int, set], dict[str, list[str]]]:
+        """
+        :param interval_map: 周期 -> 策略分组key
+        :param coalesce_keys: 策略分组key -> 合并查询key
+        :param max_size: 单次合并的最大分组数
+        :return: (周期 -> 需要下发的策略分组key, 下发的策略分组key -> 合并的策略分组key列表)
+        """
+        planned_interval_map = defaultdict(set)
+        coalesced_groups = {}
+        for interval, group_keys in interval_map.items():
+            buckets = defaultdict(list)
+            for strategy_group_key in sorted(group_keys):
+                coalesce_key = coalesce_keys.get(strategy_group_key)
+                if coalesce_key and max_size > 1:
+                    buckets[coalesce_key].append(strategy_group_key)
+                else:
+                    planned_interval_map[interval].add(strategy_group_key)
+
+            for members in buckets.values():
+                for index in range(0, len(members), max_size):
+                    chunk = members[index : index + max_size]
+                    # 以排序后的首个分组下发，分组不变时下发的key保持稳定
+                    planned_interval_map[interval].add(chunk[0])
+                    if len(chunk) > 1:
+                        coalesced_groups[chunk[0]] = chunk
+        return planned_interval_map, coalesced_groups
+
+
+class AccessCoalescedDataProcess:
+    """
+    合并查询多个策略分组的数据，再按分组分别处理
+    """
+
+    def __init__(self, strategy_group_key: str, coalesced_keys: list[str]):
+        self.strategy_group_key = strategy_group_key
+        self.processes = [AccessDataProcess(key) for key in dict.fromkeys([strategy_group_key, *coalesced_keys])]
+        self.pull_duration = 0
+        # 策略分组key -> 拉取耗时，合并查询的耗时由参与合并的分组均摊
+        self.pull_durations: dict[str, float] = {}
+
+    def __str__(self):
+        return f"{self.__class__.__name__}:strategy_group_key({self.strategy_group_key})"
+
+    @staticmethod
+    def get_coalesce_key(process: AccessDataProcess) -> str:
+        item = process.items[0]
+        return StrategyCacheManager.get_query_coalesce_key(item.strategy.bk_biz_id, item.item_config)
+
+    @staticmethod
+    def get_condition_fields(item: Item) -> list[str]:
+        return [condition["key"] for condition in item.query_configs[0].get("agg_condition") or []]
+
+    @classmethod
+    def build_query(cls, items: list[Item]) -> UnifyQuery:
+        """
+        生成合并查询: 维度为各分组维度及条件字段的并集，条件为各分组条件的或
+        """
+        first_item = items[0]
+        query_config = copy.deepcopy(first_item.query_configs[0])
+
+        dimensions = []
+        agg_condition = []
+        for item in items:
+            dimensions.extend(item.query.dimensions or [])
+            dimensions.extend(cls.get_condition_fields(item))
+
+            conditions = copy.deepcopy(item.query_configs[0].get("agg_condition") or [])
+            # 任一分组没有条件时，合并查询也不能带条件
+            if not conditions:
+                agg_condition = None
+            if agg_condition is None:
+                continue
+            conditions[0]["condition"] = "or"
+            agg_condition.extend(conditions)
+
+        if agg_condition:
+            agg_condition[0].pop("condition", None)
+        query_config["agg_dimension"] = sorted(set(dimensions))
+        query_config["agg_condition"] = agg_condition or []
+
+        data_source_class = load_data_source(query_config["data_source_label"], query_config["data_type_label"])
+        data_source = data_source_class.init_by_query_config(
+            query_config=query_config, name=first_item.name, bk_biz_id=first_item.strategy.bk_biz_id
+        )
+        return UnifyQuery(
+            bk_biz_id=first_item.strategy.bk_biz_id,
+            data_sources=[data_source],
+            expression=first_item.expression,
+            functions=[],
+        )
+
+    @classmethod
+    def split_points(cls, item: Item, points: list[dict], dimensions: set[str]) -> list[dict]:
+        """
+        按分组的条件过滤合并查询结果，并按分组的维度再次聚合
+        :param dimensions: 合并查询的维度
+        """
+        conditions = copy.deepcopy(item.query_configs[0].get("agg_condition") or [])
+        matcher = None
+        if conditions:
+            conditions[0].pop("condition", None)
+            matcher = gen_condition_matcher(conditions)
+
+        item_dimensions = item.query.dimensions or []
+        if matcher is None and set(item_dimensions) == dimensions:
+            return [dict(point) for point in points]
+
+        value_fields = {metric.get("alias") or metric["field"] for metric in item.query.metrics}
+        reducer = REAGGREGATE_METHODS[item.query_configs[0]["agg_method"]]
+
+        grouped = {}
+        for point in points:
+            if matcher and not matcher.is_match(point):
+                continue
+
+            group_key = (point["_time_"], *(point.get(dimension) for dimension in item_dimensions))
+            group = grouped.get(group_key)
+            if group is None:
+                group = grouped[group_key] = {dimension: point.get(dimension) for dimension in item_dimensions}
+                group["_time_"] = point["_time_"]
+                group.update({field: [] for field in value_fields})
+
+            for field in value_fields:
+                if point.get(field) is not None:
+                    group[field].append(point[field])
+
+        result = []
+        for group in grouped.values():
+            for field in value_fields:
+                group[field] = reducer(group[field]) if group[field] else None
+            result.append(group)
+        return result
+
+    def query_points(self, query: UnifyQuery, processes: list[AccessDataProcess]) -> list[dict]:
+        """
+        合并查询各分组时间范围并集内的数据
+        """
+        from_timestamp = min(process.from_timestamp for process in processes)
+        until_timestamp = max(process.until_timestamp for process in processes)
+
+        local.strategy_id = ",".join(str(item.strategy.id) for process in processes for item in process.items)
+        try:
+            points = query.query_data(from_timestamp * 1000, until_timestamp * 1000)
+        except BKAPIError as e:
+            logger.error(e)
+            points = []
+        except Exception as e:  # noqa
+            logger.exception(f"{self} query records error, {e}")
+            points = []
+        finally:
+            if getattr(local, "strategy_id", None):
+                delattr(local, "strategy_id")
+
+        for point in points:
+            point["_time_"] //= 1000
+
+        logger.info(
+            "%s coalesced %s strategy groups, dimensions(%s), records(%s), time range(%s - %s)",
+            self,
+            len(processes),
+            ",".join(query.dimensions or []),
+            len(points),
+            arrow.get(from_timestamp).format(),
+            arrow.get(until_timestamp).format(),
+        )
+        return points
+
+    def process(self):
+        now_timestamp = arrow.utcnow().timestamp
+
+        # 只合并仍然可以合并的分组，策略变更后不再满足条件的分组单独处理
+        leader_coalesce_key = ""
+        coalesced, standalone = [], []
+        for process in self.processes:
+            coalesce_key = self.get_coalesce_key(process) if process.items else ""
+            leader_coalesce_key = leader_coalesce_key or coalesce_key
+            if not coalesce_key or coalesce_key != leader_coalesce_key:
+                standalone.append(process)
+                continue
+
+            process.get_query_time_range(now_timestamp)
+            if process.from_timestamp > process.until_timestamp:
+                standalone.append(process)
+                continue
+            coalesced.append(process)
+
+        start = time.time()
+        if len(coalesced) > 1:
+            query = self.build_query([process.items[0] for process in coalesced])
+            points = self.query_points(query, coalesced)
+            dimensions = set(query.dimensions or [])
+            for process in coalesced:
+                process.prefetched_points = self.split_points(process.items[0], points, dimensions)
+            metrics.ACCESS_DATA_COALESCED_GROUP_COUNT.labels(strategy_group_key=metrics.TOTAL_TAG).inc(len(coalesced))
+        else:
+            standalone.extend(coalesced)
+            coalesced = []
+        self.pull_duration = time.time() - start
+        shared_duration = self.pull_duration / len(coalesced) if coalesced else 0
+
+        for process in coalesced + standalone:
+            process.process()
+            self.pull_duration += process.pull_duration
+            self.pull_durations[process.strategy_group_key] = process.pull_duration
+        for process in coalesced:
+            self.pull_durations[process.strategy_group_key] += shared_duration
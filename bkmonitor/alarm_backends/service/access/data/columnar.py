@@ -0,0 +1,147 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+"""
+access -> detect 待检测数据的列式编码
+
+一个item的一批数据打包为一个压缩块，写入待检测队列的一个元素中：
+{
+    "n": 2,                                   # 数据点数量
+    "keys": [["record_id", "value", ...]],    # 字段名元组表(记录字段、维度名、dimension_fields 等)
+    "symbols": ["127.0.0.1", "0", ...],       # 维度值共享字典
+    "layout": [0, 0],                         # 每条记录的字段元组下标
+    "columns": {
+        "record_id": ["xxx.1569246480", ...],
+        "time": [1569246480, ...],
+        "value": [1.38, ...],
+        "dimensions": [[1, 0, 1], ...],       # [维度名元组下标, 维度值下标...]
+        "values": [[2, 1.38, 1569246480], ...],  # [字段名元组下标, 值...]
+        "dimension_fields": [3, ...],         # 字段名元组下标
+    }
+}
+队列中 json 格式与列式格式可以混合存在，detect 按元素前缀区分
+"""
+
+import base64
+import gzip
+import json
+
+from alarm_backends.core.cache import key
+
+COLUMNAR_PREFIX = "columnar:v1:"
+
+# 维度字段，维度值使用共享字典编码
+DIMENSION_FIELDS = ("dimensions",)
+# 字典字段，字段名使用元组表编码
+DICT_FIELDS = ("values",)
+# 字符串列表字段，整体使用元组表编码
+TUPLE_FIELDS = ("dimension_fields",)
+
+
+class Interner:
+    """
+    值 -> 下标 的共享字典
+    """
+
+    def __init__(self):
+        self.table = []
+        self.index = {}
+
+    def add(self, value, identity=None):
+        identity = value if identity is None else identity
+        idx = self.index.get(identity)
+        if idx is None:
+            idx = self.index[identity] = len(self.table)
+            self.table.append(value)
+        return idx
+
+
+def is_columnar(raw: str) -> bool:
+    return raw.startswith(COLUMNAR_PREFIX)
+
+
+def encode_records(records: list[dict]) -> str:
+    """
+    将一批记录编码为列式压缩块
+    无法编码的记录结构(如维度值非标量)会抛出 TypeError/ValueError，由调用方回退为 json 格式
+    """
+    keys = Interner()
+    symbols = Interner()
+    layout = []
+    columns = {}
+
+    for data in records:
+        layout.append(keys.add(tuple(data)))
+        for field, value in data.items():
+            if field in DIMENSION_FIELDS:
+                encoded = [keys.add(tuple(value))]
+                # 区分 1/1.0/True 等哈希相同的值
+                encoded.extend(symbols.add(v, (v.__class__, v)) for v in value.values())
+            elif field in DICT_FIELDS:
+                encoded = [keys.add(tuple(value))]
+                encoded.extend(value.values())
+            elif field in TUPLE_FIELDS:
+                encoded = keys.add(tuple(value))
+            else:
+                encoded = value
+            columns.setdefault(field, []).append(encoded)
+
+    payload = {
+        "n": len(records),
+        "keys": keys.table,
+        "symbols": symbols.table,
+        "layout": layout,
+        "columns": columns,
+    }
+    content = gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), compresslevel=6)
+    return COLUMNAR_PREFIX + base64.b64encode(content).decode("utf-8")
+
+
+def decode_records(raw: str) -> list[dict]:
+    """
+    将列式压缩块解码为记录列表，与逐条 json.loads 的结果一致
+    """
+    payload = json.loads(gzip.decompress(base64.b64decode(raw[len(COLUMNAR_PREFIX) :])))
+    keys = payload["keys"]
+    symbols = payload["symbols"]
+    columns = {field: iter(column) for field, column in payload["columns"].items()}
+
+    records = []
+    for layout in payload["layout"]:
+        data = {}
+        for field in keys[layout]:
+            encoded = next(columns[field])
+            if field in DIMENSION_FIELDS:
+                data[field] = {k: symbols[v] for k, v in zip(keys[encoded[0]], encoded[1:])}
+            elif field in DICT_FIELDS:
+                data[field] = dict(zip(keys[encoded[0]], encoded[1:]))
+            elif field in TUPLE_FIELDS:
+                data[field] = list(keys[encoded])
+            else:
+                data[field] = encoded
+        records.append(data)
+    return records
+
+
+def get_queue_stats_key(strategy_id, item_id):
+    return key.DATA_LIST_COLUMNAR_KEY.get_key(strategy_id=strategy_id, item_id=item_id)
+
+
+def get_pending_count(client, output_key: str, strategy_id, item_id) -> int:
+    """
+    获取待检测队列中的数据点数量
+    队列元素可能是单条 json 记录，也可能是列式压缩块，压缩块的数量和数据点数由统计 hash 维护
+    """
+    queue_length = client.llen(output_key)
+    stats = client.hgetall(get_queue_stats_key(strategy_id, item_id)) or {}
+    batches = max(int(stats.get("batches") or 0), 0)
+    points = max(int(stats.get("points") or 0), 0)
+    # 统计过期或不一致时，至少按元素数量计算
+    return max(queue_length - min(batches, queue_length) + points, queue_length)
@@ -40,6 +40,7 @@ from alarm_backends.core.control.strategy import Strategy
 from alarm_backends.core.storage.redis import Cache
 from alarm_backends.management.hashring import HashRing
 from alarm_backends.service.access import base
+from alarm_backends.service.access.data import columnar
 from alarm_backends.service.access.data.duplicate import Duplicate
 from alarm_backends.service.access.data.filters import (
     ExpireFilter,
@@ -140,7 +141,12 @@ class BaseAccessDataProcess(base.BaseAccessProcess):
         data_list_key = data_list_key or key.DATA_LIST_KEY
         client = output_client or data_list_key.client
         output_key = data_list_key.get_key(strategy_id=item.strategy.strategy_id, item_id=item.id)
-        queue_length = client.llen(output_key)
+        # 列式格式仅用于检测队列，无数据队列保持json格式
+        use_columnar = settings.ACCESS_DATA_COLUMNAR_PUSH and data_list_key is key.DATA_LIST_KEY
+        if data_list_key is key.DATA_LIST_KEY:
+            queue_length = columnar.get_pending_count(client, output_key, item.strategy.strategy_id, item.id)
+        else:
+            queue_length = client.llen(output_key)
         # 超过最大检测长度10倍(50w)说明detect模块处理能力不足,数据将被丢弃。
         if queue_length > settings.SQL_MAX_LIMIT * 10:
             msg = (
@@ -152,14 +158,34 @@ class BaseAccessDataProcess(base.BaseAccessProcess):
             raise Exception(msg)
 
         pipeline = client.pipeline(transaction=False)
+        # 避免监控周期大于默认key过期时间，引起数据丢失
+        agg_interval = min(query_config["agg_interval"] for query_config in item.query_configs)
+        ttl = max([data_list_key.ttl, agg_interval * 5])
         _offset = 0
         while _offset < len(record_list):
             chunk_records = record_list[_offset : _offset + 10000]
-            pipeline.lpush(output_key, *[json.dumps(record.data) for record in chunk_records])
             _offset += 10000
-        # 避免监控周期大于默认key过期时间，引起数据丢失
-        agg_interval = min(query_config["agg_interval"] for query_config in item.query_configs)
-        pipeline.expire(output_key, max([data_list_key.ttl, agg_interval * 5]))
+
+            if use_columnar:
+                try:
+                    pipeline.lpush(output_key, columnar.encode_records([record.data for record in chunk_records]))
+                except (TypeError, ValueError) as e:
+                    logger.warning(
+                        "strategy(%s) item(%s) encode columnar records error, fallback to json: %s",
+                        item.strategy.strategy_id,
+                        item.id,
+                        e,
+                    )
+                else:
+                    # 记录列式数据块数量及数据点数，用于队列长度检查
+                    stats_key = columnar.get_queue_stats_key(item.strategy.strategy_id, item.id)
+                    pipeline.hincrby(stats_key, "batches", 1)
+                    pipeline.hincrby(stats_key, "points", len(chunk_records))
+                    pipeline.expire(stats_key, ttl)
+                    continue
+
+            pipeline.lpush(output_key, *[json.dumps(record.data) for record in chunk_records])
+        pipeline.expire(output_key, ttl)
         pipeline.execute()
         metrics.ACCESS_PROCESS_PUSH_DATA_COUNT.labels(strategy_id=metrics.TOTAL_TAG, type="data").inc(len(record_list))
 
@@ -246,6 +272,8 @@ class AccessDataProcess(BaseAccessDataProcess):
         self.strategy_group_key = strategy_group_key
         self.from_timestamp = None
         self.until_timestamp = None
+        # 合并查询(AccessCoalescedDataProcess)预先拉取的数据
+        self.prefetched_points: list[dict] | None = None
 
         if sub_task_id:
             self.batch_timestamp = int(sub_task_id.split(".")[0])
@@ -344,6 +372,13 @@ class AccessDataProcess(BaseAccessDataProcess):
         """
         数据源查询
         """
+        if self.prefetched_points is not None:
+            return [
+                point
+                for point in self.prefetched_points
+                if self.from_timestamp <= point["_time_"] <= self.until_timestamp
+            ]
+
         first_item = self.items[0]
 
         # 由于某些数据源需要进行策略分组，因此需要将条件置为空
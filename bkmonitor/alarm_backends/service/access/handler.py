@@ -21,7 +21,9 @@ from alarm_backends import constants
 from alarm_backends.core.cache.strategy import StrategyCacheManager
 from alarm_backends.core.handlers import base
 from alarm_backends.service.access import ACCESS_TYPE_TO_CLASS, AccessType
+from alarm_backends.service.access.data.coalesce import QueryCoalescePlanner
 from alarm_backends.service.access.data.processor import AccessRealTimeDataProcess
+from alarm_backends.service.access.scheduler import AccessCostRecorder, AccessScheduler
 from alarm_backends.service.access.tasks import (
     run_access_data,
     run_access_event_handler,
@@ -33,6 +35,7 @@ from bkmonitor.utils.common_utils import safe_int
 logger = logging.getLogger("access")
 REFRESH_STRATEGY_INFO = "refresh_agg_strategy_group_interval"
 REFRESH_TARGETS = "refresh_targets"
+DISPATCH_ACCESS_DATA = "dispatch_access_data"
 REFRESH_INTERVAL = 90
 
 
@@ -42,8 +45,11 @@ class AccessBeater(MonitorBeater):
         self.targets = targets or []
         self.max_access_data_period = 58
         self.interval_map = {}
+        # 下发的策略分组key -> 合并查询的策略分组key列表
+        self.coalesced_groups = {}
         self.service = service
         self.host_target = []
+        self.scheduler = AccessScheduler(dispatch=self.dispatch_access_data)
 
     def refresh_targets(self):
         """
@@ -90,6 +96,7 @@ class AccessBeater(MonitorBeater):
             return _interval_list, _is_qos
 
         interval_map = defaultdict(set)
+        coalesce_keys = {}
         qos_labels = getattr(settings, "QOS_DATASOURCE_LABELS") or []
         qos_interval_expand = getattr(settings, "QOS_INTERVAL_EXPAND", 3)
         strategy_groups = StrategyCacheManager.get_all_groups()
@@ -108,6 +115,7 @@ class AccessBeater(MonitorBeater):
                     break
 
             bk_biz_id = strategy_group.pop("bk_biz_id", None)
+            coalesce_key = strategy_group.pop("coalesce_key", "")
             strategy_ids = strategy_group.keys()
             if bk_biz_id is not None:
                 # 只要判定业务对应目标归属即可，因为策略组关联的策略归属同一业务
@@ -134,9 +142,36 @@ class AccessBeater(MonitorBeater):
                 )
                 min_interval *= qos_interval_expand
             interval_map[min_interval].add(strategy_group_key)
+            if coalesce_key:
+                coalesce_keys[strategy_group_key] = coalesce_key
+
+        # 读取相同结果表的策略分组合并为一次查询，只下发合并后的首个分组
+        if settings.ACCESS_QUERY_COALESCE_ENABLED:
+            interval_map, self.coalesced_groups = QueryCoalescePlanner.plan(
+                interval_map, coalesce_keys, settings.ACCESS_QUERY_COALESCE_MAX_GROUPS
+            )
+        else:
+            self.coalesced_groups = {}
 
         self.interval_map = interval_map
-        for interval, group_keys in interval_map.items():
+
+        # 按相位分散下发时，由每秒执行的调度任务统一下发各周期的分组，不再按周期批量下发
+        if settings.ACCESS_SCHEDULE_SPREAD_ENABLED:
+            costs = AccessCostRecorder.get_all()
+            # 耗时按分组分别记录，合并下发的分组耗时为各成员耗时之和
+            for strategy_group_key, members in self.coalesced_groups.items():
+                member_costs = [costs[member] for member in members if member in costs]
+                if member_costs:
+                    costs[strategy_group_key] = sum(member_costs)
+            self.scheduler.update(interval_map, costs)
+            if DISPATCH_ACCESS_DATA not in self.entries:
+                self.entries[DISPATCH_ACCESS_DATA] = ScheduleEntry(task=self.scheduler.tick, schedule=1, args=())
+            batch_intervals = {}
+        else:
+            self.entries.pop(DISPATCH_ACCESS_DATA, None)
+            batch_intervals = interval_map
+
+        for interval in batch_intervals:
             schedule_dict = {
                 "task": self.batch_access_data,
                 "schedule": interval,
@@ -149,9 +184,20 @@ class AccessBeater(MonitorBeater):
 
         intervals = list(self.entries.keys())
         for interval in intervals:
-            if interval not in interval_map and interval not in [REFRESH_STRATEGY_INFO, REFRESH_TARGETS]:
+            if interval not in batch_intervals and interval not in [
+                REFRESH_STRATEGY_INFO,
+                REFRESH_TARGETS,
+                DISPATCH_ACCESS_DATA,
+            ]:
                 self.entries.pop(interval)
 
+    def dispatch_access_data(self, strategy_group_key: str, interval: int):
+        coalesced_keys = self.coalesced_groups.get(strategy_group_key)
+        if coalesced_keys:
+            run_access_data.delay(strategy_group_key, interval=interval, coalesced_keys=coalesced_keys)
+        else:
+            run_access_data.delay(strategy_group_key, interval=interval)
+
     def batch_access_data(self, interval_key):
         """
         批量运行 Access data
@@ -159,7 +205,7 @@ class AccessBeater(MonitorBeater):
         """
         strategy_group_keys = self.interval_map.get(interval_key) or []
         for _idx, strategy_group_key in enumerate(strategy_group_keys):
-            run_access_data.delay(strategy_group_key, interval=interval_key)
+            self.dispatch_access_data(strategy_group_key, interval_key)
             if _idx % (len(strategy_group_keys) // interval_key + 1) == 0:
                 time.sleep(0.05)
         logger.info(
@@ -0,0 +1,228 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+"""
+策略分组拉取任务的相位调度
+
+同一周期的策略分组不再在周期开始时集中下发，而是分散到周期内的不同时刻:
+1. 分组按 key 的稳定哈希排序，分组增减时其他分组的相位基本不变
+2. 按排序依次累加各分组的拉取耗时，分组的相位落在其耗时区间的中点，使查询负载在周期内均匀分布
+3. 调度器每秒检查一次，下发相位已到达的分组
+4. 耗时变化后重新计算的相位在下个周期边界才生效，周期内新增的分组直接使用新相位，删除的分组立即移除，
+   相位变化不会导致分组在同一周期内漏发或重复下发
+"""
+
+import logging
+import statistics
+import threading
+import time
+import zlib
+from bisect import bisect_right
+from collections.abc import Callable
+
+from django.conf import settings
+
+from alarm_backends.core.cache import key
+from core.prometheus import metrics
+
+logger = logging.getLogger("access")
+
+
+class AccessCostRecorder:
+    """
+    策略分组拉取耗时记录，按指数滑动平均保存在 redis 中
+    """
+
+    # 新样本权重
+    SMOOTHING = 0.3
+
+    @classmethod
+    def record(cls, strategy_group_key: str, cost: float):
+        client = key.ACCESS_GROUP_COST_KEY.client
+        cache_key = key.ACCESS_GROUP_COST_KEY.get_key()
+        field = key.ACCESS_GROUP_COST_KEY.get_field(strategy_group_key=strategy_group_key)
+        try:
+            old_cost = client.hget(cache_key, field)
+            if old_cost is not None:
+                cost = float(old_cost) * (1 - cls.SMOOTHING) + cost * cls.SMOOTHING
+            client.hset(cache_key, field, round(cost, 3))
+            client.expire(cache_key, key.ACCESS_GROUP_COST_KEY.ttl)
+        except Exception as e:  # noqa
+            logger.warning(f"[AccessCostRecorder] record cost of strategy_group_key({strategy_group_key}) failed: {e}")
+
+    @classmethod
+    def get_all(cls) -> dict[str, float]:
+        try:
+            costs = key.ACCESS_GROUP_COST_KEY.client.hgetall(key.ACCESS_GROUP_COST_KEY.get_key())
+        except Exception as e:  # noqa
+            logger.warning(f"[AccessCostRecorder] get costs failed: {e}")
+            return {}
+        return {
+            (k.decode() if isinstance(k, bytes) else k): float(v) for k, v in costs.items() if v not in (None, b"", "")
+        }
+
+
+class AccessScheduler:
+    """
+    按相位分散下发策略分组拉取任务
+    """
+
+    # 单个分组的最小权重，避免耗时很短的分组挤在同一时刻
+    MIN_COST = 0.05
+    # 指标上报间隔
+    REPORT_INTERVAL = 10
+
+    def __init__(self, dispatch: Callable[[str, int], None]):
+        """
+        :param dispatch: 下发函数，参数为 (策略分组key, 周期)
+        """
+        self.dispatch = dispatch
+        # 周期 -> [(相位, 策略分组key)]，按相位排序
+        self.plans: dict[int, list[tuple[float, str]]] = {}
+        # 周期 -> 下个周期边界生效的相位
+        self.next_plans: dict[int, list[tuple[float, str]]] = {}
+        self.last_tick: float | None = None
+        self.last_report: float = 0
+        self._tick_lock = threading.Lock()
+
+    @staticmethod
+    def stable_hash(strategy_group_key: str) -> int:
+        return zlib.crc32(str(strategy_group_key).encode())
+
+    @classmethod
+    def plan(cls, interval: int, group_keys, costs: dict[str, float]) -> list[tuple[float, str]]:
+        """
+        计算周期内各分组的相位
+        :param interval: 周期
+        :param group_keys: 策略分组key
+        :param costs: 分组拉取耗时，没有记录的分组使用已知耗时的中位数
+        """
+        ordered = sorted(group_keys, key=lambda k: (cls.stable_hash(k), k))
+        if not ordered:
+            return []
+
+        known_costs = [costs[k] for k in ordered if k in costs]
+        default_cost = statistics.median(known_costs) if known_costs else 1.0
+        weights = [max(costs.get(k, default_cost), cls.MIN_COST) for k in ordered]
+        total = sum(weights)
+
+        # 只在周期的前一部分下发，为拉取留出执行时间
+        window = interval * settings.ACCESS_SCHEDULE_SPREAD_RATIO
+        # 不同周期的起点错开，避免各周期的首个分组同时下发
+        start = cls.stable_hash(str(interval)) / 2**32 * interval
+
+        phases = []
+        accumulated = 0.0
+        for strategy_group_key, weight in zip(ordered, weights):
+            phase = (start + (accumulated + weight / 2) / total * window) % interval
+            phases.append((phase, strategy_group_key))
+            accumulated += weight
+        phases.sort()
+        return phases
+
+    def update(self, interval_map: dict[int, set], costs: dict[str, float]):
+        """
+        重新计算相位，已有分组的新相位在下个周期边界生效
+        """
+        new_plans = {
+            interval: self.plan(interval, group_keys, costs)
+            for interval, group_keys in interval_map.items()
+            if interval
+        }
+        with self._tick_lock:
+            for interval in list(self.plans):
+                if interval not in new_plans:
+                    self.plans.pop(interval)
+                    self.next_plans.pop(interval, None)
+
+            for interval, phases in new_plans.items():
+                current = self.plans.get(interval)
+                if current is None:
+                    self.plans[interval] = phases
+                    continue
+
+                # 当前周期内保留已有分组的相位，新增分组使用新相位，已删除的分组不再下发
+                group_keys = {k for _, k in phases}
+                current_keys = {k for _, k in current}
+                self.plans[interval] = sorted(
+                    [(phase, k) for phase, k in current if k in group_keys]
+                    + [(phase, k) for phase, k in phases if k not in current_keys]
+                )
+                self.next_plans[interval] = phases
+
+    def _dispatch_phases(
+        self,
+        interval: int,
+        phases: list[tuple[float, str]],
+        last_tick: float,
+        now: float,
+        before_cycle: float | None = None,
+        from_cycle: float | None = None,
+    ) -> int:
+        """
+        下发 (last_tick, now] 内相位到达的分组
+        :param before_cycle: 只下发该周期之前的分组
+        :param from_cycle: 只下发该周期及之后的分组
+        """
+        dispatched = 0
+        for phase, strategy_group_key in phases:
+            # 相位每个周期到达一次: interval * n + phase
+            cycle = (now - phase) // interval
+            if cycle <= (last_tick - phase) // interval:
+                continue
+            if before_cycle is not None and cycle >= before_cycle:
+                continue
+            if from_cycle is not None and cycle < from_cycle:
+                continue
+            planned_time = cycle * interval + phase
+            try:
+                self.dispatch(strategy_group_key, interval)
+            except Exception as e:  # noqa
+                logger.exception(f"[AccessScheduler] dispatch strategy_group_key({strategy_group_key}): {e}")
+                continue
+            dispatched += 1
+            metrics.ACCESS_SCHEDULE_LAG.labels(interval=interval).observe(now - planned_time)
+        return dispatched
+
+    def tick(self, now: float | None = None):
+        """
+        下发 (上次检查时间, 当前时间] 内相位到达的分组
+        """
+        # 上一次检查还未结束时跳过，下次检查会补发本次的分组
+        if not self._tick_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.time() if now is None else now
+            last_tick = self.last_tick if self.last_tick is not None else now
+            self.last_tick = now
+
+            for interval in list(self.plans):
+                phases = self.plans[interval]
+                switch_cycle = now // interval
+                if interval in self.next_plans and last_tick // interval < switch_cycle:
+                    # 跨过周期边界: 边界前的分组按原相位下发，之后切换为新相位
+                    dispatched = self._dispatch_phases(interval, phases, last_tick, now, before_cycle=switch_cycle)
+                    self.plans[interval] = phases = self.next_plans.pop(interval)
+                    dispatched += self._dispatch_phases(interval, phases, last_tick, now, from_cycle=switch_cycle)
+                else:
+                    dispatched = self._dispatch_phases(interval, phases, last_tick, now)
+
+                if dispatched:
+                    metrics.ACCESS_SCHEDULE_DISPATCH_COUNT.labels(interval=interval).inc(dispatched)
+
+            if now - self.last_report >= self.REPORT_INTERVAL:
+                self.last_report = now
+                for interval, phases in self.plans.items():
+                    # 本周期内尚未下发的分组数
+                    pending = len(phases) - bisect_right([phase for phase, _ in phases], now % interval)
+                    metrics.ACCESS_SCHEDULE_PENDING.labels(interval=interval).set(pending)
+                metrics.report_all()
+        finally:
+            self._tick_lock.release()
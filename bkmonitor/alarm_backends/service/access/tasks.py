@@ -9,16 +9,20 @@ specific language governing permissions and limitations under the License.
 """
 
 import logging
+from contextlib import ExitStack
 
 from alarm_backends.core.cache import key
 from alarm_backends.core.lock.service_lock import service_lock
 from alarm_backends.service.access import ACCESS_TYPE_TO_CLASS
 from alarm_backends.service.access.data import AccessBatchDataProcess, AccessDataProcess
+from alarm_backends.service.access.data.coalesce import AccessCoalescedDataProcess
 from alarm_backends.service.access.data.token import TokenBucket
 from alarm_backends.service.access.event.processor import AccessCustomEventGlobalProcess
 from alarm_backends.service.access.event.processorv2 import AccessCustomEventGlobalProcessV2
 from alarm_backends.service.access.incident import AccessIncidentProcess
+from alarm_backends.service.access.scheduler import AccessCostRecorder
 from alarm_backends.service.scheduler.app import app
+from core.errors.alarm_backends import LockError
 from core.prometheus import metrics
 
 
@@ -26,18 +30,61 @@ logger = logging.getLogger(__name__)
 
 
 @app.task(ignore_result=True, queue="celery_service")
-def run_access_data(strategy_group_key, interval=60):
+def run_access_data(strategy_group_key, interval=60, coalesced_keys=None):
+    """
+    :param coalesced_keys: 与当前分组合并查询的策略分组key列表
+    """
+    if coalesced_keys:
+        run_coalesced_access_data(strategy_group_key, interval, coalesced_keys)
+        return
+
     with service_lock(key.SERVICE_LOCK_ACCESS, strategy_group_key=strategy_group_key):
         task_tb = TokenBucket(strategy_group_key, interval)
         if task_tb.acquire():
             processor = AccessDataProcess(strategy_group_key)
             processor.process()
+            # 记录拉取耗时，用于调度时按耗时分散各分组的下发时刻
+            AccessCostRecorder.record(strategy_group_key, processor.pull_duration)
             metrics.report_all()
-            # 500ms内的请求不计令牌消耗
-            if processor.pull_duration <= 0.5:
-                task_tb.release(0)
-                return
-            task_tb.release(max([int(processor.pull_duration), 1]))
+            release_token(task_tb, processor.pull_duration)
+
+
+def run_coalesced_access_data(strategy_group_key, interval, coalesced_keys):
+    """
+    合并查询多个策略分组，每个分组各自加锁、获取令牌并记录耗时，与单独拉取时的限制保持一致
+    正在被其他任务处理或令牌已用完的分组不参与本次合并
+    """
+    with ExitStack() as stack:
+        token_buckets = []
+        for group_key in dict.fromkeys([strategy_group_key, *coalesced_keys]):
+            try:
+                stack.enter_context(service_lock(key.SERVICE_LOCK_ACCESS, strategy_group_key=group_key))
+            except LockError:
+                logger.info(f"strategy_group_key({group_key}) is processing by other task, skip coalesced access")
+                continue
+            task_tb = TokenBucket(group_key, interval)
+            if task_tb.acquire():
+                token_buckets.append(task_tb)
+
+        if not token_buckets:
+            return
+
+        group_keys = [task_tb.strategy_group_key for task_tb in token_buckets]
+        processor = AccessCoalescedDataProcess(group_keys[0], group_keys)
+        processor.process()
+        for task_tb in token_buckets:
+            pull_duration = processor.pull_durations.get(task_tb.strategy_group_key, 0)
+            AccessCostRecorder.record(task_tb.strategy_group_key, pull_duration)
+            release_token(task_tb, pull_duration)
+        metrics.report_all()
+
+
+def release_token(task_tb: TokenBucket, pull_duration: float):
+    # 500ms内的请求不计令牌消耗
+    if pull_duration <= 0.5:
+        task_tb.release(0)
+        return
+    task_tb.release(max([int(pull_duration), 1]))
 
 
 @app.task(queue="celery_service_batch", ignore_result=True)
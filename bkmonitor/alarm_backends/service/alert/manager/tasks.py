@@ -12,10 +12,12 @@ import logging
 import time
 from typing import Dict, List
 
+from django.conf import settings
 from elasticsearch.helpers import BulkIndexError
 from elasticsearch_dsl import Q
 
 from alarm_backends.constants import CONST_ONE_DAY, CONST_ONE_HOUR
+from alarm_backends.core.alert.active_index import ActiveAlertIndex
 from alarm_backends.core.alert.alert import Alert, AlertCache, AlertKey
 from alarm_backends.core.cache.strategy import StrategyCacheManager
 from alarm_backends.core.cluster import get_cluster_bk_biz_ids
@@ -37,6 +39,23 @@ DEFAULT_CHECK_INTERVAL = 60
 def check_abnormal_alert():
     """
     拉取异常告警，对这些告警进行状态管理
+    开启活跃告警索引时优先从索引中读取，索引不可用时扫描ES并校正索引
+    """
+    if not settings.ALERT_ACTIVE_INDEX_ENABLED:
+        alerts = search_abnormal_alerts()
+    elif ActiveAlertIndex.is_ready():
+        alerts = ActiveAlertIndex.list_alerts(get_cluster_bk_biz_ids())
+    else:
+        alerts = sweep_active_alert_index()
+
+    if alerts:
+        send_check_task([{"id": alert["id"], "strategy_id": alert["strategy_id"]} for alert in alerts])
+
+
+def search_abnormal_alerts() -> list[dict]:
+    """
+    扫描ES中集群内的异常告警
+    :return: [{"id": "xxx", "strategy_id": 1, "bk_biz_id": 2}]
     """
     search = (
         AlertDocument.search(all_indices=True)
@@ -55,10 +74,27 @@ def check_abnormal_alert():
         # 只处理集群内的告警
         if hit.event.bk_biz_id not in cluster_bk_biz_ids:
             continue
-        alerts.append({"id": hit.id, "strategy_id": getattr(hit, "strategy_id", None)})
+        alerts.append(
+            {"id": hit.id, "strategy_id": getattr(hit, "strategy_id", None), "bk_biz_id": hit.event.bk_biz_id}
+        )
+    return alerts
 
-    if alerts:
-        send_check_task(alerts)
+
+def sweep_active_alert_index() -> list[dict]:
+    """
+    扫描ES中的异常告警，校正活跃告警索引
+    未开启活跃告警索引时只使索引失效，避免重新开启时读取到未维护的索引
+    :return: 集群内的异常告警
+    """
+    if not settings.ALERT_ACTIVE_INDEX_ENABLED:
+        ActiveAlertIndex.invalidate()
+        return []
+
+    start_time = int(time.time())
+    alerts = search_abnormal_alerts()
+    added, removed = ActiveAlertIndex.sweep(alerts, start_time)
+    logger.info("[sweep_active_alert_index] total(%s), added(%s), removed(%s)", len(alerts), added, removed)
+    return alerts
 
 
 def check_blocked_alert():
@@ -132,6 +168,8 @@ def check_blocked_alert_finished(alert_keys):
     if updated_alert_snaps:
         AlertCache.save_alert_to_cache(updated_alert_snaps)
         AlertCache.save_alert_snapshot(updated_alert_snaps)
+        if settings.ALERT_ACTIVE_INDEX_ENABLED:
+            ActiveAlertIndex.update_by_alerts(updated_alert_snaps)
 
     if alert_logs:
         try:
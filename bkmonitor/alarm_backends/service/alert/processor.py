@@ -14,9 +14,11 @@ import time
 from collections import defaultdict
 from typing import List
 
+from django.conf import settings
 from elasticsearch.helpers import BulkIndexError
 
 from alarm_backends.core.alert import Alert, Event
+from alarm_backends.core.alert.active_index import ActiveAlertIndex
 from alarm_backends.core.alert.alert import AlertCache
 from alarm_backends.core.cache.key import ALERT_DEDUPE_CONTENT_KEY
 from alarm_backends.service.composite.tasks import check_action_and_composite
@@ -118,6 +120,13 @@ class BaseAlertProcessor:
             time.time() - start_time,
         )
 
+        # 告警状态变更后同步更新活跃告警索引
+        if settings.ALERT_ACTIVE_INDEX_ENABLED:
+            try:
+                ActiveAlertIndex.update_by_alerts(alerts)
+            except Exception as e:
+                self.logger.exception("[update active alert index] error: %s", e)
+
         return [alert for alert in alerts]
 
     def save_alert_logs(self, alerts: List[Alert]):
@@ -11,6 +11,7 @@ specific language governing permissions and limitations under the License.
 
 import copy
 import logging
+import time
 
 import arrow
 from django.utils.translation import gettext as _
@@ -29,6 +30,7 @@ from bkmonitor.utils.range import (
     load_field_instance,
 )
 from bkmonitor.utils.range.conditions import AndCondition, EqualCondition, OrCondition
+from bkmonitor.utils.range.matcher import ConditionMatcher
 from bkmonitor.utils.range.period import TimeMatch, TimeMatchBySingle
 from bkmonitor.utils.send import Sender
 from constants.shield import ScopeType, ShieldCategory
@@ -446,3 +448,61 @@ class AlertShieldObj(ShieldObj):
     def is_match(self, alert: AlertDocument):
         source_time = arrow.now()
         return self.time_check.is_match(source_time) and self.dimension_check.is_match(self.get_dimension(alert))
+
+
+class AlertShieldMatcher:
+    """
+    业务下屏蔽配置的预编译匹配器
+    屏蔽配置只解析一次，并按维度取值建立倒排索引，告警只与可能命中的屏蔽配置进行完整匹配
+    """
+
+    # 编译结果的缓存时间，动态分组等解析结果在过期后重新获取
+    CACHE_TTL = 60
+    _cache = {}
+
+    def __init__(self, configs):
+        self.shield_objs = [AlertShieldObj(config) for config in configs]
+        self.matcher = ConditionMatcher([shield_obj.dimension_check for shield_obj in self.shield_objs])
+
+    @staticmethod
+    def get_fingerprint(configs):
+        # 屏蔽配置的任何修改都会更新 update_time
+        return tuple(
+            (config["id"], config.get("update_time"), config.get("begin_time"), config.get("end_time"))
+            for config in configs
+        )
+
+    @classmethod
+    def get(cls, bk_biz_id, configs) -> "AlertShieldMatcher":
+        """
+        获取业务的匹配器，屏蔽配置未变化时复用编译结果
+        """
+        fingerprint = cls.get_fingerprint(configs)
+        cached = cls._cache.get(bk_biz_id)
+        if cached and cached[0] == fingerprint and cached[1] > time.time():
+            return cached[2]
+
+        matcher = cls(configs)
+        cls._cache[bk_biz_id] = (fingerprint, time.time() + cls.CACHE_TTL, matcher)
+        return matcher
+
+    @classmethod
+    def clear(cls):
+        cls._cache.clear()
+
+    def match(self, alert: AlertDocument):
+        """
+        获取命中的屏蔽配置，与逐个调用 AlertShieldObj.is_match 的结果一致
+        """
+        if not self.shield_objs:
+            return []
+
+        # 告警维度与屏蔽配置无关，只需要计算一次
+        dimension = self.shield_objs[0].get_dimension(alert)
+        source_time = arrow.now()
+        matched_objs = []
+        for index in self.matcher.get_candidates(dimension):
+            shield_obj = self.shield_objs[index]
+            if shield_obj.time_check.is_match(source_time) and shield_obj.dimension_check.is_match(dimension):
+                matched_objs.append(shield_obj)
+        return matched_objs
@@ -22,7 +22,10 @@ from alarm_backends.core.cache.shield import ShieldCacheManager
 from alarm_backends.core.control.strategy import Strategy
 from alarm_backends.core.i18n import i18n
 from alarm_backends.service.alert.qos.influence import get_failure_scope_config
-from alarm_backends.service.converge.shield.shield_obj import AlertShieldObj
+from alarm_backends.service.converge.shield.shield_obj import (
+    AlertShieldMatcher,
+    AlertShieldObj,
+)
 from bkmonitor.documents.alert import AlertDocument
 from bkmonitor.models import ActionInstance, time_tools
 from bkmonitor.utils import extended_json
@@ -51,7 +54,7 @@ class AlertShieldConfigShielder(BaseShielder):
         if config_ids:
             # 已经进行过屏蔽匹配了， 这里直接返回
             config_ids: [str] = json.loads(config_ids)
-            return [AlertShieldObj(config) for config in self.configs if str(config["id"]) in config_ids]
+            return [shield_obj for shield_obj in self.matcher.shield_objs if str(shield_obj.id) in config_ids]
         return None
 
     def set_shield_objs_cache(self):
@@ -66,8 +69,10 @@ class AlertShieldConfigShielder(BaseShielder):
 
     def __init__(self, alert: AlertDocument):
         self.alert = alert
+        bk_biz_id = None
         try:
-            self.configs = ShieldCacheManager.get_shields_by_biz_id(self.alert.event.bk_biz_id)
+            bk_biz_id = self.alert.event.bk_biz_id
+            self.configs = ShieldCacheManager.get_shields_by_biz_id(bk_biz_id)
             config_ids: [str] = ",".join([str(config["id"]) for config in self.configs])
             logger.debug(
                 "[load shield] alert(%s) strategy(%s) ids:(%s)",
@@ -81,14 +86,11 @@ class AlertShieldConfigShielder(BaseShielder):
                 "[load shield failed] alert(%s) strategy(%s) detail:(%s)", self.alert.id, self.alert.strategy_id, error
             )
 
+        self.matcher = AlertShieldMatcher.get(bk_biz_id, self.configs)
         shield_objs_cache = self.get_shield_objs_from_cache()
         from_cache = True
         if shield_objs_cache is None:
-            self.shield_objs = []
-            for config in self.configs:
-                shield_obj = AlertShieldObj(config)
-                if shield_obj.is_match(alert):
-                    self.shield_objs.append(shield_obj)
+            self.shield_objs = self.matcher.match(alert)
             self.set_shield_objs_cache()
             from_cache = False
         else:
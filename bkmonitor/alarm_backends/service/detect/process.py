@@ -20,6 +20,7 @@ from alarm_backends.core.control.strategy import Strategy
 from alarm_backends.core.i18n import i18n
 from alarm_backends.core.lock.service_lock import service_lock
 from alarm_backends.core.processor.base import BaseAbnormalPushProcessor
+from alarm_backends.service.access.data import columnar
 from alarm_backends.service.detect import DataPoint
 from core.prometheus import metrics
 
@@ -27,6 +28,9 @@ logger = logging.getLogger("detect")
 
 
 class DetectProcess(BaseAbnormalPushProcessor):
+    # 队列中存在列式压缩块时，单次拉取的元素数量
+    COLUMNAR_PULL_WINDOW = 50
+
     def __init__(self, strategy_id: str):
         # note: 这里有个坑，进来的策略id是字符串
         self.strategy_id = strategy_id
@@ -73,34 +77,104 @@ class DetectProcess(BaseAbnormalPushProcessor):
                 "(SQL_MAX_LIMIT){}，部分数据可能存在处理延时".format(self.strategy_id, item.id, settings.SQL_MAX_LIMIT)
             )
 
-        records = client.lrange(data_channel, -offset, -1)
-
-        # 上报detect拉取数据量
-        metrics.DETECT_PROCESS_DATA_COUNT.labels(strategy_id=metrics.TOTAL_TAG, type="pull").inc(len(records))
+        stats_key = columnar.get_queue_stats_key(self.strategy_id, item.id)
+        stats = client.hgetall(stats_key) or {}
+        records = self._iter_queue_records(client, data_channel, offset, int(stats.get("batches") or 0))
 
         unexpected_record_count = 0
         last_unexpected_record = None
-        if records:
-            client.ltrim(data_channel, 0, -offset - 1)
-            # 队列左进右出，lrange 取出时需要做一次倒序才能保证先进先出
-            for record in reversed(records):
+        consumed_count = 0
+        columnar_batches = columnar_points = 0
+        # 队列元素可能是单条json记录，也可能是列式压缩块(一个元素包含多条记录)
+        for record in records:
+            if len(self.inputs[item.id]) >= settings.SQL_MAX_LIMIT:
+                # 列式压缩块展开后数据量达到上限，剩余元素留待下一轮处理
+                self.is_busy = True
+                break
+            consumed_count += 1
+            try:
+                if columnar.is_columnar(record):
+                    accessed_records = columnar.decode_records(record)
+                    columnar_batches += 1
+                    columnar_points += len(accessed_records)
+                else:
+                    accessed_records = [json.loads(record)]
+            except (ValueError, TypeError, OSError, EOFError):
+                unexpected_record_count += 1
+                last_unexpected_record = record
+                continue
+
+            for accessed_data in accessed_records:
                 try:
-                    data_point = DataPoint(json.loads(record), item)
+                    data_point = DataPoint(accessed_data, item)
                     # fill data point into inputs list
                     self.inputs[item.id].append(data_point)
                 except ValueError:
                     unexpected_record_count += 1
-                    last_unexpected_record = record
-            if unexpected_record_count > 0:
-                logger.error(
-                    "[detect] strategy({}) item({}) 发现非期望格式的待检测数据{}条,"
-                    " 其中之一: {}".format(self.strategy_id, item.id, unexpected_record_count, last_unexpected_record)
-                )
+                    last_unexpected_record = accessed_data
 
-            logger.info(
-                "[detect] strategy({}) item({}) 拉取数据({})条".format(self.strategy_id, item.id, len(self.inputs[item.id]))
+        if not consumed_count:
+            return
+
+        client.ltrim(data_channel, 0, -consumed_count - 1)
+        if columnar_batches:
+            self._release_columnar_stats(client, stats_key, item, columnar_batches, columnar_points)
+
+        # 上报detect拉取数据量
+        metrics.DETECT_PROCESS_DATA_COUNT.labels(strategy_id=metrics.TOTAL_TAG, type="pull").inc(
+            len(self.inputs[item.id])
+        )
+
+        if unexpected_record_count > 0:
+            logger.error(
+                "[detect] strategy({}) item({}) 发现非期望格式的待检测数据{}条,"
+                " 其中之一: {}".format(self.strategy_id, item.id, unexpected_record_count, last_unexpected_record)
             )
 
+        logger.info(
+            "[detect] strategy({}) item({}) 拉取数据({})条".format(self.strategy_id, item.id, len(self.inputs[item.id]))
+        )
+
+    @classmethod
+    def _iter_queue_records(cls, client, data_channel, offset, pending_batches):
+        """
+        从队列右端(最早写入)开始拉取 offset 个元素，按先进先出顺序返回
+        还有未取出的列式压缩块时按窗口分段拉取，避免一次取出过多压缩块，压缩块取完后剩余元素一次拉取
+        :param pending_batches: 队列中列式压缩块的数量
+        """
+        start = 0
+        while start < offset:
+            stop = min(start + cls.COLUMNAR_PULL_WINDOW, offset) if pending_batches > 0 else offset
+            records = client.lrange(data_channel, -stop, -start - 1)
+            pending_batches -= sum(1 for record in records if columnar.is_columnar(record))
+            # 队列左进右出，lrange 取出时需要做一次倒序才能保证先进先出
+            yield from reversed(records)
+            start = stop
+
+    @staticmethod
+    def _release_columnar_stats(client, stats_key, item, batches, points):
+        """
+        扣减已取出的列式压缩块统计
+        统计 hash 过期后扣减会重新创建该 key，此时计数为负，需要归零并重新设置过期时间
+        """
+        # 与 access 写入时的过期时间保持一致
+        agg_interval = min(query_config["agg_interval"] for query_config in item.query_configs)
+        ttl = max([key.DATA_LIST_KEY.ttl, agg_interval * 5])
+
+        pipeline = client.pipeline(transaction=False)
+        pipeline.hincrby(stats_key, "batches", -batches)
+        pipeline.hincrby(stats_key, "points", -points)
+        pipeline.expire(stats_key, ttl)
+        remaining_batches, remaining_points, _ = pipeline.execute()
+        if remaining_batches >= 0 and remaining_points >= 0:
+            return
+
+        pipeline = client.pipeline(transaction=False)
+        pipeline.hset(stats_key, "batches", max(remaining_batches, 0))
+        pipeline.hset(stats_key, "points", max(remaining_points, 0))
+        pipeline.expire(stats_key, ttl)
+        pipeline.execute()
+
     def handle_data(self, item):
         # detect data
         data_points = self.inputs[item.id]
@@ -125,18 +125,33 @@ class Algorithms:
         context = Context(self.get_context(data_point))
         return Template(self.desc_tpl).render(context)
 
+    def batch_detect(self, data_points):
+        """
+        批量检测，返回与 data_points 一一对应的检测结果列表
+        不支持批量检测的算法返回 None，由 detect_records 逐点检测
+        """
+        return None
+
+    def safe_detect(self, data_point):
+        """
+        逐点检测，检测异常时视为无异常
+        """
+        try:
+            return self.detect(data_point)
+        except Exception:
+            return None
+
     def detect_records(self, data_points, level):
         """
         detect service entry
         """
         if isinstance(data_points, DataPoint):
             data_points = [data_points]
+        check_results = self.batch_detect(data_points)
+        if check_results is None:
+            check_results = map(self.safe_detect, data_points)
         anomaly_points = []
-        for data_point in data_points:
-            try:
-                check_result = self.detect(data_point)
-            except Exception:
-                continue
+        for data_point, check_result in zip(data_points, check_results):
             if check_result:
                 ap = self.gen_anomaly_point(data_point, check_result, level)
                 logger.info(
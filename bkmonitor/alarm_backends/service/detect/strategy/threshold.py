@@ -15,16 +15,29 @@ specific language governing permissions and limitations under the License.
 
 import ast
 import logging
+import operator
 
 from django.utils.safestring import mark_safe
 from six.moves import zip
 
+from alarm_backends.service.detect import AnomalyDataPoint, DataPoint
 from alarm_backends.service.detect.strategy import BasicAlgorithmsCollection, ExprDetectAlgorithms
+from alarm_backends.templatetags.unit import unit_convert_min, unit_convert_min_func
 from bkmonitor.strategy.serializers import ThresholdSerializer, allowed_threshold_method
 from core.errors.alarm_backends.detect import InvalidThresholdConfig
 
 logger = logging.getLogger("detect")
 
+# 与 allowed_threshold_method 中的比较符一一对应，用于批量检测
+threshold_operators = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "eq": operator.eq,
+    "neq": operator.ne,
+}
+
 
 class AlgorithmsAST(ast.NodeTransformer):
     """
@@ -58,8 +71,85 @@ class AndThreshold(BasicAlgorithmsCollection):
         if not expr_list:
             raise InvalidThresholdConfig(dict(config=self.validated_config))
 
-        for args in zip(expr_list, tpl_list):
-            yield ExprDetectAlgorithms(*args)
+        # 记录每个表达式对应的比较方法及阈值，供批量检测使用
+        self.threshold_detectors = []
+        for args, t_config in zip(zip(expr_list, tpl_list), self.validated_config):
+            detector = ExprDetectAlgorithms(*args)
+            self.threshold_detectors.append((detector, t_config["method"], t_config["threshold"]))
+            yield detector
+
+    @property
+    def threshold_groups(self):
+        """
+        阈值条件分组：组内条件同时满足才算异常，组间满足任一即可
+        """
+        return [self.threshold_detectors]
+
+    def batch_detect(self, data_points):
+        """
+        批量阈值检测
+        单位换算及阈值换算在整批数据内只做一次，逐点只做数值比较，异常描述按表达式只渲染一次
+        不满足批量条件的数据点(非数值、调试点等)回退到逐点表达式检测
+        """
+        if not data_points:
+            return []
+
+        item = getattr(data_points[0], "item", None)
+        try:
+            unit = data_points[0].unit
+            convert = unit_convert_min_func(unit)
+            groups = [
+                [
+                    (detector, threshold_operators[method], unit_convert_min(threshold, unit, self.unit))
+                    for detector, method, threshold in group
+                ]
+                for group in self.threshold_groups
+            ]
+        except Exception as e:
+            logger.warning(f"[detect] threshold batch detect fallback to per-point detect: {e}")
+            return None
+
+        messages = {}
+        check_results = []
+        for data_point in data_points:
+            if not self.is_batchable(data_point, item):
+                check_results.append(self.safe_detect(data_point))
+                continue
+
+            value = convert(data_point.value)
+            check_result = []
+            for group in groups:
+                if all(compare(value, threshold) for _, compare, threshold in group):
+                    check_result = [
+                        self._gen_threshold_anomaly_point(data_point, detector, messages) for detector, _, _ in group
+                    ]
+                    break
+            check_results.append(check_result)
+        return check_results
+
+    @staticmethod
+    def is_batchable(data_point, item):
+        """
+        仅同一监控项下的普通数值数据点走批量检测
+        """
+        if not isinstance(data_point, DataPoint) or hasattr(data_point, "__debug__"):
+            return False
+        if data_point.item is not item or not hasattr(data_point, "time"):
+            return False
+        return type(getattr(data_point, "value", None)) in (int, float)
+
+    @staticmethod
+    def _gen_threshold_anomaly_point(data_point, detector, messages):
+        anomaly_point = AnomalyDataPoint(data_point=data_point, detector=detector)
+        # 阈值异常描述只与单位相关，同一表达式在批次内结果一致
+        if detector not in messages:
+            try:
+                messages[detector] = detector._format_message(data_point)
+            except Exception as e:
+                logger.error(f"format anomaly message error: {e}")
+                messages[detector] = ""
+        anomaly_point.anomaly_message = messages[detector]
+        return anomaly_point
 
 
 class Threshold(AndThreshold):
@@ -69,3 +159,7 @@ class Threshold(AndThreshold):
     def gen_expr(self):
         for t_config in self.validated_config:
             yield AndThreshold(t_config, self.unit)
+
+    @property
+    def threshold_groups(self):
+        return [detector.threshold_detectors for detector in self.detectors]
@@ -62,14 +62,19 @@ class BackendAssignMatchManager(AlertAssignMatchManager):
             # 如果没有分派规则或者当前配置不需要分派的情况下，不做分派适配
             return matched_rules
         for priority_id in AssignCacheManager.get_assign_priority_by_biz_id(self.bk_biz_id):
-            groups = AssignCacheManager.get_assign_groups_by_priority(self.bk_biz_id, priority_id)
-            group_rules = []
-            for group_id in groups:
-                group_rules.extend(AssignCacheManager.get_assign_rules_by_group(self.bk_biz_id, group_id))
-            for rule in group_rules:
-                rule_match_obj = AssignRuleMatch(rule, self.rule_snaps.get(str(rule["id"])), self.alert)
-                if rule_match_obj.is_matched(dimensions=self.dimensions):
-                    matched_rules.append(rule_match_obj)
+            group_rules, matcher = AssignCacheManager.get_assign_rule_matcher(self.bk_biz_id, priority_id)
+            # 通过倒排索引一次性得到维度命中的规则，只在存在需要重新适配的规则时计算
+            matched_indexes = None
+            for index, rule in enumerate(group_rules):
+                rule_match_obj = AssignRuleMatch(
+                    rule, self.rule_snaps.get(str(rule["id"])), self.alert, dimension_check=matcher.conditions[index]
+                )
+                if rule_match_obj.is_changed:
+                    if matched_indexes is None:
+                        matched_indexes = set(matcher.match(self.dimensions))
+                    if index not in matched_indexes:
+                        continue
+                matched_rules.append(rule_match_obj)
             if matched_rules:
                 # 当前优先级下适配到分派规则，停止低优先级的适配
                 break
@@ -54,6 +54,8 @@ class AnomalyChecker(object):
         # shortcut
         self.dimensions_md5 = self.record_parser.dimensions_md5
         self.source_time = self.record_parser.source_time
+        # 批量模式下预先拉取的检测窗口数据，key 为告警级别
+        self.prefetched_check_results = {}
 
     @staticmethod
     def is_no_data_point(point):
@@ -165,27 +167,56 @@ class AnomalyChecker(object):
                 anomaly_level = level
         return anomaly_level, anomaly_timestamps
 
-    def _check_anomaly_by_level(self, level):
+    @classmethod
+    def prefetch_check_results(cls, checkers):
         """
-        检测某个级别的异常点是否满足触发条件
+        批量拉取一批异常点所有级别的检测窗口数据
+        所有 ZRANGEBYSCORE 通过一次 pipeline 完成，结果暂存到各 checker 中，检测时不再逐个请求 redis
+        :param list[AnomalyChecker] checkers: 异常检测对象列表
+        """
+        windows = []
+        pipeline = CHECK_RESULT_CACHE_KEY.client.pipeline(transaction=False)
+        for checker in checkers:
+            for level in checker.point["anomaly"]:
+                level = str(int(level))
+                window = checker.get_check_window(level)
+                if window is None:
+                    continue
+                check_cache_key, min_score, max_score = window
+                pipeline.zrangebyscore(name=check_cache_key, min=min_score, max=max_score, withscores=True)
+                windows.append((checker, level))
+
+        if not windows:
+            return
+
+        for (checker, level), check_results in zip(windows, pipeline.execute()):
+            checker.prefetched_check_results[level] = check_results or []
+
+    def get_trigger_config(self, level):
+        """
+        获取某个级别的触发配置
         :param str level: 告警级别
-        :return: 二元组：是否被触发，异常次数
+        :return: 触发配置，未配置任何级别时返回 None
         """
         try:
-            trigger_config = self.trigger_configs[level]
+            return self.trigger_configs[level]
         except KeyError:
             trigger_configs = self.trigger_configs.values()
             if not trigger_configs:
-                # 如果该等级没有在策略中配置，则不检测
-                logger.error(
-                    "strategy({}), item({}) level({}) trigger config not exists".format(
-                        self.strategy_id, self.item_id, level
-                    )
-                )
-                return False, []
+                return None
 
             # 默认兜底，trigger 配置当前所有告警级别默认一致
-            trigger_config = list(trigger_configs)[0]
+            return list(trigger_configs)[0]
+
+    def get_check_window(self, level):
+        """
+        获取某个级别的检测窗口
+        :param str level: 告警级别
+        :return: 三元组：检测结果缓存key，窗口起始时间，窗口结束时间。级别未配置时返回 None
+        """
+        trigger_config = self.get_trigger_config(level)
+        if trigger_config is None:
+            return None
 
         check_cache_key = CHECK_RESULT_CACHE_KEY.get_key(
             strategy_id=self.strategy_id,
@@ -195,9 +226,32 @@ class AnomalyChecker(object):
         )
         # 在对应的打点队列中取出打点信息。时间范围为source_time前后的一个窗口偏移量
         check_window_offset = trigger_config["check_window_size"] * self.check_window_unit - 1
-        check_results = CHECK_RESULT_CACHE_KEY.client.zrangebyscore(
-            name=check_cache_key, min=self.source_time - check_window_offset, max=self.source_time, withscores=True
-        )
+        return check_cache_key, self.source_time - check_window_offset, self.source_time
+
+    def _check_anomaly_by_level(self, level):
+        """
+        检测某个级别的异常点是否满足触发条件
+        :param str level: 告警级别
+        :return: 二元组：是否被触发，异常次数
+        """
+        trigger_config = self.get_trigger_config(level)
+        if trigger_config is None:
+            # 如果该等级没有在策略中配置，则不检测
+            logger.error(
+                "strategy({}), item({}) level({}) trigger config not exists".format(
+                    self.strategy_id, self.item_id, level
+                )
+            )
+            return False, []
+
+        if level in self.prefetched_check_results:
+            check_results = self.prefetched_check_results[level]
+        else:
+            check_cache_key, min_score, max_score = self.get_check_window(level)
+            check_results = CHECK_RESULT_CACHE_KEY.client.zrangebyscore(
+                name=check_cache_key, min=min_score, max=max_score, withscores=True
+            )
+
         # 统计包含异常标记的key的数量，并与trigger_count进行比较
         anomaly_timestamps = []
         for label, score in check_results:
@@ -13,6 +13,8 @@ import json
 import logging
 import time
 
+from django.conf import settings
+
 from alarm_backends.core.alert.adapter import MonitorEventAdapter
 from alarm_backends.core.cache.key import ANOMALY_LIST_KEY, ANOMALY_SIGNAL_KEY
 from alarm_backends.core.control.strategy import Strategy
@@ -26,6 +28,8 @@ logger = logging.getLogger("trigger")
 class TriggerProcessor(object):
     # 单次处理量(默认为全量处理)
     MAX_PROCESS_COUNT = 0
+    # 批量检测模式下，单批次处理的异常点数量
+    BATCH_CHECK_SIZE = 500
 
     def __init__(self, strategy_id, item_id):
         self.strategy_id = int(strategy_id)
@@ -145,6 +149,9 @@ class TriggerProcessor(object):
         in_alarm_time, message = self.strategy.in_alarm_time()
         if not in_alarm_time:
             logger.info("[trigger] strategy(%s) not in alarm time: %s, skipped", self.strategy_id, message)
+        elif settings.TRIGGER_BATCH_CHECK:
+            for index in range(0, len(self.anomaly_points), self.BATCH_CHECK_SIZE):
+                self.process_batch(self.anomaly_points[index : index + self.BATCH_CHECK_SIZE])
         else:
             for point in self.anomaly_points:
                 try:
@@ -157,10 +164,53 @@ class TriggerProcessor(object):
 
         self.push()
 
-    def process_point(self, point):
+    def process_batch(self, points):
+        """
+        批量检测
+        一批异常点的检测窗口数据通过一次 pipeline 拉取，然后在内存中逐个判断是否满足触发条件
+        """
+        start_time = time.time()
+        checkers = []
+        for point in points:
+            try:
+                checkers.append(self.get_checker(point))
+            except Exception as e:
+                error_message = (
+                    f"[process error] strategy({self.strategy_id}), item({self.item_id}) reason: {e} "
+                    f"\norigin data: {point}"
+                )
+                logger.exception(error_message)
+
+        fetch_start_time = time.time()
+        try:
+            AnomalyChecker.prefetch_check_results(checkers)
+        except Exception as e:
+            # 批量拉取失败时，各异常点在检测时逐个拉取
+            logger.exception(
+                f"[batch check] strategy({self.strategy_id}), item({self.item_id}) prefetch check results error: {e}"
+            )
+        metrics.TRIGGER_PROCESS_BATCH_FETCH_TIME.labels(strategy_id=metrics.TOTAL_TAG).observe(
+            time.time() - fetch_start_time
+        )
+
+        for checker in checkers:
+            try:
+                self.process_checker(checker)
+            except Exception as e:
+                error_message = (
+                    f"[process error] strategy({self.strategy_id}), item({self.item_id}) reason: {e} "
+                    f"\norigin data: {checker.point}"
+                )
+                logger.exception(error_message)
+
+        metrics.TRIGGER_PROCESS_BATCH_TIME.labels(strategy_id=metrics.TOTAL_TAG).observe(time.time() - start_time)
+
+    def get_checker(self, point):
         point = json.loads(point)
         strategy = self.get_strategy_snapshot(point["strategy_snapshot_key"])
-        checker = AnomalyChecker(point, strategy, self.item_id)
+        return AnomalyChecker(point, strategy, self.item_id)
+
+    def process_checker(self, checker):
         anomaly_records, event_record = checker.check()
 
         # 暂存结果，最后批量保存
@@ -168,3 +218,6 @@ class TriggerProcessor(object):
             self.event_records.append({"anomaly_records": anomaly_records, "event_record": event_record})
         else:
             self.anomaly_records.extend(anomaly_records)
+
+    def process_point(self, point):
+        self.process_checker(self.get_checker(point))
@@ -31,6 +31,19 @@ def unit_convert_min(value, unit, suffix=None):
     return unit.convert_to_max(value, suffix, decimal=settings.POINT_PRECISION)[0]
 
 
+def unit_convert_min_func(unit, suffix=None):
+    """
+    生成与 unit_convert_min 等价的转换函数，单位只解析一次，用于批量转换
+    """
+    unit = load_unit(unit)
+    decimal = settings.POINT_PRECISION
+
+    def convert(value):
+        return unit.convert_to_max(value, suffix, decimal=decimal)[0]
+
+    return convert
+
+
 @register.filter(name="unit_suffix")
 def unit_suffix(unit, suffix):
     unit = load_unit(unit)
@@ -14,7 +14,7 @@ import json
 
 import mock
 from django.core.cache import caches
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from alarm_backends.core.cache.cmdb import (
     BusinessManager,
@@ -23,6 +23,7 @@ from alarm_backends.core.cache.cmdb import (
     ServiceInstanceManager,
     TopoManager,
 )
+from alarm_backends.core.cache.cmdb.local_cache import MISSING, LRUCache
 from alarm_backends.tests.utils.cmdb_data import (
     ALL_HOSTS,
     ALL_MODULES,
@@ -298,6 +299,113 @@ class TestHostManager(TestCMDBBaseTestCase):
         HostManager.refresh()
         self.assertEqual(8, len(HostManager.all()))
 
+    @mock.patch("alarm_backends.core.cache.cmdb.base.client.resource_watch")
+    @mock.patch("alarm_backends.core.cache.cmdb.host.api.cmdb.get_host_by_topo_node")
+    def test_refresh_incremental(self, get_host_by_topo_node, resource_watch):
+        get_host_by_topo_node.side_effect = lambda bk_biz_id, **kwargs: [
+            host for host in ALL_HOSTS if host.bk_biz_id == bk_biz_id
+        ]
+
+        # 未进行过全量刷新，不能增量刷新
+        self.assertFalse(HostManager.refresh_incremental())
+        HostManager.refresh()
+        self.assertTrue(HostManager.get_last_refresh_time())
+
+        # 业务3的主机3迁移到业务2，业务2的主机2被删除
+        new_hosts = [
+            Host(bk_host_innerip="10.0.0.1", bk_cloud_id=1, bk_host_id=1, bk_biz_id=2),
+            Host(bk_host_innerip="10.0.0.3", bk_cloud_id=3, bk_host_id=3, bk_biz_id=2),
+        ]
+        get_host_by_topo_node.reset_mock()
+        get_host_by_topo_node.side_effect = lambda bk_biz_id, **kwargs: [
+            host for host in new_hosts if host.bk_biz_id == bk_biz_id
+        ]
+
+        def mocked_resource_watch(params):
+            if params["bk_resource"] == "host_relation":
+                return {
+                    "bk_watched": True,
+                    "bk_events": [
+                        {
+                            "bk_cursor": "host_relation_cursor",
+                            "bk_resource": "host_relation",
+                            "bk_event_type": "create",
+                            "bk_detail": {"bk_biz_id": 2, "bk_host_id": 3, "bk_module_id": 1},
+                        }
+                    ],
+                }
+            return {"bk_watched": False, "bk_events": [{"bk_cursor": "host_cursor", "bk_resource": "host"}]}
+
+        resource_watch.side_effect = mocked_resource_watch
+        self.assertTrue(HostManager.refresh_incremental())
+
+        # 只刷新了发生变更的业务
+        self.assertListEqual([call[1]["bk_biz_id"] for call in get_host_by_topo_node.call_args_list], [2])
+        caches["locmem"].clear()
+        self.assertEqual(2, HostManager.get(ip="10.0.0.3", bk_cloud_id=3).bk_biz_id)
+        self.assertIsNone(HostManager.get(ip="10.0.0.2", bk_cloud_id=2))
+        self.assertEqual(3, HostManager.get(ip="10.0.0.4", bk_cloud_id=4).bk_biz_id)
+
+        cursors = HostManager.cache.hgetall(HostManager.get_watch_cursor_key())
+        self.assertEqual(cursors["host_relation"], "host_relation_cursor")
+        self.assertEqual(cursors["host"], "host_cursor")
+
+        # 下次增量刷新从游标处继续监听
+        resource_watch.reset_mock()
+        resource_watch.return_value = {"bk_watched": False, "bk_events": []}
+        resource_watch.side_effect = None
+        self.assertTrue(HostManager.refresh_incremental())
+        self.assertSetEqual(
+            {call[0][0]["bk_cursor"] for call in resource_watch.call_args_list}, {"host_relation_cursor", "host_cursor"}
+        )
+
+        # 游标失效时需要重新全量刷新
+        resource_watch.side_effect = Exception("cursor expired")
+        self.assertFalse(HostManager.refresh_incremental())
+        self.assertEqual(HostManager.get_last_refresh_time(), 0)
+
+    @override_settings(CMDB_CACHE_COMPACT_SERIALIZE=True)
+    def test_compact_serialize(self):
+        HostManager.refresh()
+        raw = HostManager.cache.hget(HostManager.CACHE_KEY, HostManager.key_to_internal_value("10.0.0.1", 1))
+        self.assertTrue(HostManager.codec.is_compact(raw))
+
+        # 清理进程内的字段名表，从redis中加载
+        HostManager.codec.tables.clear()
+        HostManager.local_cache.clear()
+        for host in ALL_HOSTS:
+            actual_host = HostManager.get(ip=host.ip, bk_cloud_id=host.bk_cloud_id)
+            self.assertEqual(host, actual_host)
+            self.assertDictEqual(host.get_attrs(), actual_host.get_attrs())
+
+        host = HostManager.get_by_id(1)
+        self.assertSetEqual(set(host.topo_link.keys()), {"module|5", "module|6"})
+        self.assertIsInstance(host.topo_link["module|5"][0], TopoNode)
+
+        # 不支持紧凑编码的数据回退为pickle
+        raw = HostManager.serialize({1: "a"})
+        self.assertFalse(HostManager.codec.is_compact(raw))
+        self.assertDictEqual(HostManager.deserialize(raw), {1: "a"})
+
+    def test_local_cache_generation(self):
+        HostManager.refresh()
+        host = HostManager.get(ip="10.0.0.1", bk_cloud_id=1)
+        # 命中进程内缓存，每次返回新的对象，修改返回值不影响缓存
+        host.operator_string = "admin"
+        cached_host = HostManager.get(ip="10.0.0.1", bk_cloud_id=1)
+        self.assertIsNot(host, cached_host)
+        self.assertEqual(host.bk_host_id, cached_host.bk_host_id)
+        self.assertFalse(hasattr(cached_host, "operator_string"))
+        self.assertIsNot(host, HostManager.multi_get([HostManager.key_to_internal_value("10.0.0.1", 1)])[0])
+
+        new_host = Host(bk_host_innerip="10.0.0.1", bk_cloud_id=1, bk_host_id=1, bk_biz_id=3)
+        HostManager.cache.hset(HostManager.CACHE_KEY, "10.0.0.1|1", HostManager.serialize(new_host))
+        self.assertEqual(2, HostManager.get(ip="10.0.0.1", bk_cloud_id=1).bk_biz_id)
+
+        # 缓存代数变化后，进程内缓存失效
+        HostManager.bump_generation()
+        self.assertEqual(3, HostManager.get(ip="10.0.0.1", bk_cloud_id=1).bk_biz_id)
+
     @mock.patch("alarm_backends.core.cache.cmdb.host.api.cmdb.get_host_without_biz_v2")
     def test_get_using_api(self, get_host_without_biz_v2):
         HostManager.refresh()
@@ -435,6 +543,21 @@ class TestServiceInstanceManager(TestCMDBBaseTestCase):
         self.assertEqual(instance.topo_link["module|5"][2].id, "biz|2")
         self.assertEqual(ServiceInstanceManager.get(2).topo_link, {"module|2": []})
 
+    def test_get_biz_ids_by_event(self):
+        HostManager.refresh()
+        ServiceInstanceManager.refresh()
+
+        # 进程实例关系变更事件不包含业务ID，通过主机或服务实例获取业务
+        event = {"bk_resource": "process_instance_relation", "bk_detail": {"bk_process_id": 1, "bk_host_id": 3}}
+        self.assertSetEqual(ServiceInstanceManager.get_biz_ids_by_event(event), {3})
+        event = {"bk_resource": "process_instance_relation", "bk_detail": {"service_instance_id": 1}}
+        self.assertSetEqual(ServiceInstanceManager.get_biz_ids_by_event(event), {2})
+        event = {"bk_resource": "process_instance_relation", "bk_detail": {"bk_process_id": 1}}
+        self.assertSetEqual(ServiceInstanceManager.get_biz_ids_by_event(event), set())
+
+        event = {"bk_resource": "host_relation", "bk_detail": {"bk_biz_id": 4, "bk_host_id": 5}}
+        self.assertSetEqual(ServiceInstanceManager.get_biz_ids_by_event(event), {4})
+
     def test_all(self):
         ServiceInstanceManager.refresh()
         instances = ServiceInstanceManager.all()
@@ -505,3 +628,33 @@ class TestTopoManager(TestCMDBBaseTestCase):
         TopoManager.clear()
         self.assertEqual(len(TopoManager.cache.hkeys(TopoManager.CACHE_KEY)), 0)
         self.assertEqual(len(TopoManager.cache.hkeys(TopoManager.get_biz_cache_key())), 0)
+
+
+class TestLRUCache(TestCase):
+    def test_lru(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set("b", None)
+        cache.set("a", 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+        # 超过容量时淘汰最久未使用的数据
+        cache.set("c", 3)
+        self.assertIs(cache.get("b"), MISSING)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(len(cache), 2)
+
+    def test_copy_on_read(self):
+        cache = LRUCache(maxsize=2, ttl=60, copy_on_read=True)
+        value = {"a": [1]}
+        cache.set("a", value)
+        value["a"].append(2)
+        cache.get("a")["a"].append(3)
+        self.assertEqual(cache.get("a"), {"a": [1]})
+
+    def test_ttl(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        with mock.patch("alarm_backends.core.cache.cmdb.local_cache.time.time", return_value=10**10):
+            self.assertIs(cache.get("a"), MISSING)
+        self.assertEqual(len(cache), 0)
@@ -9,7 +9,8 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
-from django.test import TestCase
+import arrow
+from django.test import TestCase, override_settings
 from mock import MagicMock, patch
 
 from alarm_backends.constants import NO_DATA_LEVEL, NO_DATA_TAG_DIMENSION
@@ -85,7 +86,7 @@ ANOMALY_INFO = [
 ]
 
 
-def mock_anomaly_info(self, check_timestamp, target_dimension, target_dms_md5):
+def mock_anomaly_info(self, check_timestamp, target_dimension, target_dms_md5, **kwargs):
     return {
         "data": {
             "record_id": "{dimensions_md5}.{timestamp}".format(
@@ -355,3 +356,78 @@ class TestChecker(TestCase):
         data_points = [DataPoint(record, self.item) for record in RECORDS]
         # 127.0.0.3 不在HostManager缓存中
         self.assertEqual(self.item.check(data_points, check_timestamp), ANOMALY_INFO[1:2])
+
+    @patch(
+        "alarm_backends.service.nodata.scenarios.base.BaseScenario.get_target_instances_dimensions",
+        MagicMock(
+            return_value=(
+                TARGET_INSTANCE_DIMENSIONS
+                + [{"bk_target_ip": "127.0.0.4", "bk_target_cloud_id": "0", "__NO_DATA_DIMENSION__": True}],
+                [{"bk_target_ip": "127.0.0.7", "bk_target_cloud_id": "0", "__NO_DATA_DIMENSION__": True}],
+            )
+        ),
+    )
+    @patch(
+        "alarm_backends.core.control.mixins.nodata.CheckMixin._is_host_dimension_in_business",
+        lambda self, dimensions: dimensions.get("bk_target_ip") != "127.0.0.4",
+    )
+    @patch("alarm_backends.core.control.mixins.nodata.arrow.utcnow", MagicMock(return_value=arrow.get(10000)))
+    def test_check__batch_same_as_single(self):
+        self.item.strategy.gen_strategy_snapshot = lambda: "snapshot_key"
+        dimensions_md5 = {
+            ip: count_md5({"bk_target_ip": ip, "bk_target_cloud_id": "0", NO_DATA_TAG_DIMENSION: True})
+            for ip in ["127.0.0.1", "127.0.0.2", "127.0.0.3", "127.0.0.4", "127.0.0.7"]
+        }
+        last_check_key = key.LAST_CHECKPOINTS_CACHE_KEY.get_key(strategy_id=self.item.strategy.id, item_id=self.item.id)
+        anomaly_key = key.NO_DATA_LAST_ANOMALY_CHECKPOINTS_CACHE_KEY.get_key()
+
+        def get_anomaly_field(ip):
+            return key.NO_DATA_LAST_ANOMALY_CHECKPOINTS_CACHE_KEY.get_field(
+                strategy_id=self.item.strategy.id, item_id=self.item.id, dimensions_md5=dimensions_md5[ip]
+            )
+
+        results = []
+        for batch_check in (False, True):
+            key.LAST_CHECKPOINTS_CACHE_KEY.client.flushall()
+            # 127.0.0.1、127.0.0.2 有数据上报，127.0.0.3 已无数据 5 个周期且已告警 3 个周期
+            mock_last_check_key(self, 9940, [dimensions_md5["127.0.0.1"], dimensions_md5["127.0.0.2"]])
+            mock_last_check_key(self, 9700, [dimensions_md5["127.0.0.3"]])
+            for ip, last_anomaly_point in [("127.0.0.1", 9000), ("127.0.0.3", 9880), ("127.0.0.4", 9500)]:
+                key.NO_DATA_LAST_ANOMALY_CHECKPOINTS_CACHE_KEY.client.hset(
+                    anomaly_key, get_anomaly_field(ip), last_anomaly_point
+                )
+
+            data_points = [DataPoint(record, self.item) for record in RECORDS]
+            with override_settings(NO_DATA_BATCH_CHECK=batch_check, NO_DATA_BATCH_CHECK_CHUNK_SIZE=2):
+                anomaly_data = self.item.check(data_points, 10000)
+            results.append(
+                (
+                    anomaly_data,
+                    key.LAST_CHECKPOINTS_CACHE_KEY.client.hgetall(last_check_key),
+                    key.NO_DATA_LAST_ANOMALY_CHECKPOINTS_CACHE_KEY.client.hgetall(anomaly_key),
+                )
+            )
+
+        # 批量检测与逐个检测的异常记录、检测点及异常检测点一致
+        self.assertEqual(results[0], results[1])
+
+        anomaly_messages = {
+            anomaly["data"]["dimensions"]["bk_target_ip"]: anomaly["anomaly"][str(NO_DATA_LEVEL)]["anomaly_message"]
+            for anomaly in results[1][0]
+        }
+        self.assertEqual(
+            anomaly_messages,
+            {
+                "127.0.0.3": "当前指标(check_test)已经有5个周期无数据上报，并且数据上报延时2个周期",
+                "127.0.0.7": "当前指标(check_test)已经有1个周期无数据上报",
+            },
+        )
+        # 有数据及不在业务中的维度已恢复，新的无数据维度记录首次异常点
+        anomaly_points = {
+            ip: key.NO_DATA_LAST_ANOMALY_CHECKPOINTS_CACHE_KEY.client.hget(anomaly_key, get_anomaly_field(ip))
+            for ip in dimensions_md5
+        }
+        self.assertEqual(
+            {ip: int(point) for ip, point in anomaly_points.items() if point is not None},
+            {"127.0.0.3": 9880, "127.0.0.7": 10000},
+        )
@@ -0,0 +1,78 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import random
+
+from bkmonitor.utils.range import load_condition_instance
+from bkmonitor.utils.range.matcher import ConditionMatcher
+
+
+class TestConditionMatcher:
+    def test_candidates(self):
+        conditions = [
+            load_condition_instance([[{"field": "ip", "method": "eq", "value": ["127.0.0.1"]}]], False),
+            load_condition_instance([[{"field": "ip", "method": "eq", "value": ["127.0.0.2", "127.0.0.3"]}]], False),
+            # neq 条件无法索引
+            load_condition_instance([[{"field": "ip", "method": "neq", "value": ["127.0.0.1"]}]], False),
+            # 每个分支都存在等值条件时按分支并集索引
+            load_condition_instance(
+                [
+                    [{"field": "bk_host_id", "method": "eq", "value": [1]}],
+                    [{"field": "ip", "method": "eq", "value": ["127.0.0.4"]}],
+                ],
+                False,
+            ),
+        ]
+        matcher = ConditionMatcher(conditions)
+        assert matcher.unindexed == [2]
+
+        assert matcher.get_candidates({"ip": "127.0.0.1"}) == [0, 2]
+        assert matcher.match({"ip": "127.0.0.1"}) == [0]
+        assert matcher.match({"ip": "127.0.0.3"}) == [1, 2]
+        assert matcher.match({"ip": "127.0.0.4", "bk_host_id": 2}) == [2, 3]
+        assert matcher.match({"bk_host_id": "1"}) == [3]
+        assert matcher.get_candidates({}) == [2]
+        assert matcher.match({}) == []
+
+    def test_topo_node_field(self):
+        condition = load_condition_instance(
+            [[{"field": "bk_topo_node", "method": "eq", "value": [{"bk_obj_id": "set", "bk_inst_id": 1}]}]], False
+        )
+        matcher = ConditionMatcher([condition])
+        assert matcher.match({"bk_topo_node": ["set|1", "module|2"]}) == [0]
+        assert matcher.match({"bk_obj_id": "set", "bk_inst_id": 1}) == [0]
+        assert matcher.match({"bk_topo_node": ["set|2"]}) == []
+
+    def test_same_as_is_match(self):
+        rnd = random.Random(0)
+        methods = ["eq", "eq", "eq", "neq", "include", "reg"]
+        fields = ["ip", "bk_host_id", "level", "strategy_id", "bk_target_ip"]
+
+        conditions = []
+        for _ in range(300):
+            config = []
+            for _ in range(rnd.randint(1, 2)):
+                config.append(
+                    [
+                        {
+                            "field": rnd.choice(fields),
+                            "method": rnd.choice(methods),
+                            "value": [str(rnd.randint(1, 20)) for _ in range(rnd.randint(1, 3))],
+                        }
+                        for _ in range(rnd.randint(0, 3))
+                    ]
+                )
+            conditions.append(load_condition_instance(config, rnd.choice([True, False])))
+        matcher = ConditionMatcher(conditions)
+
+        for _ in range(200):
+            data = {field: str(rnd.randint(1, 20)) for field in fields if rnd.random() > 0.3}
+            expected = [index for index, condition in enumerate(conditions) if condition.is_match(data)]
+            assert matcher.match(data) == expected
@@ -0,0 +1,111 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from collections import defaultdict
+from unittest import mock
+
+from alarm_backends.core.cache import key
+from alarm_backends.management.base.dispatch import DefaultDispatchMixin
+from alarm_backends.management.hashring import BoundedLoadHashRing
+
+HOSTS = {f"10.0.0.{i}": 1 for i in range(5)}
+
+
+def get_loads(assignment, costs):
+    loads = defaultdict(int)
+    for target, node in assignment.items():
+        loads[node] += costs[target]
+    return loads
+
+
+class TestBoundedLoadHashRing:
+    def test_bounded_load(self):
+        costs = {biz_id: 1 for biz_id in range(200)}
+        # 大业务的代价远大于其他业务
+        costs[2] = 64
+
+        ring = BoundedLoadHashRing(HOSTS, load_factor=1.25, num_vnodes=1000)
+        assignment = ring.assign(costs)
+        assert set(assignment) == set(costs)
+
+        capacity = sum(costs.values()) * 1.25 / len(HOSTS)
+        assert max(get_loads(assignment, costs).values()) <= capacity
+        # 相同输入的分配结果一致
+        assert BoundedLoadHashRing(HOSTS, load_factor=1.25, num_vnodes=1000).assign(costs) == assignment
+
+    def test_oversized_target(self):
+        costs = {1: 1000, 2: 1, 3: 1}
+        assignment = BoundedLoadHashRing(HOSTS, num_vnodes=1000).assign(costs)
+        # 单个目标超出所有节点容量时仍然会被分配，其他目标避开该节点
+        assert assignment[2] != assignment[1]
+        assert assignment[3] != assignment[1]
+
+    def test_minimal_movement(self):
+        costs = {biz_id: 1 + biz_id % 4 for biz_id in range(500)}
+        before = BoundedLoadHashRing(HOSTS, num_vnodes=1000).assign(costs)
+
+        hosts = dict(HOSTS)
+        removed = hosts.pop("10.0.0.0")
+        assert removed
+        after = BoundedLoadHashRing(hosts, num_vnodes=1000).assign(costs)
+
+        moved = [target for target in costs if before[target] != after[target]]
+        removed_targets = [target for target in costs if before[target] == "10.0.0.0"]
+        # 除了被移除节点上的目标，只有少量目标因溢出发生移动
+        assert len(moved) < len(removed_targets) * 2
+
+    def test_quantize_cost(self):
+        assert BoundedLoadHashRing.quantize_cost(None) == 1
+        assert BoundedLoadHashRing.quantize_cost(0.3) == 1
+        assert BoundedLoadHashRing.quantize_cost(60) == 64
+        assert BoundedLoadHashRing.quantize_cost(70) == 64
+
+
+class FakeClient:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def set(self, name, value, nx=False, ex=None):
+        if nx and name in self.data:
+            return False
+        self.data[name] = value
+        return True
+
+
+class FakeDispatcher(DefaultDispatchMixin):
+    _PATH_PREFIX_ = "run_access-data"
+
+    def __init__(self, costs):
+        self.costs = costs
+
+    def query_host_targets(self):
+        return list(range(200))
+
+    def query_target_costs(self, targets):
+        return self.costs
+
+
+class TestDispatchCostSnapshot:
+    def test_same_snapshot_for_all_hosts(self, settings):
+        settings.DISPATCH_BOUNDED_LOAD_ENABLED = True
+        settings.DISPATCH_BOUNDED_LOAD_FACTOR = 1.25
+        client = FakeClient()
+        with mock.patch.object(key.DISPATCH_TARGET_COST_KEY, "_cache", client):
+            _, first = FakeDispatcher({2: 64, 3: 32}).dispatch_all_hosts(HOSTS)
+            # 其他主机读取到的实时代价不同，但使用已发布的快照，分配结果一致
+            _, second = FakeDispatcher({2: 1, 5: 128}).dispatch_all_hosts(HOSTS)
+            # 无法计算代价的主机同样使用快照
+            _, third = FakeDispatcher({}).dispatch_all_hosts(HOSTS)
+
+        assert first == second == third
+        assert len(client.data) == 1
@@ -0,0 +1,113 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest import mock
+
+from alarm_backends.service.access import tasks
+from alarm_backends.service.access.data.coalesce import (
+    AccessCoalescedDataProcess,
+    QueryCoalescePlanner,
+)
+from core.errors.alarm_backends import LockError
+
+
+def make_item(agg_method, dimensions, agg_condition=None):
+    return SimpleNamespace(
+        query_configs=[{"agg_method": agg_method, "agg_condition": agg_condition or []}],
+        query=SimpleNamespace(dimensions=dimensions, metrics=[{"field": "usage", "alias": "a"}, {"field": "_result_"}]),
+    )
+
+
+POINTS = [
+    {"bk_target_ip": "127.0.0.1", "device_name": "eth0", "_time_": 60, "a": 1, "_result_": 1},
+    {"bk_target_ip": "127.0.0.1", "device_name": "eth1", "_time_": 60, "a": 2, "_result_": 2},
+    {"bk_target_ip": "127.0.0.2", "device_name": "eth0", "_time_": 60, "a": 4, "_result_": 4},
+    {"bk_target_ip": "127.0.0.1", "device_name": "eth0", "_time_": 120, "a": None, "_result_": None},
+]
+
+
+class TestQueryCoalescePlanner:
+    def test_plan(self):
+        interval_map = {60: {"g1", "g2", "g3", "g4"}, 300: {"g5", "g6"}}
+        coalesce_keys = {"g1": "k1", "g2": "k1", "g3": "k1", "g5": "k1", "g6": "k2"}
+
+        planned, coalesced = QueryCoalescePlanner.plan(interval_map, coalesce_keys, 2)
+        # 不同周期的分组不合并，超过最大分组数时拆分
+        assert planned == {60: {"g1", "g3", "g4"}, 300: {"g5", "g6"}}
+        assert coalesced == {"g1": ["g1", "g2"]}
+
+        planned, coalesced = QueryCoalescePlanner.plan(interval_map, coalesce_keys, 1)
+        assert planned == interval_map
+        assert coalesced == {}
+
+
+class TestAccessCoalescedDataProcess:
+    def test_split_points(self):
+        dimensions = {"bk_target_ip", "device_name"}
+
+        # 维度一致且没有条件时直接使用查询结果
+        item = make_item("SUM", ["bk_target_ip", "device_name"])
+        assert AccessCoalescedDataProcess.split_points(item, POINTS, dimensions) == POINTS
+
+        # 按分组维度再次聚合
+        item = make_item("SUM", ["bk_target_ip"])
+        points = AccessCoalescedDataProcess.split_points(item, POINTS, dimensions)
+        assert sorted(points, key=lambda p: (p["_time_"], p["bk_target_ip"])) == [
+            {"bk_target_ip": "127.0.0.1", "_time_": 60, "a": 3, "_result_": 3},
+            {"bk_target_ip": "127.0.0.2", "_time_": 60, "a": 4, "_result_": 4},
+            {"bk_target_ip": "127.0.0.1", "_time_": 120, "a": None, "_result_": None},
+        ]
+
+        # 按分组条件过滤
+        item = make_item("MAX", [], [{"key": "device_name", "method": "eq", "value": ["eth0"]}])
+        assert AccessCoalescedDataProcess.split_points(item, POINTS, dimensions) == [
+            {"_time_": 60, "a": 4, "_result_": 4},
+            {"_time_": 120, "a": None, "_result_": None},
+        ]
+
+
+class TestRunCoalescedAccessData:
+    def test_member_lock_and_token(self):
+        @contextmanager
+        def fake_lock(key_instance, strategy_group_key):
+            # g2 正在被其他任务处理
+            if strategy_group_key == "g2":
+                raise LockError(msg="locked")
+            yield
+
+        class FakeTokenBucket:
+            released = {}
+
+            def __init__(self, strategy_group_key, interval=60):
+                self.strategy_group_key = strategy_group_key
+
+            def acquire(self):
+                # g3 令牌已用完
+                return self.strategy_group_key != "g3"
+
+            def release(self, decrement):
+                self.released[self.strategy_group_key] = decrement
+
+        processor = mock.MagicMock(pull_durations={"g1": 3.2, "g4": 0.2})
+        with (
+            mock.patch.object(tasks, "service_lock", fake_lock),
+            mock.patch.object(tasks, "TokenBucket", FakeTokenBucket),
+            mock.patch.object(tasks, "AccessCoalescedDataProcess", return_value=processor) as process_class,
+            mock.patch.object(tasks.AccessCostRecorder, "record") as record,
+            mock.patch.object(tasks.metrics, "report_all"),
+        ):
+            tasks.run_access_data("g1", 60, ["g1", "g2", "g3", "g4"])
+
+        # 只合并拿到锁和令牌的分组，耗时及令牌按分组分别记录
+        process_class.assert_called_once_with("g1", ["g1", "g4"])
+        assert record.call_args_list == [mock.call("g1", 3.2), mock.call("g4", 0.2)]
+        assert FakeTokenBucket.released == {"g1": 3, "g4": 0}
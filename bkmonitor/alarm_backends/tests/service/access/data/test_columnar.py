@@ -0,0 +1,54 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import json
+
+import pytest
+
+from alarm_backends.service.access.data import columnar
+
+
+def gen_records(count):
+    return [
+        {
+            "record_id": f"{i:032x}.{1569246480 + i // 10 * 60}",
+            "value": i * 1.5 if i % 7 else None,
+            "values": {"time": 1569246480 + i // 10 * 60, "load5": i * 1.5 if i % 7 else None},
+            "dimensions": {"bk_target_ip": f"127.0.0.{i % 10}", "bk_target_cloud_id": 0, "flag": i % 3 == 0},
+            "dimension_fields": ["bk_target_ip", "bk_target_cloud_id", "flag"],
+            "time": 1569246480 + i // 10 * 60,
+            "access_time": 1569246500.123,
+        }
+        for i in range(count)
+    ]
+
+
+class TestColumnar:
+    def test_round_trip(self):
+        records = gen_records(100)
+        records[3]["dimensions"]["extra"] = 1.0
+        records[5]["__debug__"] = True
+
+        raw = columnar.encode_records(records)
+
+        assert columnar.is_columnar(raw)
+        assert not columnar.is_columnar(json.dumps(records[0]))
+        # 解码结果需与逐条 json 序列化/反序列化的结果一致
+        assert columnar.decode_records(raw) == [json.loads(json.dumps(record)) for record in records]
+
+    def test_smaller_than_json(self):
+        records = gen_records(1000)
+        assert len(columnar.encode_records(records)) < sum(len(json.dumps(record)) for record in records)
+
+    def test_unhashable_dimension(self):
+        records = gen_records(1)
+        records[0]["dimensions"]["tags"] = ["a", "b"]
+        with pytest.raises(TypeError):
+            columnar.encode_records(records)
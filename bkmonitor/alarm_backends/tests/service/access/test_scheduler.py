@@ -0,0 +1,85 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from alarm_backends.service.access.scheduler import AccessScheduler
+
+
+@pytest.fixture(autouse=True)
+def spread_ratio(settings):
+    settings.ACCESS_SCHEDULE_SPREAD_RATIO = 0.8
+
+
+class TestAccessScheduler:
+    def test_plan(self):
+        group_keys = [f"group_{i}" for i in range(10)]
+        costs = {key: 1 for key in group_keys}
+        costs["group_0"] = 10
+
+        phases = AccessScheduler.plan(60, group_keys, costs)
+        assert sorted(key for _, key in phases) == sorted(group_keys)
+        assert all(0 <= phase < 60 for phase, _ in phases)
+        # 相同输入的相位稳定
+        assert phases == AccessScheduler.plan(60, list(reversed(group_keys)), costs)
+
+        # 耗时高的分组与相邻分组的间隔更大
+        ordered = [key for _, key in phases]
+        index = ordered.index("group_0")
+        gaps = [(phases[(i + 1) % len(phases)][0] - phases[i][0]) % 60 for i in range(len(phases))]
+        assert gaps[index] > 3 * min(gaps)
+        assert gaps[index - 1] > 3 * min(gaps)
+
+    def test_tick(self):
+        dispatched = []
+        scheduler = AccessScheduler(dispatch=lambda key, interval: dispatched.append((key, interval)))
+        scheduler.update({60: {f"group_{i}" for i in range(20)}, 120: {"group_x"}}, {})
+
+        start = 1700000000
+        for now in range(start, start + 241):
+            scheduler.tick(now)
+
+        counter = Counter(dispatched)
+        # 每个周期每个分组只下发一次
+        assert len(counter) == 21
+        assert all(counter[(f"group_{i}", 60)] == 4 for i in range(20))
+        assert counter[("group_x", 120)] == 2
+
+        # 调度停顿后恢复，每个分组只补发一次
+        dispatched.clear()
+        scheduler.tick(start + 1000)
+        assert len(dispatched) == 21
+
+    def test_update_costs(self):
+        clock = [0]
+        dispatched = Counter()
+        # 每秒检查一次，下发的分组的计划时间在 (now - 1, now] 内，据此计算所属周期
+        scheduler = AccessScheduler(
+            dispatch=lambda key, interval: dispatched.update([(key, (clock[0] - 0.5) // interval)])
+        )
+        group_keys = {f"group_{i}" for i in range(20)}
+        scheduler.update({60: group_keys}, {})
+
+        rand = random.Random(0)
+        start = 1700000000 // 60 * 60
+        for now in range(start, start + 600):
+            clock[0] = now
+            if now % 90 == 0:
+                # 周期中途耗时变化后重新计算相位
+                scheduler.update({60: group_keys}, {key: rand.random() * 10 for key in group_keys})
+            scheduler.tick(now)
+
+        # 相位变化不会导致同一周期内漏发或重复下发
+        cycles = range(start // 60 + 1, (start + 600) // 60)
+        assert all(dispatched[(key, cycle)] == 1 for key in group_keys for cycle in cycles)
+        assert max(dispatched.values()) == 1
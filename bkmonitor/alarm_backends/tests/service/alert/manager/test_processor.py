@@ -9,9 +9,12 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import time
+
 from django.test import TestCase
 
 from alarm_backends.core.alert import Alert
+from alarm_backends.core.alert.active_index import ActiveAlertIndex
 from alarm_backends.core.alert.alert import AlertKey
 from alarm_backends.core.cache.key import ALERT_DEDUPE_CONTENT_KEY
 from alarm_backends.service.alert.manager.processor import AlertManager
@@ -58,3 +61,62 @@ class TestProcessor(TestCase):
         snapshot_alert = Alert.get_from_snapshot(alert_key)
         self.assertIsNotNone(snapshot_alert)
         self.assertEqual(snapshot_alert.id, alert.id)
+
+
+class TestActiveAlertIndex(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ALERT_DEDUPE_CONTENT_KEY.client.flushall()
+        CacheNode.refresh_from_settings()
+
+    @classmethod
+    def tearDownClass(cls):
+        ALERT_DEDUPE_CONTENT_KEY.client.flushall()
+
+    def setUp(self):
+        ALERT_DEDUPE_CONTENT_KEY.client.flushall()
+
+    def tearDown(self):
+        ALERT_DEDUPE_CONTENT_KEY.client.flushall()
+
+    def test_update_and_list(self):
+        self.assertFalse(ActiveAlertIndex.is_ready())
+        ActiveAlertIndex.update(
+            [
+                {"id": "1", "strategy_id": 1, "bk_biz_id": 2, "status": "ABNORMAL"},
+                {"id": "2", "strategy_id": 1, "bk_biz_id": 3, "status": "ABNORMAL"},
+                {"id": "3", "strategy_id": None, "bk_biz_id": 2, "status": "ABNORMAL"},
+                {"id": "4", "strategy_id": 2, "bk_biz_id": 2, "status": "ABNORMAL", "is_blocked": True},
+            ]
+        )
+        alerts = ActiveAlertIndex.list_alerts([2])
+        self.assertEqual(
+            sorted(alerts, key=lambda x: x["id"]), [{"id": "1", "strategy_id": 1}, {"id": "3", "strategy_id": None}]
+        )
+
+        # 告警恢复后从索引中移除
+        ActiveAlertIndex.update([{"id": "1", "strategy_id": 1, "bk_biz_id": 2, "status": "RECOVERED"}])
+        alerts = ActiveAlertIndex.list_alerts([2, 3])
+        self.assertEqual(
+            sorted(alerts, key=lambda x: x["id"]), [{"id": "2", "strategy_id": 1}, {"id": "3", "strategy_id": None}]
+        )
+
+    def test_sweep(self):
+        ActiveAlertIndex.update([{"id": "1", "strategy_id": 1, "bk_biz_id": 2, "status": "ABNORMAL"}])
+
+        # 最近写入的索引不会被删除，ES中存在的告警会被补充
+        start_time = int(time.time())
+        added, removed = ActiveAlertIndex.sweep([{"id": "2", "strategy_id": 1, "bk_biz_id": 2}], start_time)
+        self.assertEqual((added, removed), (1, 0))
+        self.assertTrue(ActiveAlertIndex.is_ready())
+
+        # 超过宽限期后，ES中不存在的告警从索引中删除
+        added, removed = ActiveAlertIndex.sweep(
+            [{"id": "2", "strategy_id": 1, "bk_biz_id": 2}], start_time + ActiveAlertIndex.SWEEP_GRACE_PERIOD + 1
+        )
+        self.assertEqual((added, removed), (0, 1))
+        self.assertEqual(ActiveAlertIndex.list_alerts([2]), [{"id": "2", "strategy_id": 1}])
+
+        # 索引失效后需要重新校验才能使用
+        ActiveAlertIndex.invalidate()
+        self.assertFalse(ActiveAlertIndex.is_ready())
@@ -19,6 +19,7 @@ from six.moves import map
 from alarm_backends.constants import LATEST_POINT_WITH_ALL_KEY
 from alarm_backends.core.detect_result import ANOMALY_LABEL, CheckResult
 from alarm_backends.core.storage.redis_cluster import get_node_by_strategy_id
+from alarm_backends.service.access.data import columnar
 from alarm_backends.service.detect.process import DetectProcess
 from bkmonitor.models import CacheNode
 
@@ -120,6 +121,51 @@ class TestProcessorViews(TestCase):
             processor = DetectProcess("1")
             processor.process()
 
+    def test_processor_pull_mixed_queue(self):
+        with mock.patch(
+            "alarm_backends.core.cache.strategy.StrategyCacheManager.get_strategy_by_id",
+            return_value=copy.deepcopy(strategy_config),
+        ):
+            records = [
+                {
+                    "record_id": f"342a08e0f85f169a7e099c18db3708ed.{1569246480 + i}",
+                    "value": 99 + i,
+                    "values": {"timestamp": 1569246480 + i, "load5": 99 + i},
+                    "dimensions": {"ip": "127.0.0.1", "bk_cloud_id": i % 2},
+                    "dimension_fields": ["ip", "bk_cloud_id"],
+                    "time": 1569246480 + i,
+                }
+                for i in range(5)
+            ]
+
+            from alarm_backends.core.cache import key
+
+            strategy_id, item_id = 1, 2
+            redis_client = key.DATA_LIST_KEY.client
+            data_channel = key.DATA_LIST_KEY.get_key(strategy_id=strategy_id, item_id=item_id)
+            stats_key = columnar.get_queue_stats_key(strategy_id, item_id)
+            # 旧版本 access 推送的 json 记录与新版本推送的列式压缩块混合存在
+            redis_client.lpush(data_channel, json.dumps(records[0]))
+            redis_client.lpush(data_channel, columnar.encode_records(records[1:4]))
+            redis_client.hincrby(stats_key, "batches", 1)
+            redis_client.hincrby(stats_key, "points", 3)
+            redis_client.lpush(data_channel, json.dumps(records[4]))
+            assert columnar.get_pending_count(redis_client, data_channel, strategy_id, item_id) == 5
+
+            processor = DetectProcess(str(strategy_id))
+            processor.pull_data(processor.strategy.items[0])
+
+            assert redis_client.llen(data_channel) == 0
+            assert columnar.get_pending_count(redis_client, data_channel, strategy_id, item_id) == 0
+            assert [data_point.as_dict() for data_point in processor.inputs[item_id]] == records
+
+            # 统计 hash 过期后扣减不会留下负数及没有过期时间的 key
+            redis_client.lpush(data_channel, columnar.encode_records(records))
+            processor.pull_data(processor.strategy.items[0])
+            assert len(processor.inputs[item_id]) == 5
+            assert redis_client.hgetall(stats_key) == {"batches": "0", "points": "0"}
+            assert redis_client.ttl(stats_key) > 0
+
     def test_processor_handle(self):
         with mock.patch(
             "alarm_backends.core.cache.strategy.StrategyCacheManager.get_strategy_by_id",
@@ -8,6 +8,10 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import logging
+import time
+from unittest import mock
+
 import pytest
 
 from alarm_backends.service.detect import DataPoint
@@ -21,9 +25,47 @@ from alarm_backends.tests.service.detect.mocked_data import (
     item_config,
     mock_unify_query,
     mocked_data_source,
+    mocked_item,
 )
 from core.errors.alarm_backends.detect import InvalidAlgorithmsConfig, InvalidDataPoint
 
+logger = logging.getLogger(__name__)
+
+
+def gen_data_points(count, item=mocked_item):
+    values = [0, 6, 6.0, 49.999999, 50, 50.0000001, 99, 99.5, 100, -1, 1025, None, "50"]
+    return [
+        DataPoint(
+            {
+                "record_id": f"{index}.1569246480",
+                "value": values[index % len(values)],
+                "values": {"timestamp": 1569246480, "load5": values[index % len(values)]},
+                "dimensions": {"ip": f"127.0.0.{index}"},
+                "time": 1569246480,
+            },
+            item,
+        )
+        for index in range(count)
+    ]
+
+
+def dump_anomaly_points(anomaly_points):
+    return [
+        (
+            ap.data_point.record_id,
+            ap.anomaly_id,
+            ap.anomaly_message,
+            ap.detector.__class__.__name__,
+            [child.__class__.__name__ for child in ap.child_detector],
+        )
+        for ap in anomaly_points
+    ]
+
+
+def detect_records_per_point(detect_engine, data_points, level):
+    with mock.patch.object(detect_engine.__class__, "batch_detect", return_value=None):
+        return detect_engine.detect_records(data_points, level)
+
 
 class TestThreshold(object):
     def test_detect_gte(self):
@@ -143,3 +185,63 @@ class TestThreshold(object):
 
         anomaly_records = detect_engine.detect_records([datapoint], 1)
         assert anomaly_records[0].anomaly_message == "avg(测试指标) >= 1.0KiB, 当前值1.000977KiB"
+
+
+class TestThresholdBatch:
+    algorithms_configs = [
+        [[{"threshold": 50.0, "method": "gte"}]],
+        [[{"threshold": 50, "method": "eq"}], [{"threshold": 6, "method": "lte"}]],
+        [
+            [{"threshold": 6, "method": "gt"}, {"threshold": 99, "method": "lte"}, {"threshold": 50, "method": "neq"}],
+            [{"threshold": 6, "method": "eq"}],
+        ],
+        [[{"threshold": 1, "method": "gte"}, {"threshold": 100, "method": "lt"}]],
+    ]
+
+    @pytest.mark.parametrize("algorithms_config", algorithms_configs)
+    def test_batch_detect_same_as_per_point(self, algorithms_config):
+        data_points = gen_data_points(100)
+        detect_engine = Threshold(config=algorithms_config)
+
+        batch_result = detect_engine.detect_records(data_points, 1)
+        per_point_result = detect_records_per_point(detect_engine, data_points, 1)
+
+        assert batch_result
+        assert dump_anomaly_points(batch_result) == dump_anomaly_points(per_point_result)
+
+    def test_batch_detect_with_unit(self):
+        item = Item(
+            1,
+            Strategy(1, "os"),
+            "bytes",
+            [mocked_data_source],
+            ["system.cpu_summary"],
+            item_config["query_configs"],
+            mock_unify_query,
+        )
+        data_points = gen_data_points(100, item)
+        detect_engine = Threshold(config=[[{"threshold": 1, "method": "gte"}]], unit="Ki")
+
+        batch_result = detect_engine.detect_records(data_points, 1)
+        assert dump_anomaly_points(batch_result) == dump_anomaly_points(
+            detect_records_per_point(detect_engine, data_points, 1)
+        )
+        assert {ap.data_point.value for ap in batch_result} == {1025}
+
+    def test_batch_detect_benchmark(self):
+        data_points = gen_data_points(20000)
+        detect_engine = Threshold(config=self.algorithms_configs[2])
+
+        start = time.perf_counter()
+        per_point_result = detect_records_per_point(detect_engine, data_points, 1)
+        per_point_cost = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch_result = detect_engine.detect_records(data_points, 1)
+        batch_cost = time.perf_counter() - start
+
+        logger.info(
+            "threshold detect %s points: per-point %.3fs, batch %.3fs", len(data_points), per_point_cost, batch_cost
+        )
+        assert dump_anomaly_points(batch_result) == dump_anomaly_points(per_point_result)
+        assert batch_result
@@ -87,6 +87,7 @@ from bkmonitor.utils.template import (
     AlarmNoticeTemplate,
     Jinja2Renderer,
     NoticeRowRenderer,
+    compiled_template_cache,
 )
 from bkmonitor.utils.text import cut_line_str_by_max_bytes
 from constants import alert as alert_constants
@@ -2291,6 +2292,20 @@ class TestActionProcessor(TransactionTestCase):
         content = Jinja2Renderer.render("{{content.recommended_metrics}}", context)
         self.assertEqual(content, "关联指标: 0 个指标,0 个维度")
 
+    def test_render_many(self):
+        compiled_template_cache.clear()
+        template = "{{notice_way}}: *{{ name }}*"
+        contexts = [
+            {"notice_way": "rtx", "name": "a_b"},
+            {"notice_way": NoticeWay.WX_BOT, "name": "a_b"},
+            {"notice_way": "sms", "name": "c"},
+        ]
+        expected = [Jinja2Renderer.render(template, context) for context in contexts]
+        self.assertEqual(Jinja2Renderer.render_many(template, contexts), expected)
+        self.assertEqual(expected[0], "rtx: *a_b*")
+        # 同一模板按转义方式只编译一次
+        self.assertEqual(len(compiled_template_cache.templates), 2)
+
     def test_ai_setting__config_exist(self):
         alert = AlertDocument(**self.alert_info)
         DimensionDrillLightManager(alert)
@@ -9,6 +9,7 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 import copy
+from unittest import mock
 
 import arrow
 import pytest
@@ -473,3 +474,22 @@ class TestChecker(TestCase):
         anomaly_records, event_record = checker.check()
         self.assertEqual(len(anomaly_records), 3)
         self.assertEqual(event_record["trigger"]["level"], "2")
+
+    def test_prefetch_check_results(self):
+        for anomaly_count in CHECK_RESULT_SETS:
+            self.clear_check_result()
+            self.insert_check_result(anomaly_count)
+            checker = AnomalyChecker(POINT, STRATEGY, 1)
+            expected = [checker._check_anomaly_by_level(level) for level in ["1", "2", "3"]]
+            expected_anomaly = checker.check_anomaly()
+
+            batch_checkers = [AnomalyChecker(POINT, STRATEGY, 1) for _ in range(3)]
+            AnomalyChecker.prefetch_check_results(batch_checkers)
+            for batch_checker in batch_checkers:
+                self.assertSetEqual(set(batch_checker.prefetched_check_results), {"1", "2", "3"})
+                # 预取后检测不再请求 redis
+                with mock.patch.object(CHECK_RESULT_CACHE_KEY.client, "zrangebyscore") as fake_zrangebyscore:
+                    result = [batch_checker._check_anomaly_by_level(level) for level in ["1", "2", "3"]]
+                    self.assertEqual(batch_checker.check_anomaly(), expected_anomaly)
+                    fake_zrangebyscore.assert_not_called()
+                self.assertEqual(result, expected)
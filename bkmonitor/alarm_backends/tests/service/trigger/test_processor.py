@@ -15,7 +15,7 @@ from datetime import datetime
 from uuid import uuid4
 
 import mock
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from six.moves import range
 
 from alarm_backends.core.cache.key import (
@@ -211,3 +211,23 @@ class TestProcessor(TestCase):
         ) as fake_push_to_kafka:
             processor.process()
             print(fake_push_to_kafka.call_args)
+
+    def test_process_batch(self):
+        processor = TriggerProcessor(1, 1)
+        processor.BATCH_CHECK_SIZE = 4
+        setattr(processor.strategy, "in_alarm_time", lambda: (True, None))
+        anomaly_list_key = ANOMALY_LIST_KEY.get_key(strategy_id=1, item_id=1)
+        for i in range(10):
+            ANOMALY_LIST_KEY.client.lpush(anomaly_list_key, json.dumps(POINT))
+
+        with override_settings(TRIGGER_BATCH_CHECK=True), mock.patch(
+            "alarm_backends.service.trigger.processor.AnomalyChecker.prefetch_check_results"
+        ) as fake_prefetch, mock.patch(
+            "alarm_backends.service.trigger.processor.MonitorEventAdapter.push_to_kafka"
+        ) as fake_push_to_kafka:
+            processor.process()
+
+        # 10 个异常点分 3 批拉取检测窗口数据
+        self.assertEqual(fake_prefetch.call_count, 3)
+        self.assertEqual([len(call[0][0]) for call in fake_prefetch.call_args_list], [4, 4, 2])
+        self.assertEqual(len(fake_push_to_kafka.call_args[1]["events"]), 10)
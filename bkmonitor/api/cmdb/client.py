@@ -431,6 +431,20 @@ class ExecuteDynamicGroup(CMDBBaseResource):
     method = "POST"
 
 
+class ResourceWatch(CMDBBaseResource):
+    """
+    监听资源变化事件
+    """
+
+    return_type = dict
+
+    @property
+    def action(self):
+        return "/api/v3/event/watch/resource/{bk_resource}" if self.use_apigw() else "/resource_watch/"
+
+    method = "POST"
+
+
 search_set = SearchSet()
 search_module = SearchModule()
 list_biz_hosts_topo = ListBizHostsTopo()
@@ -454,3 +468,4 @@ find_host_biz_relation = FindHostBizRelation()
 find_topo_node_paths = FindTopoNodePaths()
 search_dynamic_group = SearchDynamicGroup()
 execute_dynamic_group = ExecuteDynamicGroup()
+resource_watch = ResourceWatch()
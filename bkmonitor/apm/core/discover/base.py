@@ -12,6 +12,7 @@ import abc
 import datetime
 import itertools
 import logging
+import time
 import traceback
 from abc import ABC
 from collections import defaultdict
@@ -22,12 +23,13 @@ from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from opentelemetry.semconv.resource import ResourceAttributes
 
+from alarm_backends.core.cache.key import APM_TOPO_DISCOVER_WATERMARK_KEY
 from apm import constants
 from apm.constants import DiscoverRuleType
 from apm.models import ApmApplication, ApmTopoDiscoverRule, TraceDataSource
 from apm.utils.base import divide_biscuit
 from apm.utils.es_search import limits
-from bkmonitor.utils.thread_backend import ThreadPool
+from bkmonitor.utils.thread_backend import get_thread_pool
 from constants.apm import OtlpKey, SpanKind, TelemetryDataType
 from core.drf_resource.exceptions import CustomException
 
@@ -153,6 +155,8 @@ class DiscoverBase(ABC):
     model = None
     # 定义此发现器根据 span 列表发现时 span 列表是否为过滤后的 span 列表
     DISCOVERY_ALL_SPANS = False
+    # 发现时读取的 span 一级字段(发现规则中配置的字段会自动补充)，为 None 时拉取完整的 span
+    SOURCE_FIELDS = None
 
     def __init__(self, bk_biz_id, app_name):
         self.bk_biz_id = bk_biz_id
@@ -271,11 +275,21 @@ class TopoHandler:
 
     _ES_MAX_RESULT_WINDOWS = 10000
 
+    # 默认发现最近 10 分钟内出现的 trace
+    DEFAULT_DISCOVER_DURATION = 10 * 60
+    # 增量模式下最多从多久之前的水位继续发现，超过时回退为默认时间范围
+    INCREMENTAL_MAX_LOOKBACK = 30 * 60
+    # 增量模式下水位与当前时间的间隔，等待 ES 数据写入可见
+    INCREMENTAL_DELAY = 30
+
     def __init__(self, bk_biz_id, app_name):
         self.bk_biz_id = bk_biz_id
         self.app_name = app_name
         self.datasource = TraceDataSource.objects.filter(app_name=app_name, bk_biz_id=bk_biz_id).first()
         self.application = ApmApplication.get_application(self.bk_biz_id, self.app_name)
+        self.incremental = settings.APM_TOPO_INCREMENTAL_DISCOVER
+        # trace_id 列表是否因超时没有遍历完成
+        self.is_interrupted = False
 
     def __str__(self):
         return f"bk_biz_id: {self.bk_biz_id} app_name: {self.app_name}"
@@ -288,10 +302,63 @@ class TopoHandler:
 
         return True
 
-    def _get_after_key_body(self, after_key=None):
+    @property
+    def watermark_key(self):
+        return APM_TOPO_DISCOVER_WATERMARK_KEY.get_key(bk_biz_id=self.bk_biz_id, app_name=self.app_name)
+
+    def get_watermark(self) -> int | None:
+        watermark = APM_TOPO_DISCOVER_WATERMARK_KEY.client.get(self.watermark_key)
+        return int(watermark) if watermark else None
+
+    def set_watermark(self, watermark: int):
+        APM_TOPO_DISCOVER_WATERMARK_KEY.client.set(self.watermark_key, watermark, APM_TOPO_DISCOVER_WATERMARK_KEY.ttl)
+
+    def get_time_range(self) -> tuple[int, int]:
+        """
+        获取本轮发现的时间范围(毫秒)
+        增量模式下从上一轮已处理的位置开始，没有水位或水位过旧时使用默认时间范围
+        """
+        now = int(time.time() * 1000)
+        start = now - self.DEFAULT_DISCOVER_DURATION * 1000
+        if not self.incremental:
+            return start, now
+
+        end = now - self.INCREMENTAL_DELAY * 1000
+        try:
+            watermark = self.get_watermark()
+        except Exception as e:  # noqa
+            logger.warning(f"[TopoHandler] {self.bk_biz_id} {self.app_name} get watermark failed: {e}")
+            watermark = None
+
+        if watermark and now - self.INCREMENTAL_MAX_LOOKBACK * 1000 <= watermark < end:
+            start = watermark
+        return start, end
+
+    def get_source_fields(self) -> list[str] | None:
+        """
+        获取拓扑发现需要的 span 字段，只拉取各发现器及发现规则使用到的一级字段
+        """
+        fields = {OtlpKey.TRACE_ID, OtlpKey.KIND}
+        for discover in DiscoverContainer.list_discovers(TelemetryDataType.TRACE.value):
+            if discover.SOURCE_FIELDS is None:
+                return None
+            fields.update(discover.SOURCE_FIELDS)
+
+        # 规则中的字段格式为 "attributes.http.method" 或 "span_name"，多个字段以逗号分隔
+        for rule in ApmTopoDiscoverRule.get_application_rule(self.bk_biz_id, self.app_name, _type="all"):
+            for keys in (rule.predicate_key, rule.endpoint_key, rule.instance_key):
+                fields.update(key.split(".", 1)[0] for key in (keys or "").split(",") if key)
+        return sorted(fields)
+
+    def _get_after_key_body(self, after_key=None, time_range=None):
+        if time_range:
+            time_query = {"gte": time_range[0], "lt": time_range[1], "format": "epoch_millis"}
+        else:
+            time_query = {"gte": "now-10m", "lt": "now"}
+
         body = {
             "size": 0,
-            "query": {"bool": {"must": {"range": {"time": {"gte": "now-10m", "lt": "now"}}}}},
+            "query": {"bool": {"must": {"range": {"time": time_query}}}},
             "aggs": {
                 "unique_trace_id": {
                     "composite": {
@@ -307,12 +374,12 @@ class TopoHandler:
 
         return body
 
-    def list_trace_ids(self, index_name):
+    def list_trace_ids(self, index_name, time_range=None):
         start = datetime.datetime.now()
         after_key = None
 
         while True:
-            query_body = self._get_after_key_body(after_key)
+            query_body = self._get_after_key_body(after_key, time_range)
             logger.info(f"[TopoHandler] {self.bk_biz_id} {self.app_name} list_trace_ids body: {query_body}")
             response = self.datasource.es_client.search(index=index_name, body=query_body, request_timeout=60)
 
@@ -327,6 +394,7 @@ class TopoHandler:
                     f"[TopoHandler] {self.bk_biz_id} {self.app_name} "
                     f"list trace_ids over {constants.DISCOVER_TIME_RANGE}, break"
                 )
+                self.is_interrupted = True
                 break
             yield per_round_trace_ids
 
@@ -335,13 +403,15 @@ class TopoHandler:
                 break
 
     @limits(calls=100, period=1)
-    def list_span_by_trace_ids(self, trace_ids, max_result_count, index_name):
+    def list_span_by_trace_ids(self, trace_ids, max_result_count, index_name, source_fields=None):
         if max_result_count > constants.DISCOVER_BATCH_SIZE * len(trace_ids):
             # 直接获取
             query = {
                 "query": {"bool": {"must": [{"terms": {OtlpKey.TRACE_ID: trace_ids}}]}},
                 "size": constants.DISCOVER_BATCH_SIZE * len(trace_ids),
             }
+            if source_fields:
+                query["_source"] = source_fields
             response = self.datasource.es_client.search(index=index_name, body=query)
             hits = response["hits"]["hits"]
             return [i["_source"] for i in hits]
@@ -352,6 +422,8 @@ class TopoHandler:
                 "query": {"bool": {"must": [{"terms": {OtlpKey.TRACE_ID: trace_ids}}]}},
                 "size": max_result_count,
             }
+            if source_fields:
+                query["_source"] = source_fields
             response = self.datasource.es_client.search(index=index_name, body=query, scroll="5m")
             hits = response["hits"]["hits"]
             res += [i["_source"] for i in hits]
@@ -383,9 +455,11 @@ class TopoHandler:
                 f"discover: {str(discover)} handle_type: {handle_type}"
                 f"error: {e} exception: {traceback.format_exc()}"
             )
+            return False
 
         duration = (datetime.datetime.now() - start).seconds
         logger.info(f"[{handle_type}] round discover success. span count: {len(spans)} duration: {duration}ms")
+        return True
 
     def _get_trace_task_splits(self):
         """根据此索引最大的结果返回数量判断每个子任务需要传递多少个traceId"""
@@ -424,12 +498,18 @@ class TopoHandler:
         return 1 if not per_trace_size else per_trace_size
 
     def discover(self):
-        """application spans discover"""
+        """
+        application spans discover
+        增量模式下只发现上一轮处理位置之后出现的 trace (trace 的 span 仍然完整拉取，保证调用关系完整)，
+        与上一轮重叠的数据在入库时会按已存在的记录更新，不会产生重复数据
+        """
 
         start = datetime.datetime.now()
         trace_id_count = 0
         span_count = 0
         filter_span_count = 0
+        # 是否有批次拉取 span 或执行发现失败
+        has_failure = False
         try:
             max_result_count, per_trace_size, index_name = self._get_trace_task_splits()
         except Exception as e:
@@ -439,16 +519,22 @@ class TopoHandler:
             )
             return
 
-        for round_index, trace_ids in enumerate(self.list_trace_ids(index_name)):
+        time_range = self.get_time_range()
+        source_fields = self.get_source_fields() if self.incremental else None
+        for round_index, trace_ids in enumerate(self.list_trace_ids(index_name, time_range)):
             if not trace_ids:
                 continue
 
             trace_id_count += len(trace_ids)
 
-            pool = ThreadPool()
-            get_spans_params = [(i, max_result_count, index_name) for i in divide_biscuit(trace_ids, per_trace_size)]
-            results = pool.map_ignore_exception(self.list_span_by_trace_ids, get_spans_params)
-            all_spans_group = [i for i in results if i]
+            pool = get_thread_pool("apm_discover")
+            get_spans_params = [
+                (i, max_result_count, index_name, source_fields) for i in divide_biscuit(trace_ids, per_trace_size)
+            ]
+            results = pool.map_ignore_exception(self.list_span_by_trace_ids, get_spans_params, return_exception=True)
+            if any(isinstance(i, Exception) for i in results):
+                has_failure = True
+            all_spans_group = [i for i in results if i and not isinstance(i, Exception)]
             all_spans = list(itertools.chain(*all_spans_group))
             avg_group_span_count = len(all_spans) / len(get_spans_params)
             if round_index == 0 and avg_group_span_count:
@@ -476,11 +562,18 @@ class TopoHandler:
                 else:
                     topo_params.append((c, filter_spans, "topo"))
 
-            pool.map_ignore_exception(self._discover_handle, topo_params)
+            results = pool.map_ignore_exception(self._discover_handle, topo_params, return_exception=True)
+            if any(i is not True for i in results):
+                has_failure = True
+
+        # 全部 trace 都处理成功后才推进水位，中断或失败时下一轮从原水位重新发现
+        if self.incremental and not self.is_interrupted and not has_failure:
+            self.set_watermark(time_range[1])
 
         logger.info(
             f"[TopoHandler] discover finished {self.bk_biz_id} {self.app_name} "
-            f"trace count: {trace_id_count} all span count: {span_count} filter span count: {filter_span_count}"
+            f"trace count: {trace_id_count} all span count: {span_count} filter span count: {filter_span_count} "
+            f"has failure: {has_failure} time range: {time_range} "
             f"elapsed: {(datetime.datetime.now() - start).seconds}s"
         )
         return True
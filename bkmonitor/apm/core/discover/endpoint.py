@@ -26,6 +26,7 @@ from constants.apm import OtlpKey
 class EndpointDiscover(DiscoverBase):
     MAX_COUNT = 100000
     model = Endpoint
+    SOURCE_FIELDS = [OtlpKey.RESOURCE, OtlpKey.ATTRIBUTES, OtlpKey.KIND]
 
     def list_exists(self):
         res = {}
@@ -28,6 +28,7 @@ class HostDiscover(DiscoverBase):
     PAGE_LIMIT = 100
     DEFAULT_BK_CLOUD_ID = -1
     model = HostInstance
+    SOURCE_FIELDS = [OtlpKey.RESOURCE]
 
     def list_exists(self):
         res = {}
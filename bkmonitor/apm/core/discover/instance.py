@@ -29,6 +29,7 @@ class InstanceDiscover(DiscoverBase):
     MAX_COUNT = 100000
     INSTANCE_ID_SPLIT = ":"
     model = TopoInstance
+    SOURCE_FIELDS = [OtlpKey.RESOURCE, OtlpKey.ATTRIBUTES, OtlpKey.KIND]
 
     @classmethod
     def to_instance_key(cls, object_pk_id, instance_id):
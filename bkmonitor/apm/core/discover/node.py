@@ -41,6 +41,7 @@ class NodeDiscover(DiscoverBase):
     DISCOVERY_ALL_SPANS = True
     MAX_COUNT = 100000
     model = TopoNode
+    SOURCE_FIELDS = [OtlpKey.RESOURCE, OtlpKey.ATTRIBUTES, OtlpKey.KIND]
     # 批量处理 span 时 每批次的数量
     HANDLE_SPANS_BATCH_SIZE = 10000
 
@@ -21,6 +21,13 @@ from constants.apm import OtlpKey, SpanKind
 class RelationDiscover(DiscoverBase):
     MAX_COUNT = 100000
     model = TopoRelation
+    SOURCE_FIELDS = [
+        OtlpKey.RESOURCE,
+        OtlpKey.ATTRIBUTES,
+        OtlpKey.KIND,
+        OtlpKey.SPAN_ID,
+        OtlpKey.PARENT_SPAN_ID,
+    ]
 
     def get_relation_map(self, origin_data):
         relation_mapping = defaultdict(lambda: {"from": None, "to": [], "kind": ""})
@@ -25,6 +25,13 @@ from constants.apm import OtlpKey
 class RemoteServiceRelationDiscover(DiscoverBase):
     MAX_COUNT = 100000
     model = RemoteServiceRelation
+    SOURCE_FIELDS = [
+        OtlpKey.RESOURCE,
+        OtlpKey.ATTRIBUTES,
+        OtlpKey.KIND,
+        OtlpKey.SPAN_ID,
+        OtlpKey.PARENT_SPAN_ID,
+    ]
 
     def list_exists(self):
         res = {}
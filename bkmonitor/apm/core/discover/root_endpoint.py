@@ -20,6 +20,14 @@ from constants.apm import OtlpKey, SpanKind
 class RootEndpointDiscover(DiscoverBase):
     MAX_COUNT = 100000
     model = RootEndpoint
+    SOURCE_FIELDS = [
+        OtlpKey.RESOURCE,
+        OtlpKey.ATTRIBUTES,
+        OtlpKey.KIND,
+        OtlpKey.TRACE_ID,
+        OtlpKey.START_TIME,
+        OtlpKey.ELAPSED_TIME,
+    ]
 
     def group_by_trace_id(self, spans):
         res = {}
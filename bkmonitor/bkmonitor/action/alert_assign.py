@@ -74,33 +74,42 @@ class UpgradeRuleMatch:
 class AssignRuleMatch:
     """分派规则适配"""
 
-    def __init__(self, assign_rule, assign_rule_snap=None, alert: AlertDocument = None):
+    def __init__(self, assign_rule, assign_rule_snap=None, alert: AlertDocument = None, dimension_check=None):
         """
         :param assign_rule:  规则ID
         :param assign_rule_snap:
+        :param dimension_check: 预先解析好的条件对象，不传时根据规则配置解析
         :return:
         """
         self.assign_rule = assign_rule
         self.assign_rule_snap = assign_rule_snap or {}
-        self.dimension_check = None
-        self.parse_dimension_conditions()
+        self.dimension_check = dimension_check
+        if self.dimension_check is None:
+            self.parse_dimension_conditions()
         self.alert = alert
 
-    def parse_dimension_conditions(self):
+    @staticmethod
+    def load_dimension_check(conditions):
         """
-        根据配置的条件信息获取
-        :return:
+        根据配置的条件信息获取条件对象
         """
         or_cond = []
         and_cond = []
-        for condition in self.assign_rule["conditions"]:
+        for condition in conditions:
             if condition.get("condition") == "or" and and_cond:
                 or_cond.append(and_cond)
                 and_cond = []
             and_cond.append(condition)
         if and_cond:
             or_cond.append(and_cond)
-        self.dimension_check = load_condition_instance(or_cond, False)
+        return load_condition_instance(or_cond, False)
+
+    def parse_dimension_conditions(self):
+        """
+        根据配置的条件信息获取
+        :return:
+        """
+        self.dimension_check = self.load_dimension_check(self.assign_rule["conditions"])
 
     def assign_group(self):
         return {"group_id": self.assign_rule["assign_group_id"]}
@@ -0,0 +1,82 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import copy
+
+from bkmonitor.data_source.unify_query.series import UnifyQuerySeriesResult
+
+PARAMS = {"query_list": [{"reference_name": "a"}]}
+
+UNIFY_QUERY_DATA = {
+    "series": [
+        {
+            "name": "_result0",
+            "columns": ["_time", "_value"],
+            "types": ["float", "float"],
+            "group_keys": ["bk_target_ip_table0", "bk_target_cloud_id"],
+            "group_values": ["127.0.0.1", "0"],
+            "values": [[1652873820000, 1.5], [1652873880000, 2.5], [1652873940000, 3.5]],
+        },
+        {
+            "name": "_result1",
+            "columns": ["time", "a"],
+            "types": ["time", "float"],
+            "group_keys": None,
+            "group_values": [],
+            "values": [["2022-05-18T11:37:00Z", 1], ["2022-05-18T11:38:00Z", None]],
+        },
+        {
+            "name": "_result2",
+            "columns": ["_time", "_value"],
+            "types": ["float", "float"],
+            "group_keys": ["bk_target_ip"],
+            "group_values": ["127.0.0.2"],
+            "values": [],
+        },
+    ]
+}
+
+
+class TestUnifyQuerySeriesResult:
+    def test_to_records(self):
+        result = UnifyQuerySeriesResult.from_unify_query_data(
+            PARAMS, copy.deepcopy(UNIFY_QUERY_DATA), end_time=1652873940000
+        )
+
+        assert len(result) == 4
+        assert result.to_records() == [
+            {"bk_target_ip": "127.0.0.1", "bk_target_cloud_id": "0", "_time_": 1652873820000, "_result_": 1.5},
+            {"bk_target_ip": "127.0.0.1", "bk_target_cloud_id": "0", "_time_": 1652873880000, "_result_": 2.5},
+            {"time": 1652873820000, "a": 1, "_result_": 1},
+            {"time": 1652873880000, "a": None, "_result_": None},
+        ]
+        assert result.series[0].column("_result_") == [1.5, 2.5]
+
+    def test_instant(self):
+        params = {"instant": True, **PARAMS}
+        result = UnifyQuerySeriesResult.from_unify_query_data(
+            params, copy.deepcopy(UNIFY_QUERY_DATA), end_time=1652873940000
+        )
+        assert len(result) == 5
+
+    def test_source_data_unchanged(self):
+        data = copy.deepcopy(UNIFY_QUERY_DATA)
+        UnifyQuerySeriesResult.from_unify_query_data(PARAMS, data, end_time=1652873940000)
+        assert data == UNIFY_QUERY_DATA
+
+    def test_extend(self):
+        result = UnifyQuerySeriesResult.from_unify_query_data(PARAMS, copy.deepcopy(UNIFY_QUERY_DATA))
+        extra = {"_time_": 1652873820000, "_result_": 1, "__time_compare": "1d"}
+        result.extend([extra])
+
+        assert bool(result)
+        assert len(result) == 6
+        assert list(result)[-1] == extra
+        assert not UnifyQuerySeriesResult.from_unify_query_data(PARAMS, {"series": []})
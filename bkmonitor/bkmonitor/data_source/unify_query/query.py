@@ -10,12 +10,10 @@ specific language governing permissions and limitations under the License.
 
 import json
 import logging
-import re
 import time
 from itertools import chain
 from typing import Any
 
-import arrow
 from django.conf import settings
 from django.utils import timezone
 from django.utils.functional import cached_property
@@ -28,8 +26,9 @@ from bkmonitor.data_source.unify_query.functions import (
     CpAggMethods,
     add_expression_functions,
 )
+from bkmonitor.data_source.unify_query.series import UnifyQuerySeriesResult
 from bkmonitor.utils.tenant import bk_biz_id_to_bk_tenant_id
-from bkmonitor.utils.thread_backend import ThreadPool
+from bkmonitor.utils.thread_backend import get_thread_pool
 from bkmonitor.utils.time_tools import time_interval_align
 from constants.common import DEFAULT_TENANT_ID
 from constants.data_source import (
@@ -145,53 +144,28 @@ class UnifyQuery:
         """
         处理统一查询模块返回值
         """
-        re_dimension = re.compile(r"_table\d+$")
-
-        records = []
-
-        rows = data.get("series") or []
-        for row in rows:
-            dimensions = {}
-            if not row["group_keys"]:
-                row["group_keys"] = []
-            for index, group_key in enumerate(row["group_keys"]):
-                end_string = re_dimension.findall(group_key)
-                if end_string:
-                    end_string = end_string[0]
-                    group_key = group_key[: -len(end_string)]
-
-                dimensions[group_key] = row["group_values"][index]
-
-            for value in row["values"]:
-                record = {**dimensions}
-                for column, column_type, v in zip(row["columns"], row["types"], value):
-                    if column_type == "time":
-                        v = arrow.get(v).timestamp * 1000
-
-                    if column == "_time":
-                        column = "_time_"
-                    elif column in ["_result", "_value"]:
-                        column = "_result_"
-
-                    record[column] = v
-
-                # 单指标情况下避免缺少_result_字段
-                if "_result_" not in record:
-                    record["_result_"] = record[params["query_list"][0]["reference_name"]]
-
-                # 如果是最后一条数据，且时间戳等于结束时间，不返回
-                if not params.get("instant") and end_time and record.get("_time_") == end_time:
-                    continue
+        return cls.process_unify_query_series(params, data, end_time=end_time).to_records()
 
-                records.append(record)
-        return records
+    @classmethod
+    def process_unify_query_series(cls, params: dict, data: dict, end_time: int = None) -> UnifyQuerySeriesResult:
+        """
+        处理统一查询模块返回值(列式)，按需展开为逐条记录
+        """
+        return UnifyQuerySeriesResult.from_unify_query_data(params, data, end_time=end_time)
 
-    def process_data_by_datasource(self, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    def need_process_by_datasource(self) -> bool:
+        """
+        查询结果是否需要数据源进行二次处理
+        """
         first_ds: DataSource = self.data_sources[0]
-        if (first_ds.data_source_label, first_ds.data_type_label) in [
+        return (first_ds.data_source_label, first_ds.data_type_label) in [
             (DataSourceLabel.BK_APM, DataTypeLabel.EVENT),
             (DataSourceLabel.BK_MONITOR_COLLECTOR_NEW, DataTypeLabel.LOG),
-        ]:
+        ]
+
+    def process_data_by_datasource(self, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        if self.need_process_by_datasource():
+            first_ds: DataSource = self.data_sources[0]
             records = first_ds.process_unify_query_data(records)
         return records
 
@@ -353,9 +327,11 @@ class UnifyQuery:
         down_sample_range: int | None = "",
         time_alignment: bool = True,
         instant: bool = None,
-    ) -> list[dict]:
+        columnar: bool = False,
+    ) -> list[dict] | UnifyQuerySeriesResult:
         """
         使用统一查询模块进行查询
+        :param columnar: 是否返回列式结果，需要数据源二次处理的查询仍返回逐条记录
         """
         params = self.get_unify_query_params(start_time, end_time, time_alignment)
         if not params["query_list"]:
@@ -374,6 +350,8 @@ class UnifyQuery:
             span.set_attribute("bk.system", "unify_query")
             span.set_attribute("bk.unify_query.statement", json.dumps(params))
             data = api.unify_query.query_data(**params)
+            if columnar and not self.need_process_by_datasource():
+                return self.process_unify_query_series(params, data, end_time=end_time)
             records: list[dict[str, Any]] = self.process_unify_query_data(params, data, end_time=end_time)
             records = self.process_data_by_datasource(records)
         return records
@@ -492,7 +470,7 @@ class UnifyQuery:
         total: int = 0
         data: list[dict[str, Any]] = []
         params_list: list[tuple] = [(datasource,) for datasource in self.data_sources]
-        for partial_data, partial_total in ThreadPool().map_ignore_exception(_query_log, params_list):
+        for partial_data, partial_total in get_thread_pool("unify_query").map_ignore_exception(_query_log, params_list):
             total += partial_total
             data.extend(partial_data)
 
@@ -508,7 +486,10 @@ class UnifyQuery:
         down_sample_range: str | None = "",
         *args,
         **kwargs,
-    ) -> list[dict]:
+    ) -> list[dict] | UnifyQuerySeriesResult:
+        """
+        :param kwargs: columnar 为 True 时，统一查询的结果以列式结果(UnifyQuerySeriesResult)返回
+        """
         if not self.data_sources:
             return []
 
@@ -517,6 +498,7 @@ class UnifyQuery:
         exc = None
         labels: dict[str, str] = self.get_observe_labels()
         start_time, end_time = self.process_time_range(start_time, end_time)
+        columnar: bool = kwargs.pop("columnar", False)
 
         # 使用统一查询模块或原始数据源进行查询
         if self.use_unify_query():
@@ -531,6 +513,7 @@ class UnifyQuery:
                         down_sample_range=down_sample_range,
                         time_alignment=kwargs.get("time_alignment", True),
                         instant=kwargs.get("instant"),
+                        columnar=columnar,
                     )
             except Exception as e:
                 exc = e
@@ -0,0 +1,155 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import re
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+import arrow
+
+re_dimension = re.compile(r"_table\d+$")
+
+# 统一查询返回列名 -> 监控内部字段名
+COLUMN_MAPPING = {"_time": "_time_", "_result": "_result_", "_value": "_result_"}
+
+
+class UnifyQuerySeries:
+    """
+    统一查询返回的单条时间序列(列式)
+    维度只保存一份，数据行保持原始数组，仅在需要时展开为逐条记录
+    """
+
+    __slots__ = ("dimensions", "columns", "rows", "result_column")
+
+    def __init__(self, dimensions: dict[str, Any], columns: list[str], rows: list[list], result_column: str = None):
+        self.dimensions = dimensions
+        self.columns = columns
+        self.rows = rows
+        # 缺少 _result_ 列时，使用该列的值作为 _result_
+        self.result_column = result_column
+
+    def __len__(self):
+        return len(self.rows)
+
+    def column(self, name: str) -> list:
+        """
+        获取某一列的全部取值
+        """
+        index = self.columns.index(name)
+        return [row[index] for row in self.rows]
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        """
+        展开为逐条记录，与 UnifyQuery.process_unify_query_data 的返回一致
+        """
+        columns = self.columns
+        result_index = None
+        if self.result_column:
+            # 列名重复时以最后一列为准，与逐条赋值的结果保持一致
+            result_index = len(columns) - 1 - columns[::-1].index(self.result_column)
+        for row in self.rows:
+            record = {**self.dimensions}
+            record.update(zip(columns, row))
+            if result_index is not None:
+                record["_result_"] = row[result_index]
+            yield record
+
+
+class UnifyQuerySeriesResult:
+    """
+    统一查询列式结果
+    兼容 list 的迭代、长度判断及 extend 操作，迭代时按序列顺序逐条展开记录
+    """
+
+    def __init__(self, series: list[UnifyQuerySeries] = None):
+        self.series: list[UnifyQuerySeries] = series or []
+        # 通过 extend 追加的逐条记录
+        self.records: list[dict[str, Any]] = []
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for series in self.series:
+            yield from series.iter_records()
+        yield from self.records
+
+    def __len__(self):
+        return sum(len(series) for series in self.series) + len(self.records)
+
+    def __bool__(self):
+        return any(self.series) or bool(self.records)
+
+    def extend(self, data: Iterable[dict[str, Any]]):
+        if isinstance(data, UnifyQuerySeriesResult):
+            self.series.extend(data.series)
+            self.records.extend(data.records)
+        else:
+            self.records.extend(data)
+
+    def to_records(self) -> list[dict[str, Any]]:
+        return list(self)
+
+    @classmethod
+    def from_unify_query_data(cls, params: dict, data: dict, end_time: int = None) -> "UnifyQuerySeriesResult":
+        """
+        解析统一查询返回值
+        维度名及时间列在每条序列中只解析一次，相同的时间字符串在整个结果中只解析一次
+        """
+        group_key_cache: dict[str, str] = {}
+        time_cache: dict[Any, int] = {}
+        skip_end_time = not params.get("instant") and end_time
+
+        series_list = []
+        for row in data.get("series") or []:
+            dimensions = {}
+            for group_key, group_value in zip(row["group_keys"] or [], row["group_values"]):
+                dimension = group_key_cache.get(group_key)
+                if dimension is None:
+                    end_string = re_dimension.findall(group_key)
+                    dimension = group_key[: -len(end_string[0])] if end_string else group_key
+                    group_key_cache[group_key] = dimension
+                dimensions[dimension] = group_value
+
+            columns = [COLUMN_MAPPING.get(column, column) for column in row["columns"]]
+            rows = row["values"]
+            if not rows:
+                continue
+
+            # 时间类型的列统一转换为毫秒时间戳
+            time_indexes = [index for index, column_type in enumerate(row["types"]) if column_type == "time"]
+            if time_indexes:
+                # 复制后再转换，不修改接口返回的原始数据
+                rows = [list(value) for value in rows]
+            for index in time_indexes:
+                for value in rows:
+                    v = value[index]
+                    timestamp = time_cache.get(v)
+                    if timestamp is None:
+                        timestamp = time_cache[v] = arrow.get(v).timestamp * 1000
+                    value[index] = timestamp
+
+            # 单指标情况下避免缺少_result_字段
+            result_column = None
+            if "_result_" not in columns and "_result_" not in dimensions:
+                result_column = params["query_list"][0]["reference_name"]
+                if result_column not in columns and result_column not in dimensions:
+                    raise KeyError(result_column)
+                if result_column not in columns:
+                    dimensions["_result_"] = dimensions[result_column]
+                    result_column = None
+
+            # 如果是最后一条数据，且时间戳等于结束时间，不返回
+            if skip_end_time:
+                if "_time_" in columns:
+                    time_index = len(columns) - 1 - columns[::-1].index("_time_")
+                    rows = [value for value in rows if value[time_index] != end_time]
+                elif dimensions.get("_time_") == end_time:
+                    rows = []
+
+            series_list.append(UnifyQuerySeries(dimensions, columns, rows, result_column))
+        return cls(series_list)
@@ -291,6 +291,11 @@ ADVANCED_OPTIONS = OrderedDict(
         ("MAX_BUILD_EVENT_NUMBER", slz.IntegerField(label="单次告警生成任务处理的event数量", default=0)),
         ("HOST_DYNAMIC_FIELDS", slz.ListField(label="主机动态属性", default=[])),
         ("METRIC_CACHE_TASK_PERIOD", slz.IntegerField(label="指标缓存任务周期(min)", default=10)),
+        (
+            "ENABLE_METRIC_CACHE_INCREMENTAL_UPDATE",
+            slz.BooleanField(label="是否根据metadata变更记录增量刷新指标缓存", default=True),
+        ),
+        ("METRIC_CACHE_RECONCILE_INTERVAL", slz.IntegerField(label="指标缓存全量对账间隔(min)", default=360)),
         ("LAST_MIGRATE_VERSION", slz.CharField(label="最后一次迁移版本", default="")),
         ("GSE_MANAGERS", slz.ListField(label="GSE平台管理员", default=[])),
         ("OFFICIAL_PLUGINS_MANAGERS", slz.ListField(label="官方插件管理员", default=[])),
@@ -408,6 +413,30 @@ ADVANCED_OPTIONS = OrderedDict(
             slz.IntegerField(label="access数据批量处理触发阈值(0为不触发)", default=0),
         ),
         ("ACCESS_DATA_BATCH_PROCESS_SIZE", slz.IntegerField(label="access数据批量处理单次处理量", default=50000)),
+        (
+            "ACCESS_DATA_COLUMNAR_PUSH",
+            slz.BooleanField(label="access推送待检测数据是否使用列式压缩格式", default=False),
+        ),
+        (
+            "TRIGGER_BATCH_CHECK",
+            slz.BooleanField(label="trigger是否使用批量检测模式", default=False),
+        ),
+        (
+            "CMDB_CACHE_INCREMENTAL_REFRESH",
+            slz.BooleanField(label="CMDB缓存是否根据资源变更事件增量刷新", default=False),
+        ),
+        (
+            "CMDB_CACHE_FULL_REFRESH_INTERVAL",
+            slz.IntegerField(label="CMDB缓存增量刷新模式下的全量对账周期(秒)", default=6 * 60 * 60),
+        ),
+        (
+            "CMDB_CACHE_COMPACT_SERIALIZE",
+            slz.BooleanField(label="CMDB缓存是否使用紧凑编码", default=False),
+        ),
+        (
+            "ALERT_ACTIVE_INDEX_ENABLED",
+            slz.BooleanField(label="告警管理周期任务是否从活跃告警索引中读取异常告警", default=False),
+        ),
         ("BASE64_ENCODE_TRIGGER_CHARS", slz.ListField(label="需要base64编码的特殊字符", default=[])),
         ("AIDEV_KNOWLEDGE_BASE_IDS", slz.ListField(label="aidev的知识库ID", default=[])),
         ("AIDEV_AGENT_AI_GENERATING_KEYWORD", slz.CharField(label="AIAgent内容生成关键字", default="生成中")),
@@ -426,6 +455,12 @@ ADVANCED_OPTIONS = OrderedDict(
         ("ENABLED_TARGET_CACHE_BK_BIZ_IDS", slz.ListField(label="启用监控目标缓存的业务ID列表", default=[])),
         ("ES_INDEX_ROTATION_SLEEP_INTERVAL_SECONDS", slz.IntegerField(label="ES索引轮转等待间隔", default=3)),
         ("ES_INDEX_ROTATION_STEP", slz.IntegerField(label="ES索引轮转并发个数", default=50)),
+        (
+            "ENABLE_ROTATION_PLANNER_ES_CLUSTER_IDS",
+            slz.ListField(label="按集群批量规划索引轮转的ES集群ID列表", default=[]),
+        ),
+        ("ES_INDEX_ROTATION_CONCURRENCY", slz.IntegerField(label="ES批量索引轮转单集群并发数", default=4)),
+        ("ES_INDEX_ROTATION_ALIAS_BATCH_SIZE", slz.IntegerField(label="ES批量索引轮转单次别名变更数量", default=500)),
         ("ES_STORAGE_OFFSET_HOURS", slz.IntegerField(label="ES采集项整体时间偏移量", default=8)),
         ("METADATA_REQUEST_ES_TIMEOUT_SECONDS", slz.IntegerField(label="Metadata轮转任务请求ES超时时间", default=10)),
         ("ENABLE_V2_ACCESS_BKBASE_METHOD", slz.BooleanField(label="是否启用新版方式接入计算平台", default=True)),
@@ -553,6 +588,7 @@ STANDARD_CONFIGS = OrderedDict(
         ("APM_CREATE_VIRTUAL_METRIC_ENABLED_BK_BIZ_ID", slz.ListField(label=_("APM 创建虚拟指标业务列表"), default=[])),
         ("APM_BMW_TASK_QUEUES", slz.ListField(label=_("APM BMW 任务能够使用的队列名称"), default=[])),
         ("PER_ROUND_SPAN_MAX_SIZE", slz.IntegerField(label=_("拓扑发现允许的最大 Span 数量"), default=1000)),
+        ("APM_TOPO_INCREMENTAL_DISCOVER", slz.BooleanField(label=_("APM 拓扑发现增量模式"), default=False)),
         ("WXWORK_BOT_NAME", slz.CharField(label=_("蓝鲸监控机器人名称"), default="BK-Monitor", allow_blank=True)),
         ("WXWORK_BOT_SEND_IMAGE", slz.BooleanField(label=_("蓝鲸监控机器人发送图片"), default=True)),
         ("COLLECTING_CONFIG_FILE_MAXSIZE", slz.IntegerField(label=_("采集配置文件参数最大值(M)"), default=2)),
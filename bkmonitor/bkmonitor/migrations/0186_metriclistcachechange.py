@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2025-08-01 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bkmonitor", "0185_merge_20250630_1128"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MetricListCacheChange",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("bk_tenant_id", models.CharField(default="system", max_length=128, verbose_name="租户ID")),
+                ("bk_biz_id", models.IntegerField(verbose_name="业务ID")),
+                ("table_id", models.CharField(max_length=256, verbose_name="结果表ID")),
+                (
+                    "create_time",
+                    models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="创建时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "指标缓存变更记录",
+                "verbose_name_plural": "指标缓存变更记录",
+            },
+        ),
+    ]
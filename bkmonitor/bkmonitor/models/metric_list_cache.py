@@ -10,7 +10,7 @@ specific language governing permissions and limitations under the License.
 
 import logging
 
-from django.db import models
+from django.db import models, router, transaction
 from django.utils.translation import gettext_lazy as _
 
 from bkmonitor.utils.common_utils import safe_int
@@ -273,3 +273,35 @@ class MetricListCache(models.Model):
             return f"{db}.{self.metric_field}"
 
         return self.result_table_readable_name
+
+
+class MetricListCacheChange(models.Model):
+    """
+    指标缓存变更记录
+    metadata 结果表变更及自定义指标发现时写入，指标缓存任务据此只重建受影响的表
+    """
+
+    bk_tenant_id = models.CharField(max_length=128, default=DEFAULT_TENANT_ID, verbose_name="租户ID")
+    bk_biz_id = models.IntegerField(verbose_name="业务ID")
+    table_id = models.CharField(max_length=256, verbose_name="结果表ID")
+    create_time = models.DateTimeField(auto_now_add=True, verbose_name="创建时间", db_index=True)
+
+    class Meta:
+        verbose_name = "指标缓存变更记录"
+        verbose_name_plural = "指标缓存变更记录"
+
+    @classmethod
+    def record(cls, bk_tenant_id: str, bk_biz_id: int, table_ids: list[str]):
+        """
+        写入变更记录，写入失败不影响调用方，由指标缓存的周期全量对账兜底
+        """
+        if not table_ids:
+            return
+        try:
+            # 调用方可能处于事务中，写入失败时只回滚到保存点
+            with transaction.atomic(using=router.db_for_write(cls)):
+                cls.objects.bulk_create(
+                    [cls(bk_tenant_id=bk_tenant_id, bk_biz_id=bk_biz_id, table_id=table_id) for table_id in table_ids]
+                )
+        except Exception as e:  # noqa
+            logger.warning(f"[MetricListCacheChange] record change of {table_ids} failed: {e}")
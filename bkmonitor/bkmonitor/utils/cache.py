@@ -11,6 +11,7 @@ specific language governing permissions and limitations under the License.
 import functools
 import json
 import logging
+import threading
 import time
 import zlib
 from time import monotonic
@@ -25,6 +26,7 @@ from django.utils.encoding import force_bytes
 from bkmonitor.utils.common_utils import count_md5
 from bkmonitor.utils.local import local
 from bkmonitor.utils.request import get_request
+from core.prometheus import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +41,11 @@ class UsingCache:
     min_length = 15
     preset = 6
     key_prefix = "web_cache"
+    # 新鲜标记及刷新锁的 key 后缀
+    fresh_key_suffix = "|fresh"
+    lock_key_suffix = "|lock"
+    # 等待其他调用方刷新结果时的轮询间隔
+    wait_interval = 0.1
 
     def __init__(
         self,
@@ -48,6 +55,7 @@ class UsingCache:
         compress=True,
         is_cache_func=lambda res: True,
         func_key_generator=lambda func: f"{func.__module__}.{func.__name__}",
+        stale_timeout=None,
     ):
         """
         :param cache_type: 缓存类型
@@ -55,12 +63,16 @@ class UsingCache:
         :param compress: 是否进行压缩
         :param is_cache_func: 缓存函数，当函数返回true时，则进行缓存
         :param func_key_generator: 函数标识key的生成逻辑
+        :param stale_timeout: 缓存过期后继续提供旧数据的时间窗口，单位：s，为 0 时不提供旧数据
         """
         self.cache_type = cache_type
         self.backend_cache_type = backend_cache_type
         self.compress = compress
         self.is_cache_func = is_cache_func
         self.func_key_generator = func_key_generator
+        self.stale_timeout = settings.CACHE_STALE_TIMEOUT if stale_timeout is None else stale_timeout
+        # 记录当前线程最近一次读取的缓存是否已过期
+        self._read_state = threading.local()
         # 先看用户是否提供了user_related参数
         # 若无，则查看cache_type是否提供了user_related参数
         # 若都没有定义，则user_related默认为True
@@ -107,29 +119,52 @@ class UsingCache:
         机制：
         local (miss), cache(miss): cache <- result
         local (miss), cache(hit): local <- result
+        local 中保存已解压的序列化内容，命中时只需反序列化，每次返回独立的对象
+        开启 stale_timeout 时，从 cache 读取时同时读取新鲜标记，缓存是否已过期记录在 _read_state 中
         """
+        self._read_state.stale = False
         if self.local_cache_enable:
             value = getattr(local, cache_key, None)
             if value:
                 return json.loads(value)
 
-        value = mem_cache.get(cache_key, default=None) or cache.get(cache_key, default=None)
+        value = mem_cache.get(cache_key, default=None) if mem_cache is not cache else None
+        if value is None and self.stale_timeout > 0:
+            fresh_key = f"{cache_key}{self.fresh_key_suffix}"
+            values = cache.get_many([cache_key, fresh_key])
+            value = values.get(cache_key)
+            self._read_state.stale = value is not None and fresh_key not in values
+        elif value is None:
+            # 未开启旧数据窗口时不会写入新鲜标记，缓存存在即为有效
+            value = cache.get(cache_key)
         if value is None:
             return default
+
+        serialized_value = None
         if self.compress:
             try:
                 value = zlib.decompress(value)
             except Exception:
                 pass
             try:
-                value = json.loads(force_bytes(value))
+                serialized_value = force_bytes(value)
+                value = json.loads(serialized_value)
             except Exception:
                 value = default
         if value and self.local_cache_enable:
-            setattr(local, cache_key, json.dumps(value))
+            setattr(local, cache_key, serialized_value or json.dumps(value))
         return value
 
-    def set_value(self, key, value, timeout=60):
+    def is_stale(self) -> bool:
+        """
+        当前线程最近一次 get_value 读取的缓存是否已过期
+        """
+        return getattr(self._read_state, "stale", False)
+
+    def set_value(self, key, value, timeout=60, stale_timeout=0):
+        """
+        :param stale_timeout: 过期后继续保留旧数据的时间，保留期间通过新鲜标记区分数据是否过期
+        """
         if self.compress:
             try:
                 value = json.dumps(value)
@@ -143,7 +178,11 @@ class UsingCache:
         try:
             if mem_cache is not cache:
                 mem_cache.set(key, value, 60)
-            cache.set(key, value, timeout)
+            if stale_timeout:
+                cache.set(key, value, timeout + stale_timeout)
+                cache.set(f"{key}{self.fresh_key_suffix}", 1, timeout)
+            else:
+                cache.set(key, value, timeout)
         except Exception as e:
             try:
                 request_path = get_request().path
@@ -158,19 +197,80 @@ class UsingCache:
         先检查是否缓存是否存在
         若存在，则直接返回缓存内容
         若不存在，则执行函数，并将结果回写到缓存中
+        若已过期(仍在 stale_timeout 窗口内)，则由拿到刷新锁的调用方刷新，其余调用方返回旧数据
         """
         if settings.ENVIRONMENT == "development":
             cache_key = None
         else:
             cache_key = self._cache_key(task_definition, args, kwargs)
-        if cache_key:
+        if not cache_key:
+            return self._cacheless(task_definition, args, kwargs)
+
+        cache_type_key = self.using_cache_type.key
+        return_value = self.get_value(cache_key, default=None)
+
+        if return_value is None:
+            metrics.USING_CACHE_COUNT.labels(cache_type=cache_type_key, result="miss").inc()
+            return self._single_flight_refresh(cache_key, task_definition, args, kwargs)
+
+        if not self.is_stale():
+            metrics.USING_CACHE_COUNT.labels(cache_type=cache_type_key, result="hit").inc()
+            return return_value
+
+        # 缓存已过期，只有拿到刷新锁的调用方负责刷新，其余调用方直接使用旧数据
+        if not self._acquire_refresh_lock(cache_key):
+            metrics.USING_CACHE_COUNT.labels(cache_type=cache_type_key, result="stale").inc()
+            return return_value
+
+        try:
+            return self._refresh(task_definition, args, kwargs)
+        finally:
+            self._release_refresh_lock(cache_key)
+
+    def _acquire_refresh_lock(self, cache_key) -> bool:
+        """
+        获取跨进程的刷新锁，缓存服务异常时视为获取成功，不影响主流程
+        """
+        try:
+            return cache.add(f"{cache_key}{self.lock_key_suffix}", 1, settings.CACHE_REFRESH_LOCK_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"[Cache] acquire refresh lock[key:{cache_key}] failed: {e}")
+            return True
+
+    def _release_refresh_lock(self, cache_key):
+        try:
+            cache.delete(f"{cache_key}{self.lock_key_suffix}")
+        except Exception as e:
+            logger.warning(f"[Cache] release refresh lock[key:{cache_key}] failed: {e}")
+
+    def _is_refresh_locked(self, cache_key) -> bool:
+        try:
+            return cache.get(f"{cache_key}{self.lock_key_suffix}") is not None
+        except Exception:
+            return False
+
+    def _single_flight_refresh(self, cache_key, task_definition, args, kwargs):
+        """
+        缓存缺失时，同一时间只有一个调用方执行函数
+        其余调用方等待刷新结果，刷新结束(锁释放)仍未拿到结果或等待超时时，自行执行函数
+        """
+        if self._acquire_refresh_lock(cache_key):
+            try:
+                return self._refresh(task_definition, args, kwargs)
+            finally:
+                self._release_refresh_lock(cache_key)
+
+        deadline = monotonic() + settings.CACHE_REFRESH_WAIT_TIMEOUT
+        while monotonic() < deadline:
+            time.sleep(self.wait_interval)
             return_value = self.get_value(cache_key, default=None)
+            if return_value is not None:
+                metrics.USING_CACHE_COUNT.labels(cache_type=self.using_cache_type.key, result="wait").inc()
+                return return_value
+            if not self._is_refresh_locked(cache_key):
+                break
 
-            if return_value is None:
-                return_value = self._refresh(task_definition, args, kwargs)
-        else:
-            return_value = self._cacheless(task_definition, args, kwargs)
-        return return_value
+        return self._refresh(task_definition, args, kwargs)
 
     def _refresh(self, task_definition, args, kwargs):
         """
@@ -180,12 +280,14 @@ class UsingCache:
         cache_key = self._cache_key(task_definition, args, kwargs)
 
         return_value = self._cacheless(task_definition, args, kwargs)
+        if self.using_cache_type:
+            metrics.USING_CACHE_COUNT.labels(cache_type=self.using_cache_type.key, result="refresh").inc()
 
         # 设置了缓存空数据
         # 或者不缓存空数据且数据为空时
         # 需要进行缓存
         if self.is_cache_func(return_value):
-            self.set_value(cache_key, return_value, self.using_cache_type.timeout)
+            self.set_value(cache_key, return_value, self.using_cache_type.timeout, self.stale_timeout)
 
         return return_value
 
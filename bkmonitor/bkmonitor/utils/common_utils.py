@@ -38,6 +38,7 @@ from django.utils.timezone import is_aware
 from django.utils.translation import gettext as _
 
 from bkmonitor.utils import time_tools
+from bkmonitor.utils.fingerprint import flat_fingerprint
 from bkmonitor.utils.text import camel_to_underscore
 from constants.cmdb import BIZ_ID_FIELD_NAMES
 from constants.result_table import RT_RESERVED_WORD_EXACT, RT_RESERVED_WORD_FUZZY
@@ -461,6 +462,12 @@ def _count_md5(content):
 
 
 def count_md5(content, dict_sort=True, list_sort=True):
+    if dict_sort and list_sort:
+        # 扁平维度使用快速计算，结果与下面的通用逻辑一致
+        fingerprint = flat_fingerprint(content)
+        if fingerprint is not None:
+            return fingerprint
+
     if dict_sort and isinstance(content, dict):
         # dict的顺序受到hash的影响，所以这里先排序再计算MD5
         return count_md5(
@@ -0,0 +1,89 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+"""
+扁平维度指纹
+
+count_md5 对字典、列表逐层递归排序并计算 md5，而热点路径上的输入基本都是值为标量的扁平维度字典或列表。
+这里按 count_md5 的规则直接展开计算，结果与 count_md5 逐字节一致:
+1. 标量: md5(str(value))
+2. 扁平列表: md5(str(sorted([md5(str(value)), ...])))
+3. 扁平字典: 每个键值对为 md5(str(sorted([md5(key), md5(md5(str(value)))])))，再按扁平列表的方式合并
+并按维度内容缓存计算结果，非扁平的输入返回 None，由 count_md5 的通用逻辑处理
+"""
+
+import hashlib
+from functools import lru_cache
+
+# 与 count_md5 中 str(value) 结果一致的标量类型，子类可能重写 __str__，不走快速路径
+SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
+# 维度指纹缓存数量
+FINGERPRINT_CACHE_SIZE = 2**16
+
+
+def _md5(content: str) -> str:
+    return hashlib.md5(content.encode("utf8")).hexdigest()
+
+
+def _join_digests(digests) -> str:
+    """
+    等价于 str(list_of_digests)，md5 摘要中不含需要转义的字符
+    """
+    return "['" + "', '".join(digests) + "']" if digests else "[]"
+
+
+@lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)
+def _pair_fingerprint(key: str, value: str) -> str:
+    return _md5(_join_digests(sorted([_md5(key), _md5(_md5(value))])))
+
+
+@lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)
+def _dict_fingerprint(items: tuple) -> str:
+    """
+    :param items: (key1, value1, key2, value2, ...)，value 已转换为字符串
+    """
+    return _md5(_join_digests(sorted([_pair_fingerprint(items[i], items[i + 1]) for i in range(0, len(items), 2)])))
+
+
+@lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)
+def _list_fingerprint(values: tuple) -> str:
+    return _md5(_join_digests(sorted([_md5(value) for value in values])))
+
+
+def flat_fingerprint(content) -> str | None:
+    """
+    计算扁平维度的指纹，等价于 count_md5(content)
+    :return: 输入不是标量、扁平字典或扁平列表时返回 None
+    """
+    content_type = type(content)
+    if content_type in SCALAR_TYPES:
+        return _md5(str(content))
+
+    if content_type is dict:
+        items = []
+        for key, value in content.items():
+            value_type = type(value)
+            if type(key) is not str or value_type not in SCALAR_TYPES:
+                return None
+            items.append(key)
+            items.append(value if value_type is str else str(value))
+        return _dict_fingerprint(tuple(items))
+
+    if content_type is list or content_type is tuple:
+        values = []
+        for value in content:
+            value_type = type(value)
+            if value_type not in SCALAR_TYPES:
+                return None
+            values.append(value if value_type is str else str(value))
+        return _list_fingerprint(tuple(values))
+
+    return None
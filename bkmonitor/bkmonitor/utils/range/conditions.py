@@ -12,6 +12,7 @@ specific language governing permissions and limitations under the License.
 
 import re
 import sre_constants
+from functools import cached_property
 
 
 class Condition(object):
@@ -82,10 +83,13 @@ class AndCondition(CompositeCondition):
 
 
 class EqualCondition(SimpleCondition):
+    @cached_property
+    def cond_value_set(self):
+        # 条件值不会变化，只在首次匹配时转换
+        return set(self.cond_field.to_str_list())
+
     def _is_match(self, data_field):
-        data_value = data_field.to_str_list()
-        cond_value = self.cond_field.to_str_list()
-        return bool(set(data_value) & set(cond_value))
+        return not self.cond_value_set.isdisjoint(data_field.to_str_list())
 
 
 class NotEqualCondition(EqualCondition):
@@ -141,17 +145,25 @@ class RegularCondition(SimpleCondition):
         if not data_value:
             return False
         data_value = data_value[0]
-        cond_value = self.cond_field.to_str_list()
-        for v in cond_value:
-            try:
-                reg = re.compile(r"%s" % v)
-            except sre_constants.error:
+        for reg in self.cond_regexes:
+            # 表达式不合法时不匹配
+            if reg is None:
                 return False
 
             if reg.findall(data_value):
                 return True
         return False
 
+    @cached_property
+    def cond_regexes(self):
+        regexes = []
+        for v in self.cond_field.to_str_list():
+            try:
+                regexes.append(re.compile(r"%s" % v))
+            except sre_constants.error:
+                regexes.append(None)
+        return regexes
+
 
 class NotRegularCondition(RegularCondition):
     def _is_match(self, data_field):
@@ -159,7 +171,9 @@ class NotRegularCondition(RegularCondition):
 
 
 class IsSuperSetCondition(SimpleCondition):
+    @cached_property
+    def cond_value_set(self):
+        return set(self.cond_field.to_str_list())
+
     def _is_match(self, data_field):
-        data_value = data_field.to_str_list()
-        cond_value = self.cond_field.to_str_list()
-        return set(data_value).issuperset(set(cond_value))
+        return set(data_field.to_str_list()).issuperset(self.cond_value_set)
@@ -0,0 +1,142 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import logging
+from collections import defaultdict
+
+from .conditions import AndCondition, Condition, EqualCondition, OrCondition
+
+logger = logging.getLogger("bkmonitor")
+
+
+def get_field_signature(field) -> tuple:
+    """
+    字段取值方式的标识
+    相同标识的字段从数据中取值及转换的结果一致(ip 类字段的取值方式与配置值的格式有关)
+    """
+    first_value = field.value
+    if first_value and isinstance(first_value, list | tuple):
+        first_value = first_value[0]
+    value_format = tuple(sorted(first_value)) if isinstance(first_value, dict) else None
+    return field.__class__, field.name, value_format
+
+
+def iter_equal_conditions(condition: Condition):
+    if isinstance(condition, AndCondition | OrCondition):
+        for cond in condition.conditions:
+            yield from iter_equal_conditions(cond)
+    elif type(condition) is EqualCondition:
+        yield condition
+
+
+class ConditionMatcher:
+    """
+    多条件匹配器
+    将一组条件编译为 维度取值 -> 候选条件 的倒排索引，匹配时只对可能命中的条件进行完整判断
+    每个条件选取一组"必要等值条件"作为索引：只有其中至少一个等值条件命中时，整个条件才可能命中
+    无法索引的条件(如只包含 neq/reg 等)每次都会完整判断
+    """
+
+    def __init__(self, conditions: list[Condition]):
+        self.conditions = conditions
+        # 字段标识 -> 条件值 -> 条件下标
+        self.index: dict[tuple, dict[str, list[int]]] = defaultdict(lambda: defaultdict(list))
+        # 字段标识 -> 用于从数据中取值的等值条件
+        self.extractors: dict[tuple, EqualCondition] = {}
+        # 字段标识 -> 该字段下的全部条件下标，取值异常时使用
+        self.signature_conditions: dict[tuple, list[int]] = defaultdict(list)
+        # 无法索引的条件下标
+        self.unindexed: list[int] = []
+
+        # 统计各字段的条件值数量，条件值越分散，按该字段索引的区分度越高
+        cardinality = defaultdict(set)
+        for condition in conditions:
+            for cond in iter_equal_conditions(condition):
+                cardinality[get_field_signature(cond.cond_field)].update(cond.cond_value_set)
+        self.cardinality = {signature: len(values) for signature, values in cardinality.items()}
+
+        for index, condition in enumerate(conditions):
+            anchors = self.select_anchors(condition)
+            if anchors is None:
+                self.unindexed.append(index)
+                continue
+
+            for cond in anchors[1]:
+                signature = get_field_signature(cond.cond_field)
+                self.extractors.setdefault(signature, cond)
+                self.signature_conditions[signature].append(index)
+                for value in cond.cond_value_set:
+                    self.index[signature][value].append(index)
+
+    def __len__(self):
+        return len(self.conditions)
+
+    def select_anchors(self, condition: Condition) -> tuple[float, list[EqualCondition]] | None:
+        """
+        选取条件的必要等值条件
+        :return: (预估命中比例, 等值条件列表)，无法索引时返回 None
+        """
+        if type(condition) is EqualCondition:
+            # 维度不存在时默认命中的条件无法索引
+            if condition.default_value_if_not_exists or not condition.cond_value_set:
+                return None
+            signature = get_field_signature(condition.cond_field)
+            return len(condition.cond_value_set) / self.cardinality[signature], [condition]
+
+        if isinstance(condition, AndCondition):
+            # 任一子条件的必要条件都是整体的必要条件，取区分度最高的一个
+            candidates = [self.select_anchors(cond) for cond in condition.conditions]
+            candidates = [candidate for candidate in candidates if candidate is not None]
+            if not candidates:
+                return None
+            return min(candidates, key=lambda candidate: candidate[0])
+
+        if isinstance(condition, OrCondition):
+            # 每个分支都存在必要条件时，才能按分支必要条件的并集索引
+            if not condition.conditions:
+                return None
+            rate, anchors = 0, []
+            for cond in condition.conditions:
+                candidate = self.select_anchors(cond)
+                if candidate is None:
+                    return None
+                rate += candidate[0]
+                anchors.extend(candidate[1])
+            return rate, anchors
+
+        return None
+
+    def get_candidates(self, data: dict) -> list[int]:
+        """
+        获取可能命中的条件下标，保持原有顺序
+        """
+        candidates = set(self.unindexed)
+        for signature, extractor in self.extractors.items():
+            try:
+                existed, data_field = extractor.get_field(data)
+                if not existed:
+                    continue
+                values = data_field.to_str_list()
+            except Exception as e:
+                # 取值异常时，该字段下的条件全部交给完整判断处理
+                logger.debug("[ConditionMatcher] get field(%s) value error: %s", signature[1], e)
+                candidates.update(self.signature_conditions[signature])
+                continue
+
+            value_index = self.index[signature]
+            for value in values:
+                candidates.update(value_index.get(value, ()))
+        return sorted(candidates)
+
+    def match(self, data: dict) -> list[int]:
+        """
+        获取命中的条件下标，与逐个调用 is_match 的结果一致
+        """
+        return [index for index in self.get_candidates(data) if self.conditions[index].is_match(data)]
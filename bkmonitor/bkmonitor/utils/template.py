@@ -8,10 +8,12 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import hashlib
 import json
 import logging
 import re
-from collections import defaultdict
+import threading
+from collections import OrderedDict, defaultdict
 from os import path
 
 import arrow
@@ -32,6 +34,7 @@ except ImportError:
 
 from bkmonitor.utils.text import cut_str_by_max_bytes, get_content_length
 from constants.action import NoticeWay
+from core.prometheus import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -170,23 +173,38 @@ class Jinja2Renderer:
     """
 
     @staticmethod
-    def render(content, context):
+    def get_escape_mode(context):
+        """
+        获取转义方式，markdown 类通知需要转义
+        :return: (autoescape, escape_func)
+        """
+        if context.get("notice_way") in settings.MD_SUPPORTED_NOTICE_WAYS:
+            return True, escape_markdown
+        return False, None
+
+    @classmethod
+    def render(cls, content, context):
         """
         支持json和re函数
         """
-        notice_way = context.get("notice_way")
-        if notice_way in settings.MD_SUPPORTED_NOTICE_WAYS:
-            autoescape = True
-            escape_func = escape_markdown
-        else:
-            autoescape = False
-            escape_func = None
+        template = compiled_template_cache.get(content, *cls.get_escape_mode(context))
+        return template.render({"json": json, "re": re, "arrow": arrow, **context})
 
-        return (
-            jinja2_environment(autoescape=autoescape, escape_func=escape_func)
-            .from_string(content)
-            .render({"json": json, "re": re, "arrow": arrow, **context})
-        )
+    @classmethod
+    def render_many(cls, content, contexts):
+        """
+        使用同一模板批量渲染多个上下文，模板只编译一次
+        :return: 与 contexts 一一对应的渲染结果
+        """
+        templates = {}
+        results = []
+        for context in contexts:
+            escape_mode = cls.get_escape_mode(context)
+            template = templates.get(escape_mode)
+            if template is None:
+                template = templates[escape_mode] = compiled_template_cache.get(content, *escape_mode)
+            results.append(template.render({"json": json, "re": re, "arrow": arrow, **context}))
+        return results
 
 
 class AlarmNoticeTemplate:
@@ -390,6 +408,56 @@ def jinja2_environment(**options):
     return env
 
 
+class CompiledTemplateCache:
+    """
+    编译后模板的进程内缓存
+    环境按转义方式长期复用，模板按 (转义方式, 模板内容摘要) 缓存，超过容量时淘汰最久未使用的模板
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.templates = OrderedDict()
+        self.environments = {}
+        self.lock = threading.Lock()
+
+    def get_environment(self, autoescape=False, escape_func=None):
+        key = (autoescape, escape_func)
+        env = self.environments.get(key)
+        if env is None:
+            with self.lock:
+                env = self.environments.get(key)
+                if env is None:
+                    env = self.environments[key] = jinja2_environment(autoescape=autoescape, escape_func=escape_func)
+        return env
+
+    def get(self, content, autoescape=False, escape_func=None):
+        key = (autoescape, escape_func, hashlib.md5(content.encode("utf-8")).hexdigest())
+        with self.lock:
+            template = self.templates.get(key)
+            if template is not None:
+                self.templates.move_to_end(key)
+
+        if template is not None:
+            metrics.NOTICE_TEMPLATE_CACHE_COUNT.labels(result="hit").inc()
+            return template
+
+        metrics.NOTICE_TEMPLATE_CACHE_COUNT.labels(result="miss").inc()
+        template = self.get_environment(autoescape, escape_func).from_string(content)
+        if self.maxsize > 0:
+            with self.lock:
+                self.templates[key] = template
+                while len(self.templates) > self.maxsize:
+                    self.templates.popitem(last=False)
+        return template
+
+    def clear(self):
+        with self.lock:
+            self.templates.clear()
+
+
+compiled_template_cache = CompiledTemplateCache(maxsize=settings.NOTICE_TEMPLATE_CACHE_SIZE)
+
+
 def jinja_render(template_value, context):
     """
     支持object的jinja2渲染
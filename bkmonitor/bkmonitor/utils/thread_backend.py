@@ -10,12 +10,18 @@ specific language governing permissions and limitations under the License.
 """
 
 import logging
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from functools import partial
 from multiprocessing.pool import ThreadPool as _ThreadPool
 from threading import Thread
 from typing import List
 
 from django import db
+from django.conf import settings
 from django.utils import timezone, translation
 from opentelemetry.context import attach, get_current
 
@@ -160,5 +166,139 @@ class ThreadPool(_ThreadPool):
         return super(ThreadPool, self).imap_unordered(self.get_func_with_local(func), iterable, chunksize=chunksize)
 
 
+class SharedThreadPool:
+    """
+    进程内共享的有界线程池，通过 get_thread_pool 按名称获取
+    - 与 ThreadPool 一样，任务继承提交线程的 local/时区/语言/trace 上下文，执行结束后关闭 db 连接
+    - 排队任务数超过上限，或在本线程池的工作线程中再次提交任务时，任务由调用方线程直接执行，避免无限排队及嵌套死锁
+    - 支持按截止时间等待结果，超时后取消尚未开始执行的任务
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue_size: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._executor = _ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"shared-{name}")
+        # 排队及执行中的任务数上限
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue_size)
+        self._lock = threading.Lock()
+        self._queue_size = 0
+        self._active_count = 0
+        self._worker_state = threading.local()
+
+    def _report(self, queue_delta: int = 0, active_delta: int = 0):
+        # 延迟导入，避免循环引用
+        from core.prometheus import metrics
+
+        with self._lock:
+            self._queue_size += queue_delta
+            self._active_count += active_delta
+            queue_size, active_count = self._queue_size, self._active_count
+        # 聚合网关上报后会清空指标数据，因此使用 set 而不是 inc/dec
+        metrics.THREAD_POOL_QUEUE_SIZE.labels(pool=self.name).set(queue_size)
+        metrics.THREAD_POOL_ACTIVE_COUNT.labels(pool=self.name).set(active_count)
+
+    def _run(self, func, submit_time: float, *args, **kwargs):
+        from core.prometheus import metrics
+
+        metrics.THREAD_POOL_WAIT_TIME.labels(pool=self.name).observe(time.monotonic() - submit_time)
+        self._report(queue_delta=-1, active_delta=1)
+        self._worker_state.running = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._worker_state.running = False
+            self._report(active_delta=-1)
+            self._slots.release()
+
+    def _run_in_caller(self, func, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        """
+        提交任务
+        """
+        from core.prometheus import metrics
+
+        if getattr(self._worker_state, "running", False):
+            metrics.THREAD_POOL_TASK_COUNT.labels(pool=self.name, mode="nested").inc()
+            return self._run_in_caller(func, *args, **kwargs)
+
+        if not self._slots.acquire(blocking=False):
+            metrics.THREAD_POOL_TASK_COUNT.labels(pool=self.name, mode="caller").inc()
+            return self._run_in_caller(func, *args, **kwargs)
+
+        metrics.THREAD_POOL_TASK_COUNT.labels(pool=self.name, mode="pool").inc()
+        self._report(queue_delta=1)
+        try:
+            return self._executor.submit(
+                self._run, ThreadPool.get_func_with_local(func), time.monotonic(), *args, **kwargs
+            )
+        except Exception:
+            self._report(queue_delta=-1)
+            self._slots.release()
+            raise
+
+    def map_ignore_exception(self, func, iterable, return_exception=False, timeout: float | None = None):
+        """
+        忽略错误版的map，与 ThreadPool.map_ignore_exception 一致
+        :param timeout: 整批任务的等待时间，单位：s，超时的任务视为执行失败
+        """
+        futures = []
+        for params in iterable:
+            if not isinstance(params, tuple | list):
+                params = (params,)
+            futures.append(self.submit(func, *params))
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = []
+        for future in futures:
+            try:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                results.append(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                # 尚未开始执行的任务直接取消，已经在执行的任务无法中断，结果将被丢弃
+                if future.cancel():
+                    self._report(queue_delta=-1)
+                    self._slots.release()
+                e = TimeoutError(f"thread pool({self.name}) task timeout after {timeout}s")
+                if return_exception:
+                    results.append(e)
+                logger.warning(e)
+            except Exception as e:
+                if return_exception:
+                    results.append(e)
+                logger.exception(e)
+
+        return results
+
+
+_thread_pools: dict[str, SharedThreadPool] = {}
+_thread_pools_lock = threading.Lock()
+
+
+def get_thread_pool(name: str = "default") -> SharedThreadPool:
+    """
+    获取进程内共享的线程池，线程池配置见 settings.SHARED_THREAD_POOL_CONFIGS
+    """
+    thread_pool = _thread_pools.get(name)
+    if thread_pool:
+        return thread_pool
+
+    with _thread_pools_lock:
+        if name not in _thread_pools:
+            configs = settings.SHARED_THREAD_POOL_CONFIGS
+            config = configs.get(name) or configs["default"]
+            _thread_pools[name] = SharedThreadPool(
+                name=name, max_workers=config["max_workers"], max_queue_size=config["max_queue_size"]
+            )
+        return _thread_pools[name]
+
+
 if __name__ == "__main__":
     InheritParentThread().start()
@@ -42,6 +42,12 @@ class Config:
             "enabled": True,
             "options": {"queue": "celery_resource"},
         },
+        "monitor_web.tasks.update_metric_list_by_changes": {
+            "task": "monitor_web.tasks.update_metric_list_by_changes",
+            "schedule": crontab(),
+            "enabled": True,
+            "options": {"queue": "celery_resource"},
+        },
         "monitor_web.tasks.access_pending_aiops_strategy": {
             "task": "monitor_web.tasks.access_pending_aiops_strategy",
             "schedule": crontab(minute="*/5"),
@@ -562,6 +562,8 @@ APM_CUSTOM_METRIC_SDK_MAPPING_CONFIG = {}
 UNIFY_QUERY_TABLE_MAPPING_CONFIG = {}
 # 拓扑发现允许的最大 Span 数量(预估值)
 PER_ROUND_SPAN_MAX_SIZE = 1000
+# 拓扑发现增量模式: 只发现上一轮处理位置之后的 trace，并只拉取发现所需的 span 字段
+APM_TOPO_INCREMENTAL_DISCOVER = False
 # profiling 汇聚方法映射配置
 APM_PROFILING_AGG_METHOD_MAPPING = {
     "HEAP-SPACE": "AVG",
@@ -701,6 +703,8 @@ WECOM_ROBOT_BIZ_WHITE_LIST = []
 WECOM_ROBOT_ACCOUNT = {}
 IS_WECOM_ROBOT_ENABLED = False
 MD_SUPPORTED_NOTICE_WAYS = ["wxwork-bot"]
+# 编译后的通知模板缓存数量(进程内)
+NOTICE_TEMPLATE_CACHE_SIZE = 2000
 
 WECOM_APP_ACCOUNT = {}
 
@@ -977,6 +981,28 @@ CACHE_DATA_TIMEOUT = 60 * 2
 CACHE_OVERVIEW_TIMEOUT = 60 * 2
 CACHE_HOME_TIMEOUT = 60 * 10
 CACHE_USER_TIMEOUT = 60 * 60
+# UsingCache 过期后继续提供旧数据的时间窗口，期间只有一个调用方刷新缓存，其余调用方直接使用旧数据
+CACHE_STALE_TIMEOUT = 60
+# UsingCache 刷新锁的超时时间
+CACHE_REFRESH_LOCK_TIMEOUT = 30
+# UsingCache 缓存缺失且其他调用方正在刷新时，等待刷新结果的最长时间
+CACHE_REFRESH_WAIT_TIMEOUT = 3
+
+# 指标选择器模糊搜索是否使用进程内搜索索引
+METRIC_SEARCH_INDEX_ENABLED = True
+# 模糊搜索命中的指标数超过该值时，回退为数据库查询
+METRIC_SEARCH_INDEX_MAX_MATCHES = 5000
+# 搜索索引增量刷新的检查间隔，单位：s
+METRIC_SEARCH_INDEX_CHECK_INTERVAL = 30
+
+# 进程内共享线程池配置，按子系统划分，未配置的名称使用 default 配置
+# max_workers: 线程数，max_queue_size: 排队任务数上限，超出上限的任务由调用方线程直接执行
+SHARED_THREAD_POOL_CONFIGS = {
+    "default": {"max_workers": 16, "max_queue_size": 256},
+    "unify_query": {"max_workers": 16, "max_queue_size": 256},
+    "apm_topo": {"max_workers": 16, "max_queue_size": 256},
+    "apm_discover": {"max_workers": 8, "max_queue_size": 128},
+}
 
 # SaaS访问读写权限
 ROLE_WRITE_PERMISSION = "w"
@@ -1506,6 +1532,12 @@ ENABLE_V2_ROTATION_ES_CLUSTER_IDS = []
 ES_INDEX_ROTATION_SLEEP_INTERVAL_SECONDS = 3
 # ES索引轮转步长
 ES_INDEX_ROTATION_STEP = 50
+# 按集群批量规划索引轮转的ES集群名单
+ENABLE_ROTATION_PLANNER_ES_CLUSTER_IDS = []
+# 批量轮转时单个集群的并发数
+ES_INDEX_ROTATION_CONCURRENCY = 4
+# 批量轮转时单次提交的别名变更数量
+ES_INDEX_ROTATION_ALIAS_BATCH_SIZE = 500
 # ES采集项整体偏移量（小时）
 ES_STORAGE_OFFSET_HOURS = 8
 # ES请求默认超时时间（秒）
@@ -1532,6 +1564,26 @@ ENABLE_BKBASE_V4_MULTI_TENANT = False
 ENABLED_ACCESS_DATA_BATCH_PROCESS = False
 ACCESS_DATA_BATCH_PROCESS_SIZE = 50000
 ACCESS_DATA_BATCH_PROCESS_THRESHOLD = 0
+# access推送待检测数据时是否使用列式压缩格式(需确保detect模块已支持该格式)
+ACCESS_DATA_COLUMNAR_PUSH = False
+# trigger是否使用批量检测模式(一批异常点的检测窗口数据通过一次pipeline拉取)
+TRIGGER_BATCH_CHECK = False
+# nodata是否批量检测(按块批量读取检测点，通过pipeline写入异常周期和恢复)
+NO_DATA_BATCH_CHECK = True
+# nodata批量检测每块的维度数量
+NO_DATA_BATCH_CHECK_CHUNK_SIZE = 1000
+
+# CMDB缓存是否根据资源变更事件增量刷新
+CMDB_CACHE_INCREMENTAL_REFRESH = False
+# CMDB缓存增量刷新模式下的全量对账周期，单位为秒
+CMDB_CACHE_FULL_REFRESH_INTERVAL = 6 * 60 * 60
+# CMDB缓存是否使用紧凑编码(需确保所有读取方已支持该格式)
+CMDB_CACHE_COMPACT_SERIALIZE = False
+# CMDB缓存进程内缓存容量及过期时间(秒)
+CMDB_CACHE_LOCAL_MAXSIZE = 10000
+CMDB_CACHE_LOCAL_TTL = 300
+# 告警管理周期任务是否从活跃告警索引中读取异常告警(索引不可用时回退为扫描ES)
+ALERT_ACTIVE_INDEX_ENABLED = False
 
 # metadata请求es超时配置, 单位为秒，默认10秒
 # 格式: {default: 10, 集群域名: 20}
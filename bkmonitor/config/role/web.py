@@ -474,6 +474,12 @@ PYINSTRUMENT_URL_ARGUMENT = "bk-monitor-profile"
 
 # 指标缓存任务执行周期数
 METRIC_CACHE_TASK_PERIOD = 10
+# 是否根据 metadata 变更记录增量刷新指标缓存
+ENABLE_METRIC_CACHE_INCREMENTAL_UPDATE = True
+# 支持增量刷新的指标缓存全量对账间隔(min)
+METRIC_CACHE_RECONCILE_INTERVAL = 360
+# 单次增量刷新处理的变更记录数
+METRIC_CACHE_CHANGE_BATCH_SIZE = 5000
 
 # 外部监控域名前缀
 EXTERNAL_PREFIX = ""
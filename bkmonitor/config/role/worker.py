@@ -130,6 +130,8 @@ DEFAULT_CRONTAB = [
     ("alarm_backends.core.cache.action_config.refresh_latest_5_minutes", "* * * * *", "global"),
     ("alarm_backends.core.cache.assign", "* * * * *", "global"),
     ("alarm_backends.core.cache.calendar", "* * * * *", "global"),
+    # cmdb 缓存增量刷新(需开启 CMDB_CACHE_INCREMENTAL_REFRESH)
+    ("alarm_backends.core.cache.cmdb.watch", "* * * * *", "global"),
     # api cache
     ("alarm_backends.core.cache.result_table", "*/10 * * * *", "global"),
     # delay queue
@@ -198,6 +200,8 @@ ACTION_TASK_CRONTAB = [
     # 分集群任务
     # 定期检测异常告警
     ("alarm_backends.service.alert.manager.tasks.check_abnormal_alert", "* * * * *", "cluster"),
+    # 活跃告警索引一致性校验，未开启活跃告警索引时跳过
+    ("alarm_backends.service.alert.manager.tasks.sweep_active_alert_index", "*/10 * * * *", "cluster"),
     # 定期关闭流控告警，避免与整点之类的任务并发，设置每小时执行一次
     ("alarm_backends.service.alert.manager.tasks.check_blocked_alert", "40 */1 * * *", "cluster"),
     # 定期检测屏蔽策略，进行告警的屏蔽
@@ -339,6 +343,20 @@ ANOMALY_RECORD_CONVERGED_ACTION_WINDOW = 3
 # access模块策略拉取耗时限制（每10分钟）
 ACCESS_TIME_PER_WINDOW = 30
 
+# access模块是否按相位将策略分组分散到周期内下发
+ACCESS_SCHEDULE_SPREAD_ENABLED = True
+# access模块策略分组下发占用的周期比例
+ACCESS_SCHEDULE_SPREAD_RATIO = 0.8
+# access模块是否合并读取相同结果表的策略分组查询
+ACCESS_QUERY_COALESCE_ENABLED = True
+# access模块单次合并查询的最大策略分组数
+ACCESS_QUERY_COALESCE_MAX_GROUPS = 20
+
+# 后台目标分配是否按目标代价使用负载有界的一致性哈希
+DISPATCH_BOUNDED_LOAD_ENABLED = True
+# 单台主机负载上限相对于平均负载的倍数
+DISPATCH_BOUNDED_LOAD_FACTOR = 1.25
+
 # access 模块流控数据源列表
 QOS_DATASOURCE_LABELS = []
 QOS_INTERVAL_EXPAND = 3
@@ -163,6 +163,12 @@ ACCESS_DATA_PROCESS_PULL_DATA_COUNT = Counter(
     labelnames=("strategy_group_key",),
 )
 
+ACCESS_DATA_COALESCED_GROUP_COUNT = Counter(
+    name="bkmonitor_access_data_coalesced_group_count",
+    documentation="access(data) 模块合并查询的策略分组数",
+    labelnames=("strategy_group_key",),
+)
+
 ACCESS_EVENT_PROCESS_TIME = Histogram(
     name="bkmonitor_access_event_process_time",
     documentation="access(event) 模块处理耗时",
@@ -192,6 +198,25 @@ ACCESS_TOKEN_FORBIDDEN_COUNT = Counter(
     documentation="access 流控限制次数",
 )
 
+ACCESS_SCHEDULE_LAG = Histogram(
+    name="bkmonitor_access_schedule_lag",
+    documentation="access 策略分组实际下发时间与计划相位的延迟",
+    labelnames=("interval",),
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, INF),
+)
+
+ACCESS_SCHEDULE_PENDING = Gauge(
+    name="bkmonitor_access_schedule_pending",
+    documentation="access 当前周期内待下发的策略分组数",
+    labelnames=("interval",),
+)
+
+ACCESS_SCHEDULE_DISPATCH_COUNT = Counter(
+    name="bkmonitor_access_schedule_dispatch_count",
+    documentation="access 策略分组下发次数",
+    labelnames=("interval",),
+)
+
 ACCESS_INCIDENT_PROCESS_COUNT = Counter(
     name="bkmonitor_access_incident_process_count",
     documentation="access(incident) 模块处理次数",
@@ -242,6 +267,18 @@ TRIGGER_PROCESS_PUSH_DATA_COUNT = Counter(
     labelnames=("strategy_id",),
 )
 
+TRIGGER_PROCESS_BATCH_TIME = Histogram(
+    name="bkmonitor_trigger_process_batch_time",
+    documentation="trigger 模块批量检测单批次处理耗时",
+    labelnames=("strategy_id",),
+)
+
+TRIGGER_PROCESS_BATCH_FETCH_TIME = Histogram(
+    name="bkmonitor_trigger_process_batch_fetch_time",
+    documentation="trigger 模块批量检测单批次拉取检测窗口数据耗时",
+    labelnames=("strategy_id",),
+)
+
 # nodata
 NODATA_PROCESS_TIME = Histogram(
     name="bkmonitor_nodata_process_time",
@@ -503,7 +540,44 @@ ACTION_NOTICE_API_CALL_COUNT = Counter(
     labelnames=("notice_way", "status"),
 )
 
+NOTICE_TEMPLATE_CACHE_COUNT = Counter(
+    name="bkmonitor_notice_template_cache_count",
+    documentation="通知模板编译缓存命中次数",
+    labelnames=("result",),
+)
+
+THREAD_POOL_QUEUE_SIZE = Gauge(
+    name="bkmonitor_thread_pool_queue_size",
+    documentation="共享线程池排队任务数",
+    labelnames=("pool",),
+)
+
+THREAD_POOL_ACTIVE_COUNT = Gauge(
+    name="bkmonitor_thread_pool_active_count",
+    documentation="共享线程池执行中任务数",
+    labelnames=("pool",),
+)
+
+THREAD_POOL_WAIT_TIME = Histogram(
+    name="bkmonitor_thread_pool_wait_time",
+    documentation="共享线程池任务排队耗时",
+    labelnames=("pool",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, INF),
+)
+
+THREAD_POOL_TASK_COUNT = Counter(
+    name="bkmonitor_thread_pool_task_count",
+    documentation="共享线程池任务数",
+    labelnames=("pool", "mode"),
+)
+
 # cache
+USING_CACHE_COUNT = Counter(
+    name="bkmonitor_using_cache_count",
+    documentation="UsingCache 缓存读取次数",
+    labelnames=("cache_type", "result"),
+)
+
 ALARM_CACHE_TASK_TIME = Histogram(
     name="bkmonitor_alarm_cache_task_time",
     documentation="数据缓存任务执行耗时",
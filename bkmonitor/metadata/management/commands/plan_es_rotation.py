@@ -0,0 +1,43 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from metadata import models
+from metadata.models.constants import EsSourceType
+from metadata.service.es_storage import ESRotationPlanner
+
+
+class Command(BaseCommand):
+    help = "按集群生成ES索引轮转计划(dry-run)，不会对集群做任何修改"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cluster_id", type=int, required=True, help="ES集群ID")
+        parser.add_argument(
+            "--table_ids", type=str, default="", help="结果表ID, 半角逗号分隔，不传时为集群下全部采集项"
+        )
+        parser.add_argument("--summary", action="store_true", help="仅输出汇总信息")
+
+    def handle(self, *args, **options):
+        es_storages = models.ESStorage.objects.filter(
+            storage_cluster_id=options["cluster_id"], source_type=EsSourceType.LOG.value, need_create_index=True
+        )
+        if options["table_ids"]:
+            es_storages = es_storages.filter(table_id__in=options["table_ids"].split(","))
+        if not es_storages.exists():
+            self.stderr.write("no es storage found")
+            return
+
+        report = ESRotationPlanner(options["cluster_id"], list(es_storages)).run(dry_run=True)
+        if options["summary"]:
+            report = report["summary"]
+        self.stdout.write(json.dumps(report, ensure_ascii=False))
@@ -399,6 +399,11 @@ class TimeSeriesGroup(CustomGroupBase):
         )
         # 刷新 rt 表中的指标和维度
         self.bulk_refresh_rt_fields(group.table_id, metric_info)
+        # 发现新指标时通知指标缓存增量刷新
+        if is_updated:
+            from bkmonitor.models.metric_list_cache import MetricListCacheChange
+
+            MetricListCacheChange.record(group.bk_tenant_id, group.bk_biz_id, [group.table_id])
         return is_updated
 
     @property
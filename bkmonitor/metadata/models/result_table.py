@@ -1405,6 +1405,11 @@ class ResultTable(models.Model):
 
         # 刷新清洗配置
         self.refresh_etl_config()
+
+        # 通知指标缓存增量刷新
+        from bkmonitor.models.metric_list_cache import MetricListCacheChange
+
+        MetricListCacheChange.record(self.bk_tenant_id, self.bk_biz_id, [self.table_id])
         logger.info("table_id->[%s] of bk_tenant_id->[%s] updated success.", self.table_id, self.bk_tenant_id)
 
     # TODO: 多租户 计算平台关联接口，暂未改造
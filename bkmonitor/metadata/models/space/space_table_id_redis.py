@@ -9,9 +9,12 @@ specific language governing permissions and limitations under the License.
 """
 
 import datetime
+import hashlib
 import itertools
 import json
 import logging
+import threading
+from contextlib import contextmanager
 
 from django.conf import settings
 from django.db.models import Q
@@ -49,6 +52,7 @@ from metadata.models.space.ds_rt import (
 )
 from metadata.models.space.utils import (
     get_biz_ids_by_space_ids,
+    get_filter_alias_map,
     get_related_spaces,
     reformat_table_id,
     update_filters_with_alias,
@@ -58,6 +62,9 @@ from metadata.utils.redis_tools import RedisTools
 
 logger = logging.getLogger("metadata")
 
+# 批量推送空间路由时的查询缓存，按线程隔离
+_batch_context = threading.local()
+
 
 class SpaceTableIDRedis:
     """
@@ -65,6 +72,9 @@ class SpaceTableIDRedis:
     多租户环境下,不允许跨租户推送路由,即每次操作的目标数据,必须是同一租户下的,不能跨租户
     """
 
+    # 批量推送时，每批空间共享查询缓存并批量比较、写入路由
+    PUSH_SPACE_BATCH_SIZE = 500
+
     def push_space_table_ids(self, space_type: str, space_id: str, is_publish: bool | None = False):
         """
         推送空间及对应的结果表和过滤条件
@@ -75,7 +85,29 @@ class SpaceTableIDRedis:
         space_id = str(space_id)
 
         space = models.Space.objects.get(space_type_id=space_type, space_id=space_id)
-        bk_tenant_id = space.bk_tenant_id
+        space_redis_key, values_to_redis = self._compose_space_table_ids(space)
+
+        # 推送数据
+        if values_to_redis:
+            RedisTools.hmset_to_redis(SPACE_TO_RESULT_TABLE_KEY, {space_redis_key: json.dumps(values_to_redis)})
+
+        logger.info(
+            "push redis space_to_result_table, space_type: %s, space_id: %s",
+            space_type,
+            space_id,
+        )
+
+        # 通知使用方
+        if is_publish:
+            RedisTools.publish(SPACE_TO_RESULT_TABLE_CHANNEL, [space_redis_key])
+        logger.info("push space table_id data successfully, space_type: %s, space_id: %s", space_type, space_id)
+
+    def _compose_space_table_ids(self, space: models.Space) -> tuple[str, dict]:
+        """
+        组装空间的路由数据
+        :return: (redis field, {table_id: {"filters": [...]}})
+        """
+        space_type, space_id = space.space_type_id, space.space_id
 
         # 过滤空间关联的数据源信息
         if space_type == SpaceTypes.BKCC.value:
@@ -96,42 +128,161 @@ class SpaceTableIDRedis:
 
         # 组装redis key
         if settings.ENABLE_MULTI_TENANT_MODE:
-            space_redis_key = f"{space_type}__{space_id}|{bk_tenant_id}"
+            space_redis_key = f"{space_type}__{space_id}|{space.bk_tenant_id}"
         else:
             space_redis_key = f"{space_type}__{space_id}"
+        return space_redis_key, values_to_redis
 
-        # 推送数据
-        if values_to_redis:
-            RedisTools.hmset_to_redis(SPACE_TO_RESULT_TABLE_KEY, {space_redis_key: json.dumps(values_to_redis)})
+    def push_multi_space_table_ids(self, spaces: list, is_publish: bool | None = False) -> list:
+        """
+        批量推送空间数据
+        同一次推送内与空间无关的查询只执行一次，且仅写入和通知路由内容发生变化的空间
+        :param spaces: 空间列表，元素为 Space 对象或包含 space_type_id/space_id/bk_tenant_id 的字典
+        :return: 路由内容发生变化的空间，元素与入参一致
+        """
+        changed_spaces = []
+        changed_redis_keys = []
+        spaces = list(spaces)
+        with self._batch_query_cache() as cache:
+            for start in range(0, len(spaces), self.PUSH_SPACE_BATCH_SIZE):
+                batch_spaces = spaces[start : start + self.PUSH_SPACE_BATCH_SIZE]
+                space_objs = self._get_space_objs(batch_spaces)
+                self._set_batch_spaces(cache, space_objs.values())
+                space_values = {}
+                for space in batch_spaces:
+                    space_obj = space_objs.get(self._get_space_identity(space))
+                    if space_obj is None:
+                        logger.error("push_multi_space_table_ids: space->[%s] not found", space)
+                        continue
+                    try:
+                        space_redis_key, values_to_redis = self._compose_space_table_ids(space_obj)
+                    except Exception:  # pylint: disable=broad-except
+                        logger.exception(
+                            "push_multi_space_table_ids: compose space->[%s__%s] router error",
+                            space_obj.space_type_id,
+                            space_obj.space_id,
+                        )
+                        continue
+                    # 与单个推送保持一致，路由为空时不写入
+                    if values_to_redis:
+                        space_values[space_redis_key] = (space, json.dumps(values_to_redis))
 
-        logger.info(
-            "push redis space_to_result_table, space_type: %s, space_id: %s",
-            space_type,
-            space_id,
-        )
+                if not space_values:
+                    continue
+
+                # 与已有路由比较内容摘要，仅写入发生变化的空间
+                redis_keys = list(space_values.keys())
+                old_values = RedisTools.hmget(SPACE_TO_RESULT_TABLE_KEY, redis_keys)
+                changed_values = {}
+                for space_redis_key, old_value in zip(redis_keys, old_values):
+                    space, value = space_values[space_redis_key]
+                    if old_value is not None and self._get_router_digest(old_value) == self._get_router_digest(value):
+                        continue
+                    changed_values[space_redis_key] = value
+                    changed_spaces.append(space)
+
+                if changed_values:
+                    RedisTools.hmset_to_redis(SPACE_TO_RESULT_TABLE_KEY, changed_values)
+                    changed_redis_keys.extend(changed_values.keys())
+                logger.info(
+                    "push_multi_space_table_ids: push space router, changed->[%s], total->[%s]",
+                    len(changed_values),
+                    len(batch_spaces),
+                )
 
         # 通知使用方
-        if is_publish:
-            RedisTools.publish(SPACE_TO_RESULT_TABLE_CHANNEL, [space_redis_key])
-        logger.info("push space table_id data successfully, space_type: %s, space_id: %s", space_type, space_id)
+        if is_publish and changed_redis_keys:
+            RedisTools.publish(SPACE_TO_RESULT_TABLE_CHANNEL, changed_redis_keys)
+
+        return changed_spaces
 
-    def push_multi_space_table_ids(self, spaces: list[models.Space], is_publish: bool | None = False) -> None:
+    @staticmethod
+    def _get_space_identity(space) -> tuple[str, str, str]:
+        if isinstance(space, dict):
+            return space["space_type_id"], str(space["space_id"]), space.get("bk_tenant_id") or DEFAULT_TENANT_ID
+        return space.space_type_id, str(space.space_id), space.bk_tenant_id
+
+    def _get_space_objs(self, spaces: list) -> dict[tuple[str, str, str], models.Space]:
+        """获取空间对象，字典形式的空间按空间类型批量查询"""
+        space_objs = {}
+        space_ids = {}
+        for space in spaces:
+            if isinstance(space, models.Space):
+                space_objs[self._get_space_identity(space)] = space
+            else:
+                space_type, space_id, _ = self._get_space_identity(space)
+                space_ids.setdefault(space_type, set()).add(space_id)
+
+        for space_type, space_id_list in space_ids.items():
+            for space in filter_model_by_in_page(
+                model=models.Space,
+                field_op="space_id__in",
+                filter_data=list(space_id_list),
+                other_filter={"space_type_id": space_type},
+            ):
+                space_objs[self._get_space_identity(space)] = space
+        return space_objs
+
+    @staticmethod
+    def _get_router_digest(value: str | bytes) -> str:
+        """计算路由内容摘要，与字段顺序无关"""
+        return hashlib.md5(json.dumps(json.loads(value), sort_keys=True).encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def _batch_query_cache(self):
         """
-        批量推送空间数据
+        批量推送期间缓存与空间无关的查询结果，在整个推送过程中共享
         """
-        # 推送数据
-        for space in spaces:
-            self.push_space_table_ids(space.space_type_id, space.space_id, is_publish=False)
+        cache = {}
+        _batch_context.cache = cache
+        try:
+            yield cache
+        finally:
+            _batch_context.cache = None
 
-        # 通知使用方
-        if is_publish:
-            push_redis_keys = []
-            for space in spaces:
-                if settings.ENABLE_MULTI_TENANT_MODE:
-                    push_redis_keys.append(f"{space.space_type_id}__{space.space_id}|{space.bk_tenant_id}")
-                else:
-                    push_redis_keys.append(f"{space.space_type_id}__{space.space_id}")
-            RedisTools.publish(SPACE_TO_RESULT_TABLE_CHANNEL, push_redis_keys)
+    @staticmethod
+    def _set_batch_spaces(cache: dict, spaces):
+        """
+        将批次内的空间对象放入缓存，避免逐个查询空间，上一批次的空间对象不再保留
+        """
+        for key in [key for key in cache if key[0] == "space"]:
+            del cache[key]
+        cache.update({("space", space.space_type_id, space.space_id): space for space in spaces})
+
+    @staticmethod
+    def _get_batch_cached(key: tuple, func):
+        """批量推送期间优先从缓存获取，否则直接查询"""
+        cache = getattr(_batch_context, "cache", None)
+        if cache is None:
+            return func()
+        if key not in cache:
+            cache[key] = func()
+        return cache[key]
+
+    def _get_space(self, space_type: str, space_id: str) -> models.Space:
+        """获取空间对象，不存在时抛出 Space.DoesNotExist"""
+        space = self._get_batch_cached(
+            ("space", space_type, space_id),
+            lambda: models.Space.objects.filter(space_type_id=space_type, space_id=space_id).first(),
+        )
+        if space is None:
+            raise models.Space.DoesNotExist
+        return space
+
+    def _get_biz_id_by_space(self, space_type: str, space_id: str) -> int | None:
+        """通过空间类型和空间ID获取业务ID，与 SpaceManager.get_biz_id_by_space 一致"""
+        try:
+            space = self._get_space(space_type, space_id)
+        except models.Space.DoesNotExist:
+            return None
+        if space_type == SpaceTypes.BKCC.value:
+            return int(space.space_id)
+        return -space.id
+
+    def _update_filters_with_alias(self, space_type: str, space_id: str, values: dict) -> dict:
+        """替换自定义过滤条件别名，批量推送时别名映射按空间类型只查询一次"""
+        alias_map = self._get_batch_cached(("filter_alias", space_type), lambda: get_filter_alias_map(space_type))
+        return update_filters_with_alias(space_type=space_type, space_id=space_id, values=values, alias_map=alias_map)
 
     def push_data_label_table_ids(
         self,
@@ -822,7 +973,7 @@ class SpaceTableIDRedis:
         )
 
         # 替换自定义过滤条件别名
-        _values = update_filters_with_alias(space_type=space_type, space_id=space_id, values=_values)
+        _values = self._update_filters_with_alias(space_type=space_type, space_id=space_id, values=_values)
         return _values
 
     def _compose_bkci_space_table_ids(
@@ -861,7 +1012,7 @@ class SpaceTableIDRedis:
         _values.update(self._compose_apm_all_type_table_ids(space_type, space_id))
 
         # 替换自定义过滤条件别名
-        _values = update_filters_with_alias(space_type=space_type, space_id=space_id, values=_values)
+        _values = self._update_filters_with_alias(space_type=space_type, space_id=space_id, values=_values)
         return _values
 
     def _compose_bksaas_space_table_ids(
@@ -896,7 +1047,7 @@ class SpaceTableIDRedis:
         # APM 真全局数据
         _values.update(self._compose_apm_all_type_table_ids(space_type, space_id))
         # 替换自定义过滤条件别名
-        _values = update_filters_with_alias(space_type=space_type, space_id=space_id, values=_values)
+        _values = self._update_filters_with_alias(space_type=space_type, space_id=space_id, values=_values)
         return _values
 
     def _compose_bcs_space_biz_table_ids(self, space_type: str, space_id: str, bk_tenant_id=DEFAULT_TENANT_ID) -> dict:
@@ -910,15 +1061,20 @@ class SpaceTableIDRedis:
         if not obj:
             logger.error("space: %s__%s, resource_type: %s not found", space_type, space_id, resource_type)
             return {}
+
         # 获取空间关联的业务，注意这里业务 ID 为字符串类型
         # 追加空间访问指定插件的 filter
-        rts = models.ResultTable.objects.filter(
-            Q(table_id__startswith=BKCI_SYSTEM_TABLE_ID_PREFIX) | Q(table_id__in=settings.BKCI_SPACE_ACCESS_PLUGIN_LIST)
-        )
+        def get_table_ids():
+            rts = models.ResultTable.objects.filter(
+                Q(table_id__startswith=BKCI_SYSTEM_TABLE_ID_PREFIX)
+                | Q(table_id__in=settings.BKCI_SPACE_ACCESS_PLUGIN_LIST)
+            )
+
+            if settings.ENABLE_MULTI_TENANT_MODE:  # 若开启多租户模式,则这里应该会变成新版1001数据
+                rts = rts.filter(bk_tenant_id=bk_tenant_id)
+            return list(rts.values_list("table_id", flat=True))
 
-        if settings.ENABLE_MULTI_TENANT_MODE:  # 若开启多租户模式,则这里应该会变成新版1001数据
-            rts = rts.filter(bk_tenant_id=bk_tenant_id)
-        tids = rts.values_list("table_id", flat=True)
+        tids = self._get_batch_cached(("bcs_space_biz_table_ids", bk_tenant_id), get_table_ids)
 
         return {tid: {"filters": [{"bk_biz_id": str(obj.resource_id)}]} for tid in tids}
 
@@ -975,6 +1131,19 @@ class SpaceTableIDRedis:
     def _compose_bkci_level_table_ids(self, space_type: str, space_id: str, bk_tenant_id=DEFAULT_TENANT_ID) -> dict:
         """组装 bkci 全局下的结果表"""
         logger.info("start to push bkci level table_id, space_type: %s, space_id: %s", space_type, space_id)
+        # 空间级的结果表只与空间类型有关，批量推送时只查询一次
+        table_id_filter_keys = self._get_batch_cached(
+            ("bkci_level_table_ids", space_type, bk_tenant_id),
+            lambda: self._get_bkci_level_table_ids(space_type=space_type, bk_tenant_id=bk_tenant_id),
+        )
+        # 组装数据
+        return {tid: {"filters": [{filter_key: space_id}]} for tid, filter_key in table_id_filter_keys.items()}
+
+    def _get_bkci_level_table_ids(self, space_type: str, bk_tenant_id=DEFAULT_TENANT_ID) -> dict[str, str]:
+        """
+        获取空间类型下平台级的结果表
+        :return: {table_id: 过滤条件的 key}
+        """
         # 过滤空间级的数据源
         data_ids = get_platform_data_ids(space_type=space_type, bk_tenant_id=bk_tenant_id)
         # 一个空间下 data_id 不会太多
@@ -983,12 +1152,11 @@ class SpaceTableIDRedis:
                 "table_id", flat=True
             )
         )
-        _values = {}
+        table_id_filter_keys = {}
         if not table_is_list:
-            return _values
+            return table_id_filter_keys
         # 过滤仅写入influxdb和vm的数据
         table_ids = self._refine_table_ids(table_is_list, bk_tenant_id=bk_tenant_id)
-        # 组装数据
         for tid in table_ids:
             if tid in settings.SPECIAL_RT_ROUTE_ALIAS_RESULT_TABLE_LIST:
                 rt_ins = models.ResultTable.objects.get(bk_tenant_id=bk_tenant_id, table_id=tid)
@@ -997,11 +1165,11 @@ class SpaceTableIDRedis:
                     tid,
                     rt_ins.bk_biz_id_alias,
                 )
-                _values[tid] = {"filters": [{rt_ins.bk_biz_id_alias: space_id}]}
+                table_id_filter_keys[tid] = rt_ins.bk_biz_id_alias
                 continue
-            _values[tid] = {"filters": [{"projectId": space_id}]}
+            table_id_filter_keys[tid] = "projectId"
 
-        return _values
+        return table_id_filter_keys
 
     def _compose_bkci_other_table_ids(self, space_type: str, space_id: str, bk_tenant_id=DEFAULT_TENANT_ID) -> dict:
         logger.info("start to push bkci space other table_id, space_type: %s, space_id: %s", space_type, space_id)
@@ -1034,12 +1202,22 @@ class SpaceTableIDRedis:
         logger.info(
             "start to push bkci space cross space_type table_id, space_type: %s, space_id: %s", space_type, space_id
         )
-        tids = models.ResultTable.objects.filter(table_id__startswith=BKCI_1001_TABLE_ID_PREFIX).values_list(
-            "table_id", flat=True
+        tids = self._get_batch_cached(
+            ("table_ids_by_prefix", BKCI_1001_TABLE_ID_PREFIX),
+            lambda: list(
+                models.ResultTable.objects.filter(table_id__startswith=BKCI_1001_TABLE_ID_PREFIX).values_list(
+                    "table_id", flat=True
+                )
+            ),
         )
         # bkci 访问 p4 主机数据对应的结果表
-        p4_tids = models.ResultTable.objects.filter(table_id__startswith=P4_1001_TABLE_ID_PREFIX).values_list(
-            "table_id", flat=True
+        p4_tids = self._get_batch_cached(
+            ("table_ids_by_prefix", P4_1001_TABLE_ID_PREFIX),
+            lambda: list(
+                models.ResultTable.objects.filter(table_id__startswith=P4_1001_TABLE_ID_PREFIX).values_list(
+                    "table_id", flat=True
+                )
+            ),
         )
         # 组装结果表对应的 filter
         tid_filters = {tid: {"filters": [{"projectId": space_id}]} for tid in tids}
@@ -1051,7 +1229,7 @@ class SpaceTableIDRedis:
         logger.info("start to push all space type table_id, space_type: %s, space_id: %s", space_type, space_id)
         # 转换空间对应的bk_biz_id
         try:
-            _id = models.Space.objects.get(space_type_id=space_type, space_id=space_id).id
+            _id = self._get_space(space_type, space_id).id
         except models.Space.DoesNotExist:
             return {}
         return {tid: {"filters": [{"bk_biz_id": str(-_id)}]} for tid in ALL_SPACE_TYPE_TABLE_ID_LIST}
@@ -1064,14 +1242,19 @@ class SpaceTableIDRedis:
         # TODO： 该方法为临时支持，长期需要改造抽象为公共逻辑
         logger.info("start to push apm all space type table_id, space_type: %s, space_id: %s", space_type, space_id)
         try:
-            space = models.Space.objects.get(space_type_id=space_type, space_id=space_id)
+            space = self._get_space(space_type, space_id)
         except models.Space.DoesNotExist:
             return {}
 
-        result_tables = models.ResultTable.objects.filter(
-            table_id__contains="apm_global.precalculate_storage", bk_tenant_id=space.bk_tenant_id
+        table_id_aliases = self._get_batch_cached(
+            ("apm_all_type_table_ids", space.bk_tenant_id),
+            lambda: list(
+                models.ResultTable.objects.filter(
+                    table_id__contains="apm_global.precalculate_storage", bk_tenant_id=space.bk_tenant_id
+                ).values_list("table_id", "bk_biz_id_alias")
+            ),
         )
-        return {rt.table_id: {"filters": [{rt.bk_biz_id_alias: str(-space.id)}]} for rt in result_tables}
+        return {table_id: {"filters": [{alias: str(-space.id)}]} for table_id, alias in table_id_aliases}
 
     def _compose_bksaas_space_cluster_table_ids(
         self,
@@ -1310,7 +1493,7 @@ class SpaceTableIDRedis:
 
     def _compose_es_table_ids(self, space_type: str, space_id: str, bk_tenant_id=DEFAULT_TENANT_ID):
         """组装es的结果表"""
-        biz_id = models.Space.objects.get_biz_id_by_space(space_type, space_id)
+        biz_id = self._get_biz_id_by_space(space_type, space_id)
         tids = models.ResultTable.objects.filter(
             bk_biz_id=biz_id,
             default_storage=models.ClusterInfo.TYPE_ES,
@@ -1324,7 +1507,7 @@ class SpaceTableIDRedis:
         """
         组装Doris链路结果表
         """
-        biz_id = models.Space.objects.get_biz_id_by_space(space_type, space_id)
+        biz_id = self._get_biz_id_by_space(space_type, space_id)
         tids = models.ResultTable.objects.filter(
             bk_biz_id=biz_id, default_storage=models.ClusterInfo.TYPE_DORIS, is_deleted=False, is_enable=True
         ).values_list("table_id", flat=True)
@@ -1471,6 +1654,14 @@ class SpaceTableIDRedis:
 
     def _refine_table_ids(self, table_id_list: list | None = None, bk_tenant_id: str | None = DEFAULT_TENANT_ID) -> set:
         """提取写入到influxdb或vm的结果表数据"""
+        # 批量推送时，先获取全部写入的结果表，再与各空间的结果表取交集，避免逐个空间分页查询
+        if table_id_list and getattr(_batch_context, "cache", None) is not None:
+            tenant_key = bk_tenant_id if settings.ENABLE_MULTI_TENANT_MODE else None
+            all_table_ids = self._get_batch_cached(
+                ("refine_table_ids", tenant_key), lambda: self._get_storage_table_ids(bk_tenant_id=bk_tenant_id)
+            )
+            return all_table_ids & set(table_id_list)
+
         # 过滤写入 influxdb 的结果表
         influxdb_table_ids = models.InfluxDBStorage.objects.values_list("table_id", flat=True)
 
@@ -1506,6 +1697,16 @@ class SpaceTableIDRedis:
 
         return table_ids
 
+    def _get_storage_table_ids(self, bk_tenant_id: str | None = DEFAULT_TENANT_ID) -> set:
+        """获取写入到influxdb、vm或es的全部结果表，与 _refine_table_ids 指定结果表时的过滤条件一致"""
+        other_filter = {}
+        if settings.ENABLE_MULTI_TENANT_MODE:
+            other_filter = {"bk_tenant_id": bk_tenant_id}
+        influxdb_table_ids = models.InfluxDBStorage.objects.values_list("table_id", flat=True)
+        vm_table_ids = models.AccessVMRecord.objects.filter(**other_filter).values_list("result_table_id", flat=True)
+        es_table_ids = models.ESStorage.objects.filter(**other_filter).values_list("table_id", flat=True)
+        return set(influxdb_table_ids).union(set(vm_table_ids)).union(set(es_table_ids))
+
     def _filter_ts_info(self, table_ids: set) -> dict:
         """根据结果表获取对应的时序数据"""
         if not table_ids:
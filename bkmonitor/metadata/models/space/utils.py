@@ -1139,19 +1139,29 @@ def cached_cluster_k8s_data_id() -> dict[str, int]:
     return cluster_data_id
 
 
-def update_filters_with_alias(space_type, space_id, values):
+def get_filter_alias_map(space_type) -> dict:
+    """
+    获取空间类型下结果表过滤条件别名的映射关系
+    :return: {(table_id, space_type): filter_alias}
+    """
+    return {
+        (alias.table_id, alias.space_type): alias.filter_alias
+        for alias in SpaceTypeToResultTableFilterAlias.objects.filter(space_type=space_type, status=True)
+    }
+
+
+def update_filters_with_alias(space_type, space_id, values, alias_map: dict | None = None):
     """
     更新 _values 中的 filters，将 key 替换为 filter_alias.
     :param space_type: 空间类型，用于查询 SpaceTypeToResultTableFilterAlias
     :param space_id: 空间 ID，用于日志记录
     :param values: 存放表数据的字典，格式为 {'table_id': {'filters': [...]}}
+    :param alias_map: 已查询的别名映射关系，不传时按空间类型查询
     :return: 更新后的 values 字典
     """
     # 获取所有的 filter_alias 映射关系
-    alias_map = {
-        (alias.table_id, alias.space_type): alias.filter_alias
-        for alias in SpaceTypeToResultTableFilterAlias.objects.filter(space_type=space_type, status=True)
-    }
+    if alias_map is None:
+        alias_map = get_filter_alias_map(space_type)
 
     # 遍历 values 字典
     for table_id, table_data in values.items():
@@ -9,19 +9,33 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import datetime
+import json
 import logging
-from typing import Dict, List
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
+from django.conf import settings
+
+from bkmonitor.utils.time_tools import datetime_str_to_datetime
+from core.prometheus import metrics
 from metadata import models
+from metadata.tools.constants import TASK_FINISHED_SUCCESS, TASK_STARTED
+from metadata.utils import es_tools
 
 logger = logging.getLogger("metadata")
 
+# 集群内索引名称的通用格式: [v2_]{index_name}_{datetime}_{index}
+INDEX_NAME_RE = re.compile(r"^(?P<version>v2_)?(?P<index_name>.+)_(?P<datetime>\d+)_(?P<index>\d+)$")
+
 
 class ESIndex:
     def __init__(self):
         pass
 
-    def query_es_index(self, table_id_list: List) -> Dict:
+    def query_es_index(self, table_id_list: list) -> dict:
         """查询结果表对应的es索引"""
         es_objs = models.ESStorage.objects.filter(table_id__in=table_id_list)
         data = {}
@@ -33,14 +47,14 @@ class ESIndex:
             data[obj.table_id] = item
         return data
 
-    def _query_current_index(self, es_obj: models.ESStorage) -> Dict:
+    def _query_current_index(self, es_obj: models.ESStorage) -> dict:
         try:
             return es_obj.current_index_info()
         except Exception as e:
             logger.error("query current index error, %s", e)
             return {}
 
-    def _query_all_index(self, es_obj: models.ESStorage) -> Dict:
+    def _query_all_index(self, es_obj: models.ESStorage) -> dict:
         try:
             es_client = es_obj.get_client()
             return es_client.indices.get("{}*".format(es_obj.index_name))
@@ -48,7 +62,7 @@ class ESIndex:
             logger.error("query all index error, %s", e)
             return {}
 
-    def _refine_index_and_aliases(self, index_info: Dict) -> Dict:
+    def _refine_index_and_aliases(self, index_info: dict) -> dict:
         """获取索引和别名"""
         data = {}
         for index, detail in index_info.items():
@@ -56,7 +70,7 @@ class ESIndex:
             data[index] = aliases
         return data
 
-    def _refine_deleted_index(self, es_obj: models.ESStorage, index_info: Dict) -> List:
+    def _refine_deleted_index(self, es_obj: models.ESStorage, index_info: dict) -> list:
         """获取可以删除的index
 
         - 索引的别名已经过期
@@ -77,3 +91,388 @@ class ESIndex:
                 can_delete_index.add(index)
 
         return list(can_delete_index)
+
+
+class ESClusterState:
+    """
+    ES 集群索引状态快照
+    一次性拉取集群内全部索引(cat indices)及别名，并按采集项的索引名归类，供轮转规划使用
+    """
+
+    def __init__(self, es_client):
+        self.es_client = es_client
+        # 索引名 -> {"health": "green", "docs_count": 0, "size": 0}
+        self.indices: dict[str, dict] = {}
+        # 索引名 -> 别名列表
+        self.index_aliases: dict[str, list[str]] = {}
+        # 别名 -> 索引列表
+        self.alias_indices: dict[str, list[str]] = defaultdict(list)
+        # 采集项索引名 -> 索引名列表
+        self.storage_indices: dict[str, list[str]] = defaultdict(list)
+
+    def load(self) -> "ESClusterState":
+        timeout = settings.METADATA_REQUEST_ES_TIMEOUT_SECONDS
+        cat_indices = self.es_client.cat.indices(
+            format="json", bytes="b", h="index,health,docs.count,pri.store.size", request_timeout=timeout
+        )
+        for item in cat_indices:
+            # 关闭的索引没有文档数及大小
+            self.indices[item["index"]] = {
+                "health": item.get("health"),
+                "docs_count": int(item.get("docs.count") or 0),
+                "size": int(item.get("pri.store.size") or 0),
+            }
+            result = INDEX_NAME_RE.match(item["index"])
+            if result:
+                self.storage_indices[result.group("index_name")].append(item["index"])
+
+        for index_name, info in self.es_client.indices.get_alias(request_timeout=timeout).items():
+            aliases = list(info.get("aliases") or {})
+            self.index_aliases[index_name] = aliases
+            for alias in aliases:
+                self.alias_indices[alias].append(index_name)
+        return self
+
+    def get_storage_indices(self, es_storage: models.ESStorage) -> list[str]:
+        """获取采集项的索引，与 ESStorage.get_index_stats 一致，存在 v2 索引时只使用 v2 索引"""
+        index_names = self.storage_indices.get(es_storage.index_name, [])
+        v2_indices = [index for index in index_names if es_storage.index_re_v2.match(index)]
+        if v2_indices:
+            return v2_indices
+        return [index for index in index_names if es_storage.index_re_v1.match(index)]
+
+    def get_alias_list(self, es_storage: models.ESStorage) -> dict[str, dict]:
+        """获取采集项全部索引的别名，格式与 indices.get_alias 的返回一致"""
+        return {
+            index: {"aliases": {alias: {} for alias in self.index_aliases.get(index, [])}}
+            for index in self.storage_indices.get(es_storage.index_name, [])
+        }
+
+
+class ESRotationPlanner:
+    """
+    按集群批量规划并执行ES索引轮转
+    1. 每个集群只拉取一次索引、别名及大小信息
+    2. 在内存中计算各采集项需要新建/轮转的索引、需要绑定或解除的别名以及需要删除的索引
+    3. 别名变更合并为批量请求，其余按采集项的操作以有限并发执行
+    判断 mapping 是否变化、索引是否可删除(快照)等依赖实时查询的部分，仍在执行阶段按采集项判断
+    """
+
+    ACTION_CREATE = "create"
+    ACTION_ROTATE = "rotate"
+    ACTION_KEEP = "keep"
+    ACTION_SKIP = "skip"
+
+    def __init__(
+        self,
+        cluster_id: int,
+        es_storages: list[models.ESStorage],
+        concurrency: int | None = None,
+        alias_batch_size: int | None = None,
+    ):
+        self.cluster_id = cluster_id
+        self.es_storages = es_storages
+        self.concurrency = max(concurrency or settings.ES_INDEX_ROTATION_CONCURRENCY, 1)
+        self.alias_batch_size = max(alias_batch_size or settings.ES_INDEX_ROTATION_ALIAS_BATCH_SIZE, 1)
+        self.es_client = es_tools.get_client(cluster_id)
+        self.state: ESClusterState | None = None
+
+    def load_state(self) -> ESClusterState:
+        self.state = ESClusterState(self.es_client).load()
+        return self.state
+
+    def plan(self) -> list[dict]:
+        """
+        生成轮转计划，不会对集群做任何修改
+        """
+        if self.state is None:
+            self.load_state()
+
+        plans = []
+        for es_storage in self.es_storages:
+            # 同一集群的采集项复用同一个客户端
+            es_storage.es_client = self.es_client
+            try:
+                plans.append(self.plan_storage(es_storage))
+            except Exception as e:  # pylint: disable=broad-except
+                logger.exception("ESRotationPlanner: table_id->[%s] plan failed, error->[%s]", es_storage.table_id, e)
+                plans.append(self._new_plan(es_storage, self.ACTION_SKIP, f"plan failed: {e}"))
+        return plans
+
+    @staticmethod
+    def _new_plan(es_storage: models.ESStorage, action: str, reason: str = "") -> dict:
+        return {
+            "table_id": es_storage.table_id,
+            "storage": es_storage,
+            "action": action,
+            "reasons": [reason] if reason else [],
+            "current_index": None,
+            "size": 0,
+            "alias_actions": [],
+            "expired_aliases": {},
+            "delete_indices": [],
+        }
+
+    def plan_storage(self, es_storage: models.ESStorage) -> dict:
+        # 配置有误的采集项不做处理，与 _manage_es_storage 一致
+        if not es_storage.index_settings or es_storage.index_settings == "{}":
+            return self._new_plan(es_storage, self.ACTION_SKIP, "index_settings invalid")
+        if not es_storage.mapping_settings or es_storage.mapping_settings == "{}":
+            return self._new_plan(es_storage, self.ACTION_SKIP, "mapping_settings invalid")
+
+        index_names = self.state.get_storage_indices(es_storage)
+        if not index_names:
+            return self._new_plan(es_storage, self.ACTION_CREATE, "no index")
+
+        plan = self._new_plan(es_storage, self.ACTION_KEEP)
+        now = es_storage.now
+
+        # 获取当前最新的索引，与 ESStorage.current_index_info 一致
+        current = None
+        for index_name in index_names:
+            result = INDEX_NAME_RE.match(index_name)
+            datetime_object = datetime_str_to_datetime(
+                result.group("datetime"), es_storage.date_format, es_storage.time_zone
+            )
+            key = (datetime_object, int(result.group("index")))
+            if current is None or key > current[0]:
+                current = (key, index_name)
+        (current_datetime, _), current_index = current
+        plan["current_index"] = current_index
+        plan["size"] = self.state.indices.get(current_index, {}).get("size", 0)
+
+        # 是否需要创建新索引，与 ESStorage._should_create_index 的判断一致(mapping 在执行阶段判断)
+        reasons = plan["reasons"]
+        if now < current_datetime:
+            reasons.append("INDEX_AHEAD_OF_NOW")
+        if plan["size"] / 1024.0 / 1024.0 / 1024.0 > es_storage.slice_size:
+            reasons.append("INDEX_OVER_SLICE_SIZE")
+        if current_datetime < now - datetime.timedelta(days=es_storage.retention):
+            reasons.append("INDEX_EXPIRED")
+        if (es_storage.archive_index_days or 0) > 0 and current_datetime < now - datetime.timedelta(
+            days=es_storage.archive_index_days
+        ):
+            reasons.append("INDEX_NEED_ARCHIVE")
+        if es_storage.warm_phase_days > 0 and current_datetime < now - datetime.timedelta(
+            days=es_storage.warm_phase_days
+        ):
+            reasons.append("INDEX_NEED_WARM_PHASE")
+
+        if reasons:
+            plan["action"] = self.ACTION_ROTATE
+        else:
+            plan["alias_actions"] = self.plan_aliases(es_storage, current_index, now)
+
+        self.plan_clean(es_storage, plan, now)
+        return plan
+
+    def plan_aliases(self, es_storage: models.ESStorage, current_index: str, now) -> list[dict]:
+        """
+        计算需要变更的别名，与 ESStorage.create_or_update_aliases 一致，已经正确绑定的别名不再重复提交
+        """
+        # 索引未就绪时保持原有的绑定关系
+        if self.state.indices.get(current_index, {}).get("health") != "green":
+            return []
+
+        actions = []
+        now_gap = 0
+        while now_gap <= es_storage.slice_gap:
+            round_time_str = (now + datetime.timedelta(minutes=now_gap)).strftime(es_storage.date_format)
+            write_alias = f"write_{round_time_str}_{es_storage.index_name}"
+            read_alias = f"{es_storage.index_name}_{round_time_str}_read"
+
+            bound_indices = self.state.alias_indices.get(write_alias, [])
+            if bound_indices != [current_index] or current_index not in self.state.alias_indices.get(read_alias, []):
+                actions.append({"add": {"index": current_index, "alias": write_alias}})
+                actions.append({"add": {"index": current_index, "alias": read_alias}})
+                for index_name in bound_indices:
+                    if index_name != current_index:
+                        actions.append({"remove": {"index": index_name, "alias": write_alias}})
+
+            # slice_gap 为 0 时只处理当前轮次
+            if es_storage.slice_gap <= 0:
+                break
+            now_gap += es_storage.slice_gap
+        return actions
+
+    def plan_clean(self, es_storage: models.ESStorage, plan: dict, now):
+        """
+        计算需要解除的过期别名及需要删除的索引，与 ESStorage.clean_index_v2 一致
+        """
+        long_term_storage_indices = []
+        if es_storage.long_term_storage_settings:
+            try:
+                long_term_storage_indices = json.loads(es_storage.long_term_storage_settings)
+            except Exception:  # pylint: disable=broad-except
+                pass
+            if not isinstance(long_term_storage_indices, list):
+                long_term_storage_indices = []
+
+        now_datetime_str = now.strftime(es_storage.date_format)
+        filter_result = es_storage.group_expired_alias(self.state.get_alias_list(es_storage), es_storage.retention)
+        for index_name, alias_info in filter_result.items():
+            if index_name.startswith(es_storage.restore_index_prefix) or index_name in long_term_storage_indices:
+                continue
+            # 当天的索引不清理
+            if now_datetime_str in index_name:
+                continue
+            if alias_info["not_expired_alias"]:
+                if alias_info["expired_alias"]:
+                    plan["expired_aliases"][index_name] = alias_info["expired_alias"]
+                continue
+            plan["delete_indices"].append(index_name)
+
+    @staticmethod
+    def report(plans: list[dict]) -> dict:
+        """
+        生成轮转计划报告，可用于 dry-run
+        """
+        summary = defaultdict(int)
+        details = []
+        for plan in plans:
+            summary[plan["action"]] += 1
+            summary["alias_actions"] += len(plan["alias_actions"])
+            summary["expired_aliases"] += sum(len(aliases) for aliases in plan["expired_aliases"].values())
+            summary["delete_indices"] += len(plan["delete_indices"])
+            details.append({key: value for key, value in plan.items() if key != "storage"})
+        return {"summary": dict(summary), "plans": details}
+
+    def run(self, dry_run: bool = False) -> dict:
+        """
+        规划并执行轮转
+        :param dry_run: 仅生成计划报告，不做任何修改
+        """
+        plans = self.plan()
+        report = self.report(plans)
+        logger.info(
+            "ESRotationPlanner: cluster_id->[%s] rotation plan summary->[%s]", self.cluster_id, report["summary"]
+        )
+        if not dry_run:
+            self.apply(plans)
+        return report
+
+    def apply(self, plans: list[dict]):
+        plans = [plan for plan in plans if plan["action"] != self.ACTION_SKIP]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # 1. 按采集项更新 mapping、新建/轮转索引及创建快照
+            list(executor.map(self._apply_index, plans))
+
+            # 2. 批量更新别名，包括新增的读写别名以及可清理的过期别名
+            alias_actions = []
+            for plan in plans:
+                actions = list(plan["alias_actions"])
+                if plan.get("can_delete"):
+                    for index_name, aliases in plan["expired_aliases"].items():
+                        actions.extend({"remove": {"index": index_name, "alias": alias}} for alias in aliases)
+                if actions:
+                    alias_actions.append((plan, actions))
+            self._update_aliases(alias_actions)
+
+            # 3. 删除已没有未过期别名的索引
+            delete_indices = [
+                (plan["table_id"], index_name)
+                for plan in plans
+                if plan.get("can_delete")
+                for index_name in plan["delete_indices"]
+            ]
+            list(executor.map(lambda item: self._delete_index(*item), delete_indices))
+
+            # 4. 按采集项清理历史集群索引、过期快照并重新分配索引
+            list(executor.map(self._apply_lifecycle, plans))
+
+    def _apply_index(self, plan: dict):
+        es_storage = plan["storage"]
+        # 统计&上报 任务状态指标，与按采集项轮转保持一致
+        metrics.METADATA_CRON_TASK_STATUS_TOTAL.labels(
+            task_name="_manage_es_storage", status=TASK_STARTED, process_target=plan["table_id"]
+        ).inc()
+        plan["start_time"] = time.time()
+        try:
+            if plan["action"] == self.ACTION_CREATE:
+                es_storage.create_index_and_aliases(es_storage.slice_gap)
+            elif plan["action"] == self.ACTION_ROTATE or not es_storage.is_mapping_same(plan["current_index"]):
+                # 需要轮转或 mapping 发生变化时，走原有的单采集项更新流程
+                plan["action"] = self.ACTION_ROTATE
+                plan["alias_actions"] = []
+                es_storage.update_index_and_aliases(ahead_time=es_storage.slice_gap)
+            else:
+                try:
+                    es_storage.put_field_alias_mapping_to_es()
+                except Exception as e:  # pylint: disable=broad-except
+                    logger.error(
+                        "ESRotationPlanner: table_id->[%s] put field alias failed, error->[%s]", es_storage.table_id, e
+                    )
+            es_storage.create_snapshot()
+            plan["can_delete"] = es_storage.can_delete()
+        except Exception as e:  # pylint: disable=broad-except
+            plan["alias_actions"] = []
+            plan["can_delete"] = False
+            logger.exception("ESRotationPlanner: table_id->[%s] update index failed, error->[%s]", plan["table_id"], e)
+
+    def _update_aliases(self, alias_actions: list):
+        """
+        按批次提交别名变更，批次失败时退化为按采集项提交，避免单个采集项的异常影响其它采集项
+        """
+        batches, batch, batch_size = [], [], 0
+        for plan, actions in alias_actions:
+            if batch and batch_size + len(actions) > self.alias_batch_size:
+                batches.append(batch)
+                batch, batch_size = [], 0
+            batch.append((plan, actions))
+            batch_size += len(actions)
+        if batch:
+            batches.append(batch)
+
+        for batch in batches:
+            try:
+                self.es_client.indices.update_aliases(
+                    body={"actions": [action for _, actions in batch for action in actions]},
+                    request_timeout=settings.METADATA_REQUEST_ES_TIMEOUT_SECONDS,
+                )
+                continue
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning(
+                    "ESRotationPlanner: cluster_id->[%s] bulk update aliases failed, error->[%s]", self.cluster_id, e
+                )
+
+            for plan, actions in batch:
+                try:
+                    self.es_client.indices.update_aliases(
+                        body={"actions": actions}, request_timeout=settings.METADATA_REQUEST_ES_TIMEOUT_SECONDS
+                    )
+                except Exception as e:  # pylint: disable=broad-except
+                    logger.error(
+                        "ESRotationPlanner: table_id->[%s] update aliases failed, actions->[%s], error->[%s]",
+                        plan["table_id"],
+                        actions,
+                        e,
+                    )
+
+    def _delete_index(self, table_id: str, index_name: str):
+        try:
+            self.es_client.indices.delete(index=index_name)
+            logger.info("ESRotationPlanner: table_id->[%s] index->[%s] is deleted", table_id, index_name)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning(
+                "ESRotationPlanner: table_id->[%s] index->[%s] delete failed, index maybe doing snapshot, error->[%s]",
+                table_id,
+                index_name,
+                e,
+            )
+
+    def _apply_lifecycle(self, plan: dict):
+        es_storage = plan["storage"]
+        try:
+            es_storage.clean_history_es_index()
+            es_storage.clean_snapshot()
+            es_storage.reallocate_index()
+        except Exception as e:  # pylint: disable=broad-except
+            logger.exception("ESRotationPlanner: table_id->[%s] lifecycle failed, error->[%s]", plan["table_id"], e)
+
+        metrics.METADATA_CRON_TASK_STATUS_TOTAL.labels(
+            task_name="_manage_es_storage", status=TASK_FINISHED_SUCCESS, process_target=plan["table_id"]
+        ).inc()
+        # 统计耗时，并上报指标
+        metrics.METADATA_CRON_TASK_COST_SECONDS.labels(
+            task_name="_manage_es_storage", process_target=plan["table_id"]
+        ).observe(time.time() - plan["start_time"])
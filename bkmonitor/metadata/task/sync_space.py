@@ -677,16 +677,19 @@ def push_and_publish_space_router(
         for space in spaces
     ]
 
-    # 批量处理 -- SPACE_TO_RESULT_TABLE 路由
+    # 批量处理 -- SPACE_TO_RESULT_TABLE 路由，仅路由内容变化的空间需要通知
+    changed_spaces = []
     bulk_handle(
-        lambda batch_spaces: SpaceTableIDRedis().push_multi_space_table_ids(batch_spaces, is_publish=False),
+        lambda batch_spaces: changed_spaces.extend(
+            SpaceTableIDRedis().push_multi_space_table_ids(batch_spaces, is_publish=False)
+        ),
         list(spaces),
     )
 
     # 通知到使用方
-    if is_publish:
+    if is_publish and changed_spaces:
         space_uid_list = []
-        for space in spaces:
+        for space in changed_spaces:
             if settings.ENABLE_MULTI_TENANT_MODE:
                 space_uid_list.append(f"{space['bk_tenant_id']}|{space['space_type_id']}__{space['space_id']}")
             else:
@@ -906,11 +909,12 @@ def refresh_bksaas_space_resouce():
     # 批量进行推送数据
     # NOTE: 此时集群或者公共插件相关的信息已经存在了，不需要再进行指标或 data_label 的映射
     space_client = SpaceTableIDRedis()
-    bulk_handle(lambda space_list: space_client.push_multi_space_table_ids(space_list), spaces)
+    changed_spaces = []
+    bulk_handle(lambda space_list: changed_spaces.extend(space_client.push_multi_space_table_ids(space_list)), spaces)
 
-    # 通知到使用方
+    # 通知到使用方，仅通知路由内容变化的空间
     push_redis_keys = []
-    for space in spaces:
+    for space in changed_spaces:
         if settings.ENABLE_MULTI_TENANT_MODE:
             push_redis_keys.append(f"{space.bk_tenant_id}|{space.space_type_id}__{space.space_id}")
         else:
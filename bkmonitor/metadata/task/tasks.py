@@ -40,6 +40,7 @@ from metadata.models.vm.utils import (
     get_vm_cluster_id_name,
     report_metadata_data_link_status_info,
 )
+from metadata.service.es_storage import ESRotationPlanner
 from metadata.service.sync_metadata import (
     sync_es_metadata,
     sync_kafka_metadata,
@@ -205,6 +206,14 @@ def manage_es_storage(storage_record_ids, cluster_id: int = None):
 
     es_storages = models.ESStorage.objects.filter(id__in=storage_record_ids)
 
+    # 白名单中的集群按集群批量规划轮转：集群状态只拉取一次，别名变更批量提交
+    if cluster_id is not None and cluster_id in settings.ENABLE_ROTATION_PLANNER_ES_CLUSTER_IDS:
+        try:
+            ESRotationPlanner(cluster_id, list(es_storages)).run()
+        except Exception as e:  # pylint: disable=broad-except
+            logger.exception("manage_es_storage:cluster_id->[%s] rotate by planner failed, error->[%s]", cluster_id, e)
+        es_storages = []
+
     # 不再使用白名单，默认全量使用新方式轮转
     for es_storage in es_storages:
         logger.info(
@@ -459,11 +468,17 @@ def push_and_publish_space_router(
         # NOTE: 现阶段仅针对 bkcc 类型做处理
         spaces = list(models.Space.objects.filter(space_type_id=SpaceTypes.BKCC.value))
         # 使用线程处理
-        bulk_handle(lambda space_list: space_client.push_multi_space_table_ids(space_list, is_publish=False), spaces)
+        changed_spaces = []
+        bulk_handle(
+            lambda space_list: changed_spaces.extend(
+                space_client.push_multi_space_table_ids(space_list, is_publish=False)
+            ),
+            spaces,
+        )
 
-        # 通知到使用方
+        # 通知到使用方，仅通知路由内容变化的空间
         push_redis_keys = []
-        for space in spaces:
+        for space in changed_spaces:
             if settings.ENABLE_MULTI_TENANT_MODE:
                 push_redis_keys.append(f"{space.bk_tenant_id}|{space.space_type_id}__{space.space_id}")
             else:
@@ -306,3 +306,42 @@ def test_push_space_to_rt_router_without_tenant_for_bksaas(create_or_delete_reco
                 "bkmonitorv3:spaces:space_to_result_table:channel",
                 ["bksaas__monitor_saas"],
             )
+
+
+@pytest.mark.django_db(databases="__all__")
+def test_push_multi_space_to_rt_router_only_changed(create_or_delete_records):
+    """测试SPACE_TO_RESULT_TABLE路由批量推送- 仅推送内容变化的空间"""
+    settings.ENABLE_MULTI_TENANT_MODE = False
+    spaces = list(models.Space.objects.filter(space_type_id="bksaas", space_id="monitor_saas"))
+    expected = {
+        "bksaas__monitor_saas": '{"custom_report_aggate.base":{"filters":[{'
+        '"bk_biz_id":"-10008"}]},"bkm_statistics.base":{"filters":[{'
+        '"bk_biz_id":"-10008"}]}}'
+    }
+    client = SpaceTableIDRedis()
+
+    # 路由不存在时写入并通知
+    with (
+        patch("metadata.utils.redis_tools.RedisTools.hmget", return_value=[None]),
+        patch("metadata.utils.redis_tools.RedisTools.hmset_to_redis") as mock_hmset_to_redis,
+        patch("metadata.utils.redis_tools.RedisTools.publish") as mock_publish,
+    ):
+        assert client.push_multi_space_table_ids(spaces, is_publish=True) == spaces
+        actual: dict[str, str] = mock_hmset_to_redis.call_args[0][1]
+        assert json.loads(actual["bksaas__monitor_saas"]) == json.loads(expected["bksaas__monitor_saas"])
+        mock_publish.assert_called_once_with(
+            "bkmonitorv3:spaces:space_to_result_table:channel",
+            ["bksaas__monitor_saas"],
+        )
+
+    # 路由内容一致(字段顺序不同)时不写入也不通知，字典形式的空间同样支持
+    old_value = json.dumps(json.loads(expected["bksaas__monitor_saas"]), sort_keys=True, indent=1).encode()
+    space_dicts = [{"space_type_id": "bksaas", "space_id": "monitor_saas", "bk_tenant_id": spaces[0].bk_tenant_id}]
+    with (
+        patch("metadata.utils.redis_tools.RedisTools.hmget", return_value=[old_value]),
+        patch("metadata.utils.redis_tools.RedisTools.hmset_to_redis") as mock_hmset_to_redis,
+        patch("metadata.utils.redis_tools.RedisTools.publish") as mock_publish,
+    ):
+        assert client.push_multi_space_table_ids(space_dicts, is_publish=True) == []
+        mock_hmset_to_redis.assert_not_called()
+        mock_publish.assert_not_called()
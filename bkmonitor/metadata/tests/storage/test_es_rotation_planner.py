@@ -0,0 +1,134 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from dateutil import tz
+
+from metadata.models.storage import ESStorage
+from metadata.service.es_storage import ESRotationPlanner
+
+GB = 1024 * 1024 * 1024
+
+
+@pytest.fixture
+def es_client():
+    client = MagicMock()
+    client.cat.indices.return_value = [
+        {"index": "v2_2_bklog_a_20241219_0", "health": "green", "docs.count": "10", "pri.store.size": str(GB)},
+        {"index": "v2_2_bklog_a_20241215_0", "health": "green", "docs.count": "10", "pri.store.size": str(GB)},
+        {"index": "v2_2_bklog_a_20241201_0", "health": "green", "docs.count": "10", "pri.store.size": str(GB)},
+        {"index": "v2_2_bklog_b_20241219_0", "health": "green", "docs.count": "10", "pri.store.size": str(600 * GB)},
+        {"index": ".kibana", "health": "green", "docs.count": "1", "pri.store.size": "100"},
+    ]
+    client.indices.get_alias.return_value = {
+        "v2_2_bklog_a_20241219_0": {
+            "aliases": {"write_20241219_2_bklog_a": {}, "2_bklog_a_20241219_read": {}},
+        },
+        "v2_2_bklog_a_20241215_0": {
+            # 未过期别名 + 过期别名
+            "aliases": {"2_bklog_a_20241215_read": {}, "2_bklog_a_20241205_read": {}},
+        },
+        "v2_2_bklog_a_20241201_0": {"aliases": {"2_bklog_a_20241201_read": {}}},
+        "v2_2_bklog_b_20241219_0": {"aliases": {}},
+        ".kibana": {"aliases": {}},
+    }
+    return client
+
+
+def make_es_storage(table_id):
+    es_storage = ESStorage(
+        table_id=table_id,
+        storage_cluster_id=1,
+        date_format="%Y%m%d",
+        slice_size=500,
+        slice_gap=1440,
+        retention=7,
+        index_settings='{"number_of_shards": 1}',
+        mapping_settings='{"dynamic": false}',
+    )
+    for method in [
+        "is_mapping_same",
+        "put_field_alias_mapping_to_es",
+        "create_snapshot",
+        "can_delete",
+        "create_index_and_aliases",
+        "update_index_and_aliases",
+        "clean_history_es_index",
+        "clean_snapshot",
+        "reallocate_index",
+    ]:
+        setattr(es_storage, method, MagicMock(return_value=True))
+    return es_storage
+
+
+@pytest.fixture
+def planner(es_client, settings):
+    settings.ES_INDEX_ROTATION_SLEEP_INTERVAL_SECONDS = 0
+    es_storages = [make_es_storage("2_bklog_a"), make_es_storage("2_bklog_b"), make_es_storage("2_bklog_c")]
+    with (
+        patch("metadata.service.es_storage.es_tools.get_client", return_value=es_client),
+        patch.object(ESStorage, "now", new=datetime(2024, 12, 19, 10, 0, tzinfo=tz.tzutc())),
+    ):
+        yield ESRotationPlanner(1, es_storages, concurrency=2)
+
+
+def test_plan(planner, es_client):
+    report = planner.run(dry_run=True)
+    plans = {plan["table_id"]: plan for plan in report["plans"]}
+
+    # 集群状态只拉取一次，dry-run 不做任何修改
+    es_client.cat.indices.assert_called_once()
+    es_client.indices.get_alias.assert_called_once()
+    es_client.indices.update_aliases.assert_not_called()
+    es_client.indices.delete.assert_not_called()
+
+    plan_a = plans["2_bklog_a"]
+    assert plan_a["action"] == ESRotationPlanner.ACTION_KEEP
+    assert plan_a["current_index"] == "v2_2_bklog_a_20241219_0"
+    # 当天别名已绑定，只需要预创建次日别名
+    assert plan_a["alias_actions"] == [
+        {"add": {"index": "v2_2_bklog_a_20241219_0", "alias": "write_20241220_2_bklog_a"}},
+        {"add": {"index": "v2_2_bklog_a_20241219_0", "alias": "2_bklog_a_20241220_read"}},
+    ]
+    assert plan_a["expired_aliases"] == {"v2_2_bklog_a_20241215_0": ["2_bklog_a_20241205_read"]}
+    assert plan_a["delete_indices"] == ["v2_2_bklog_a_20241201_0"]
+
+    assert plans["2_bklog_b"]["action"] == ESRotationPlanner.ACTION_ROTATE
+    assert plans["2_bklog_b"]["reasons"] == ["INDEX_OVER_SLICE_SIZE"]
+    assert plans["2_bklog_c"]["action"] == ESRotationPlanner.ACTION_CREATE
+    assert report["summary"] == {
+        "keep": 1,
+        "rotate": 1,
+        "create": 1,
+        "alias_actions": 2,
+        "expired_aliases": 1,
+        "delete_indices": 1,
+    }
+
+
+def test_apply(planner, es_client):
+    planner.run()
+    storage_a, storage_b, storage_c = planner.es_storages
+
+    storage_b.update_index_and_aliases.assert_called_once_with(ahead_time=1440)
+    storage_c.create_index_and_aliases.assert_called_once_with(1440)
+    storage_a.update_index_and_aliases.assert_not_called()
+
+    # 别名变更合并为一次批量请求
+    es_client.indices.update_aliases.assert_called_once()
+    actions = es_client.indices.update_aliases.call_args[1]["body"]["actions"]
+    assert {"remove": {"index": "v2_2_bklog_a_20241215_0", "alias": "2_bklog_a_20241205_read"}} in actions
+    assert len(actions) == 3
+    es_client.indices.delete.assert_called_once_with(index="v2_2_bklog_a_20241201_0")
+    for es_storage in planner.es_storages:
+        es_storage.reallocate_index.assert_called_once()
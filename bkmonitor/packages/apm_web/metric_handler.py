@@ -54,6 +54,8 @@ class MetricHandler:
     metric_field = "bk_apm_duration"
     data_source_label = "custom"
     datasource_query = False
+    # 由查询计划预先获取的 Instance 查询结果，为 None 时实时查询
+    prefetched_instance = None
 
     def __init__(
         self,
@@ -222,6 +224,8 @@ class MetricHandler:
 
     def origin_query_instance(self):
         """Instant 查询 & 不处理值"""
+        if self.prefetched_instance is not None:
+            return self.prefetched_instance
         return self.query_by_datasource(self._datasource_query_params(instant=True))
 
     def group_query(self, *group_key: str):
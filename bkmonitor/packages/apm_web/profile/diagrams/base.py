@@ -133,38 +133,19 @@ class ValueCalculator:
         }
 
     @classmethod
-    def calculate_nodes(cls, tree, sample_type, samples_len, agg_method=None):
-        """递归计算所有节点值"""
-        # 根据聚合方法和采样类型获取计算策略，当agg_method没传值时，默认通过profiling数据类型的计算节点
-        if agg_method:
-            c = cls.agg_mapping().get(agg_method) or cls.agg_mapping().get(
-                settings.APM_PROFILING_AGG_METHOD_MAPPING.get(sample_type["type"].upper()), cls.SumCount
-            )
-        else:
-            c = cls.agg_mapping().get(
-                settings.APM_PROFILING_AGG_METHOD_MAPPING.get(sample_type["type"].upper()), cls.SumCount
-            )
-
-        def calculate_node(tree_node):
-            """递归计算节点值"""
-            tree_node.value = c.calculate(tree_node.values, samples_len)
-            for child in tree_node.children.values():
-                calculate_node(child)
-
-        calculate_node(tree.root)
-        # 更新根节点值（子节点值总和）
-        tree.root.value = format_percent(
-            sum(child.value for child in tree.root.children.values()), precision=4, sig_fig_cnt=4
+    def get_calculator(cls, sample_type, agg_method=None):
+        """根据聚合方法和采样类型获取计算策略，当agg_method没传值时，默认通过profiling数据类型的计算节点"""
+        default = cls.agg_mapping().get(
+            settings.APM_PROFILING_AGG_METHOD_MAPPING.get(sample_type["type"].upper()), cls.SumCount
         )
+        if agg_method:
+            return cls.agg_mapping().get(agg_method) or default
+        return default
 
-        # 计算图结构节点
-        for node in tree.function_node_map.values():
-            node.value = c.calculate(node.values, samples_len)
-
-        # 更新图结构根节点值
-        tree.map_root.value = format_percent(
-            sum(child.value for child in tree.map_root.children.values()), precision=4, sig_fig_cnt=4
-        )
+    @classmethod
+    def calculate_nodes(cls, tree, sample_type, samples_len, agg_method=None):
+        """计算列式调用树(FrameTree)的所有节点值"""
+        tree.calculate(cls.get_calculator(sample_type, agg_method), samples_len)
 
     class AvgCount:
         """Go协程数量计算策略（平均值）"""
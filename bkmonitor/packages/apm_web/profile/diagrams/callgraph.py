@@ -13,12 +13,12 @@ import re
 from collections import deque
 from dataclasses import dataclass
 from io import BytesIO
-from typing import Any, List
+from typing import Any
 
 from graphviz import Digraph
 
 from apm_web.profile.constants import CallGraph, CallGraphResponseDataMode
-from apm_web.profile.diagrams.base import FunctionNode, FunctionTree
+from apm_web.profile.diagrams.frame_tree import STACK_RESET, FrameTree
 from apm_web.profile.diagrams.tree_converter import TreeConverter
 
 # 定义正则表达式 来过滤切割不同语言的 pkg 名称
@@ -62,22 +62,25 @@ def multiline_printable_name(name, file_path=''):
     return f"{name}\\n{file_path}\\n" if file_path else f"{name}\\n"
 
 
-def build_edge_relation(node_list: List[FunctionNode]) -> list:
+def build_edge_relation(tree: FrameTree) -> list:
     edges = {}
     visited_nodes = set()
+    graph_children = tree.graph_children()
+    frame_ids = tree.frames.ids
+    values = tree.graph_values
 
-    queue = deque(node_list)
+    queue = deque(graph_children.get(STACK_RESET, []))
     while queue:
         node = queue.popleft()
-        for child in node.children.values():
-            edge_key = (node.id, child.id)
+        for child in graph_children.get(node, []):
+            edge_key = (node, child)
             if edge_key in edges:
                 continue
 
-            edge_value = min(node.value, child.value)
-            edges[edge_key] = {"source_id": node.id, "target_id": child.id, "value": edge_value}
-            if child.id not in visited_nodes:
-                visited_nodes.add(child.id)
+            edge_value = min(values[node], values[child])
+            edges[edge_key] = {"source_id": frame_ids[node], "target_id": frame_ids[child], "value": edge_value}
+            if child not in visited_nodes:
+                visited_nodes.add(child)
                 queue.append(child)
     return list(edges.values())
 
@@ -141,7 +144,7 @@ def dot_color(score: float, is_back_ground: bool = False) -> str:
     return "#{:02x}{:02x}{:02x}".format(int(r * 255.0), int(g * 255.0), int(b * 255.0))
 
 
-def generate_svg_data(tree: FunctionTree, data: dict, unit: str):
+def generate_svg_data(tree: FrameTree, data: dict, unit: str):
     """
     生成 svg 图片数据
     :param tree 功能树调用树
@@ -177,10 +180,10 @@ def generate_svg_data(tree: FunctionTree, data: dict, unit: str):
 
     for edge in call_graph_data.get("call_graph_relation", []):
         tooltip = (
-            tree.function_node_map.get(edge["source_id"]).name
-            if edge["source_id"] in tree.function_node_map
-            else "unknown" + "->" + tree.function_node_map.get(edge["target_id"]).name
-            if edge["target_id"] in tree.function_node_map
+            tree.frames.get_name(edge["source_id"])
+            if edge["source_id"] in tree.frames.index
+            else "unknown" + "->" + tree.frames.get_name(edge["target_id"])
+            if edge["target_id"] in tree.frames.index
             else "unknown"
         )
         penwidth = max(int(min((edge["value"] * 5 / data["call_graph_all"]), 5)), 1)
@@ -276,16 +279,22 @@ def convert_seconds(seconds):
 @dataclass
 class CallGraphDiagrammer:
     def draw(self, c: TreeConverter, **options) -> Any:
-        nodes = list(c.tree.function_node_map.values())
-        edges = build_edge_relation(list(c.tree.map_root.children.values()))
+        tree = c.tree
+        edges = build_edge_relation(tree)
         data = {
             "call_graph_data": {
                 "call_graph_nodes": [
-                    {"id": node.id, "name": node.name, "value": node.value, "self": node.self_time} for node in nodes
+                    {
+                        "id": tree.frames.ids[frame],
+                        "name": tree.frames.names[frame],
+                        "value": tree.graph_values[frame],
+                        "self": tree.graph_selfs[frame],
+                    }
+                    for frame in range(len(tree.frames))
                 ],
                 "call_graph_relation": edges,
             },
-            "call_graph_all": c.tree.map_root.value,
+            "call_graph_all": tree.graph_root_value,
         }
         if options.get("data_mode") and options.get("data_mode") == CallGraphResponseDataMode.IMAGE_DATA_MODE:
             # 补充 sample_type 信息
@@ -12,7 +12,7 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Dict, List, Optional
 
-from apm_web.profile.diagrams.base import FunctionNode, FunctionTree
+from apm_web.profile.diagrams.frame_tree import ROOT_INDEX, FrameTree
 from apm_web.profile.diagrams.tree_converter import TreeConverter
 
 logger = logging.getLogger(__name__)
@@ -20,8 +20,8 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class ProfileDiffer:
-    baseline: "FunctionTree"
-    comparison: "FunctionTree"
+    baseline: "FrameTree"
+    comparison: "FrameTree"
 
     @classmethod
     def from_raw(
@@ -31,34 +31,40 @@ class ProfileDiffer:
     ) -> "ProfileDiffer":
         return ProfileDiffer(base_tree_converter.tree, diff_tree_converter.tree)
 
-    def _process_add_or_remove(self, base: "FunctionNode", mark: "DiffMark"):
-        if not base:
-            return
+    @staticmethod
+    def _children_map(tree: FrameTree, index: int) -> dict[str, int]:
+        return {tree.get_id(child): child for child in tree.children(index)}
 
-        diff_node = DiffNode(base, None, mark) if mark == DiffMark.ADDED else DiffNode(None, base, mark)
+    def _process_add_or_remove(self, tree: "FrameTree", index: int, mark: "DiffMark"):
+        node = tree.to_dict(index)
+        diff_node = DiffNode(node, None, mark) if mark == DiffMark.ADDED else DiffNode(None, node, mark)
 
-        for child in base.children.values():
-            diff_child_node = self._process_add_or_remove(child, mark)
+        for child in tree.children(index):
+            diff_child_node = self._process_add_or_remove(tree, child, mark)
             diff_node.add_child(diff_child_node)
 
         return diff_node
 
-    def _diff_func_node(self, base: "FunctionNode", comp: "FunctionNode") -> "DiffNode":
+    def _diff_func_node(self, base_index: int, comp_index: int) -> "DiffNode":
         """Diff a node."""
-        diff_node = DiffNode(base, comp, DiffMark.CHANGED if base.value != comp.value else DiffMark.UNCHANGED)
-
-        for base_child in base.children.values():
-            comp_child = comp.children.get(base_child.id)
+        base = self.baseline.to_dict(base_index)
+        comp = self.comparison.to_dict(comp_index)
+        diff_node = DiffNode(base, comp, DiffMark.CHANGED if base["value"] != comp["value"] else DiffMark.UNCHANGED)
+
+        base_children = self._children_map(self.baseline, base_index)
+        comp_children = self._children_map(self.comparison, comp_index)
+        for node_id, base_child in base_children.items():
+            comp_child = comp_children.get(node_id)
             if comp_child is None:
-                diff_child_node = self._process_add_or_remove(base_child, DiffMark.ADDED)
+                diff_child_node = self._process_add_or_remove(self.baseline, base_child, DiffMark.ADDED)
                 diff_node.add_child(diff_child_node)
             else:
                 diff_child_node = self._diff_func_node(base_child, comp_child)
                 diff_node.add_child(diff_child_node)
 
-        for comp_child in comp.children.values():
-            if comp_child.id not in base.children:
-                diff_child_node = self._process_add_or_remove(comp_child, DiffMark.REMOVED)
+        for node_id, comp_child in comp_children.items():
+            if node_id not in base_children:
+                diff_child_node = self._process_add_or_remove(self.comparison, comp_child, DiffMark.REMOVED)
                 diff_node.add_child(diff_child_node)
 
         return diff_node
@@ -68,28 +74,33 @@ class ProfileDiffer:
 
         diff_tree = DiffTree()
 
-        if self.baseline.root and self.comparison.root:
-            diff_root = self._diff_func_node(self.baseline.root, self.comparison.root)
+        if self.baseline and self.comparison:
+            diff_root = self._diff_func_node(ROOT_INDEX, ROOT_INDEX)
             diff_tree.root = diff_root
 
         return diff_tree
 
     def diff_table(self) -> "DiffTree":
         diff_tree = DiffTree()
-        for node_id, base_node in self.baseline.function_node_map.items():
-            comp_node = self.comparison.function_node_map.get(node_id)
-            if comp_node is None:
+        comp_frames = self.comparison.frames.index
+        for node_id, base_frame in self.baseline.frames.index.items():
+            base_node = self.baseline.graph_to_dict(base_frame)
+            comp_frame = comp_frames.get(node_id)
+            if comp_frame is None:
                 diff_node = DiffNode(base_node, None, DiffMark.ADDED)
             else:
-                if base_node.value != comp_node.value:
+                comp_node = self.comparison.graph_to_dict(comp_frame)
+                if base_node["value"] != comp_node["value"]:
                     diff_node = DiffNode(base_node, comp_node, DiffMark.CHANGED)
                 else:
                     diff_node = DiffNode(base_node, comp_node, DiffMark.UNCHANGED)
             diff_tree.diff_node_map[node_id] = diff_node
 
-        for node_id, comp_node in self.comparison.function_node_map.items():
-            if node_id not in self.baseline.function_node_map:
-                diff_tree.diff_node_map[node_id] = DiffNode(None, comp_node, DiffMark.REMOVED)
+        for node_id, comp_frame in comp_frames.items():
+            if node_id not in self.baseline.frames.index:
+                diff_tree.diff_node_map[node_id] = DiffNode(
+                    None, self.comparison.graph_to_dict(comp_frame), DiffMark.REMOVED
+                )
         return diff_tree
 
 
@@ -104,8 +115,12 @@ class DiffMark(Enum):
 
 @dataclass
 class DiffNode:
-    baseline: Optional[FunctionNode]
-    comparison: Optional[FunctionNode]
+    """
+    baseline/comparison 为节点信息字典，格式同 FrameTree.to_dict
+    """
+
+    baseline: Optional[dict]
+    comparison: Optional[dict]
     mark: DiffMark
 
     parent: Optional["DiffNode"] = None
@@ -115,10 +130,10 @@ class DiffNode:
     def delta(self) -> Optional[float]:
         """Node delta as percentage."""
         if self.mark == DiffMark.CHANGED:
-            if self.comparison.value > self.baseline.value:
-                return -round(((self.comparison.value - self.baseline.value) / self.comparison.value), 4)
+            if self.comparison["value"] > self.baseline["value"]:
+                return -round(((self.comparison["value"] - self.baseline["value"]) / self.comparison["value"]), 4)
             else:
-                return round(((self.baseline.value - self.comparison.value) / self.baseline.value), 4)
+                return round(((self.baseline["value"] - self.comparison["value"]) / self.baseline["value"]), 4)
         elif self.mark == DiffMark.UNCHANGED:
             return 0
 
@@ -131,19 +146,19 @@ class DiffNode:
 
         if self.mark == DiffMark.REMOVED:
             diff_info["baseline"] = 0
-            diff_info["comparison"] = self.default.value
+            diff_info["comparison"] = self.default["value"]
         elif self.mark == DiffMark.ADDED:
-            diff_info["baseline"] = self.default.value
+            diff_info["baseline"] = self.default["value"]
             diff_info["comparison"] = 0
         else:
-            diff_info["baseline"] = self.baseline.value
-            diff_info["comparison"] = self.comparison.value
+            diff_info["baseline"] = self.baseline["value"]
+            diff_info["comparison"] = self.comparison["value"]
 
         diff_info["diff"] = self.delta
         return diff_info
 
     @property
-    def default(self) -> FunctionNode:
+    def default(self) -> dict:
         if self.mark in [DiffMark.CHANGED, DiffMark.UNCHANGED, DiffMark.ADDED]:
             return self.baseline
 
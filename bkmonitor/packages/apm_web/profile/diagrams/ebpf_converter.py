@@ -12,6 +12,7 @@ import logging
 from dataclasses import dataclass, field
 
 from apm_web.profile.diagrams.base import ROOT_DISPLAY_NAME, FunctionNode, FunctionTree
+from apm_web.profile.diagrams.frame_tree import FrameTree
 from apm_web.profile.diagrams.tree_converter import TreeConverter
 
 logger = logging.getLogger("root")
@@ -32,7 +33,7 @@ class EbpfConverter(TreeConverter):
     def get_sample_type(self) -> dict:
         return self.sample_type
 
-    def convert(self, raw: list, data_type: str) -> FunctionTree:
+    def convert(self, raw: list, data_type: str) -> FrameTree:
         """
         ebpf 的数据格式是平铺的列表 每个元素为字典 其格式为
             {
@@ -109,5 +110,6 @@ class EbpfConverter(TreeConverter):
             else:
                 self.function_name_map[parent.name].add_child(graph_node)
 
-        self.tree = tree
+        # ebpf 数据量较小，构建完成后转为 FrameTree 与其他数据源共用图表绘制逻辑
+        self.tree = FrameTree.from_function_tree(tree)
         return self.tree
@@ -11,8 +11,9 @@ import logging
 from dataclasses import dataclass
 from typing import Optional
 
-from apm_web.profile.diagrams.base import FunctionNode, get_handler_by_mapping
+from apm_web.profile.diagrams.base import get_handler_by_mapping
 from apm_web.profile.diagrams.diff import DiffNode, ProfileDiffer
+from apm_web.profile.diagrams.frame_tree import ROOT_INDEX
 from apm_web.profile.diagrams.tree_converter import TreeConverter
 
 logger = logging.getLogger("apm")
@@ -21,7 +22,7 @@ logger = logging.getLogger("apm")
 def diff_node_to_element(diff_node: Optional[DiffNode], **options) -> dict:
     handler = get_handler_by_mapping(options)
     return {
-        **handler(diff_node.default.to_dict()),
+        **handler(diff_node.default),
         "diff_info": diff_node.diff_info,
         "children": [diff_node_to_element(child, **options) for child in diff_node.children],
     }
@@ -31,20 +32,21 @@ def diff_node_to_element(diff_node: Optional[DiffNode], **options) -> dict:
 class FlamegraphDiagrammer:
     def draw(self, c: TreeConverter, **options) -> dict:
         handler = get_handler_by_mapping(options)
+        tree = c.tree
 
-        def function_node_to_element(function_node: FunctionNode) -> dict:
+        def function_node_to_element(index: int) -> dict:
             return handler(
                 {
-                    "id": function_node.id,
-                    "name": function_node.name,
-                    "value": function_node.value,
-                    "self": function_node.self_time,
-                    "children": [function_node_to_element(child) for child in function_node.children.values()],
+                    "id": tree.get_id(index),
+                    "name": tree.get_name(index),
+                    "value": tree.values[index],
+                    "self": tree.self_time(index),
+                    "children": [function_node_to_element(child) for child in tree.children(index)],
                 }
             )
 
-        root = {"name": "total", "value": c.tree.root.value, "children": [], "id": 0}
-        for r in c.tree.root.children.values():
+        root = {"name": "total", "value": tree.values[ROOT_INDEX], "children": [], "id": 0}
+        for r in tree.children(ROOT_INDEX):
             root["children"].append(function_node_to_element(r))
 
         return {"flame_data": root}
@@ -58,7 +60,7 @@ class FlamegraphDiagrammer:
         handler = get_handler_by_mapping(options)
         flame_data = [
             {
-                **handler(diff_tree_root.default.to_dict()),
+                **handler(diff_tree_root.default),
                 "diff_info": diff_tree_root.diff_info,
                 "children": [diff_node_to_element(child, **options) for child in diff_tree_root.children],
             }
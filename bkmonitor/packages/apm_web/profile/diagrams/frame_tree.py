@@ -0,0 +1,271 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+"""
+列式调用树
+
+Profiling 数据按 "帧表 + 数组" 存储，不为每个调用栈帧创建节点对象
+- 帧表: 按函数 ID 去重的帧信息，帧同时也是调用图的节点
+- 调用树: 节点下标 -> 父节点下标 / 帧下标 / 聚合值，下标 0 为根节点
+- 调用图: 帧下标 -> 聚合值，以及帧之间的调用关系
+"""
+
+from array import array
+from collections.abc import Sequence
+
+from apm_web.profile.diagrams.base import ROOT_DISPLAY_NAME
+from bkmonitor.utils.common_utils import format_percent
+
+ROOT_INDEX = 0
+
+# 调用栈中的重置标记，其后的帧重新挂到根节点下
+STACK_RESET = -1
+
+
+class FrameTable:
+    """
+    帧表，按函数 ID 去重
+    """
+
+    def __init__(self):
+        self.ids: list[str] = []
+        self.names: list[str] = []
+        self.system_names: list[str] = []
+        self.filenames: list[str] = []
+        self.index: dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def intern(self, frame_id: str, name: str, system_name: str = "", filename: str = "") -> int:
+        index = self.index.get(frame_id)
+        if index is None:
+            index = self.index[frame_id] = len(self.ids)
+            self.ids.append(frame_id)
+            self.names.append(name)
+            self.system_names.append(system_name)
+            self.filenames.append(filename)
+        return index
+
+    def get_name(self, frame_id: str) -> str | None:
+        index = self.index.get(frame_id)
+        return None if index is None else self.names[index]
+
+
+class FrameTree:
+    """
+    列式调用树，同时包含调用树与调用图
+    """
+
+    def __init__(self):
+        self.frames = FrameTable()
+
+        # 调用树
+        self.parents = array("l", [-1])
+        self.node_frames = array("l", [STACK_RESET])
+        # 构建时为累加值，calculate 后为计算后的节点值
+        self.values: list = [0]
+
+        # 调用图，调用关系中父节点为 STACK_RESET 表示根节点
+        self.graph_values: list = []
+        self.graph_selfs: list = []
+        self.graph_edges: dict[tuple, None] = {}
+        self.graph_root_value = 0
+
+        # 构建时使用: (父节点下标 << 32 | 帧下标) -> 节点下标
+        self._node_index: dict[int, int] | None = {}
+        # 子节点下标，按父节点连续存储，通过 offsets 定位
+        self._child_offsets: array | None = None
+        self._child_indices: array | None = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.parents)
+
+    def _add_node(self, parent: int, frame: int) -> int:
+        index = len(self.parents)
+        self.parents.append(parent)
+        self.node_frames.append(frame)
+        self.values.append(0)
+        self._child_offsets = self._child_indices = None
+        return index
+
+    def add_stack(self, frames: Sequence[int], value):
+        """
+        添加一条调用栈
+        :param frames: 由根到叶的帧下标，STACK_RESET 表示重新从根节点开始
+        :param value: 调用栈的聚合值
+        """
+        self.graph_values.extend([0] * (len(self.frames) - len(self.graph_values)))
+
+        node = ROOT_INDEX
+        graph_parent = STACK_RESET
+        visited = set()
+        for frame in frames:
+            if frame == STACK_RESET:
+                node = ROOT_INDEX
+                graph_parent = STACK_RESET
+                continue
+
+            # 1. 构造树
+            key = node << 32 | frame
+            child = self._node_index.get(key)
+            if child is None:
+                child = self._node_index[key] = self._add_node(node, frame)
+            self.values[child] += value
+            node = child
+
+            # 2. 构造图，同一调用栈中重复出现的帧只累加一次
+            self.graph_edges[(graph_parent, frame)] = None
+            graph_parent = frame
+            if frame not in visited:
+                visited.add(frame)
+                self.graph_values[frame] += value
+
+    def calculate(self, calculator, samples_len: int):
+        """
+        根据计算策略计算所有节点值
+        """
+        self._node_index = None
+        self.values = [calculator.calculate((value,), samples_len) for value in self.values]
+        self.graph_values = [calculator.calculate((value,), samples_len) for value in self.graph_values]
+        self.graph_values.extend([0] * (len(self.frames) - len(self.graph_values)))
+
+        # 根节点值为子节点值总和
+        self.values[ROOT_INDEX] = format_percent(
+            sum(self.values[child] for child in self.children(ROOT_INDEX)), precision=4, sig_fig_cnt=4
+        )
+
+        child_values = [0] * len(self.frames)
+        root_value = 0
+        for parent, child in self.graph_edges:
+            if parent == STACK_RESET:
+                root_value += self.graph_values[child]
+            else:
+                child_values[parent] += self.graph_values[child]
+        self.graph_root_value = format_percent(root_value, precision=4, sig_fig_cnt=4)
+        self.graph_selfs = [max(value - sub, 0) for value, sub in zip(self.graph_values, child_values)]
+
+    def _build_children(self):
+        count = len(self.parents)
+        offsets = array("l", [0]) * (count + 1)
+        for parent in self.parents[1:]:
+            offsets[parent + 1] += 1
+        for index in range(count):
+            offsets[index + 1] += offsets[index]
+
+        positions = array("l", offsets)
+        indices = array("l", [0]) * (count - 1)
+        # 节点按创建顺序编号，因此子节点保持插入顺序
+        for index in range(1, count):
+            parent = self.parents[index]
+            indices[positions[parent]] = index
+            positions[parent] += 1
+        self._child_offsets, self._child_indices = offsets, indices
+
+    def children(self, index: int) -> array:
+        if self._child_offsets is None:
+            self._build_children()
+        return self._child_indices[self._child_offsets[index] : self._child_offsets[index + 1]]
+
+    def get_id(self, index: int) -> str:
+        frame = self.node_frames[index]
+        return ROOT_DISPLAY_NAME if frame == STACK_RESET else self.frames.ids[frame]
+
+    def get_name(self, index: int) -> str:
+        frame = self.node_frames[index]
+        return ROOT_DISPLAY_NAME if frame == STACK_RESET else self.frames.names[frame]
+
+    def self_time(self, index: int):
+        sub = self.values[index] - sum(self.values[child] for child in self.children(index))
+        return sub if sub > 0 else 0
+
+    def to_dict(self, index: int) -> dict:
+        """
+        调用树节点信息，与 FunctionNode.to_dict 一致
+        """
+        frame = self.node_frames[index]
+        if frame == STACK_RESET:
+            name, system_name, filename = ROOT_DISPLAY_NAME, "", ""
+        else:
+            name, system_name, filename = (
+                self.frames.names[frame],
+                self.frames.system_names[frame],
+                self.frames.filenames[frame],
+            )
+        return {
+            "id": self.get_id(index),
+            "value": self.values[index],
+            "self": self.self_time(index),
+            "name": name,
+            "system_name": system_name,
+            "filename": filename,
+        }
+
+    def graph_to_dict(self, frame: int) -> dict:
+        """
+        调用图节点信息，与 FunctionNode.to_dict 一致
+        """
+        return {
+            "id": self.frames.ids[frame],
+            "value": self.graph_values[frame],
+            "self": self.graph_selfs[frame],
+            "name": self.frames.names[frame],
+            "system_name": self.frames.system_names[frame],
+            "filename": self.frames.filenames[frame],
+        }
+
+    def graph_children(self) -> dict[int, list[int]]:
+        """
+        调用图的邻接表，根节点为 STACK_RESET
+        """
+        children = {}
+        for parent, child in self.graph_edges:
+            children.setdefault(parent, []).append(child)
+        return children
+
+    @classmethod
+    def from_function_tree(cls, function_tree) -> "FrameTree":
+        """
+        由已计算节点值的 FunctionTree 转换
+        """
+        tree = cls()
+        for node in function_tree.function_node_map.values():
+            tree.frames.intern(node.id, node.name, node.system_name, node.filename)
+
+        # 调用图
+        visited = set()
+        pending = [(STACK_RESET, child) for child in function_tree.map_root.children.values()]
+        pending.reverse()
+        while pending:
+            parent, node = pending.pop()
+            frame = tree.frames.intern(node.id, node.name, node.system_name, node.filename)
+            tree.graph_edges[(parent, frame)] = None
+            if node.id in visited:
+                continue
+            visited.add(node.id)
+            pending.extend((frame, child) for child in reversed(node.children.values()))
+
+        # 调用树，按先序遍历编号，同一父节点的子节点保持原有顺序
+        tree.values[ROOT_INDEX] = function_tree.root.value
+        pending = [(ROOT_INDEX, child) for child in reversed(function_tree.root.children.values())]
+        while pending:
+            parent, node = pending.pop()
+            index = tree._add_node(parent, tree.frames.intern(node.id, node.name, node.system_name, node.filename))
+            tree.values[index] = node.value
+            pending.extend((index, child) for child in reversed(node.children.values()))
+        tree._node_index = None
+
+        for frame_id in tree.frames.ids:
+            node = function_tree.function_node_map.get(frame_id)
+            tree.graph_values.append(node.value if node else 0)
+            tree.graph_selfs.append(node.self_time if node else 0)
+        tree.graph_root_value = function_tree.map_root.value
+        return tree
@@ -14,7 +14,7 @@ from typing import List
 
 from django.utils.translation import gettext_lazy as _
 
-from apm_web.profile.diagrams.base import FunctionNode
+from apm_web.profile.diagrams.frame_tree import ROOT_INDEX, FrameTree
 from apm_web.profile.diagrams.tree_converter import TreeConverter
 
 logger = logging.getLogger("apm")
@@ -30,7 +30,8 @@ class GrafanaFlameDiagrammer:
 
     def convert(
         self,
-        node: FunctionNode,
+        tree: FrameTree,
+        index: int = ROOT_INDEX,
         level: int = 0,
         levels: List[int] = None,
         labels: List[str] = None,
@@ -47,12 +48,12 @@ class GrafanaFlameDiagrammer:
             values = []
 
         levels.append(level)
-        labels.append(node.id)
-        values.append(node.value)
-        selfs.append(node.self_time)
+        labels.append(tree.get_id(index))
+        values.append(tree.values[index])
+        selfs.append(tree.self_time(index))
 
-        for c in node.children.values():
-            self.convert(c, level + 1, levels, labels, selfs, values)
+        for c in tree.children(index):
+            self.convert(tree, c, level + 1, levels, labels, selfs, values)
 
         return levels, labels, selfs, values
 
@@ -68,7 +69,7 @@ class GrafanaFlameDiagrammer:
         return indices, list(values.keys())
 
     def draw(self, c: TreeConverter, **_) -> dict:
-        levels, labels, selfs, values = self.convert(c.tree.root)
+        levels, labels, selfs, values = self.convert(c.tree)
         label_indices, label_enums = self.convert_to_string_table(labels)
 
         unit = c.get_sample_type().get("unit")
@@ -9,8 +9,9 @@ specific language governing permissions and limitations under the License.
 """
 from dataclasses import dataclass
 
-from apm_web.profile.diagrams.base import FunctionNode, get_handler_by_mapping
+from apm_web.profile.diagrams.base import get_handler_by_mapping
 from apm_web.profile.diagrams.diff import ProfileDiffer
+from apm_web.profile.diagrams.frame_tree import ROOT_INDEX
 from apm_web.profile.diagrams.tree_converter import TreeConverter
 
 
@@ -18,28 +19,35 @@ from apm_web.profile.diagrams.tree_converter import TreeConverter
 class TableDiagrammer:
     def draw(self, c: TreeConverter, **options) -> dict:
         handler = get_handler_by_mapping(options)
-        nodes = list(c.tree.function_node_map.values())
+        tree = c.tree
+        nodes = [
+            {
+                "id": tree.frames.ids[frame],
+                "name": tree.frames.names[frame],
+                "self": tree.graph_selfs[frame],
+                "total": tree.graph_values[frame],
+            }
+            for frame in range(len(tree.frames))
+        ]
         # 添加total节点
-        total_node = FunctionNode(id="total", value=c.tree.root.value, name="total", filename="", system_name="")
-        nodes.append(total_node)
+        root_value = tree.values[ROOT_INDEX]
+        nodes.append({"id": "total", "name": "total", "self": root_value, "total": root_value})
         sort_map = {
-            "name": lambda x: x.name,
-            "self": lambda x: x.self_time,
-            "total": lambda x: x.value,
-            "location": lambda x: x.name,
+            "name": lambda x: x["name"],
+            "self": lambda x: x["self"],
+            "total": lambda x: x["total"],
+            "location": lambda x: x["name"],
         }
 
         if options.get("sort"):
             sorted_nodes = self.sorted_node(node_list=nodes, options=options, sort_map=sort_map)
         else:
             # 默认排序
-            sorted_nodes = sorted(nodes, key=lambda x: x.name, reverse=True)
+            sorted_nodes = sorted(nodes, key=lambda x: x["name"], reverse=True)
         return {
             "table_data": {
-                "total": c.tree.root.value,
-                "items": [
-                    handler({"id": x.id, "name": x.name, "self": x.self_time, "total": x.value}) for x in sorted_nodes
-                ],
+                "total": root_value,
+                "items": [handler(x) for x in sorted_nodes],
             }
         }
 
@@ -65,10 +73,10 @@ class TableDiagrammer:
         for node in diff_table.diff_node_map.values():
             table_data.append(
                 {
-                    **handler(node.default.to_dict()),
+                    **handler(node.default),
                     **node.diff_info,
-                    "baseline_node": handler(node.baseline.to_dict() if node.baseline else miss_value),
-                    "comparison_node": handler(node.comparison.to_dict() if node.comparison else miss_value),
+                    "baseline_node": handler(node.baseline or miss_value),
+                    "comparison_node": handler(node.comparison or miss_value),
                 }
             )
 
@@ -12,21 +12,17 @@ import json
 from dataclasses import dataclass
 from typing import Any
 
-from apm_web.profile.diagrams.base import (
-    ROOT_DISPLAY_NAME,
-    FunctionNode,
-    FunctionTree,
-    ValueCalculator,
-)
+from apm_web.profile.diagrams.base import FunctionNode, ValueCalculator
+from apm_web.profile.diagrams.frame_tree import STACK_RESET, FrameTable, FrameTree
 
 
 @dataclass
 class TreeConverter:
     """
-    将 doris 查询出来的原始数据直接转为 FunctionTree 而不经过 ProfileConverter
+    将 doris 查询出来的原始数据直接转为 FrameTree 而不经过 ProfileConverter
     """
 
-    tree: FunctionTree = None
+    tree: FrameTree = None
     sample_type: dict = None
 
     def empty(self) -> bool:
@@ -39,7 +35,7 @@ class TreeConverter:
     def _align_agg_interval(cls, t, interval):
         return int(t / interval) * interval
 
-    def convert(self, raw: Any, agg_method: str | None = None, agg_interval: int = 60) -> FunctionTree:
+    def convert(self, raw: Any, agg_method: str | None = None, agg_interval: int = 60) -> FrameTree:
         samples_info = raw["list"]
         if not samples_info:
             return self.tree
@@ -47,23 +43,8 @@ class TreeConverter:
         first_item_sample_type = samples_info[0]["sample_type"].split("/")
         self.sample_type = {"type": first_item_sample_type[0], "unit": first_item_sample_type[1]}
 
-        # 构建 FunctionTree
-        tree = FunctionTree(
-            root=FunctionNode(
-                id=ROOT_DISPLAY_NAME,
-                name=ROOT_DISPLAY_NAME,
-                system_name="",
-                filename="",
-                values=[],
-            ),
-            map_root=FunctionNode(
-                id=ROOT_DISPLAY_NAME,
-                name=ROOT_DISPLAY_NAME,
-                system_name="",
-                filename="",
-                values=[],
-            ),
-        )
+        # 构建 FrameTree
+        tree = FrameTree()
         self.build_tree(tree, samples_info, agg_method, agg_interval)
 
         # 计算出一共有多少个时间点的数据，相同时间点的数据只算一次
@@ -77,7 +58,35 @@ class TreeConverter:
         return self.tree
 
     @classmethod
-    def build_tree(cls, tree: FunctionTree, samples, agg_method=None, agg_interval=60):
+    def parse_stacktrace(cls, frames: FrameTable, stacktrace: str) -> list:
+        """
+        将 sample 的堆栈解析为由根到叶的帧下标列表
+        """
+        stack = []
+        for frame in reversed(json.loads(stacktrace)):
+            if not frame["lines"]:
+                # 重新从根节点开始，防止生成错误的调用关系
+                stack.append(STACK_RESET)
+                continue
+
+            for line in reversed(frame["lines"]):
+                if not line:
+                    stack.append(STACK_RESET)
+                    continue
+
+                pure_line = FunctionNode.replace_invalid_char(line)
+                stack.append(
+                    frames.intern(
+                        FunctionNode.generate_id(pure_line),
+                        pure_line["function"]["name"],
+                        pure_line["function"]["systemName"],
+                        pure_line["function"]["fileName"],
+                    )
+                )
+        return stack
+
+    @classmethod
+    def build_tree(cls, tree: FrameTree, samples, agg_method=None, agg_interval=60):
         if agg_method == "LAST":
             # 只保留最后一个时间戳的所有 sample 数据
             interval = agg_interval * 1000
@@ -86,62 +95,11 @@ class TreeConverter:
                 s for s in samples if cls._align_agg_interval(int(s["dtEventTimeStamp"]), interval) == last_snapshot
             ]
 
+        # 节点值只与累加值有关，相同堆栈的 sample 先合并，每个堆栈只解析一次
+        stack_values = {}
         for sample in samples:
-            value = int(sample["value"])
-            parent = tree.root
-            map_parent = tree.map_root
-            stacktraces = json.loads(sample["stacktrace"])
-
-            visited_node = set()
-            for stacktrace in reversed(stacktraces):
-                if not stacktrace["lines"]:
-                    # 将 parent 设置为空防止生成错误的调用关系
-                    parent = tree.root
-                    map_parent = tree.map_root
-                    continue
+            stacktrace = sample["stacktrace"]
+            stack_values[stacktrace] = stack_values.get(stacktrace, 0) + int(sample["value"])
 
-                for line in reversed(stacktrace["lines"]):
-                    if not line:
-                        parent = tree.root
-                        map_parent = tree.map_root
-                        continue
-
-                    pure_line = FunctionNode.replace_invalid_char(line)
-                    node_id = FunctionNode.generate_id(pure_line)
-
-                    # 1. 构造树
-                    if node_id in parent.children:
-                        node = parent.children.get(node_id)
-                        node.add_value(value)
-                        parent = node
-                    else:
-                        node = FunctionNode(
-                            id=node_id,
-                            name=pure_line["function"]["name"],
-                            system_name=pure_line["function"]["systemName"],
-                            filename=pure_line["function"]["fileName"],
-                            values=[value],
-                        )
-                        parent.add_child(node)
-                        parent = node
-
-                    # 2. 构造图
-                    if node_id not in tree.function_node_map:
-                        map_node = FunctionNode(
-                            id=node_id,
-                            name=pure_line["function"]["name"],
-                            system_name=pure_line["function"]["systemName"],
-                            filename=pure_line["function"]["fileName"],
-                            values=[value],
-                        )
-                        tree.function_node_map[node_id] = map_node
-                        map_parent.add_child(map_node)
-                        map_parent = map_node
-                    else:
-                        map_node = tree.function_node_map[node_id]
-                        if node_id not in visited_node:
-                            map_node.add_value(value)
-                        map_parent.add_child(map_node)
-                        map_parent = map_node
-
-                    visited_node.add(node_id)
+        for stacktrace, value in stack_values.items():
+            tree.add_stack(cls.parse_stacktrace(tree.frames, stacktrace), value)
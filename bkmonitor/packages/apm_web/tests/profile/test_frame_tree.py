@@ -0,0 +1,73 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import json
+
+from apm_web.profile.diagrams.flamegraph import FlamegraphDiagrammer
+from apm_web.profile.diagrams.frame_tree import ROOT_INDEX
+from apm_web.profile.diagrams.table import TableDiagrammer
+from apm_web.profile.diagrams.tree_converter import TreeConverter
+
+
+def _line(name):
+    return {"function": {"systemName": "", "fileName": "main.go", "name": name}}
+
+
+def _sample(names, value, timestamp=0):
+    return {
+        "stacktrace": json.dumps([{"lines": [_line(name) for name in reversed(names)]}]),
+        "value": str(value),
+        "dtEventTimeStamp": str(timestamp),
+        "sample_type": "cpu/nanoseconds",
+    }
+
+
+class TestFrameTree:
+    def test_convert(self):
+        c = TreeConverter()
+        tree = c.convert(
+            {
+                "list": [
+                    _sample(["main", "a", "b"], 10),
+                    _sample(["main", "a", "b"], 5, 60000),
+                    _sample(["main", "c", "a"], 7),
+                    _sample(["main", "main"], 3),
+                ]
+            }
+        )
+
+        # 相同函数在调用树中按调用路径区分，在调用图中只有一个节点
+        assert tree.node_count == 7
+        assert tree.frames.ids == ["main.gomain", "main.goa", "main.gob", "main.goc"]
+        assert tree.values[ROOT_INDEX] == 25
+
+        main = tree.children(ROOT_INDEX)[0]
+        assert tree.values[main] == 25
+        assert [tree.get_name(child) for child in tree.children(main)] == ["a", "c", "main"]
+        assert tree.self_time(main) == 0
+
+        frame_a = tree.frames.index["main.goa"]
+        assert tree.graph_values[frame_a] == 22
+        assert tree.graph_selfs[frame_a] == 7
+        # 递归调用在同一调用栈中只累加一次
+        assert tree.graph_values[tree.frames.index["main.gomain"]] == 25
+
+        flame_data = FlamegraphDiagrammer().draw(c)["flame_data"]
+        assert flame_data["value"] == 25
+        assert flame_data["children"][0]["children"][0] == {
+            "id": "main.goa",
+            "name": "a",
+            "value": 15,
+            "self": 0,
+            "children": [{"id": "main.gob", "name": "b", "value": 15, "self": 15, "children": []}],
+        }
+
+        table_data = TableDiagrammer().draw(c, sort="-total")["table_data"]
+        assert [item["name"] for item in table_data["items"]] == ["main", "total", "a", "b", "c"]
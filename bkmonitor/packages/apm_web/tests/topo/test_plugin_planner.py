@@ -0,0 +1,93 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from unittest import mock
+
+from apm_web.metric_handler import MetricHandler
+from apm_web.topo.handle.graph_plugin import (
+    EdgeErrorCount,
+    EdgeRequestCount,
+    NodeDurationMaxCaller,
+    NodeRequestCount,
+)
+from apm_web.topo.handle.plugin_planner import PluginQueryPlanner
+
+APPLICATION = {"bk_biz_id": 2, "metric_result_table_id": "2_bkapm_metric_demo.__default__"}
+
+
+class FakeDataSource:
+    def __init__(self, bk_biz_id, **params):
+        self.params = params
+
+
+class FakeUnifyQuery:
+    queries = []
+
+    def __init__(self, bk_biz_id, data_sources, expression):
+        self.data_sources = data_sources
+        self.expression = expression
+        self.queries.append(self)
+
+    def query_data(self, **kwargs):
+        records = []
+        for data_source in self.data_sources:
+            metric = data_source.params["metrics"][0]
+            records.append(
+                {
+                    "from_apm_service_name": "a",
+                    "to_apm_service_name": "b",
+                    "_result_": 1 if metric["method"] == "SUM" else 100,
+                    PluginQueryPlanner.REFERENCE_LABEL: metric["alias"],
+                }
+            )
+        return records
+
+
+class TestPluginQueryPlanner:
+    def test_prefetch(self):
+        runtime = {"application": APPLICATION, "start_time": 1700000000, "end_time": 1700000600}
+        plugins = [
+            EdgeRequestCount(_runtime=runtime),
+            NodeRequestCount(_runtime=runtime),
+            NodeDurationMaxCaller(_runtime=runtime),
+            EdgeErrorCount(_runtime=runtime),
+        ]
+
+        FakeUnifyQuery.queries = []
+        single_query = mock.patch.object(
+            MetricHandler,
+            "query_by_datasource",
+            return_value=[{"from_apm_service_name": "a", "to_apm_service_name": "b", "_result_": 2}],
+        )
+        with (
+            mock.patch("apm_web.topo.handle.plugin_planner.UnifyQuery", FakeUnifyQuery),
+            mock.patch("apm_web.topo.handle.plugin_planner.load_data_source", return_value=FakeDataSource),
+            single_query as query_by_datasource,
+        ):
+            planner = PluginQueryPlanner(plugins)
+            with mock.patch.object(MetricHandler, "origin_query_instance") as origin_query_instance:
+                planner.prefetch()
+            # 试运行只记录查询，不会执行插件的查询及后续计算
+            assert origin_query_instance.call_count == 0
+
+            # 请求量与最大耗时合并为一次查询，错误数的过滤条件不同，单独查询
+            assert len(FakeUnifyQuery.queries) == 1
+            assert len(FakeUnifyQuery.queries[0].data_sources) == 2
+            assert query_by_datasource.call_count == 1
+
+            results = [planner.install(plugin) for plugin in plugins]
+            assert query_by_datasource.call_count == 1
+
+        assert results[0] == {("a", "b"): {"request_count": 1, "_request_count": 1}}
+        assert results[1] == {("a",): {"request_count": 1}, ("b",): {"request_count": 1}}
+        assert results[2][("a",)]["_duration_max_caller"] == 100
+        assert results[3] == {("a", "b"): {"error_count": 2, "_error_count": 2}}
+        # 插件的指标类在安装后恢复
+        assert plugins[0].metric is EdgeRequestCount.metric
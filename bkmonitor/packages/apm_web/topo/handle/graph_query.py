@@ -23,8 +23,9 @@ from apm_web.topo.constants import GraphPluginType
 from apm_web.topo.handle import BaseQuery
 from apm_web.topo.handle import NodeDisplayType as Display
 from apm_web.topo.handle.graph_plugin import PluginProvider, ViewConverter
+from apm_web.topo.handle.plugin_planner import PluginQueryPlanner
 from apm_web.utils import merge_dicts
-from bkmonitor.utils.thread_backend import ThreadPool
+from bkmonitor.utils.thread_backend import get_thread_pool
 
 logger = logging.getLogger("apm")
 
@@ -154,11 +155,17 @@ class Graph:
     _edge_merge_attrs: dict = field(default_factory=dict)
 
     def __post_init__(self):
+        # 合并各插件的指标查询
+        planner = PluginQueryPlanner(
+            [p for p in self.plugins if p.type in (GraphPluginType.NODE, GraphPluginType.EDGE)]
+        )
+        planner.prefetch()
+
         def _process_plugin(p):
             if p.type == GraphPluginType.NODE:
-                return 'node', p.install()
+                return 'node', planner.install(p)
             elif p.type == GraphPluginType.EDGE:
-                return 'edge', p.install()
+                return 'edge', planner.install(p)
             return None, None
 
         def _merge_result(result, n, e):
@@ -171,7 +178,7 @@ class Graph:
         nodes_attrs = self._nodes_attrs
         edges_attrs = self._edges_attrs
 
-        pool = ThreadPool()
+        pool = get_thread_pool("apm_topo")
         results = pool.map_ignore_exception(_process_plugin, self.plugins)
         for r in results:
             nodes_attrs, edges_attrs = _merge_result(r, nodes_attrs, edges_attrs)
@@ -0,0 +1,212 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+"""
+拓扑插件指标查询计划
+
+同一次拓扑渲染中，各插件的指标查询通常只在指标字段、聚合方法及维度上有差异
+查询计划分为三步:
+1. 收集: 试运行插件至创建指标对象为止，记录插件创建的首个指标查询，不执行查询及后续计算
+2. 执行: 按 表 + 过滤条件 + 时间范围 分组，每组合并为一次多指标统一查询，
+   每个子查询通过 label_replace 打上引用标签，返回后按标签拆分回各个查询
+3. 安装: 插件正常执行 install，指标对象直接使用预先获取的数据
+无法合并的查询(如 PromQL 查询)、插件的后续指标查询及合并查询失败的分组，插件安装时仍单独查询
+"""
+
+import json
+import logging
+import string
+from collections import defaultdict
+
+from django.conf import settings
+
+from apm_web.metric_handler import MetricHandler, PromqlInstanceQueryMixin
+from apm_web.topo.handle.graph_plugin import PrePlugin, ValuesPluginMixin
+from bkmonitor.data_source import UnifyQuery, load_data_source
+from bkmonitor.utils.thread_backend import get_thread_pool
+
+logger = logging.getLogger("apm")
+
+
+class QueryCollected(Exception):
+    """试运行插件时已记录指标查询，中断插件安装"""
+
+
+class PlannedMetric:
+    """插件指标类的代理，创建的指标对象由查询计划提供数据"""
+
+    def __init__(self, planner: "PluginQueryPlanner", metric):
+        self._planner = planner
+        self._metric = metric
+
+    def __call__(self, *args, **kwargs):
+        handler = self._metric(*args, **kwargs)
+        self._planner.bind(handler)
+        if self._planner.collecting:
+            raise QueryCollected
+        return handler
+
+    def __getattr__(self, item):
+        return getattr(self._metric, item)
+
+
+class PluginQueryPlanner:
+    # 合并查询的子查询引用标签
+    REFERENCE_LABEL = "bk_topo_reference"
+    # 单次合并查询的最大子查询数量
+    MAX_REFERENCES = 10
+
+    def __init__(self, plugins):
+        self.plugins = list(plugins)
+        self.collecting = False
+        # 查询标识 -> 指标对象
+        self.handlers: dict[str, MetricHandler] = {}
+        # 查询标识 -> 预先获取的数据
+        self.results: dict[str, list[dict]] = {}
+
+    @classmethod
+    def is_plannable(cls, handler: MetricHandler) -> bool:
+        return handler.data_source_label == "custom" and not isinstance(handler, PromqlInstanceQueryMixin)
+
+    @classmethod
+    def get_query_keys(cls, handler: MetricHandler) -> tuple[str, str]:
+        """
+        获取查询的 (分组标识, 查询标识)
+        相同分组的查询只在指标、聚合方法、维度及函数上有差异，可以合并为一次查询
+        """
+        params = handler._datasource_query_params(instant=True)
+        scope = {
+            "bk_biz_id": handler._get_app_attr("bk_biz_id"),
+            "start_time": handler.start_time,
+            "end_time": handler.end_time,
+        }
+        group_key = json.dumps(
+            {
+                **scope,
+                "table": params["table"],
+                "where": params["where"],
+                "filter_dict": params["filter_dict"],
+                "interval": params.get("interval"),
+            },
+            sort_keys=True,
+        )
+        return group_key, json.dumps({**scope, **params}, sort_keys=True)
+
+    def bind(self, handler: MetricHandler):
+        if not self.is_plannable(handler):
+            return
+
+        _, query_key = self.get_query_keys(handler)
+        if self.collecting:
+            self.handlers.setdefault(query_key, handler)
+        elif query_key in self.results:
+            handler.prefetched_instance = list(self.results[query_key])
+
+    def _run(self, plugin: PrePlugin):
+        metric = plugin.metric
+        plugin.metric = PlannedMetric(self, metric)
+        try:
+            return plugin.install()
+        finally:
+            plugin.metric = metric
+
+    def collect(self):
+        """试运行插件，收集指标查询"""
+        self.collecting = True
+        try:
+            for plugin in self.plugins:
+                if not isinstance(plugin, ValuesPluginMixin):
+                    continue
+                try:
+                    self._run(plugin)
+                except QueryCollected:
+                    pass
+                except Exception as e:  # noqa
+                    logger.warning(f"[PluginQueryPlanner] collect plugin({plugin.id}) queries failed: {e}")
+        finally:
+            self.collecting = False
+
+    def plan(self) -> list[list[tuple[str, MetricHandler]]]:
+        """按分组标识合并查询，每个分组的子查询数量不超过 MAX_REFERENCES"""
+        groups = defaultdict(list)
+        for query_key, handler in self.handlers.items():
+            group_key, _ = self.get_query_keys(handler)
+            groups[group_key].append((query_key, handler))
+
+        batches = []
+        for queries in groups.values():
+            for index in range(0, len(queries), self.MAX_REFERENCES):
+                batches.append(queries[index : index + self.MAX_REFERENCES])
+        return batches
+
+    def query(self, queries: list[tuple[str, MetricHandler]]) -> dict[str, list[dict]]:
+        """执行一次合并查询，并按引用标签拆分结果"""
+        if len(queries) == 1:
+            query_key, handler = queries[0]
+            return {query_key: handler.query_by_datasource(handler._datasource_query_params(instant=True))}
+
+        handler = queries[0][1]
+        bk_biz_id = handler._get_app_attr("bk_biz_id")
+        data_source_class = load_data_source(handler.data_source_label, "time_series")
+
+        data_sources = []
+        expressions = []
+        references = {}
+        for alias, (query_key, query_handler) in zip(string.ascii_lowercase, queries):
+            params = query_handler._datasource_query_params(instant=True)
+            params["metrics"] = [{**metric, "alias": alias} for metric in params["metrics"]]
+            data_sources.append(data_source_class(bk_biz_id=bk_biz_id, **params))
+            expressions.append(f'label_replace({alias}, "{self.REFERENCE_LABEL}", "{alias}", "", "")')
+            references[alias] = query_key
+
+        query = UnifyQuery(bk_biz_id=bk_biz_id, data_sources=data_sources, expression=" or ".join(expressions))
+        records = query.query_data(
+            start_time=handler.start_time * 1000,
+            end_time=handler.end_time * 1000,
+            limit=settings.SQL_MAX_LIMIT,
+            slimit=settings.SQL_MAX_LIMIT,
+            time_alignment=False,
+            instant=True,
+        )
+
+        results = {query_key: [] for query_key in references.values()}
+        for record in records:
+            query_key = references.get(record.pop(self.REFERENCE_LABEL, None))
+            if query_key is not None:
+                results[query_key].append(record)
+        return results
+
+    def prefetch(self):
+        """收集并执行合并查询，合并查询失败的分组在插件安装时单独查询"""
+        self.collect()
+        batches = self.plan()
+        if not batches:
+            return
+
+        def _query(queries):
+            try:
+                return self.query(queries)
+            except Exception as e:  # noqa
+                logger.warning(f"[PluginQueryPlanner] query {len(queries)} references failed: {e}")
+                return {}
+
+        for result in get_thread_pool("apm_topo").map_ignore_exception(_query, [(queries,) for queries in batches]):
+            self.results.update(result)
+
+        logger.info(
+            f"[PluginQueryPlanner] {len(self.plugins)} plugins, {len(self.handlers)} queries, "
+            f"{len(batches)} batches, {len(self.results)} prefetched"
+        )
+
+    def install(self, plugin: PrePlugin):
+        """安装插件，已预先获取的查询直接使用预取数据"""
+        if not isinstance(plugin, ValuesPluginMixin):
+            return plugin.install()
+        return self._run(plugin)
@@ -12,6 +12,7 @@ from typing import List, Tuple
 
 from apm_web.topo.constants import BarChartDataType, RelationResourcePathType
 from apm_web.topo.handle.graph_plugin import PluginProvider
+from apm_web.topo.handle.plugin_planner import PluginQueryPlanner
 from apm_web.topo.handle.relation.define import Node, TreeInfo
 from apm_web.topo.handle.relation.endpoint_top import (
     AlertList,
@@ -22,7 +23,7 @@ from apm_web.topo.handle.relation.endpoint_top import (
 )
 from apm_web.topo.handle.relation.path import PathProvider
 from apm_web.utils import merge_dicts
-from bkmonitor.utils.thread_backend import ThreadPool
+from bkmonitor.utils.thread_backend import get_thread_pool
 
 
 class RelationEntrance:
@@ -162,8 +163,10 @@ class EndpointListEntrance:
         )
 
         endpoint_metrics = {}
-        pool = ThreadPool()
-        results = pool.map_ignore_exception(lambda p: p.install(), plugins)
+        planner = PluginQueryPlanner(plugins)
+        planner.prefetch()
+        pool = get_thread_pool("apm_topo")
+        results = pool.map_ignore_exception(planner.install, planner.plugins)
         for r in results:
             endpoint_metrics = merge_dicts(endpoint_metrics, r)
 
@@ -15,7 +15,7 @@ from dataclasses import asdict
 from functools import reduce
 from itertools import chain
 from typing import Any
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from re import Pattern
 
 import arrow
@@ -37,6 +37,7 @@ from bkmonitor.data_source import (
     load_data_source,
 )
 from bkmonitor.data_source.unify_query.query import UnifyQuery
+from bkmonitor.data_source.unify_query.series import UnifyQuerySeries, UnifyQuerySeriesResult
 from bkmonitor.models import BCSCluster, MetricListCache
 from bkmonitor.share.api_auth_resource import ApiAuthResource
 from bkmonitor.strategy.new_strategy import get_metric_id
@@ -486,6 +487,8 @@ class UnifyQueryRawResource(ApiAuthResource):
     """
 
     re_down_sample = re.compile(r"^\d+[mshdw]$")
+    # 是否使用统一查询的列式结果，原始数据接口需要返回逐条记录
+    columnar_result = False
 
     class RequestSerializer(serializers.Serializer):
         class QueryConfigSerializer(serializers.Serializer):
@@ -872,6 +875,10 @@ class UnifyQueryRawResource(ApiAuthResource):
         }
         query_method: Callable[[Any], list[dict]] = query_method_map.get(params.get("query_method"), query.query_data)
 
+        query_kwargs = {}
+        if self.columnar_result and query_method == query.query_data:
+            query_kwargs["columnar"] = True
+
         points = query_method(
             start_time=params["start_time"] * 1000,
             end_time=params["end_time"] * 1000,
@@ -879,6 +886,7 @@ class UnifyQueryRawResource(ApiAuthResource):
             slimit=params["slimit"],
             down_sample_range=params["down_sample_range"],
             time_alignment=time_alignment,
+            **query_kwargs,
         )
 
         # 如果存在数据后过滤条件，则进行过滤
@@ -900,6 +908,8 @@ class GraphUnifyQueryResource(UnifyQueryRawResource):
     统一查询接口 (适配图表展示)
     """
 
+    columnar_result = True
+
     def get_unit(self, metrics: list[dict], params: dict) -> str:
         """
         获取单位信息
@@ -958,48 +968,69 @@ class GraphUnifyQueryResource(UnifyQueryRawResource):
                     (DataSourceLabel.BK_FTA, DataTypeLabel.EVENT),
                 )
 
-        for record in data:
-            dimensions = tuple(
-                sorted(
-                    (key, value)
-                    for key, value in record.items()
-                    if key in dimension_fields
-                    or key == "__time_compare"
-                    or (data_source_label == DataSourceLabel.PROMETHEUS and key not in ["_result_", "_time_"])
-                )
-            )
+        # 取值字段及对应的图表指标，查询结果在前，其他需要展示的指标在后
+        value_fields = ["_result_"]
+        metric_tuples = [("_result_", expression)]
+        for query_config in params["query_configs"]:
+            for metric in query_config["metrics"]:
+                # 只展示需要展示的指标
+                if not metric.get("display"):
+                    continue
 
-            if record.get("_result_") is not None:
-                if isinstance(record["_result_"], int | float):
-                    record["_result_"] = round(record["_result_"], settings.POINT_PRECISION)
+                if metric.get("alias"):
+                    display_dimension = f"{metric['field']}({metric['alias']})"
+                else:
+                    display_dimension = metric["field"]
 
-                # 查询结果取值
-                formatted_data[dimensions].setdefault(("_result_", expression), []).append(
-                    [record.get("_result_"), record["_time_"]]
-                )
+                value_fields.append(metric.get("alias") or metric["field"])
+                metric_tuples.append((value_fields[-1], display_dimension))
 
-            # 其他指标取值
-            for query_config in params["query_configs"]:
-                for metric in query_config["metrics"]:
-                    # 只展示需要展示的指标
-                    if not metric.get("display"):
-                        continue
+        def is_dimension(key: str) -> bool:
+            return (
+                key in dimension_fields
+                or key == "__time_compare"
+                or (data_source_label == DataSourceLabel.PROMETHEUS and key not in ["_result_", "_time_"])
+            )
 
-                    if metric.get("alias"):
-                        alias = metric["alias"]
-                        display_dimension = f"{metric['field']}({alias})"
-                    else:
-                        alias = metric["field"]
-                        display_dimension = alias
-
-                    alias = metric.get("alias") or metric["field"]
-                    if record.get(alias) is not None:
-                        value = record[alias]
-                        if isinstance(value, int | float):
-                            value = round(value, settings.POINT_PRECISION)
-                        formatted_data[dimensions].setdefault((alias, display_dimension), []).append(
-                            [value, record["_time_"]]
-                        )
+        def add_values(dimensions: tuple, values: list, get_time: Callable[[], int]):
+            for metric_tuple, value in zip(metric_tuples, values):
+                if value is None:
+                    continue
+                if isinstance(value, int | float):
+                    value = round(value, settings.POINT_PRECISION)
+                formatted_data[dimensions].setdefault(metric_tuple, []).append([value, get_time()])
+
+        def add_records(records: Iterable[dict]):
+            for record in records:
+                dimensions = tuple(sorted((key, value) for key, value in record.items() if is_dimension(key)))
+                add_values(dimensions, [record.get(field) for field in value_fields], lambda: record["_time_"])
+
+        def add_series(series: UnifyQuerySeries):
+            columns = series.columns
+            if "_time_" not in columns or any(is_dimension(column) for column in columns):
+                add_records(series.iter_records())
+                return
+
+            # 序列维度在所有数据行中保持不变，只需计算一次
+            dimensions = tuple(sorted((key, value) for key, value in series.dimensions.items() if is_dimension(key)))
+            column_indexes = {column: index for index, column in enumerate(columns)}
+            if series.result_column:
+                column_indexes["_result_"] = column_indexes[series.result_column]
+            field_indexes = [column_indexes.get(field) for field in value_fields]
+            constants = [series.dimensions.get(field) for field in value_fields]
+            time_index = column_indexes["_time_"]
+            for row in series.rows:
+                values = [
+                    constant if index is None else row[index] for index, constant in zip(field_indexes, constants)
+                ]
+                add_values(dimensions, values, lambda: row[time_index])
+
+        if isinstance(data, UnifyQuerySeriesResult):
+            for series in data.series:
+                add_series(series)
+            add_records(data.records)
+        else:
+            add_records(data)
 
         # 构造图表数据结构
         result = []
@@ -1114,6 +1145,7 @@ class GraphUnifyQueryResource(UnifyQueryRawResource):
         raw_query_result = super().perform_request(params)
         points = raw_query_result["series"]
         if not points:
+            raw_query_result["series"] = []
             return raw_query_result
 
         metrics = raw_query_result["metrics"]
@@ -81,6 +81,7 @@ from monitor_web.strategies.metric_cache.built_in_metrics import (
     SYSTEM_HOST_METRICS,
     UPTIMECHECK_METRICS,
 )
+from monitor_web.strategies.metric_search import MetricSearchIndexManager
 from monitor_web.tasks import run_metric_manager_async
 
 FILTER_DIMENSION_LIST = ["time", "bk_supplier_id", "bk_cmdb_level", "timestamp"]
@@ -208,10 +209,16 @@ class BaseMetricCacheManager:
     """
 
     data_sources = (("", ""),)
+    # 是否支持按变更的结果表增量刷新，要求 get_tables 返回的表均带有 metadata 的 table_id
+    incremental_supported = False
 
-    def __init__(self, bk_tenant_id: str, bk_biz_id: int | None = None):
+    def __init__(self, bk_tenant_id: str, bk_biz_id: int | None = None, table_ids: list[str] | None = None):
+        """
+        :param table_ids: 变更的结果表，指定时只重建这些表的指标
+        """
         self.bk_biz_id = bk_biz_id
         self.bk_tenant_id = bk_tenant_id
+        self.table_ids = set(table_ids) if table_ids is not None else None
         self.new_metric_ids = []
         self._label_names_map = None
         self.has_exception = False
@@ -257,9 +264,23 @@ class BaseMetricCacheManager:
             .annotate(use_frequency=Count("metric_id"))
         }
 
+    def iter_metrics(self) -> Generator[dict, None, None]:
+        """
+        生成指标数据，增量刷新时只处理变更的表
+        """
+        for table in self.get_tables():
+            if self.table_ids is not None and table.get("table_id") not in self.table_ids:
+                continue
+            for metric in self.get_metrics_by_table(table):
+                # 处理result_table_id长度
+                if len(metric.get("result_table_id", "")) > 256:
+                    metric["result_table_id"] = metric["result_table_id"][:256]
+                yield metric
+
     def _run(self):
         start_time = time.time()
-        logger.info(f"[start] update metric {self.__class__.__name__}({self.bk_biz_id})")
+        mode = "full" if self.table_ids is None else f"incremental({len(self.table_ids)} tables)"
+        logger.info(f"[start] update metric {self.__class__.__name__}({self.bk_biz_id}) {mode}")
 
         # 集中整理后进行差量更新
         to_be_create = []
@@ -270,6 +291,11 @@ class BaseMetricCacheManager:
         metric_pool = self.get_metric_pool()
         if self.bk_biz_id is not None:
             metric_pool = metric_pool.filter(bk_biz_id=self.bk_biz_id)
+
+        if self.table_ids is not None:
+            # 增量刷新时只与变更表的已有指标做差量比对，不再产生指标的变更表会清理其指标，未变更的表由全量对账处理
+            metric_pool = metric_pool.filter(result_table_id__in={table_id[:256] for table_id in self.table_ids})
+        metrics = self.iter_metrics()
         metric_pool_values = metric_pool.only(*METRIC_POOL_KEYS)
 
         # metric_hash_dict
@@ -281,59 +307,54 @@ class BaseMetricCacheManager:
             else:
                 metric_hash_dict[metric_id] = m
 
-        for table in self.get_tables():
-            for metric in self.get_metrics_by_table(table):
-                # 处理result_table_id长度
-                if len(metric.get("result_table_id", "")) > 256:
-                    metric["result_table_id"] = metric["result_table_id"][:256]
-
-                if metric.get("result_table_id", "") in ["bkunifylogbeat_task.base", "bkunifylogbeat_common.base"]:
-                    continue
+        for metric in metrics:
+            if metric.get("result_table_id", "") in ["bkunifylogbeat_task.base", "bkunifylogbeat_common.base"]:
+                continue
 
-                # 补全维度字段
-                dimensions = metric.get("dimensions", [])
-                for dimension in dimensions:
-                    if "is_dimension" not in dimension:
-                        dimension["is_dimension"] = True
-                    if "type" not in dimension:
-                        dimension["type"] = DimensionFieldType.String
-
-                metric.update(
-                    dict(
-                        use_frequency=self.metric_use_frequency.get(
-                            f"{metric.get('data_source_label', '')}."
-                            f"{metric.get('result_table_id', '')}.{metric['metric_field']}",
-                            0,
-                        )
+            # 补全维度字段
+            dimensions = metric.get("dimensions", [])
+            for dimension in dimensions:
+                if "is_dimension" not in dimension:
+                    dimension["is_dimension"] = True
+                if "type" not in dimension:
+                    dimension["type"] = DimensionFieldType.String
+
+            metric.update(
+                dict(
+                    use_frequency=self.metric_use_frequency.get(
+                        f"{metric.get('data_source_label', '')}."
+                        f"{metric.get('result_table_id', '')}.{metric['metric_field']}",
+                        0,
                     )
                 )
-                metric_id = "{}.{}.{}.{}".format(
-                    metric["bk_biz_id"],
-                    metric.get("result_table_id", ""),
-                    metric["metric_field"],
-                    metric.get("related_id", ""),
-                )
-                metric_instance = metric_hash_dict.pop(metric_id, None)
-                if metric_instance is None:
-                    _metric = MetricListCache(bk_tenant_id=self.bk_tenant_id, **metric)
-                    metric["readable_name"] = _metric.get_human_readable_name()
-                    _metric.readable_name = metric["readable_name"]
-                    _metric.metric_md5 = count_md5(metric)
-
-                    logger.info("Going to add %s to cache creating list", metric_id)
-                    to_be_create.append(_metric)
-                    continue
+            )
+            metric_id = "{}.{}.{}.{}".format(
+                metric["bk_biz_id"],
+                metric.get("result_table_id", ""),
+                metric["metric_field"],
+                metric.get("related_id", ""),
+            )
+            metric_instance = metric_hash_dict.pop(metric_id, None)
+            if metric_instance is None:
+                _metric = MetricListCache(bk_tenant_id=self.bk_tenant_id, **metric)
+                metric["readable_name"] = _metric.get_human_readable_name()
+                _metric.readable_name = metric["readable_name"]
+                _metric.metric_md5 = count_md5(metric)
+
+                logger.info("Going to add %s to cache creating list", metric_id)
+                to_be_create.append(_metric)
+                continue
 
-                # readable_name 可能会因用户修改data_label而变更，因此跟随周期任务自动更新
-                metric["readable_name"] = metric_instance.get_human_readable_name()
+            # readable_name 可能会因用户修改data_label而变更，因此跟随周期任务自动更新
+            metric["readable_name"] = metric_instance.get_human_readable_name()
 
-                metric["metric_md5"] = count_md5(metric)
-                if not metric_instance.metric_md5 or metric_instance.metric_md5 != metric["metric_md5"]:
-                    metric["last_update"] = datetime.now()
-                    logger.info(f"Going to adding {metric_id} to cache updating list")
-                    metric["id"] = metric_instance.id
-                    to_be_update.append(metric)
-                    metric_instance.metric_md5 = metric["metric_md5"]
+            metric["metric_md5"] = count_md5(metric)
+            if not metric_instance.metric_md5 or metric_instance.metric_md5 != metric["metric_md5"]:
+                metric["last_update"] = datetime.now()
+                logger.info(f"Going to adding {metric_id} to cache updating list")
+                metric["id"] = metric_instance.id
+                to_be_update.append(metric)
+                metric_instance.metric_md5 = metric["metric_md5"]
 
         # create
         if to_be_create:
@@ -361,8 +382,12 @@ class BaseMetricCacheManager:
             logger.info("Going to delete metric caches %s", list(metric_hash_dict.keys()))
             MetricListCache.objects.filter(id__in=to_be_delete).delete()
 
+        # 通知指标搜索索引增量刷新
+        if to_be_create or to_be_update or to_be_delete:
+            MetricSearchIndexManager.mark_updated(self.bk_tenant_id, self.bk_biz_id)
+
         logger.info(
-            f"[end] update metric {self.__class__.__name__}({self.bk_biz_id}) "
+            f"[end] update metric {self.__class__.__name__}({self.bk_biz_id}) {mode} "
             f"create {len(to_be_create)} metric,update {len(to_be_update)} metric, delete {len(to_be_delete)} metric."
             f"timestamp: {int(start_time)}, cost {time.time() - start_time}s"
         )
@@ -442,6 +467,7 @@ class CustomMetricCacheManager(BaseMetricCacheManager):
     """
 
     data_sources = ((DataSourceLabel.CUSTOM, DataTypeLabel.TIME_SERIES),)
+    incremental_supported = True
 
     def get_metric_pool(self):
         # 自定义指标，补上进程采集相关(映射到了，bkmonitor + timeseries[业务id为0])
@@ -731,8 +757,8 @@ class BkLogSearchCacheManager(BaseMetricCacheManager):
         (DataSourceLabel.BK_LOG_SEARCH, DataTypeLabel.LOG),
     )
 
-    def __init__(self, bk_tenant_id: str, bk_biz_id: int | None = None):
-        super().__init__(bk_tenant_id=bk_tenant_id, bk_biz_id=bk_biz_id)
+    def __init__(self, bk_tenant_id: str, bk_biz_id: int | None = None, table_ids: list[str] | None = None):
+        super().__init__(bk_tenant_id=bk_tenant_id, bk_biz_id=bk_biz_id, table_ids=table_ids)
 
         self.cluster_id_to_name = {
             cluster["cluster_config"]["cluster_id"]: cluster["cluster_config"]["cluster_name"]
@@ -1292,8 +1318,8 @@ class BkmonitorMetricCacheManager(BaseMetricCacheManager):
 
     data_sources = ((DataSourceLabel.BK_MONITOR_COLLECTOR, DataTypeLabel.TIME_SERIES),)
 
-    def __init__(self, bk_tenant_id: str, bk_biz_id: int | None = None):
-        super().__init__(bk_tenant_id=bk_tenant_id, bk_biz_id=bk_biz_id)
+    def __init__(self, bk_tenant_id: str, bk_biz_id: int | None = None, table_ids: list[str] | None = None):
+        super().__init__(bk_tenant_id=bk_tenant_id, bk_biz_id=bk_biz_id, table_ids=table_ids)
 
         # 添加默认维度映射
         default_dimension_list = (
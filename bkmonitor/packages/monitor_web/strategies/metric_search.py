@@ -0,0 +1,213 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+"""
+指标选择器模糊搜索索引
+
+MetricListCache 的模糊搜索(icontains)在数据库中只能全表扫描，这里按 租户 + 业务 在进程内维护搜索索引:
+- 每个指标的搜索字段转为小写后按顺序拼接为一个字符串，子串匹配由 str.find 完成，不逐条比较
+- 首次使用时全量构建，之后按 last_update 增量加载变更的指标
+- 指标缓存任务(BaseMetricCacheManager._run)更新后刷新版本号，索引发现版本变化时同时清理已删除的指标
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+from bkmonitor.models.metric_list_cache import MetricListCache
+
+logger = logging.getLogger("monitor_web")
+
+# 字段分隔符，搜索内容中不会出现，保证匹配不会跨越字段
+FIELD_SEPARATOR = "\x00"
+
+
+class MetricSearchIndex:
+    """
+    单个租户业务下的指标搜索索引
+    """
+
+    # 模糊搜索字段
+    SEARCH_FIELDS = ("data_label", "result_table_id", "metric_field", "metric_field_name")
+    # 增量加载时回看的时间，避免写入时间早于提交时间的指标被遗漏
+    WATERMARK_OVERLAP = timedelta(minutes=1)
+
+    def __init__(self, bk_tenant_id: str, bk_biz_id: int):
+        self.bk_tenant_id = bk_tenant_id
+        self.bk_biz_id = bk_biz_id
+        self.lock = threading.Lock()
+        # 指标ID -> 搜索内容
+        self.records: dict[int, str] = {}
+        self.watermark: datetime | None = None
+        self.version = None
+        self.checked_at = 0.0
+        # 由 records 生成的搜索文本，records 变更后重新生成
+        self._text = ""
+        self._starts: list[int] = []
+        self._ids: list[int] = []
+        self._dirty = True
+
+    def get_queryset(self):
+        # 不使用默认管理器，默认管理器会按当前请求的业务过滤重名指标
+        return MetricListCache._base_manager.filter(bk_tenant_id=self.bk_tenant_id, bk_biz_id=self.bk_biz_id)
+
+    @classmethod
+    def to_record(cls, values) -> str:
+        return "".join(f"{str(value or '').lower()}{FIELD_SEPARATOR}" for value in values)
+
+    def refresh(self, version):
+        """
+        增量刷新索引
+        """
+        queryset = self.get_queryset()
+        if self.watermark is not None:
+            queryset = queryset.filter(last_update__gte=self.watermark - self.WATERMARK_OVERLAP)
+
+        changed = 0
+        for metric_id, last_update, *values in queryset.values_list("id", "last_update", *self.SEARCH_FIELDS):
+            record = self.to_record(values)
+            if self.records.get(metric_id) != record:
+                self.records[metric_id] = record
+                changed += 1
+            if last_update and (self.watermark is None or last_update > self.watermark):
+                self.watermark = last_update
+
+        # 版本变化说明指标缓存任务执行过，可能有指标被删除
+        if self.version is not None and version != self.version:
+            existed_ids = set(self.get_queryset().values_list("id", flat=True))
+            deleted_ids = [metric_id for metric_id in self.records if metric_id not in existed_ids]
+            for metric_id in deleted_ids:
+                del self.records[metric_id]
+            changed += len(deleted_ids)
+
+        if changed:
+            self._dirty = True
+        self.version = version
+        self.checked_at = time.time()
+
+    def _build(self):
+        ids = []
+        starts = []
+        offset = 0
+        for metric_id, record in self.records.items():
+            ids.append(metric_id)
+            starts.append(offset)
+            offset += len(record)
+        starts.append(offset)
+        self._text = "".join(self.records.values())
+        self._starts = starts
+        self._ids = ids
+        self._dirty = False
+
+    def search(self, query: str, limit: int) -> list[int] | None:
+        """
+        搜索任意字段包含 query 的指标(忽略大小写)
+        :return: 指标ID列表，命中数量超过 limit 时返回 None
+        """
+        query = query.lower()
+        if not query or FIELD_SEPARATOR in query:
+            return None
+
+        if self._dirty:
+            self._build()
+        text, starts, ids = self._text, self._starts, self._ids
+
+        result = []
+        position = text.find(query)
+        while position != -1:
+            index = bisect_right(starts, position) - 1
+            result.append(ids[index])
+            if len(result) > limit:
+                return None
+            # 同一指标只记录一次，从下一个指标继续查找
+            position = text.find(query, starts[index + 1])
+        return result
+
+
+class MetricSearchIndexManager:
+    """
+    进程内的指标搜索索引管理
+    """
+
+    version_key_prefix = "metric_search_index_version"
+
+    _indexes: dict[tuple[str, int], MetricSearchIndex] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_version_key(cls, bk_tenant_id: str, bk_biz_id: int | None = None) -> str:
+        if bk_biz_id is None:
+            return f"{cls.version_key_prefix}:{bk_tenant_id}"
+        return f"{cls.version_key_prefix}:{bk_tenant_id}:{bk_biz_id}"
+
+    @classmethod
+    def mark_updated(cls, bk_tenant_id: str, bk_biz_id: int | None = None):
+        """
+        指标缓存更新后刷新版本号，未指定业务时刷新整个租户
+        """
+        try:
+            cache.set(cls.get_version_key(bk_tenant_id, bk_biz_id), time.time(), None)
+        except Exception as e:
+            logger.warning(f"[MetricSearchIndex] mark updated failed: {e}")
+
+    @classmethod
+    def get_index(cls, bk_tenant_id: str, bk_biz_id: int) -> MetricSearchIndex:
+        key = (bk_tenant_id, bk_biz_id)
+        index = cls._indexes.get(key)
+        if index is None:
+            with cls._lock:
+                index = cls._indexes.setdefault(key, MetricSearchIndex(bk_tenant_id, bk_biz_id))
+
+        tenant_key = cls.get_version_key(bk_tenant_id)
+        biz_key = cls.get_version_key(bk_tenant_id, bk_biz_id)
+        versions = cache.get_many([tenant_key, biz_key])
+        version = (versions.get(tenant_key), versions.get(biz_key))
+
+        def _need_refresh():
+            return (
+                version != index.version
+                or time.time() - index.checked_at >= settings.METRIC_SEARCH_INDEX_CHECK_INTERVAL
+            )
+
+        if _need_refresh():
+            with index.lock:
+                # 等待锁期间可能已经由其他线程刷新
+                if _need_refresh():
+                    index.refresh(version)
+        return index
+
+    @classmethod
+    def search(cls, bk_tenant_id: str, bk_biz_ids: list[int], query: str) -> list[int] | None:
+        """
+        在多个业务中搜索指标
+        :return: 指标ID列表，索引未启用或命中数量过多时返回 None，由调用方回退为数据库查询
+        """
+        if not settings.METRIC_SEARCH_INDEX_ENABLED:
+            return None
+
+        limit = settings.METRIC_SEARCH_INDEX_MAX_MATCHES
+        metric_ids = []
+        try:
+            for bk_biz_id in bk_biz_ids:
+                index = cls.get_index(bk_tenant_id, bk_biz_id)
+                with index.lock:
+                    result = index.search(query, limit - len(metric_ids))
+                if result is None:
+                    return None
+                metric_ids.extend(result)
+        except Exception as e:
+            logger.exception(f"[MetricSearchIndex] search failed: {e}")
+            return None
+        return metric_ids
@@ -86,6 +86,7 @@ from monitor_web.strategies.constant import (
     DEFAULT_TRIGGER_CONFIG_MAP,
     GLOBAL_TRIGGER_CONFIG,
 )
+from monitor_web.strategies.metric_search import MetricSearchIndex, MetricSearchIndexManager
 from monitor_web.strategies.serializers import handle_target
 from monitor_web.tasks import update_metric_list_by_biz
 
@@ -1570,11 +1571,15 @@ class GetMetricListV2Resource(Resource):
                         Q(result_table_id=".".join(fields[:2]), metric_field__icontains=".".join(fields[2:]))
                     )
 
+            # 优先使用进程内搜索索引，命中过多或索引不可用时回退为数据库模糊查询
             queries = []
-            for query, field in product(
-                filter_dict["query"], ["data_label", "result_table_id", "metric_field", "metric_field_name"]
-            ):
-                queries.append(Q(**{f"{field}__icontains": query}))
+            for query in filter_dict["query"]:
+                metric_ids = MetricSearchIndexManager.search(get_request_tenant_id(), [0, params["bk_biz_id"]], query)
+                if metric_ids is not None:
+                    queries.append(Q(id__in=metric_ids))
+                    continue
+                for field in MetricSearchIndex.SEARCH_FIELDS:
+                    queries.append(Q(**{f"{field}__icontains": query}))
 
             queries.extend(exact_query)
             metrics = metrics.filter(reduce(lambda x, y: x | y, queries))
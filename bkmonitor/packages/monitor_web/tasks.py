@@ -16,6 +16,7 @@ import os
 import shutil
 import time
 import traceback
+from collections import defaultdict
 from collections.abc import Callable
 from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING, Any
@@ -27,9 +28,12 @@ from celery import shared_task
 from celery.signals import task_postrun
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.storage import default_storage
+from django.db.models import Max, Min, Q
 from django.dispatch import receiver as celery_receiver
 from django.forms import model_to_dict
+from django.utils import timezone
 from django.utils.translation import gettext as _
 from rest_framework.exceptions import ValidationError
 
@@ -248,8 +252,15 @@ def _update_metric_list(bk_tenant_id: str, period: int, offset: int):
     from monitor_web.strategies.metric_list_cache import SOURCE_TYPE
 
     def update_metric(_source_type: str, bk_biz_id: int | None = None):
+        # 支持增量刷新的指标缓存由变更记录驱动，周期任务降级为低频的全量对账
+        manager_class = SOURCE_TYPE[_source_type]
+        if settings.ENABLE_METRIC_CACHE_INCREMENTAL_UPDATE and manager_class.incremental_supported:
+            reconcile_key = f"metric_cache_reconcile:{bk_tenant_id}:{_source_type}:{bk_biz_id}"
+            if not cache.add(reconcile_key, 1, settings.METRIC_CACHE_RECONCILE_INTERVAL * 60):
+                return
+
         try:
-            SOURCE_TYPE[_source_type](bk_tenant_id=bk_tenant_id, bk_biz_id=bk_biz_id).run(delay=True)
+            manager_class(bk_tenant_id=bk_tenant_id, bk_biz_id=bk_biz_id).run(delay=True)
         except BaseException as e:
             logger.exception(
                 "Failed to update metric list(%s) for (%s)",
@@ -316,6 +327,65 @@ def _update_metric_list(bk_tenant_id: str, period: int, offset: int):
     logger.info(f"$update metric list(round {offset}), biz count: {biz_count}, cost: {time.time() - start}")
 
 
+@shared_task(ignore_result=True, queue="celery_resource")
+def update_metric_list_by_changes():
+    """
+    根据 metadata 变更记录增量刷新指标缓存，只重建变更的结果表
+    """
+    from bkmonitor.models import MetricListCacheChange
+    from monitor_web.strategies.metric_list_cache import SOURCE_TYPE
+
+    # 未开启增量刷新时，变更记录没有消费者，直接清理，由全量刷新兜底
+    if not settings.ENABLE_METRIC_CACHE_INCREMENTAL_UPDATE:
+        MetricListCacheChange.objects.all().delete()
+        return
+
+    # 超过全量对账间隔的记录已由全量对账覆盖，清理掉持续失败的记录，避免阻塞后续的变更
+    expired_time = timezone.now() - datetime.timedelta(minutes=settings.METRIC_CACHE_RECONCILE_INTERVAL)
+    MetricListCacheChange.objects.filter(create_time__lt=expired_time).delete()
+
+    # 同一张表的多条变更记录合并处理
+    changes = list(
+        MetricListCacheChange.objects.values("bk_tenant_id", "bk_biz_id", "table_id")
+        .annotate(min_id=Min("id"), max_id=Max("id"))
+        .order_by("min_id")[: settings.METRIC_CACHE_CHANGE_BATCH_SIZE]
+    )
+    if not changes:
+        return
+
+    changed_tables = defaultdict(dict)
+    for change in changes:
+        changed_tables[(change["bk_tenant_id"], change["bk_biz_id"])][change["table_id"]] = change["max_id"]
+
+    set_local_username(settings.COMMON_USERNAME)
+    for (bk_tenant_id, bk_biz_id), table_max_ids in changed_tables.items():
+        set_local_tenant_id(bk_tenant_id=bk_tenant_id)
+        success = True
+        for source_type, manager_class in SOURCE_TYPE.items():
+            if not manager_class.incremental_supported:
+                continue
+            try:
+                # 同步执行，以便确认刷新结果后再删除变更记录
+                manager_class(bk_tenant_id=bk_tenant_id, bk_biz_id=bk_biz_id, table_ids=list(table_max_ids)).run()
+            except Exception as e:
+                success = False
+                logger.exception(
+                    "Failed to update metric list(%s) by changes(%s): %s",
+                    f"{bk_tenant_id}_{bk_biz_id}_{source_type}",
+                    list(table_max_ids),
+                    e,
+                )
+
+        # 只删除已成功刷新的记录，失败的记录留给下一轮重试，处理期间产生的新记录同样留给下一轮
+        if success:
+            query = Q()
+            for table_id, max_id in table_max_ids.items():
+                query |= Q(table_id=table_id, id__lte=max_id)
+            MetricListCacheChange.objects.filter(query, bk_tenant_id=bk_tenant_id, bk_biz_id=bk_biz_id).delete()
+
+    logger.info(f"update metric list by {len(changes)} changed tables, {len(changed_tables)} biz")
+
+
 @shared_task(queue="celery_resource")
 def update_metric_list_by_biz(bk_biz_id):
     from monitor.models import ApplicationConfig
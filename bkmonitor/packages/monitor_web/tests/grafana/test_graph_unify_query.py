@@ -0,0 +1,74 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import copy
+
+from bkmonitor.data_source.unify_query.series import UnifyQuerySeriesResult
+from constants.data_source import DataSourceLabel, DataTypeLabel
+from monitor_web.grafana.resources.unify_query import GraphUnifyQueryResource
+
+PARAMS = {
+    "expression": "a + b",
+    "query_configs": [
+        {
+            "data_source_label": DataSourceLabel.BK_MONITOR_COLLECTOR,
+            "data_type_label": DataTypeLabel.TIME_SERIES,
+            "metrics": [{"field": "usage", "method": "AVG", "alias": "a", "display": True}],
+            "group_by": ["bk_target_ip"],
+        },
+        {
+            "data_source_label": DataSourceLabel.BK_MONITOR_COLLECTOR,
+            "data_type_label": DataTypeLabel.TIME_SERIES,
+            "metrics": [{"field": "idle", "method": "AVG", "alias": "b", "display": False}],
+            "group_by": ["bk_target_ip"],
+        },
+    ],
+}
+
+UNIFY_QUERY_DATA = {
+    "series": [
+        {
+            "columns": ["_time", "_value", "a"],
+            "types": ["float", "float", "float"],
+            "group_keys": ["bk_target_ip", "bk_target_cloud_id"],
+            "group_values": ["127.0.0.1", "0"],
+            "values": [[1652873820000, 1.123456789, 1], [1652873880000, None, 2], [1652873940000, 3, None]],
+        },
+        {
+            "columns": ["_time", "_value", "a"],
+            "types": ["float", "float", "float"],
+            "group_keys": ["bk_target_ip"],
+            "group_values": ["127.0.0.2"],
+            "values": [[1652873820000, 4, 4]],
+        },
+    ]
+}
+
+
+class TestGraphUnifyQueryDataFormat:
+    def test_columnar_same_as_records(self):
+        resource = GraphUnifyQueryResource()
+        params = {"query_list": [{"reference_name": "a"}]}
+
+        records = UnifyQuerySeriesResult.from_unify_query_data(params, copy.deepcopy(UNIFY_QUERY_DATA)).to_records()
+        columnar = UnifyQuerySeriesResult.from_unify_query_data(params, copy.deepcopy(UNIFY_QUERY_DATA))
+        columnar.extend([{"bk_target_ip": "127.0.0.1", "_time_": 1652873820000, "_result_": 5, "__time_compare": "1d"}])
+        records.extend(columnar.records)
+
+        expected = resource.data_format(copy.deepcopy(PARAMS), records)
+        assert resource.data_format(copy.deepcopy(PARAMS), columnar) == expected
+        assert [row["target"] for row in expected] == [
+            "AVG(usage) + b{bk_target_ip=127.0.0.1}",
+            "usage(a){bk_target_ip=127.0.0.1}",
+            "AVG(usage) + b{bk_target_ip=127.0.0.2}",
+            "usage(a){bk_target_ip=127.0.0.2}",
+            "AVG(usage) + b{__time_compare=1d, bk_target_ip=127.0.0.1}",
+        ]
+        assert expected[0]["datapoints"] == [[1.123457, 1652873820000], [3, 1652873940000]]
@@ -0,0 +1,47 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from monitor_web.strategies.metric_search import MetricSearchIndex
+
+
+class TestMetricSearchIndex:
+    def make_index(self):
+        index = MetricSearchIndex("system", 2)
+        index.records = {
+            1: MetricSearchIndex.to_record(["system", "system.cpu_summary", "usage", "CPU使用率"]),
+            2: MetricSearchIndex.to_record(["system", "system.mem", "pct_used", "内存使用率"]),
+            3: MetricSearchIndex.to_record([None, "2_bkmonitor_time_series_1.base", "usage_total", "Usage"]),
+        }
+        return index
+
+    def test_search(self):
+        index = self.make_index()
+        # 忽略大小写，同一指标多个字段命中只返回一次
+        assert index.search("USAGE", 10) == [1, 3]
+        assert index.search("使用率", 10) == [1, 2]
+        assert index.search("system.", 10) == [1, 2]
+        assert index.search("not_exists", 10) == []
+        # 匹配不会跨越字段
+        assert index.search("systemsystem", 10) == []
+
+    def test_search_limit(self):
+        index = self.make_index()
+        # 命中数量超过上限时回退为数据库查询
+        assert index.search("s", 2) is None
+        assert index.search("", 10) is None
+
+    def test_records_changed(self):
+        index = self.make_index()
+        assert index.search("disk", 10) == []
+        index.records[4] = MetricSearchIndex.to_record(["system", "system.disk", "in_use", "磁盘使用率"])
+        index._dirty = True
+        del index.records[1]
+        assert index.search("disk", 10) == [4]
+        assert index.search("usage", 10) == [3]
@@ -9,6 +9,8 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 import logging
+import time
+from unittest import mock
 
 from apm.core.discover.base import TopoHandler
 from apm.utils.base import divide_biscuit
@@ -46,3 +48,25 @@ class TestTopoHandler:
             )
 
             assert per_trace_size == i["expect"]
+
+    def test_get_time_range(self):
+        handler = TopoHandler.__new__(TopoHandler)
+        handler.bk_biz_id, handler.app_name = 2, "app"
+        now = int(time.time() * 1000)
+
+        handler.incremental = False
+        start, end = handler.get_time_range()
+        assert end - start == TopoHandler.DEFAULT_DISCOVER_DURATION * 1000
+
+        handler.incremental = True
+        # 从上一轮处理到的位置继续发现
+        with mock.patch.object(TopoHandler, "get_watermark", return_value=now - 5 * 60 * 1000):
+            start, end = handler.get_time_range()
+            assert start == now - 5 * 60 * 1000
+            assert end <= int(time.time() * 1000) - TopoHandler.INCREMENTAL_DELAY * 1000
+
+        # 没有水位或水位过旧时，使用默认时间范围
+        for watermark in [None, now - (TopoHandler.INCREMENTAL_MAX_LOOKBACK + 60) * 1000]:
+            with mock.patch.object(TopoHandler, "get_watermark", return_value=watermark):
+                start, end = handler.get_time_range()
+                assert start >= now - TopoHandler.DEFAULT_DISCOVER_DURATION * 1000
@@ -0,0 +1,119 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import hashlib
+import logging
+import random
+import string
+import time
+
+from bkmonitor.utils.common_utils import count_md5
+from bkmonitor.utils.fingerprint import flat_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def reference_count_md5(content, dict_sort=True, list_sort=True):
+    """
+    快速路径引入前的 count_md5 实现
+    """
+    if dict_sort and isinstance(content, dict):
+        return reference_count_md5(
+            [(str(k), reference_count_md5(content[k], dict_sort, list_sort)) for k in sorted(content.keys())],
+            dict_sort,
+            list_sort,
+        )
+    elif isinstance(content, list | tuple):
+        content = (
+            sorted([reference_count_md5(k, dict_sort) for k in content])
+            if list_sort
+            else [reference_count_md5(k, dict_sort, list_sort) for k in content]
+        )
+    return hashlib.md5(str(content).encode("utf8")).hexdigest()
+
+
+def random_scalar(rand: random.Random):
+    return rand.choice(
+        [
+            lambda: "".join(rand.choices(string.printable + "中文'\"\\", k=rand.randint(0, 12))),
+            lambda: rand.randint(-(2**40), 2**40),
+            lambda: rand.random() * rand.choice([1, 1e10, -1e-10]),
+            lambda: rand.choice([True, False, None, 0, 1, "", "1", 1.0]),
+        ]
+    )()
+
+
+def random_dimensions(rand: random.Random) -> dict:
+    keys = ["bk_target_ip", "bk_target_cloud_id", "device_name", "bk_biz_id", "", "中文", "a'b"]
+    return {rand.choice(keys) + str(rand.randint(0, 3)): random_scalar(rand) for _ in range(rand.randint(0, 8))}
+
+
+class TestFlatFingerprint:
+    def test_same_as_count_md5(self):
+        rand = random.Random(20261018)
+        for _ in range(2000):
+            dimensions = random_dimensions(rand)
+            values = [random_scalar(rand) for _ in range(rand.randint(0, 6))]
+            for content in [dimensions, values, tuple(values), values[0] if values else None]:
+                expected = reference_count_md5(content)
+                # 重复计算时命中缓存
+                assert flat_fingerprint(content) == expected
+                assert flat_fingerprint(content) == expected
+                assert count_md5(content) == expected
+
+        # 键的顺序不影响结果
+        dimensions = {"bk_target_ip": "127.0.0.1", "bk_target_cloud_id": 0}
+        assert flat_fingerprint(dimensions) == flat_fingerprint(dict(reversed(dimensions.items())))
+        # 值的类型不同但字符串相同时结果一致
+        assert flat_fingerprint({"a": 1}) == flat_fingerprint({"a": "1"}) == reference_count_md5({"a": 1})
+        assert flat_fingerprint({"a": True}) != flat_fingerprint({"a": 1})
+
+    def test_fallback(self):
+        contents = [
+            {"a": {"b": 1}},
+            {"a": [1, 2]},
+            {1: "a"},
+            [{"a": 1}, {"b": 2}],
+            [[1, 2], 3],
+        ]
+        for content in contents:
+            assert flat_fingerprint(content) is None
+            assert count_md5(content) == reference_count_md5(content)
+
+        # 不排序时使用通用逻辑
+        assert count_md5([2, 1], list_sort=False) == reference_count_md5([2, 1], list_sort=False)
+        assert count_md5({"b": 1, "a": 2}, dict_sort=False) == reference_count_md5({"b": 1, "a": 2}, dict_sort=False)
+
+    def test_fingerprint_benchmark(self):
+        rand = random.Random(1)
+        dimensions_list = [
+            {
+                "bk_target_ip": f"127.0.{i % 256}.{rand.randint(0, 255)}",
+                "bk_target_cloud_id": 0,
+                "device_name": f"eth{i % 4}",
+            }
+            for i in range(5000)
+        ]
+
+        start = time.perf_counter()
+        expected = [reference_count_md5(dimensions) for _ in range(4) for dimensions in dimensions_list]
+        reference_cost = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = [flat_fingerprint(dimensions) for _ in range(4) for dimensions in dimensions_list]
+        fingerprint_cost = time.perf_counter() - start
+
+        logger.info(
+            "fingerprint %s dimensions: count_md5 %.3fs, flat_fingerprint %.3fs",
+            len(expected),
+            reference_cost,
+            fingerprint_cost,
+        )
+        assert result == expected
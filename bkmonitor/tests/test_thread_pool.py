@@ -0,0 +1,57 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import threading
+import time
+
+from bkmonitor.utils.local import local
+from bkmonitor.utils.thread_backend import SharedThreadPool
+
+
+class TestSharedThreadPool:
+    def test_map_ignore_exception(self):
+        pool = SharedThreadPool("test", max_workers=2, max_queue_size=10)
+        local.username = "admin"
+
+        def func(value):
+            if value == 2:
+                raise ValueError(value)
+            return value, local.username
+
+        assert pool.map_ignore_exception(func, [1, 2, 3]) == [(1, "admin"), (3, "admin")]
+        results = pool.map_ignore_exception(func, [1, 2, 3], return_exception=True)
+        assert isinstance(results[1], ValueError)
+        # 调用方的上下文不受工作线程影响
+        assert local.username == "admin"
+
+    def test_caller_runs(self):
+        pool = SharedThreadPool("test", max_workers=1, max_queue_size=0)
+        event = threading.Event()
+        caller = threading.current_thread()
+
+        blocked = pool.submit(event.wait, 1)
+        # 排队任务数已满时由调用方线程执行
+        assert pool.submit(threading.current_thread).result() is caller
+        event.set()
+        assert blocked.result()
+
+    def test_nested_submit(self):
+        pool = SharedThreadPool("test", max_workers=1, max_queue_size=10)
+
+        def outer():
+            return pool.map_ignore_exception(lambda value: value * 2, [1, 2])
+
+        # 工作线程中再次提交的任务直接执行，不会因为等待自身而死锁
+        assert pool.submit(outer).result(timeout=1) == [2, 4]
+
+    def test_timeout(self):
+        pool = SharedThreadPool("test", max_workers=1, max_queue_size=10)
+        results = pool.map_ignore_exception(time.sleep, [0.5, 0], return_exception=True, timeout=0.1)
+        assert all(isinstance(result, TimeoutError) for result in results)
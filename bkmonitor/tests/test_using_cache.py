@@ -0,0 +1,115 @@
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云 - 监控平台 (BlueKing - Monitor) available.
+Copyright (C) 2017-2021 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from unittest import mock
+
+import pytest
+
+from bkmonitor.utils import cache as cache_module
+from bkmonitor.utils.cache import CacheType, UsingCache
+
+
+class FakeCache:
+    """忽略过期时间的内存缓存"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def get_many(self, keys):
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def set(self, key, value, timeout=None):
+        self.data[key] = value
+
+    def add(self, key, value, timeout=None):
+        if key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def fake_cache():
+    fake = FakeCache()
+    with (
+        mock.patch.object(cache_module, "cache", fake),
+        mock.patch.object(cache_module, "mem_cache", fake),
+        mock.patch("django.conf.settings.ENVIRONMENT", "production"),
+    ):
+        yield fake
+
+
+class TestUsingCache:
+    def make_func(self):
+        calls = []
+
+        def func(value):
+            calls.append(value)
+            return {"value": value, "version": len(calls)}
+
+        using_cache = UsingCache(CacheType.DATA, user_related=False)
+        using_cache.local_cache_enable = False
+        return using_cache, using_cache(func), calls
+
+    def test_hit_and_miss(self, fake_cache):
+        using_cache, func, calls = self.make_func()
+
+        assert func(1) == {"value": 1, "version": 1}
+        assert func(1) == {"value": 1, "version": 1}
+        assert len(calls) == 1
+        # 刷新锁已释放
+        assert not [key for key in fake_cache.data if key.endswith(UsingCache.lock_key_suffix)]
+
+    def test_stale_while_revalidate(self, fake_cache):
+        using_cache, func, calls = self.make_func()
+        func(1)
+        fresh_key = next(key for key in fake_cache.data if key.endswith(UsingCache.fresh_key_suffix))
+        cache_key = fresh_key[: -len(UsingCache.fresh_key_suffix)]
+
+        # 缓存过期且其他调用方正在刷新时，直接返回旧数据
+        fake_cache.delete(fresh_key)
+        fake_cache.add(f"{cache_key}{UsingCache.lock_key_suffix}", 1)
+        assert func(1) == {"value": 1, "version": 1}
+        assert len(calls) == 1
+
+        # 拿到刷新锁的调用方负责刷新
+        fake_cache.delete(f"{cache_key}{UsingCache.lock_key_suffix}")
+        assert func(1) == {"value": 1, "version": 2}
+        assert fresh_key in fake_cache.data
+
+    def test_without_stale_timeout(self, fake_cache):
+        using_cache, func, calls = self.make_func()
+        using_cache.stale_timeout = 0
+
+        # 未开启旧数据窗口时不写入新鲜标记，缓存命中即为有效
+        assert func(1) == {"value": 1, "version": 1}
+        assert not [key for key in fake_cache.data if key.endswith(UsingCache.fresh_key_suffix)]
+        assert func(1) == {"value": 1, "version": 1}
+        assert not using_cache.is_stale()
+        assert len(calls) == 1
+
+    def test_single_flight_wait(self, fake_cache):
+        using_cache, func, calls = self.make_func()
+        cache_key = using_cache._cache_key(func.__wrapped__, (1,), {})
+        fake_cache.add(f"{cache_key}{UsingCache.lock_key_suffix}", 1)
+
+        # 其他调用方刷新完成后，等待方直接使用刷新结果
+        def refreshed(seconds):
+            using_cache.set_value(cache_key, {"value": 1, "version": 0}, 60, 60)
+
+        with mock.patch.object(cache_module.time, "sleep", refreshed):
+            assert func(1) == {"value": 1, "version": 0}
+        assert not calls
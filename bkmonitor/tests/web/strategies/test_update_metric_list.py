@@ -8,9 +8,13 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import datetime
+
 import mock
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from monitor_web.strategies.metric_list_cache import (
+    BaseMetricCacheManager,
     BkFtaAlertCacheManager,
     BkMonitorAlertCacheManager,
 )
@@ -18,7 +22,52 @@ from monitor_web.strategies.metric_list_cache import (
 from bkmonitor.models import AlertConfig
 from bkmonitor.models import EventPluginV2 as EventPlugin
 from bkmonitor.models import QueryConfigModel, StrategyModel
-from bkmonitor.models.metric_list_cache import MetricListCache
+from bkmonitor.models.metric_list_cache import MetricListCache, MetricListCacheChange
+from constants.data_source import DataSourceLabel, DataTypeLabel
+
+
+class FakeTableCacheManager(BaseMetricCacheManager):
+    """
+    按 表 -> 指标名 生成指标的缓存管理器
+    """
+
+    data_sources = ((DataSourceLabel.CUSTOM, DataTypeLabel.TIME_SERIES),)
+    incremental_supported = True
+    tables = {}
+
+    def get_tables(self):
+        for table_id, metric_fields in self.tables.items():
+            yield {"table_id": table_id, "metric_fields": metric_fields}
+
+    def get_metrics_by_table(self, table):
+        for metric_field in table["metric_fields"]:
+            yield {
+                "bk_biz_id": self.bk_biz_id,
+                "result_table_id": table["table_id"],
+                "metric_field": metric_field,
+                "metric_field_name": metric_field,
+                "result_table_label": "other_rt",
+                "data_source_label": DataSourceLabel.CUSTOM,
+                "data_type_label": DataTypeLabel.TIME_SERIES,
+                "data_target": "none_target",
+                "dimensions": [],
+                "default_dimensions": [],
+                "default_condition": [],
+                "collect_config_ids": [],
+            }
+
+
+class FailingTableCacheManager(FakeTableCacheManager):
+    """
+    指定业务刷新失败的缓存管理器
+    """
+
+    failed_biz_ids = {3}
+
+    def run(self, *args, **kwargs):
+        if self.bk_biz_id in self.failed_biz_ids:
+            raise Exception("refresh failed")
+        return super().run(*args, **kwargs)
 
 
 class TestUpdateMetricListResource(TestCase):
@@ -145,3 +194,55 @@ class TestUpdateMetricListResource(TestCase):
         self.assertEqual(
             MetricListCache.objects.filter(result_table_id="strategy", data_type_label="alert", bk_biz_id=2).count(), 1
         )
+
+    def test_incremental_update(self):
+        """
+        增量刷新只重建变更的表
+        """
+        FakeTableCacheManager.tables = {"db.a": ["x", "y"], "db.b": ["z"]}
+        FakeTableCacheManager(bk_tenant_id="system", bk_biz_id=2).run()
+        self.assertEqual(MetricListCache.objects.count(), 3)
+
+        FakeTableCacheManager.tables = {"db.a": ["x"], "db.b": ["z", "w"]}
+        FakeTableCacheManager(bk_tenant_id="system", bk_biz_id=2, table_ids=["db.b"]).run()
+        metrics = set(MetricListCache.objects.values_list("result_table_id", "metric_field"))
+        self.assertEqual(metrics, {("db.a", "x"), ("db.a", "y"), ("db.b", "z"), ("db.b", "w")})
+
+        # 未记录变更的表由全量对账处理
+        FakeTableCacheManager(bk_tenant_id="system", bk_biz_id=2).run()
+        metrics = set(MetricListCache.objects.values_list("result_table_id", "metric_field"))
+        self.assertEqual(metrics, {("db.a", "x"), ("db.b", "z"), ("db.b", "w")})
+
+        # 变更后不再产生指标的表，清理其全部指标
+        FakeTableCacheManager.tables = {"db.a": ["x"]}
+        FakeTableCacheManager(bk_tenant_id="system", bk_biz_id=2, table_ids=["db.b"]).run()
+        metrics = set(MetricListCache.objects.values_list("result_table_id", "metric_field"))
+        self.assertEqual(metrics, {("db.a", "x")})
+
+    @mock.patch("monitor_web.strategies.metric_list_cache.SOURCE_TYPE", {"FAKE": FailingTableCacheManager})
+    def test_update_by_changes(self):
+        """
+        变更记录按表合并处理，失败的记录保留重试，过期和未开启增量刷新时的记录被清理
+        """
+        from monitor_web.tasks import update_metric_list_by_changes
+
+        FailingTableCacheManager.tables = {"db.a": ["x"], "db.c": ["y"]}
+        MetricListCacheChange.record("system", 2, ["db.a", "db.a"])
+        MetricListCacheChange.record("system", 3, ["db.c"])
+        MetricListCacheChange.record("system", 4, ["db.d"])
+        MetricListCacheChange.objects.filter(bk_biz_id=4).update(
+            create_time=timezone.now() - datetime.timedelta(days=1)
+        )
+
+        with override_settings(ENABLE_METRIC_CACHE_INCREMENTAL_UPDATE=True, METRIC_CACHE_RECONCILE_INTERVAL=360):
+            update_metric_list_by_changes()
+        # 成功的业务删除记录，失败的业务保留记录，过期的记录直接清理
+        self.assertEqual(
+            set(MetricListCacheChange.objects.values_list("bk_biz_id", "table_id")),
+            {(3, "db.c")},
+        )
+        self.assertEqual(set(MetricListCache.objects.values_list("bk_biz_id", "result_table_id")), {(2, "db.a")})
+
+        with override_settings(ENABLE_METRIC_CACHE_INCREMENTAL_UPDATE=False):
+            update_metric_list_by_changes()
+        self.assertFalse(MetricListCacheChange.objects.exists())